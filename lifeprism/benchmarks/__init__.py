@@ -0,0 +1,15 @@
+"""
+基准测试模块
+
+- aw_synthetic: 按随机种子生成合成 ActivityWatch SQLite 数据
+- bench_ingest: 度量 读取 / 清洗 / 写库 三个阶段的吞吐与峰值内存
+- bench_classify: 用离线假模型（fake 后端）度量 LLM 分批分类与 ClassifyGraph 端到端的吞吐
+- bench_prompt_tokens: 提示词 Toon 紧凑编码的 golden 校验与各类提示词的 token 对比
+- bench_local_classifier: 本地预分类器的留出集准确率与可避免的 LLM 调用比例
+- bench_title_similarity: 近似重复标题索引（MinHash/LSH）的命中率、准确率与查询延迟
+- bench_title_analysis: 标题分析（get_titles）逐条请求与分批 + 持久化复用的每次同步调用次数与耗时
+- bench_rate_limiter: 共享限速器下交互请求的排队延迟（优先级）与上游持续失败时的调用数（熔断器）
+- bench_chat_sessions: 多会话并发流式对话的负载测试（检查点与 token 使用量按会话隔离、并发与串行耗时）
+- bench_chat_history: 长会话的提示词输入 token、检查点数与对话数据库大小（检查点压缩 + 滚动摘要）
+- bench_chat_history_read: 打开会话历史的耗时（反序列化 checkpoint 与 chat_message 表游标分页）
+"""
@@ -0,0 +1,288 @@
+"""
+合成 ActivityWatch 数据生成器
+按固定随机种子生成与 aw-server 表结构一致的 SQLite 文件（bucketmodel / eventmodel），
+用于在没有真实数据时复现和度量同步链路的吞吐
+
+- 应用与标题按 Zipf 分布抽样（少数应用/标题占据大部分事件）
+- 可配置多用途应用（浏览器）占比
+- 心跳模式：事件首尾相接，短事件（切窗口）与长事件混合，偶尔插入离开（AFK）间隔
+"""
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from lifeprism.config import WINDOW_BUCKET_ID
+
+# aw-server (peewee) 的表结构
+AW_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucketmodel (
+    key INTEGER NOT NULL PRIMARY KEY,
+    id VARCHAR(255) NOT NULL,
+    created DATETIME NOT NULL,
+    name VARCHAR(255),
+    type VARCHAR(255) NOT NULL,
+    client VARCHAR(255) NOT NULL,
+    hostname VARCHAR(255) NOT NULL,
+    datastr VARCHAR(255)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS bucketmodel_id ON bucketmodel (id);
+CREATE TABLE IF NOT EXISTS eventmodel (
+    id INTEGER NOT NULL PRIMARY KEY,
+    bucket_id INTEGER NOT NULL,
+    timestamp DATETIME NOT NULL,
+    duration DECIMAL(10, 5) NOT NULL,
+    datastr VARCHAR(255) NOT NULL,
+    FOREIGN KEY (bucket_id) REFERENCES bucketmodel (key)
+);
+CREATE INDEX IF NOT EXISTS eventmodel_bucket_id ON eventmodel (bucket_id);
+CREATE INDEX IF NOT EXISTS eventmodel_timestamp ON eventmodel (timestamp);
+"""
+
+# peewee 写入的时间戳格式（UTC）
+AW_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f+00:00"
+
+# 常见单用途应用（其余按 app_<n>.exe 补足）
+SINGLE_PURPOSE_APPS = [
+    "Code.exe", "WeChat.exe", "QQ.exe", "explorer.exe", "WindowsTerminal.exe", "Feishu.exe",
+    "DingTalk.exe", "Notion.exe", "Obsidian.exe", "Spotify.exe", "cloudmusic.exe", "pycharm64.exe",
+    "WINWORD.EXE", "EXCEL.EXE", "POWERPNT.EXE", "Telegram.exe", "Steam.exe", "Photoshop.exe",
+]
+MULTIPURPOSE_APPS = ["chrome.exe", "msedge.exe", "firefox.exe"]
+
+# 浏览器标题模板：{n} 为页面序号，部分模板带未读计数以覆盖标题归一化
+BROWSER_SITES = [
+    "youtube", "bilibili", "github", "stack overflow", "知乎", "gmail", "google 搜索", "notion",
+    "百度", "哔哩哔哩直播", "chatgpt", "x", "reddit", "wikipedia", "豆瓣", "淘宝",
+]
+BROWSER_SUFFIX = {
+    "chrome.exe": " - google chrome",
+    "msedge.exe": " - 个人 - microsoft​ edge",
+    "firefox.exe": " — mozilla firefox",
+}
+
+
+@dataclass
+class SyntheticAWConfig:
+    """
+    合成数据配置
+
+    Attributes:
+        events: 窗口事件总数
+        seed: 随机种子（相同配置与种子生成完全相同的文件）
+        start: 第一个事件的开始时间（UTC）
+        apps: 应用数量（含多用途应用）
+        titles_per_app: 每个应用的标题词表大小
+        app_zipf: 应用分布的 Zipf 指数
+        title_zipf: 标题分布的 Zipf 指数
+        multipurpose_share: 事件落在多用途应用上的比例
+        short_event_share: 短于 short_event_seconds 的切换事件比例（会被清洗阶段过滤）
+        short_event_seconds: 短事件的最大时长（秒）
+        median_duration: 普通事件时长中位数（秒，对数正态）
+        afk_probability: 每个事件之后进入离开状态的概率
+        afk_seconds: 离开时长范围（秒）
+        hostname: 写入 bucket 的主机名
+    """
+    events: int = 100_000
+    seed: int = 42
+    start: datetime = field(default_factory=lambda: datetime(2025, 1, 1, tzinfo=timezone.utc))
+    apps: int = 60
+    titles_per_app: int = 400
+    app_zipf: float = 1.2
+    title_zipf: float = 1.1
+    multipurpose_share: float = 0.45
+    short_event_share: float = 0.35
+    short_event_seconds: int = 5
+    median_duration: float = 45.0
+    afk_probability: float = 0.01
+    afk_seconds: Tuple[int, int] = (300, 3600)
+    hostname: str = "synthetic-host"
+
+
+def _zipf_weights(size: int, exponent: float) -> np.ndarray:
+    """有界 Zipf 分布的概率向量（第 k 名的权重 ∝ 1 / k^exponent）"""
+    weights = 1.0 / np.power(np.arange(1, size + 1, dtype=np.float64), exponent)
+    return weights / weights.sum()
+
+
+def _build_vocabulary(config: SyntheticAWConfig) -> Tuple[List[str], List[List[str]]]:
+    """生成应用列表及每个应用的标题词表（按流行度排序）"""
+    single_count = max(config.apps - len(MULTIPURPOSE_APPS), 1)
+    single_apps = SINGLE_PURPOSE_APPS[:single_count] + [
+        f"app_{index}.exe" for index in range(len(SINGLE_PURPOSE_APPS), single_count)
+    ]
+
+    titles: List[List[str]] = []
+    for app in single_apps:
+        name = app.rsplit(".", 1)[0]
+        titles.append([f"{name} - 文档 {index}" for index in range(config.titles_per_app)])
+    for app in MULTIPURPOSE_APPS:
+        app_titles = []
+        for index in range(config.titles_per_app):
+            site = BROWSER_SITES[index % len(BROWSER_SITES)]
+            page = f"页面 {index // len(BROWSER_SITES)}"
+            prefix = f"({index % 7 + 1}) " if site in ("gmail", "知乎", "x") else ""
+            app_titles.append(f"{prefix}{page} - {site}{BROWSER_SUFFIX[app]}")
+        titles.append(app_titles)
+    return single_apps + MULTIPURPOSE_APPS, titles
+
+
+def generate_events(config: SyntheticAWConfig) -> Dict[str, np.ndarray]:
+    """
+    按配置生成窗口事件（列式，按时间升序）
+
+    Returns:
+        Dict: timestamp（UTC 秒）/ duration（秒）/ app_index / title_index / afk_before（之前的离开时长）
+    """
+    rng = np.random.default_rng(config.seed)
+    n = config.events
+    apps, titles = _build_vocabulary(config)
+    single_count = len(apps) - len(MULTIPURPOSE_APPS)
+
+    # 1. 应用：先按 multipurpose_share 决定是否浏览器，再在各自集合内按 Zipf 抽样
+    is_multi = rng.random(n) < config.multipurpose_share
+    app_index = np.where(
+        is_multi,
+        single_count + rng.choice(len(MULTIPURPOSE_APPS), size=n, p=_zipf_weights(len(MULTIPURPOSE_APPS), config.app_zipf)),
+        rng.choice(single_count, size=n, p=_zipf_weights(single_count, config.app_zipf)),
+    )
+    title_index = rng.choice(config.titles_per_app, size=n, p=_zipf_weights(config.titles_per_app, config.title_zipf))
+
+    # 2. 心跳：短切换事件 + 对数正态时长的普通事件
+    is_short = rng.random(n) < config.short_event_share
+    duration = np.where(
+        is_short,
+        rng.uniform(0, config.short_event_seconds, size=n),
+        rng.lognormal(mean=np.log(config.median_duration), sigma=1.0, size=n),
+    ).round(3)
+
+    # 3. 事件首尾相接，偶尔插入离开间隔
+    afk_before = np.where(
+        rng.random(n) < config.afk_probability,
+        rng.integers(config.afk_seconds[0], config.afk_seconds[1] + 1, size=n),
+        0,
+    )
+    afk_before[0] = 0
+    offsets = np.concatenate(([0.0], np.cumsum(duration[:-1]))) + np.cumsum(afk_before)
+    timestamp = config.start.timestamp() + offsets
+
+    return {
+        "timestamp": timestamp,
+        "duration": duration,
+        "app_index": app_index,
+        "title_index": title_index,
+        "afk_before": afk_before,
+        "apps": apps,
+        "titles": titles,
+    }
+
+
+def generate_aw_database(path: str, config: SyntheticAWConfig, chunk_size: int = 50_000) -> Dict:
+    """
+    生成合成 ActivityWatch SQLite 文件（已存在则覆盖）
+
+    Args:
+        path: 输出文件路径
+        config: 生成配置
+        chunk_size: 每次 executemany 写入的事件数
+
+    Returns:
+        Dict: 生成摘要 {path, events, start_time, end_time（UTC datetime）, apps, distinct_titles, afk_gaps}
+    """
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if output.exists():
+        output.unlink()
+
+    data = generate_events(config)
+    apps, titles = data["apps"], data["titles"]
+    created = config.start.strftime(AW_TIMESTAMP_FORMAT)
+
+    conn = sqlite3.connect(output)
+    try:
+        conn.executescript(AW_SCHEMA)
+        conn.execute(
+            "INSERT INTO bucketmodel (key, id, created, name, type, client, hostname, datastr) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (1, f"{WINDOW_BUCKET_ID}{config.hostname}", created, None, "currentwindow",
+             "aw-watcher-window", config.hostname, "{}")
+        )
+        conn.execute(
+            "INSERT INTO bucketmodel (key, id, created, name, type, client, hostname, datastr) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (2, f"aw-watcher-afk_{config.hostname}", created, None, "afkstatus",
+             "aw-watcher-afk", config.hostname, "{}")
+        )
+
+        # datastr 按 (app, title) 缓存，大量重复的组合只序列化一次
+        datastr_cache: Dict[Tuple[int, int], str] = {}
+
+        def datastr(app_idx: int, title_idx: int) -> str:
+            key = (app_idx, title_idx)
+            value = datastr_cache.get(key)
+            if value is None:
+                value = json.dumps({"app": apps[app_idx], "title": titles[app_idx][title_idx]}, ensure_ascii=False)
+                datastr_cache[key] = value
+            return value
+
+        def timestamp_str(seconds: float) -> str:
+            return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime(AW_TIMESTAMP_FORMAT)
+
+        n = config.events
+        for start in range(0, n, chunk_size):
+            end = min(start + chunk_size, n)
+            conn.executemany(
+                "INSERT INTO eventmodel (bucket_id, timestamp, duration, datastr) VALUES (1, ?, ?, ?)",
+                [
+                    (timestamp_str(ts), float(duration), datastr(int(app_idx), int(title_idx)))
+                    for ts, duration, app_idx, title_idx in zip(
+                        data["timestamp"][start:end], data["duration"][start:end],
+                        data["app_index"][start:end], data["title_index"][start:end]
+                    )
+                ]
+            )
+
+        # 离开间隔写入 afk bucket
+        gap_positions = np.flatnonzero(data["afk_before"])
+        conn.executemany(
+            "INSERT INTO eventmodel (bucket_id, timestamp, duration, datastr) VALUES (2, ?, ?, ?)",
+            [
+                (timestamp_str(data["timestamp"][pos] - data["afk_before"][pos]),
+                 float(data["afk_before"][pos]), '{"status": "afk"}')
+                for pos in gap_positions
+            ]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    start_time = datetime.fromtimestamp(float(data["timestamp"][0]), tz=timezone.utc)
+    end_time = datetime.fromtimestamp(float(data["timestamp"][-1] + data["duration"][-1]), tz=timezone.utc)
+    return {
+        "path": str(output),
+        "events": config.events,
+        "start_time": start_time,
+        "end_time": end_time + timedelta(seconds=1),
+        "apps": len(apps),
+        "distinct_titles": len(datastr_cache),
+        "afk_gaps": int(len(gap_positions)),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生成合成 ActivityWatch SQLite 文件")
+    parser.add_argument("output", help="输出文件路径")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--multipurpose-share", type=float, default=0.45)
+    args = parser.parse_args()
+
+    summary = generate_aw_database(
+        args.output,
+        SyntheticAWConfig(events=args.events, seed=args.seed, multipurpose_share=args.multipurpose_share)
+    )
+    print(summary)
@@ -0,0 +1,131 @@
+"""
+长会话的历史增长基准，使用离线假模型（FakeChatModel）
+
+单个会话连续进行 --turns 轮对话（回答较长），对比两种配置：
+
+- unbounded: 不压缩检查点（chat_checkpoint_keep=0）、不生成滚动摘要（chat_history_token_window=0）
+- bounded: 每轮后只保留最新 --keep 个检查点，历史超过 --window tokens 时合并为滚动摘要，结束后 vacuum()
+
+记录每轮发往模型的输入 token 数（意图识别 + 回答 + 摘要）、检查点数与对话数据库大小；
+检查点写入临时目录下的 AsyncSqliteSaver
+
+用法:
+    python -m lifeprism.benchmarks.bench_chat_history --turns 60 --window 2000 --keep 10
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from lifeprism.config.settings_manager import settings
+from lifeprism.llm.llm_classify.chat.chat_bot_graph import ChatBot
+from lifeprism.llm.llm_classify.utils import (
+    FakeChatModel,
+    clear_model_pool,
+    register_backend,
+    set_backend_override,
+)
+
+BENCH_BACKEND = "bench-chat-history"
+GENERAL_INTENT = "一般模式"
+LONG_ANSWER = "这是一段较长的回答，包含用户询问的统计数据与建议。" * 15
+SUMMARY = "摘要：用户在连续询问时间统计相关的问题，已给出各类建议。"
+
+
+def _register_backend() -> None:
+    def factory(enable_streaming: bool = False, **kwargs) -> FakeChatModel:
+        rules = [{"pattern": "对话记录整理助手", "response": SUMMARY}]
+        if enable_streaming:
+            return FakeChatModel(rules=rules, default_response=LONG_ANSWER)
+        return FakeChatModel(rules=rules + [{"pattern": r"[\s\S]", "response": GENERAL_INTENT}])
+
+    register_backend(BENCH_BACKEND, factory)
+    set_backend_override(BENCH_BACKEND)
+    clear_model_pool()
+
+
+async def _count_checkpoints(bot: ChatBot) -> int:
+    async with bot.checkpointer.conn.execute("SELECT COUNT(*) FROM checkpoints") as cur:
+        return (await cur.fetchone())[0]
+
+
+async def _run_scenario(name: str, turns: int, window: int, keep: int) -> Dict:
+    settings._config["chat_history_token_window"] = window
+    settings._config["chat_checkpoint_keep"] = keep
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = Path(workdir) / "chat.db"
+        async with ChatBot.create_with_persistence(db_path) as bot:
+            input_tokens = []
+            for turn in range(turns):
+                await bot.chat_not_stream(f"第{turn}轮提问：今天的时间用在哪里了？", thread_id="bench")
+                input_tokens.append(bot.tokens_usage["bench"]["input_tokens"])
+            checkpoints = await _count_checkpoints(bot)
+            if keep > 0:
+                await bot.vacuum()
+            db_bytes = sum(
+                os.path.getsize(path) for path in (db_path, Path(f"{db_path}-wal")) if path.exists()
+            )
+    return {
+        "scenario": name,
+        "first_input_tokens": input_tokens[0],
+        "max_input_tokens": max(input_tokens),
+        "last_input_tokens": input_tokens[-1],
+        "checkpoints": checkpoints,
+        "db_kb": db_bytes / 1024,
+    }
+
+
+async def run_benchmark_async(turns: int = 60, window: int = 2000, keep: int = 10) -> Dict:
+    """
+    Returns:
+        Dict: {turns, results: [{scenario, first_input_tokens, max_input_tokens, last_input_tokens, checkpoints, db_kb}]}
+    """
+    _register_backend()
+    saved = {key: settings._config.get(key) for key in ("chat_history_token_window", "chat_checkpoint_keep")}
+    try:
+        results = [
+            await _run_scenario("unbounded", turns, window=0, keep=0),
+            await _run_scenario("bounded", turns, window=window, keep=keep),
+        ]
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                settings._config.pop(key, None)
+            else:
+                settings._config[key] = value
+        set_backend_override(None)
+        clear_model_pool()
+    return {"turns": turns, "results": results}
+
+
+def run_benchmark(turns: int = 60, window: int = 2000, keep: int = 10) -> Dict:
+    return asyncio.run(run_benchmark_async(turns, window, keep))
+
+
+def format_results(result: Dict) -> str:
+    """格式化为文本表格"""
+    lines = [
+        f"{result['turns']} 轮对话",
+        f"{'scenario':>10} {'first_in':>8} {'max_in':>8} {'last_in':>8} {'checkpoints':>11} {'db_kb':>8}",
+    ]
+    for r in result["results"]:
+        lines.append(
+            f"{r['scenario']:>10} {r['first_input_tokens']:>8} {r['max_input_tokens']:>8} {r['last_input_tokens']:>8} "
+            f"{r['checkpoints']:>11} {r['db_kb']:>8.0f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="长会话历史增长基准（离线假模型）")
+    parser.add_argument("--turns", type=int, default=60, help="对话轮数")
+    parser.add_argument("--window", type=int, default=2000, help="历史消息的 token 上限")
+    parser.add_argument("--keep", type=int, default=10, help="每个会话保留的检查点数")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(format_results(run_benchmark(args.turns, args.window, args.keep)))
@@ -0,0 +1,150 @@
+"""
+打开会话历史的耗时基准：反序列化 checkpoint 与 chat_message 表游标分页的对比，使用离线假模型（FakeChatModel）
+
+单个会话连续进行对话，轮数到达 --sizes 中的每个值时，各重复 --repeat 次度量：
+
+- checkpoint: 旧版 get_chat_history，读取最新的完整 checkpoint 并转换全部消息
+- paged: ChatSessionProvider.get_messages 读取最新一页（--limit 条）
+
+每轮结束时由 on_turn_end 把本轮提问与回答追加到临时 LifeWatch 数据库的 chat_message 表；
+检查点写入临时目录下的 AsyncSqliteSaver（不压缩检查点、不生成滚动摘要）
+
+用法:
+    python -m lifeprism.benchmarks.bench_chat_history_read --sizes 50,200,500 --limit 50
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from lifeprism.config.settings_manager import settings
+from lifeprism.llm.llm_classify.chat.chat_bot_graph import ChatBot
+from lifeprism.llm.llm_classify.utils import (
+    FakeChatModel,
+    clear_model_pool,
+    register_backend,
+    set_backend_override,
+)
+from lifeprism.server.providers.chat_session_provider import ChatSessionProvider
+from lifeprism.storage import DatabaseManager
+from lifeprism.storage.lw_table_manager import LWTableManager
+
+BENCH_BACKEND = "bench-chat-history-read"
+GENERAL_INTENT = "一般模式"
+ANSWER = "这是一段中等长度的回答，包含用户询问的统计数据与建议。" * 6
+SESSION_ID = "bench"
+
+
+def _register_backend() -> None:
+    def factory(enable_streaming: bool = False, **kwargs) -> FakeChatModel:
+        if enable_streaming:
+            return FakeChatModel(default_response=ANSWER)
+        return FakeChatModel(rules=[{"pattern": r"[\s\S]", "response": GENERAL_INTENT}])
+
+    register_backend(BENCH_BACKEND, factory)
+    set_backend_override(BENCH_BACKEND)
+    clear_model_pool()
+
+
+async def _legacy_read(bot: ChatBot) -> int:
+    """旧版 get_chat_history：反序列化最新的 checkpoint，转换全部消息"""
+    checkpoint_tuple = await bot.checkpointer.aget_tuple({"configurable": {"thread_id": SESSION_ID}})
+    messages = []
+    for msg in checkpoint_tuple.checkpoint.get("channel_values", {}).get("messages", []):
+        if isinstance(msg, (HumanMessage, AIMessage)):
+            messages.append({"role": type(msg).__name__, "content": msg.content})
+    return len(messages)
+
+
+def _median_ms(samples: List[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+async def run_benchmark_async(sizes: List[int], limit: int = 50, repeat: int = 20) -> List[Dict]:
+    """
+    Returns:
+        List[Dict]: 每个会话长度一条 {turns, messages, checkpoint_ms, paged_ms, page_size}
+    """
+    _register_backend()
+    saved = {key: settings._config.get(key) for key in ("chat_history_token_window", "chat_checkpoint_keep")}
+    settings._config["chat_history_token_window"] = 0
+    settings._config["chat_checkpoint_keep"] = 0
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db = DatabaseManager(DB_PATH=str(Path(workdir) / "lw.db"))
+            LWTableManager(db).init_database()
+            provider = ChatSessionProvider(db)
+
+            def record_turn(thread_id: str, record: Dict) -> None:
+                messages = [{"role": "user", "content": record["question"], "timestamp": record["started_at"]}]
+                if record["answer"] is not None:
+                    messages.append({"role": "assistant", "content": record["answer"], "timestamp": record["finished_at"]})
+                provider.append_messages(thread_id, messages)
+
+            async with ChatBot.create_with_persistence(Path(workdir) / "chat.db") as bot:
+                bot.on_turn_end = record_turn
+                turns = 0
+                for size in sorted(sizes):
+                    while turns < size:
+                        await bot.chat_not_stream(f"第{turns}轮提问：今天的时间用在哪里了？", thread_id=SESSION_ID)
+                        turns += 1
+
+                    legacy, paged = [], []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        count = await _legacy_read(bot)
+                        legacy.append(time.perf_counter() - started)
+
+                        started = time.perf_counter()
+                        page, _ = provider.get_messages(SESSION_ID, limit=limit)
+                        paged.append(time.perf_counter() - started)
+                    results.append({
+                        "turns": turns,
+                        "messages": count,
+                        "checkpoint_ms": _median_ms(legacy),
+                        "paged_ms": _median_ms(paged),
+                        "page_size": len(page),
+                    })
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                settings._config.pop(key, None)
+            else:
+                settings._config[key] = value
+        set_backend_override(None)
+        clear_model_pool()
+    return results
+
+
+def run_benchmark(sizes: List[int], limit: int = 50, repeat: int = 20) -> List[Dict]:
+    return asyncio.run(run_benchmark_async(sizes, limit, repeat))
+
+
+def format_results(results: List[Dict]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'turns':>6} {'messages':>8} {'checkpoint_ms':>13} {'paged_ms':>9} {'page_size':>9}"]
+    for r in results:
+        lines.append(
+            f"{r['turns']:>6} {r['messages']:>8} {r['checkpoint_ms']:>13.2f} {r['paged_ms']:>9.2f} {r['page_size']:>9}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="打开会话历史的耗时基准（离线假模型）")
+    parser.add_argument("--sizes", type=str, default="50,200,500", help="度量时的会话轮数，逗号分隔")
+    parser.add_argument("--limit", type=int, default=50, help="分页读取的每页数量")
+    parser.add_argument("--repeat", type=int, default=20, help="每个长度的重复度量次数（取中位数）")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    print(format_results(run_benchmark(sizes, args.limit, args.repeat)))
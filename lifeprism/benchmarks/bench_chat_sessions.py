@@ -0,0 +1,130 @@
+"""
+多会话并发对话负载测试，使用离线假模型（FakeChatModel）
+
+N 个会话同时进行 M 轮带状态的流式对话（chat_stream_with_status），共用一个 ChatBot（一个编译后的图）
+与临时目录下的 AsyncSqliteSaver 检查点，会话ID随每次调用传入：
+
+- 校验每个会话的检查点只包含本会话的 M 条提问与 M 条回答
+- 校验每个会话的 token 使用量只累计本会话的调用（各会话的提示词长度相同，累计值应完全一致）
+- 对比并发执行与逐个会话串行执行的总耗时
+
+假模型通过临时注册的后端（bench-chat）提供：非流式调用（意图识别）固定返回"一般模式"，
+流式调用（回答）返回默认回复；不挂载全局限速器，只度量对话链路本身的并发能力
+
+用法:
+    python -m lifeprism.benchmarks.bench_chat_sessions --sessions 20 --turns 3 --latency 0.2
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from lifeprism.llm.llm_classify.chat.chat_bot_graph import ChatBot
+from lifeprism.llm.llm_classify.utils import (
+    FakeChatModel,
+    clear_model_pool,
+    register_backend,
+    set_backend_override,
+)
+
+BENCH_BACKEND = "bench-chat"
+GENERAL_INTENT = "一般模式"
+
+
+def _register_backend(latency: float) -> None:
+    def factory(enable_streaming: bool = False, **kwargs) -> FakeChatModel:
+        rules = [] if enable_streaming else [{"pattern": r"[\s\S]", "response": GENERAL_INTENT}]
+        return FakeChatModel(latency=latency, rules=rules)
+
+    register_backend(BENCH_BACKEND, factory)
+    set_backend_override(BENCH_BACKEND)
+    clear_model_pool()
+
+
+async def _run_session(bot: ChatBot, session_id: str, turns: int) -> None:
+    for turn in range(turns):
+        async for event in bot.chat_stream_with_status(f"{session_id} 第{turn}轮提问", thread_id=session_id):
+            if event["type"] == "error":
+                raise RuntimeError(f"会话 {session_id} 第{turn}轮失败: {event['message']}")
+
+
+async def _check_sessions(bot: ChatBot, session_ids: List[str], turns: int) -> Dict:
+    """返回 {isolated, usage_consistent}"""
+    isolated = True
+    for session_id in session_ids:
+        checkpoint = await bot.checkpointer.aget_tuple({"configurable": {"thread_id": session_id}})
+        messages = checkpoint.checkpoint["channel_values"].get("messages", []) if checkpoint else []
+        questions = [m for m in messages if isinstance(m, HumanMessage)]
+        answers = [m for m in messages if isinstance(m, AIMessage)]
+        if (
+            len(questions) != turns or len(answers) != turns
+            or any(not q.content.startswith(f"{session_id} ") for q in questions)
+        ):
+            isolated = False
+    totals = {bot.session_tokens_usage.get(session_id, {}).get("total_tokens", 0) for session_id in session_ids}
+    return {"isolated": isolated, "usage_consistent": len(totals) == 1 and 0 not in totals}
+
+
+async def run_benchmark_async(sessions: int = 20, turns: int = 3, latency: float = 0.2) -> Dict:
+    """
+    Returns:
+        Dict: {sessions, turns, concurrent_seconds, sequential_seconds, isolated, usage_consistent}
+    """
+    _register_backend(latency)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            async with ChatBot.create_with_persistence(Path(workdir) / "chat.db") as bot:
+                concurrent_ids = [f"c{index:04d}" for index in range(sessions)]
+                started = time.perf_counter()
+                await asyncio.gather(*[_run_session(bot, session_id, turns) for session_id in concurrent_ids])
+                concurrent_seconds = time.perf_counter() - started
+                checks = await _check_sessions(bot, concurrent_ids, turns)
+
+                sequential_ids = [f"q{index:04d}" for index in range(sessions)]
+                started = time.perf_counter()
+                for session_id in sequential_ids:
+                    await _run_session(bot, session_id, turns)
+                sequential_seconds = time.perf_counter() - started
+    finally:
+        set_backend_override(None)
+        clear_model_pool()
+    return {
+        "sessions": sessions,
+        "turns": turns,
+        "concurrent_seconds": concurrent_seconds,
+        "sequential_seconds": sequential_seconds,
+        **checks,
+    }
+
+
+def run_benchmark(sessions: int = 20, turns: int = 3, latency: float = 0.2) -> Dict:
+    return asyncio.run(run_benchmark_async(sessions, turns, latency))
+
+
+def format_results(result: Dict) -> str:
+    """格式化为文本"""
+    total_turns = result["sessions"] * result["turns"]
+    return "\n".join([
+        f"{result['sessions']} 个会话 × {result['turns']} 轮 = {total_turns} 轮对话",
+        f"  并发: {result['concurrent_seconds']:.2f}s ({total_turns / result['concurrent_seconds']:.1f} 轮/s)",
+        f"  串行: {result['sequential_seconds']:.2f}s ({total_turns / result['sequential_seconds']:.1f} 轮/s)",
+        f"  检查点隔离: {'通过' if result['isolated'] else '失败'}，"
+        f"token 使用量按会话累计: {'通过' if result['usage_consistent'] else '失败'}",
+    ])
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="多会话并发对话负载测试（离线假模型）")
+    parser.add_argument("--sessions", type=int, default=20, help="并发会话数")
+    parser.add_argument("--turns", type=int, default=3, help="每个会话的对话轮数")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次模型调用的模拟延迟（秒）")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(format_results(run_benchmark(args.sessions, args.turns, args.latency)))
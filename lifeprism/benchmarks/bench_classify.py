@@ -0,0 +1,267 @@
+"""
+LLM 分类吞吐基准
+用注入延迟的离线假模型（FakeChatModel，见 utils/offline_models.py）代替真实 LLM：
+
+- run_benchmark: 度量 run_batches 在不同并发数下的墙钟耗时，可按 failure_rate 随机失败
+  以验证逐批重试与结果顺序；各并发数共用同一组 LogItem，检查全部条目被分类且顺序与输入一致
+- run_batching_benchmark: 对比固定条数分批与按 token 预算分批（TokenBudget）的请求次数与解析失败数，
+  假模型按 max_output_tokens 截断输出，模拟真实模型的输出截断
+- run_graph_benchmark: 切换到 fake 后端，端到端运行 ClassifyGraph.classify
+  （单用途 / 多用途短时长 / 多用途长时长三条分支），度量整图吞吐
+
+用法:
+    python -m lifeprism.benchmarks.bench_classify --items 300 --latency 0.5 --concurrency 1 2 4 8
+    python -m lifeprism.benchmarks.bench_classify --batching --items 600
+    python -m lifeprism.benchmarks.bench_classify --graph --items 300 --latency 0.2 --concurrency 1 4
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from lifeprism.config import settings
+from lifeprism.llm.llm_classify.schemas.classify_shemas import AppInFo, LogItem, classifyState
+from lifeprism.llm.llm_classify.utils import FakeChatModel, TokenBudget, run_batches, set_backend_override
+
+# 与分类节点一致的每批条目数
+BATCH_SIZE = 15
+DEFAULT_CONCURRENCY = (1, 2, 4, 8)
+
+
+def _make_items(count: int) -> List[LogItem]:
+    return [LogItem(id=i, app=f"app-{i % 20}", duration=60 + i, title=f"title {i}") for i in range(count)]
+
+
+# 与分类节点提示词结构一致：分类体系 + id -> [category, sub_category, link_to_goal] 输出格式
+CATEGORY_TREE = {"工作": ["编程", "文档"], "娱乐": ["视频"], "学习": None}
+BENCH_SYSTEM_MESSAGE = SystemMessage(content="""
+分类体系：category -> sub_category
+• 工作
+  - 编程
+# 输出格式为json,key为对于数据的id,value为一个list[category,sub_category,link_to_goal]
+""")
+
+
+def _build_messages(batch: List[LogItem]) -> list:
+    rows = [[item.id, item.app, item.title] for item in batch]
+    return [BENCH_SYSTEM_MESSAGE, HumanMessage(content=json.dumps(rows, ensure_ascii=False))]
+
+
+def run_once(
+    items: int,
+    latency: float,
+    concurrency: int,
+    failure_rate: float = 0.0,
+    seed: int = 42
+) -> Dict:
+    """
+    以指定并发数分类一组条目
+
+    Returns:
+        Dict: {concurrency, items, batches, calls, seconds, classified, failed_batches, ordered}
+    """
+    log_items = _make_items(items)
+    model = FakeChatModel(latency=latency, failure_rate=failure_rate, seed=seed)
+    started = time.perf_counter()
+    outcomes = run_batches(
+        model, log_items, _build_messages, BATCH_SIZE,
+        node_name="bench", max_concurrency=concurrency, retry_delay=0.0
+    )
+    seconds = time.perf_counter() - started
+
+    merged = []
+    for outcome in outcomes:
+        for item in outcome.items:
+            if outcome.ok and str(item.id) in outcome.parsed:
+                item.category = outcome.parsed[str(item.id)][0]
+            merged.append(item)
+    return {
+        "concurrency": concurrency,
+        "items": items,
+        "batches": len(outcomes),
+        "calls": model.calls,
+        "seconds": round(seconds, 3),
+        "classified": sum(1 for item in merged if item.category is not None),
+        "failed_batches": sum(1 for outcome in outcomes if not outcome.ok),
+        "ordered": [item.id for item in merged] == list(range(items)),
+    }
+
+
+def run_benchmark(
+    items: int = 300,
+    latency: float = 0.5,
+    concurrency=DEFAULT_CONCURRENCY,
+    failure_rate: float = 0.0,
+    seed: int = 42
+) -> List[Dict]:
+    """依次运行各并发数，附加相对串行（并发数 1 或列表首项）的加速比"""
+    results = [run_once(items, latency, c, failure_rate=failure_rate, seed=seed) for c in concurrency]
+    baseline: Optional[float] = results[0]["seconds"] if results else None
+    for result in results:
+        result["speedup"] = round(baseline / result["seconds"], 2) if baseline and result["seconds"] else None
+    return results
+
+
+def _make_mixed_items(count: int, seed: int = 42) -> List[LogItem]:
+    """标题长短混合的条目（短标题 / 长网页标题各半）"""
+    import random
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        length = rng.choice((8, 12, 20, 70, 80))
+        items.append(LogItem(id=i, app=f"app-{i % 20}", duration=60 + i, title=("标题" * length)[:length]))
+    return items
+
+
+def run_batching_benchmark(
+    items: int = 600,
+    max_output_tokens: int = 600,
+    token_budget: int = 6000,
+    passes: int = 2,
+) -> List[Dict]:
+    """
+    对比固定条数分批与按 token 预算分批
+
+    假模型的输出上限为 max_output_tokens，超出即截断（解析失败后按批重试，最终失败的批次不计入 classified）。
+    token 预算模式连续运行 passes 次，共用一个 TokenBudget，展示 usage 反馈后的变化
+
+    Returns:
+        List[Dict]: [{mode, batches, calls, failed_batches, classified, total_tokens}, ...]
+    """
+    log_items = _make_mixed_items(items)
+    budget = TokenBudget(token_budget=token_budget, max_output_tokens=max_output_tokens)
+    modes = [("fixed-15", 15), ("fixed-60", 60)] + [(f"token-budget#{i + 1}", None) for i in range(passes)]
+    results = []
+    for mode, batch_size in modes:
+        model = FakeChatModel(max_output_tokens=max_output_tokens)
+        outcomes = run_batches(
+            model, [item.model_copy() for item in log_items], _build_messages, batch_size,
+            node_name="bench_batching", max_concurrency=8, retry_delay=0.0,
+            token_budget=budget if batch_size is None else None,
+        )
+        results.append({
+            "mode": mode,
+            "batches": len(outcomes),
+            "calls": model.calls,
+            "failed_batches": sum(1 for outcome in outcomes if not outcome.ok),
+            "classified": sum(len(outcome.items) for outcome in outcomes if outcome.ok),
+            "total_tokens": sum(u["total_tokens"] for outcome in outcomes for u in outcome.tokens_usage),
+        })
+    return results
+
+
+def format_batching_results(results: List[Dict]) -> str:
+    """格式化分批对比结果为文本表格"""
+    lines = [f"{'mode':<16} {'batches':>7} {'calls':>6} {'failed':>6} {'classified':>10} {'tokens':>8}"]
+    for r in results:
+        lines.append(
+            f"{r['mode']:<16} {r['batches']:>7} {r['calls']:>6} {r['failed_batches']:>6} "
+            f"{r['classified']:>10} {r['total_tokens']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def _make_graph_state(count: int) -> classifyState:
+    """构造覆盖三条分类分支的状态：单用途应用、多用途应用的短时长与长时长条目（描述已预填，不访问数据库）"""
+    long_threshold = int(settings.long_log_threshold or 3600)
+    app_registry = {
+        f"app-{i}": AppInFo(description=f"app-{i} 的描述", is_multipurpose=False) for i in range(10)
+    }
+    app_registry["chrome"] = AppInFo(description="浏览器", is_multipurpose=True)
+    log_items = []
+    for i in range(count):
+        if i % 2 == 0:
+            log_items.append(LogItem(id=i, app=f"app-{i % 10}", duration=60 + i, title=f"title {i}"))
+        else:
+            duration = long_threshold + i if i % 10 == 1 else 60 + i
+            log_items.append(LogItem(id=i, app="chrome", duration=duration, title=f"page {i}"))
+    return classifyState(app_registry=app_registry, log_items=log_items)
+
+
+def run_graph_once(items: int, latency: float, concurrency: int) -> Dict:
+    """
+    切换到 fake 后端，端到端运行一次 ClassifyGraph.classify
+
+    Returns:
+        Dict: {concurrency, items, seconds, items_per_second, classified, total_tokens}
+    """
+    from lifeprism.llm.llm_classify.classify.classify_graph import ClassifyGraph
+
+    previous = (settings.get('llm_fake_latency'), settings.get('llm_max_concurrency'))
+    settings.set('llm_fake_latency', latency, save=False)
+    settings.set('llm_max_concurrency', concurrency, save=False)
+    set_backend_override("fake")
+    try:
+        graph = ClassifyGraph(goal=[], category_tree=CATEGORY_TREE)
+        state = _make_graph_state(items)
+        started = time.perf_counter()
+        output = graph.classify(state)
+        seconds = time.perf_counter() - started
+    finally:
+        set_backend_override(None)
+        settings.set('llm_fake_latency', previous[0], save=False)
+        settings.set('llm_max_concurrency', previous[1], save=False)
+
+    result_items = output.get("result_items") or []
+    return {
+        "concurrency": concurrency,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_second": round(items / seconds, 1) if seconds else None,
+        "classified": sum(1 for item in result_items if item.category is not None),
+        "total_tokens": output["tokens_usage"]["total_tokens"],
+    }
+
+
+def run_graph_benchmark(items: int = 300, latency: float = 0.2, concurrency=(1, 4)) -> List[Dict]:
+    """依次以各并发数端到端运行 ClassifyGraph"""
+    return [run_graph_once(items, latency, c) for c in concurrency]
+
+
+def format_graph_results(results: List[Dict]) -> str:
+    """格式化端到端结果为文本表格"""
+    lines = [f"{'conc':>4} {'items':>6} {'seconds':>8} {'items/s':>8} {'classified':>10} {'tokens':>8}"]
+    for r in results:
+        lines.append(
+            f"{r['concurrency']:>4} {r['items']:>6} {r['seconds']:>8.3f} {r['items_per_second']:>8} "
+            f"{r['classified']:>10} {r['total_tokens']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def format_results(results: List[Dict]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'conc':>4} {'batches':>7} {'calls':>6} {'seconds':>8} {'speedup':>7} {'classified':>10} {'failed':>6} {'ordered':>7}"]
+    for r in results:
+        lines.append(
+            f"{r['concurrency']:>4} {r['batches']:>7} {r['calls']:>6} {r['seconds']:>8.3f} "
+            f"{r['speedup']:>7} {r['classified']:>10} {r['failed_batches']:>6} {str(r['ordered']):>7}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="LLM 分类吞吐基准（离线假模型）")
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.5, help="每次调用的模拟延迟（秒）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="单次调用的模拟失败概率")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--graph", action="store_true", help="端到端运行 ClassifyGraph（fake 后端）")
+    parser.add_argument("--batching", action="store_true", help="对比固定条数分批与按 token 预算分批")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if args.batching:
+        print(format_batching_results(run_batching_benchmark(args.items)))
+        raise SystemExit(0)
+    if args.graph:
+        print(format_graph_results(run_graph_benchmark(args.items, args.latency, args.concurrency)))
+        raise SystemExit(0)
+    print(format_results(run_benchmark(
+        args.items, args.latency, args.concurrency, failure_rate=args.failure_rate, seed=args.seed
+    )))
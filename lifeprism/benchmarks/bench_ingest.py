@@ -0,0 +1,199 @@
+"""
+同步链路吞吐基准
+在合成 ActivityWatch 数据上分别度量三个阶段的吞吐（事件/秒）和 Python 堆峰值内存：
+
+- fetch: AWBaseDataProvider.get_window_events
+- clean: clean_activitywatch_data（缓存由数据前缀预热，命中率接近真实使用）
+- save:  LWBaseDataProvider.save_user_app_behavior_log（每次写入新的空库）
+
+用法:
+    python -m lifeprism.benchmarks.bench_ingest --sizes 10000 100000 1000000 --json result.json
+
+计时与内存分两次运行：tracemalloc 会显著拖慢执行，计时结果不受其影响
+"""
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from lifeprism.benchmarks.aw_synthetic import SyntheticAWConfig, generate_aw_database
+from lifeprism.processors.components import CategoryCache
+from lifeprism.processors.data_clean import clean_activitywatch_data
+from lifeprism.storage import AWBaseDataProvider, DatabaseManager, LWBaseDataProvider
+from lifeprism.storage.lw_table_manager import LWTableManager
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# 用于预热分类缓存的数据前缀事件数
+WARMUP_EVENTS = 10_000
+
+
+def _measure(fn: Callable[[], object], track_memory: bool) -> Tuple[object, float, Optional[int]]:
+    """执行 fn，返回 (结果, 耗时秒, 峰值内存字节)；track_memory=False 时峰值为 None"""
+    gc.collect()
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _warm_cache(aw_provider: AWBaseDataProvider, summary: Dict) -> CategoryCache:
+    """
+    将数据前缀中出现的待分类项视为已分类，构建分类缓存
+
+    Zipf 分布下前缀覆盖了绝大多数高频 app/title，剩余长尾未命中，与日常增量同步的情况接近
+    """
+    warmup_end = summary["start_time"] + (summary["end_time"] - summary["start_time"]) * min(
+        1.0, WARMUP_EVENTS / summary["events"]
+    )
+    _, classify_state = clean_activitywatch_data(
+        start_time=summary["start_time"],
+        end_time=warmup_end,
+        category_cache=CategoryCache(),
+        aw_data_provider=aw_provider,
+        workers=0,
+    )
+    records = [
+        {
+            "app": item.app,
+            "title": item.title,
+            "is_multipurpose_app": int(classify_state.app_registry[item.app].is_multipurpose),
+            "app_description": None,
+            "category_id": "bench-category",
+            "sub_category_id": None,
+            "link_to_goal_id": None,
+            "state": 1,
+        }
+        for item in classify_state.log_items
+    ]
+    return CategoryCache(pd.DataFrame(records))
+
+
+def _new_lw_provider(workdir: Path, name: str) -> LWBaseDataProvider:
+    """在 workdir 下创建空的 LifeWatch 数据库并返回数据提供者"""
+    path = workdir / f"{name}.db"
+    if path.exists():
+        path.unlink()
+    db = DatabaseManager(DB_PATH=str(path))
+    LWTableManager(db).init_database()
+    return LWBaseDataProvider(db)
+
+
+def run_size(events: int, workdir: Path, seed: int = 42, track_memory: bool = True) -> List[Dict]:
+    """
+    对一个数据规模运行三个阶段的基准
+
+    Returns:
+        List[Dict]: 每个阶段一条 {stage, events, processed, seconds, events_per_sec, peak_mib}
+    """
+    summary = generate_aw_database(str(workdir / f"aw_{events}.db"), SyntheticAWConfig(events=events, seed=seed))
+    aw_provider = AWBaseDataProvider(DatabaseManager(DB_PATH=summary["path"], readonly=True))
+    cache = _warm_cache(aw_provider, summary)
+    start_time, end_time = summary["start_time"], summary["end_time"]
+
+    def fetch():
+        return aw_provider.get_window_events(start_time=start_time, end_time=end_time)
+
+    def clean():
+        return clean_activitywatch_data(
+            start_time=start_time, end_time=end_time, category_cache=cache, aw_data_provider=aw_provider
+        )
+
+    # 清洗阶段的输入为读取到的全部事件：get_window_events 分页读取，必须覆盖生成的每一条事件
+    fetched = len(fetch())
+    assert fetched == events, f"get_window_events 返回 {fetched} 条事件，生成了 {events} 条"
+    cleaned_df, _ = clean()
+
+    def prepare_save() -> Callable[[], object]:
+        # 每次运行写入新库，避免 INSERT OR IGNORE 跳过已存在的行
+        provider = _new_lw_provider(workdir, f"lw_{events}")
+        return lambda: provider.save_user_app_behavior_log(cleaned_df)
+
+    # (阶段, 生成待计时函数, 该阶段处理的事件数)
+    stages = [
+        ("fetch", lambda: fetch, fetched),
+        ("clean", lambda: clean, fetched),
+        ("save", prepare_save, len(cleaned_df)),
+    ]
+
+    results = []
+    for stage, prepare, processed in stages:
+        _, seconds, _ = _measure(prepare(), track_memory=False)
+        peak = _measure(prepare(), track_memory=True)[2] if track_memory else None
+        results.append({
+            "stage": stage,
+            "events": events,
+            "processed": processed,
+            "seconds": round(seconds, 4),
+            "events_per_sec": round(processed / seconds) if seconds > 0 else None,
+            "peak_mib": round(peak / 1024 / 1024, 1) if peak is not None else None,
+        })
+    return results
+
+
+def run_benchmark(
+    sizes=DEFAULT_SIZES,
+    seed: int = 42,
+    track_memory: bool = True,
+    workdir: Optional[str] = None
+) -> List[Dict]:
+    """
+    依次运行各数据规模的基准
+
+    Args:
+        sizes: 事件数列表
+        seed: 合成数据随机种子
+        track_memory: 是否额外运行一次以统计峰值内存
+        workdir: 合成数据库的存放目录，None 时使用临时目录（运行结束后删除）
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="lifeprism-bench-") as tmp:
+        root = Path(workdir or tmp)
+        root.mkdir(parents=True, exist_ok=True)
+        for size in sizes:
+            results.extend(run_size(size, root, seed=seed, track_memory=track_memory))
+    return results
+
+
+def format_results(results: List[Dict]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'stage':<6} {'events':>9} {'processed':>9} {'seconds':>9} {'events/s':>10} {'peak MiB':>9}"]
+    for r in results:
+        peak = f"{r['peak_mib']:.1f}" if r["peak_mib"] is not None else "-"
+        rate = f"{r['events_per_sec']:,}" if r["events_per_sec"] is not None else "-"
+        lines.append(
+            f"{r['stage']:<6} {r['events']:>9,} {r['processed']:>9,} {r['seconds']:>9.3f} {rate:>10} {peak:>9}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="ActivityWatch 同步链路吞吐基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="跳过峰值内存统计（减少一半运行时间）")
+    parser.add_argument("--workdir", help="保留合成数据库的目录")
+    parser.add_argument("--json", help="将结果写入 JSON 文件，便于对比不同版本")
+    args = parser.parse_args()
+
+    # 基准运行期间关闭逐批的 INFO 日志
+    logging.disable(logging.INFO)
+    results = run_benchmark(args.sizes, seed=args.seed, track_memory=not args.no_memory, workdir=args.workdir)
+    print(format_results(results))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,198 @@
+"""
+本地预分类器基准：留出集准确率与可避免的 LLM 调用比例
+
+把已标注的分类缓存记录按自然键随机切分为训练集 / 留出集，用训练集训练 NaiveBayesClassifier，
+对留出集在不同置信度阈值下统计：
+- accepted: 置信度达到阈值、直接采用本地结果的比例（即可避免的 LLM 调用比例）
+- accuracy: 被采用条目的准确率（标签 = category_id / sub_category_id / link_to_goal_id 完全一致）
+另外比较增量重训（撤销并重新加入部分样本）与整表重训的耗时
+
+数据来源：
+- 默认：合成的浏览器标题 / 单用途应用数据（含同一站点不同分类的歧义样本）
+- --db：当前 LW 数据库的分类缓存表（load_category_map_cache_V2）
+
+用法:
+    python -m lifeprism.benchmarks.bench_local_classifier --samples 3000
+    python -m lifeprism.benchmarks.bench_local_classifier --db
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lifeprism.processors.components.local_classifier import NaiveBayesClassifier, extract_features
+
+# (app, title, is_multipurpose_app, label)
+Record = Tuple[str, Optional[str], int, tuple]
+
+# 合成数据：站点 -> [(主题词, 标签), ...]，同一站点可对应多个分类
+_SITES = {
+    "GitHub": [(["lifeprism", "pull request", "issues", "actions"], ("c-work", "s-code", "g-1"))],
+    "Stack Overflow": [(["python", "pandas", "sqlite", "asyncio"], ("c-work", "s-code", None))],
+    "哔哩哔哩": [
+        (["番剧", "鬼畜", "游戏实况", "vlog"], ("c-fun", "s-video", None)),
+        (["公开课", "算法讲解", "机器学习", "考研数学"], ("c-work", "s-study", None)),
+    ],
+    "YouTube": [
+        (["music video", "trailer", "gameplay", "funny"], ("c-fun", "s-video", None)),
+        (["lecture", "tutorial", "conference talk"], ("c-work", "s-study", None)),
+    ],
+    "知乎": [
+        (["如何评价", "有哪些", "推荐"], ("c-fun", "s-read", None)),
+        (["面试", "职业规划", "论文"], ("c-work", "s-study", None)),
+    ],
+    "飞书文档": [(["周报", "会议纪要", "需求评审", "技术方案"], ("c-work", "s-doc", None))],
+    "淘宝": [(["购物车", "订单", "降噪耳机", "显示器"], ("c-life", "s-shop", None))],
+    "Steam": [(["商店", "库", "愿望单"], ("c-fun", "s-game", None))],
+}
+_SINGLE_APPS = {
+    ("c-work", "s-code", None): ["code", "pycharm64", "idea64", "webstorm64", "clion64", "windowsterminal"],
+    ("c-work", "s-doc", None): ["winword", "excel", "powerpnt", "wps", "obsidian", "notion", "typora"],
+    ("c-fun", "s-game", None): ["steam", "genshinimpact", "leagueclient", "epicgameslauncher"],
+    ("c-fun", "s-video", None): ["potplayer", "vlc", "iqiyi", "youku", "bilibili"],
+    ("c-life", "s-chat", None): ["wechat", "qq", "telegram", "dingtalk", "feishu"],
+}
+_BROWSERS = ["chrome", "msedge", "firefox"]
+
+
+def make_synthetic_records(count: int, noise: float = 0.05, seed: int = 42) -> List[Record]:
+    """
+    生成合成的分类缓存记录（约 90% 为浏览器标题，其余为单用途应用及其变体名）
+
+    Args:
+        noise: 标签被随机替换的比例（模拟用户手动改分类、LLM 误分类）
+    """
+    rng = random.Random(seed)
+    all_labels = sorted({label for topics in _SITES.values() for _, label in topics} | set(_SINGLE_APPS), key=str)
+    records: Dict[tuple, Record] = {}
+    sites = list(_SITES)
+    while len(records) < count:
+        if rng.random() < 0.9:
+            site = rng.choice(sites)
+            topics, label = rng.choice(_SITES[site])
+            title = f"{rng.choice(topics)} {rng.randint(1, 999)} - {site}"
+            if rng.random() < 0.3:
+                title = f"({rng.randint(1, 99)}) {title} - 个人 - Microsoft Edge"
+            app = rng.choice(_BROWSERS)
+            records[(app, title)] = (app, title, 1, label)
+        else:
+            label = rng.choice(list(_SINGLE_APPS))
+            app = rng.choice(_SINGLE_APPS[label]) + rng.choice(["", "", ".exe", "_x64", str(rng.randint(1, 9))])
+            records[(app, None)] = (app, None, 0, label)
+    return [
+        (app, title, is_multi, rng.choice(all_labels) if rng.random() < noise else label)
+        for app, title, is_multi, label in records.values()
+    ]
+
+
+def load_db_records() -> List[Record]:
+    """读取当前 LW 数据库中已标注（state=1 且 category_id 非空）的分类缓存记录"""
+    import pandas as pd
+    from lifeprism.storage import LWBaseDataProvider
+
+    df = LWBaseDataProvider().load_category_map_cache_V2()
+    if df is None or df.empty:
+        return []
+    records = []
+    for row in df.to_dict('records'):
+        if row.get('state', 1) != 1 or pd.isna(row.get('category_id')):
+            continue
+        is_multi = int(row['is_multipurpose_app'])
+        records.append((
+            row['app'], row['title'] if is_multi else None, is_multi,
+            tuple(None if pd.isna(row.get(col)) else row[col] for col in ('category_id', 'sub_category_id', 'link_to_goal_id')),
+        ))
+    return records
+
+
+def _train(records: Sequence[Record]) -> NaiveBayesClassifier:
+    model = NaiveBayesClassifier()
+    for app, title, is_multi, label in records:
+        model.add(("m", app, title or "") if is_multi else ("s", app), label, extract_features(app, title))
+    return model
+
+
+def run_benchmark(
+    records: List[Record],
+    holdout: float = 0.2,
+    thresholds: Sequence[float] = (0.0, 0.6, 0.8, 0.9, 0.95),
+    seed: int = 7
+) -> Dict:
+    """
+    留出集评估
+
+    Returns:
+        Dict: {train, test, thresholds: [{threshold, accepted, accuracy}], train_seconds, predict_ms,
+               incremental_seconds, incremental_changed}
+    """
+    rng = random.Random(seed)
+    records = list(records)
+    rng.shuffle(records)
+    split = max(1, int(len(records) * holdout))
+    test, train = records[:split], records[split:]
+
+    start = time.perf_counter()
+    model = _train(train)
+    train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = [model.predict(extract_features(app, title)) for app, title, _, _ in test]
+    predict_ms = (time.perf_counter() - start) * 1000 / max(1, len(test))
+
+    rows = []
+    for threshold in thresholds:
+        accepted = [(pred, label) for (pred, conf), (_, _, _, label) in zip(predictions, test) if pred is not None and conf >= threshold]
+        correct = sum(1 for pred, label in accepted if pred == label)
+        rows.append({
+            "threshold": threshold,
+            "accepted": len(accepted) / len(test),
+            "accuracy": correct / len(accepted) if accepted else 0.0,
+        })
+
+    # 增量重训：撤销并重新加入 1% 的样本（模拟一次同步后的缓存变更）
+    changed = train[:max(1, len(train) // 100)]
+    start = time.perf_counter()
+    for app, title, is_multi, label in changed:
+        key = ("m", app, title or "") if is_multi else ("s", app)
+        model.remove(key)
+        model.add(key, label, extract_features(app, title))
+    incremental_seconds = time.perf_counter() - start
+
+    return {
+        "train": len(train),
+        "test": len(test),
+        "thresholds": rows,
+        "train_seconds": train_seconds,
+        "predict_ms": predict_ms,
+        "incremental_seconds": incremental_seconds,
+        "incremental_changed": len(changed),
+    }
+
+
+def format_results(result: Dict) -> str:
+    """格式化为文本表格"""
+    lines = [
+        f"训练 {result['train']} 条 / 留出 {result['test']} 条",
+        f"{'threshold':>9} {'accepted(LLM 调用避免)':>22} {'accuracy':>9}",
+    ]
+    for row in result['thresholds']:
+        lines.append(f"{row['threshold']:>9.2f} {row['accepted']:>22.1%} {row['accuracy']:>9.1%}")
+    lines.append(
+        f"整表训练 {result['train_seconds'] * 1000:.1f} ms，单条预测 {result['predict_ms']:.3f} ms，"
+        f"增量重训 {result['incremental_changed']} 条 {result['incremental_seconds'] * 1000:.1f} ms"
+    )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地预分类器基准")
+    parser.add_argument("--samples", type=int, default=3000, help="合成数据的记录数")
+    parser.add_argument("--noise", type=float, default=0.05, help="合成数据的标签噪声比例")
+    parser.add_argument("--holdout", type=float, default=0.2, help="留出集比例")
+    parser.add_argument("--db", action="store_true", help="使用当前 LW 数据库的分类缓存表")
+    args = parser.parse_args()
+
+    data = load_db_records() if args.db else make_synthetic_records(args.samples, noise=args.noise)
+    if len(data) < 10:
+        raise SystemExit(f"已标注记录过少（{len(data)} 条），无法评估")
+    print(format_results(run_benchmark(data, holdout=args.holdout)))
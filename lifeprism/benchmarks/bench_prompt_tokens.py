@@ -0,0 +1,248 @@
+"""
+提示词紧凑编码的 token 基准与 golden 校验
+
+- check_golden: 固定样本的 Toon 编码必须与 GOLDEN_* 完全一致，且解码后的语义
+  （id / app / 截断后的 title / 描述 / 分类体系 / 目标 / 行为日志）与输入一致
+- run_benchmark: 对每类批量提示词，比较旧版文本格式与 Toon 表格格式的估算 token 数
+  （estimate_tokens，与 TokenBudget 使用同一估算）
+
+用法:
+    python -m lifeprism.benchmarks.bench_prompt_tokens --items 60
+"""
+import argparse
+import json
+import random
+from typing import Dict, List
+
+from lifeprism.llm.llm_classify.schemas.classify_shemas import AppInFo, Goal, LogItem
+from lifeprism.llm.llm_classify.utils import (
+    LangChainToonAdapter,
+    estimate_tokens,
+    format_category_tree_compact,
+    format_category_tree_for_prompt,
+    format_goals_compact,
+    format_goals_for_prompt,
+    format_log_items_compact,
+    format_log_items_table,
+)
+from lifeprism.llm.llm_classify.utils.data_base_format import (
+    format_behavior_logs_compact,
+    format_behavior_logs_lines,
+    format_daily_breakdown,
+    format_daily_breakdown_compact,
+)
+
+CATEGORY_TREE = {"工作/学习": ["编程", "文档", "会议"], "娱乐": ["视频", "游戏"], "休息": None}
+GOALS = [
+    Goal(goal="完成 LifePrism 开发", category="工作/学习", sub_category="编程"),
+    Goal(goal="每周阅读 3 小时", category="工作/学习", sub_category=None),
+]
+
+GOLDEN_ITEMS = [
+    LogItem(id=1, app="code", duration=120, title="main.py - lifeprism"),
+    LogItem(id=2, app="chrome", duration=30, title='搜索 "a, b" - Google'),
+    LogItem(id=3, app="code", duration=60, title="2024"),
+    LogItem(id=4, app="chrome", duration=45, title=None),
+    LogItem(id=5, app="chrome", duration=90, title="null"),
+]
+GOLDEN_REGISTRY = {
+    "code": AppInFo(description="代码编辑器", is_multipurpose=False),
+    "chrome": AppInFo(description="浏览器, 多用途", is_multipurpose=True),
+}
+GOLDEN_ITEMS_GROUPED = """apps[2]{app,description}:
+  code,代码编辑器
+  chrome,"浏览器, 多用途"
+items[5]{id,app,title}:
+  1,code,main.py - lifeprism
+  3,code,"2024"
+  2,chrome,"搜索 \\"a, b\\" - Google"
+  4,chrome,
+  5,chrome,"null\""""
+GOLDEN_CATEGORY_TREE = """category_tree:
+  工作/学习[3]: 编程,文档,会议
+  娱乐[2]: 视频,游戏
+  休息[0]:"""
+GOLDEN_GOALS = """goals[2]{goal,category,sub_category}:
+  完成 LifePrism 开发,工作/学习,编程
+  每周阅读 3 小时,工作/学习,"""
+
+
+def check_golden() -> None:
+    """校验固定样本的编码结果与解码语义，不一致时抛出 AssertionError"""
+    encoded = format_log_items_compact(
+        GOLDEN_ITEMS, ["id", "app", "title"], GOLDEN_REGISTRY, group_by_app=True, show_app_description=True
+    )
+    assert encoded == GOLDEN_ITEMS_GROUPED, f"items 编码与 golden 不一致:\n{encoded}"
+    assert format_category_tree_compact(CATEGORY_TREE) == GOLDEN_CATEGORY_TREE
+    assert format_goals_compact(GOALS) == GOLDEN_GOALS
+
+    tables = LangChainToonAdapter.decode_tables(encoded)
+    assert {r["app"]: r["description"] for r in tables["apps"]} == {
+        app: info.description for app, info in GOLDEN_REGISTRY.items()
+    }
+    decoded = {r["id"]: r for r in tables["items"]}
+    for item in GOLDEN_ITEMS:
+        assert decoded[item.id] == {"id": item.id, "app": item.app, "title": item.title}, decoded[item.id]
+
+    tree = LangChainToonAdapter.decode_list_mapping(GOLDEN_CATEGORY_TREE, "category_tree")
+    assert tree == {category: subs or [] for category, subs in CATEGORY_TREE.items()}
+    goals = LangChainToonAdapter.decode_tables(GOLDEN_GOALS)["goals"]
+    assert goals == [goal.model_dump() for goal in GOALS]
+
+    # 随机样本的往返：截断后的 title / title_analysis 必须原样还原
+    rng = random.Random(7)
+    alphabet = "ab 中文,\"\\:-[]{}0123456789\n"
+    items = [
+        LogItem(
+            id=i, app=f"app{i % 3}", duration=i,
+            title="".join(rng.choice(alphabet) for _ in range(rng.randint(0, 100))) or None,
+            title_analysis=rng.choice([None, "", "true", "-1", " padded "]),
+        )
+        for i in range(200)
+    ]
+    fields = ["id", "app", "title", "title_analysis"]
+    records = LangChainToonAdapter.decode_tables(format_log_items_compact(items, fields))["items"]
+    for item, record in zip(items, records):
+        title = item.title if item.title is None or len(item.title) <= 80 else item.title[:77] + "..."
+        assert record == {"id": item.id, "app": item.app, "title": title, "title_analysis": item.title_analysis}
+
+    logs = _make_behavior_logs(5)
+    decoded_logs = LangChainToonAdapter.decode_tables(format_behavior_logs_compact(logs))["logs"]
+    assert [(r["app"], r["title"], r["category"]) for r in decoded_logs] == [
+        (log["app"], log["title"] or None, log["category_name"] or None) for log in logs
+    ]
+
+
+def _make_items(count: int, seed: int = 42) -> List[LogItem]:
+    rng = random.Random(seed)
+    sites = ["GitHub", "哔哩哔哩", "Stack Overflow", "知乎", "YouTube"]
+    items = []
+    for i in range(count):
+        site = rng.choice(sites)
+        items.append(LogItem(
+            id=1000 + i,
+            app=rng.choice(["code", "chrome", "msedge", "wechat", "obsidian"]),
+            duration=rng.randint(10, 4000),
+            title=f"{site} - 第{i}个页面的标题, 关于 {rng.choice(['python', '学习笔记', '周报'])}",
+            title_analysis=rng.choice([None, "用户在查阅技术文档", "用户在观看视频"]),
+        ))
+    return items
+
+
+def _make_registry(items: List[LogItem]) -> Dict[str, AppInFo]:
+    return {
+        item.app: AppInFo(description=f"{item.app} 是一款常用的桌面应用程序", is_multipurpose=item.app in ("chrome", "msedge"))
+        for item in items
+    }
+
+
+def _make_behavior_logs(count: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    logs = []
+    for i in range(count):
+        hour, minute = 8 + i // 6, (i * 10) % 60
+        logs.append({
+            "start_time": f"2026-01-05 {hour:02d}:{minute:02d}:00",
+            "end_time": f"2026-01-05 {hour:02d}:{minute + 9:02d}:00",
+            "duration": rng.randint(30, 3600),
+            "app": rng.choice(["chrome", "code", "wechat"]),
+            "title": rng.choice(["", "lifeprism - batch_utils.py", "哔哩哔哩 - 视频"]),
+            "category_name": rng.choice(["", "工作/学习", "娱乐"]),
+            "sub_category_name": rng.choice(["", "编程", "视频"]),
+            "goal_name": rng.choice(["", "完成 LifePrism 开发"]),
+        })
+    return logs
+
+
+def _make_breakdown(days: int) -> List[Dict]:
+    return [
+        {
+            "date": f"2026-01-{d + 1:02d}",
+            "total_duration_hours": 6 + d % 4,
+            "pc_start_time": "08:30",
+            "pc_end_time": "23:10",
+            "categories": [
+                {"name": "工作/学习", "percentage": 50 + d % 10, "duration_seconds": 20000},
+                {"name": "娱乐", "percentage": 30 - d % 10, "duration_seconds": 9000},
+                {"name": "休息", "percentage": 20, "duration_seconds": 6000},
+            ],
+        }
+        for d in range(days)
+    ]
+
+
+def _legacy_simple_rows(items: List[LogItem], registry: Dict[str, AppInFo]) -> str:
+    """ClassifySimple 之前的 JSON 行格式（每条重复应用描述）"""
+    rows = [
+        [item.id, item.app, registry[item.app].description, item.title, registry[item.app].is_multipurpose]
+        for item in items
+    ]
+    return "数据格式：[id, app_name, app_description, title, is_multipurpose]\n" + json.dumps(rows, ensure_ascii=False)
+
+
+def _compact_simple_rows(items: List[LogItem], registry: Dict[str, AppInFo]) -> str:
+    apps = list(dict.fromkeys(item.app for item in items))
+    return LangChainToonAdapter.encode_table(
+        "apps", ["app", "app_description", "is_multipurpose"],
+        [[app, registry[app].description, registry[app].is_multipurpose] for app in apps]
+    ) + "\n" + LangChainToonAdapter.encode_table(
+        "items", ["id", "app", "title"], [[item.id, item.app, item.title] for item in items]
+    )
+
+
+def run_benchmark(items: int = 60) -> List[Dict]:
+    """
+    各类提示词片段的旧版 / 紧凑编码 token 估算
+
+    Returns:
+        List[Dict]: [{prompt, legacy_tokens, compact_tokens, saving}, ...]
+    """
+    log_items = _make_items(items)
+    registry = _make_registry(log_items)
+    logs = _make_behavior_logs(items)
+    breakdown = _make_breakdown(30)
+    cases = [
+        ("category_tree", format_category_tree_for_prompt(CATEGORY_TREE), format_category_tree_compact(CATEGORY_TREE)),
+        ("goals", format_goals_for_prompt(GOALS), format_goals_compact(GOALS)),
+        (
+            "single_classify items",
+            format_log_items_table(log_items, ["id", "app", "title"], registry, True, True),
+            format_log_items_compact(log_items, ["id", "app", "title"], registry, True, True),
+        ),
+        (
+            "multi_classify items",
+            format_log_items_table(log_items, ["id", "app", "title", "title_analysis"]),
+            format_log_items_compact(log_items, ["id", "app", "title", "title_analysis"]),
+        ),
+        ("classify_simple items", _legacy_simple_rows(log_items, registry), _compact_simple_rows(log_items, registry)),
+        ("behavior logs", format_behavior_logs_lines(logs), format_behavior_logs_compact(logs)),
+        ("daily breakdown (30d)", format_daily_breakdown(breakdown), format_daily_breakdown_compact(breakdown)),
+    ]
+    results = []
+    for name, legacy, compact in cases:
+        legacy_tokens, compact_tokens = estimate_tokens(legacy), estimate_tokens(compact)
+        results.append({
+            "prompt": name,
+            "legacy_tokens": legacy_tokens,
+            "compact_tokens": compact_tokens,
+            "saving": round(1 - compact_tokens / legacy_tokens, 3) if legacy_tokens else 0.0,
+        })
+    return results
+
+
+def format_results(results: List[Dict]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'prompt':<24} {'legacy':>7} {'compact':>8} {'saving':>7}"]
+    for r in results:
+        lines.append(f"{r['prompt']:<24} {r['legacy_tokens']:>7} {r['compact_tokens']:>8} {r['saving']:>7.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="提示词紧凑编码 token 基准")
+    parser.add_argument("--items", type=int, default=60, help="每类提示词的条目数")
+    args = parser.parse_args()
+
+    check_golden()
+    print("golden 校验通过")
+    print(format_results(run_benchmark(args.items)))
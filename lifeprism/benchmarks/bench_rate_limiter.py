@@ -0,0 +1,139 @@
+"""
+共享限速器（优先级 + 熔断器）基准，使用离线假模型（FakeChatModel）模拟上游
+
+- priority: 后台分类以 --concurrency 个并发批次持续占满速率，同时每隔 --interval 秒发起一次交互请求，
+  对比交互请求按 background（旧行为，与分类同等排队）与按 interactive 取令牌时的等待延迟
+- breaker: 上游持续失败时分批请求 --batches 批，对比关闭 / 开启熔断器时实际发往上游的调用数与耗时
+
+每个场景使用独立的 RateLimiter 实例，不读取也不修改全局配置
+
+用法:
+    python -m lifeprism.benchmarks.bench_rate_limiter --rps 10 --latency 0.2
+"""
+import argparse
+import threading
+import time
+from typing import Dict, List
+
+from langchain_core.messages import HumanMessage
+
+from lifeprism.llm.llm_classify.utils import FakeChatModel, run_batches
+from lifeprism.llm.llm_classify.utils.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    RateLimiter,
+    RateLimiterCallback,
+)
+
+
+def _model(limiter: RateLimiter, priority: str, latency: float, failure_rate: float = 0.0) -> FakeChatModel:
+    return FakeChatModel(
+        latency=latency,
+        failure_rate=failure_rate,
+        rate_limiter=limiter.for_priority(priority),
+        callbacks=[RateLimiterCallback(limiter)],
+    )
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run_priority(
+    interactive_priority: str,
+    rps: float = 10,
+    latency: float = 0.2,
+    concurrency: int = 16,
+    requests: int = 10,
+    interval: float = 0.5,
+) -> Dict:
+    """后台批次占满速率时，交互请求的排队延迟（不含模型本身的 latency）"""
+    limiter = RateLimiter(requests_per_second=rps)
+    background = _model(limiter, PRIORITY_BACKGROUND, latency)
+    interactive = _model(limiter, interactive_priority, latency)
+    stop = threading.Event()
+
+    def flood():
+        index = 0
+        while not stop.is_set():
+            run_batches(
+                background, list(range(concurrency * 2)), lambda batch: [HumanMessage(content=f"分类 {index} {batch}")],
+                batch_size=1, node_name="bench", max_concurrency=concurrency, parse=lambda content: content,
+            )
+            index += 1
+
+    thread = threading.Thread(target=flood, daemon=True)
+    thread.start()
+    time.sleep(1.0)
+    waits = []
+    for i in range(requests):
+        started = time.perf_counter()
+        interactive.invoke([HumanMessage(content=f"对话 {i}")])
+        waits.append(max(0.0, time.perf_counter() - started - latency))
+        time.sleep(interval)
+    stop.set()
+    thread.join()
+    return {
+        "priority": interactive_priority,
+        "p50_ms": _percentile(waits, 0.5) * 1000,
+        "p95_ms": _percentile(waits, 0.95) * 1000,
+        "background_calls": background.calls,
+    }
+
+
+def run_breaker(
+    failure_threshold: int,
+    batches: int = 40,
+    concurrency: int = 4,
+    latency: float = 0.2,
+) -> Dict:
+    """上游持续失败时分批请求的上游调用数与耗时（每批最多尝试 3 次，重试退避缩短为 0.1s）"""
+    limiter = RateLimiter(failure_threshold=failure_threshold, cooldown_seconds=30)
+    model = _model(limiter, PRIORITY_BACKGROUND, latency, failure_rate=1.0)
+    started = time.perf_counter()
+    outcomes = run_batches(
+        model, list(range(batches)), lambda batch: [HumanMessage(content=f"分类 {batch}")],
+        batch_size=1, node_name="bench", max_concurrency=concurrency, retry_delay=0.1,
+        parse=lambda content: content,
+    )
+    return {
+        "failure_threshold": failure_threshold,
+        "upstream_calls": model.calls,
+        "failed_batches": sum(1 for outcome in outcomes if not outcome.ok),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def format_results(priority: List[Dict], breaker: List[Dict]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'interactive as':>14} {'wait_p50_ms':>11} {'wait_p95_ms':>11} {'bg_calls':>8}"]
+    for r in priority:
+        lines.append(f"{r['priority']:>14} {r['p50_ms']:>11.0f} {r['p95_ms']:>11.0f} {r['background_calls']:>8}")
+    lines.append("")
+    lines.append(f"{'breaker':>14} {'upstream_calls':>14} {'failed_batches':>14} {'seconds':>8}")
+    for r in breaker:
+        label = f"after {r['failure_threshold']}" if r['failure_threshold'] > 0 else "off"
+        lines.append(f"{label:>14} {r['upstream_calls']:>14} {r['failed_batches']:>14} {r['seconds']:>8.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="共享限速器基准（离线假模型）")
+    parser.add_argument("--rps", type=float, default=10, help="请求速率上限（次/秒）")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次调用的模拟延迟（秒）")
+    parser.add_argument("--concurrency", type=int, default=16, help="后台分类的并发批次数")
+    parser.add_argument("--requests", type=int, default=10, help="交互请求次数")
+    parser.add_argument("--batches", type=int, default=40, help="熔断场景的批次数")
+    args = parser.parse_args()
+
+    # 熔断场景的批次按预期失败，不输出失败日志
+    logging.disable(logging.ERROR)
+    priority_results = [
+        run_priority(priority, args.rps, args.latency, args.concurrency, args.requests)
+        for priority in (PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE)
+    ]
+    breaker_results = [run_breaker(threshold, args.batches, latency=args.latency) for threshold in (0, 5)]
+    print(format_results(priority_results, breaker_results))
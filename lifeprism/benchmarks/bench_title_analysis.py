@@ -0,0 +1,139 @@
+"""
+标题分析（ClassifyGraph.get_titles）基准：每次同步的 LLM 调用次数与墙钟耗时
+
+用注入延迟的离线假模型（FakeChatModel）模拟连续多次同步，每次同步的长时长多用途条目中
+有 --repeat 比例的标题在之前的同步中出现过，其余为新标题（同一次同步内也有重复标题）：
+
+- legacy: 旧版 get_titles，逐条 chat_model.invoke（无去重、无持久化）
+- batched: fill_title_analyses，先查 title_analysis 表，缺失的标题去重后每批多条并发请求
+
+标题分析表写入临时目录下的空 LifeWatch 数据库
+
+用法:
+    python -m lifeprism.benchmarks.bench_title_analysis --items 60 --syncs 3 --latency 0.3
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from lifeprism.llm.llm_classify.schemas.classify_shemas import LogItem
+from lifeprism.llm.llm_classify.utils import FakeChatModel, fill_title_analyses
+from lifeprism.storage import DatabaseManager, LWBaseDataProvider
+from lifeprism.storage.lw_table_manager import LWTableManager
+
+_SITES = ["YouTube", "哔哩哔哩", "GitHub", "知乎", "Stack Overflow", "飞书文档"]
+_TOPICS = ["python 异步编程", "考研数学", "番剧", "周报", "pandas 性能", "机器学习公开课", "游戏实况", "需求评审"]
+
+
+def _make_syncs(items: int, syncs: int, repeat: float, seed: int = 42) -> List[List[LogItem]]:
+    """生成每次同步的长时长多用途条目（标题重复率约为 repeat）"""
+    rng = random.Random(seed)
+    seen: List[str] = []
+    counter = 0
+    result = []
+    for _ in range(syncs):
+        batch = []
+        for i in range(items):
+            if seen and rng.random() < repeat:
+                title = rng.choice(seen)
+            else:
+                counter += 1
+                title = f"{rng.choice(_TOPICS)} 第{counter}集 - {rng.choice(_SITES)}"
+                seen.append(title)
+            batch.append(LogItem(id=i, app="chrome", duration=3600 + i, title=title))
+        result.append(batch)
+    return result
+
+
+def _legacy_get_titles(chat_model, items: List[LogItem]) -> None:
+    """旧版 get_titles：每个有标题的条目单独 invoke"""
+    system_message = SystemMessage(content="""
+        你是一个通过网络搜索分析的助手,依据网络搜索结果和title分析用户的活动，要求结果在30字以内
+        # 输出格式:str 内容为:用户活动
+        """)
+    for item in items:
+        if item.title:
+            result = chat_model.invoke([system_message, HumanMessage(content=f"""搜索并分析{item.title}""")])
+            item.title_analysis = result.content
+
+
+def run_benchmark(
+    items: int = 60,
+    syncs: int = 3,
+    repeat: float = 0.5,
+    latency: float = 0.3,
+    concurrency: int = 4
+) -> List[Dict]:
+    """
+    Returns:
+        List[Dict]: 每次同步一条 {sync, items, distinct, legacy_calls, legacy_seconds,
+            batched_calls, batched_seconds, analyzed, filled}
+    """
+    plan = _make_syncs(items, syncs, repeat)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        db = DatabaseManager(DB_PATH=str(Path(workdir) / "lw.db"))
+        LWTableManager(db).init_database()
+        provider = LWBaseDataProvider(db)
+
+        for index, sync_items in enumerate(plan, start=1):
+            legacy_model = FakeChatModel(latency=latency)
+            legacy_items = [item.model_copy() for item in sync_items]
+            started = time.perf_counter()
+            _legacy_get_titles(legacy_model, legacy_items)
+            legacy_seconds = time.perf_counter() - started
+
+            batched_model = FakeChatModel(latency=latency)
+            batched_items = [item.model_copy() for item in sync_items]
+            started = time.perf_counter()
+            filled = fill_title_analyses(
+                batched_items, chat_model=batched_model, data_provider=provider, max_concurrency=concurrency
+            )
+            batched_seconds = time.perf_counter() - started
+
+            results.append({
+                "sync": index,
+                "items": len(sync_items),
+                "distinct": len({item.title for item in sync_items}),
+                "legacy_calls": legacy_model.calls,
+                "legacy_seconds": legacy_seconds,
+                "batched_calls": batched_model.calls,
+                "batched_seconds": batched_seconds,
+                "analyzed": sum(1 for item in batched_items if item.title_analysis),
+                "filled": len(filled),
+            })
+    return results
+
+
+def format_results(results: List[Dict]) -> str:
+    """格式化为文本表格"""
+    lines = [
+        f"{'sync':>4} {'items':>6} {'distinct':>8} {'legacy_calls':>12} {'legacy_s':>9} "
+        f"{'batched_calls':>13} {'batched_s':>9} {'analyzed':>8}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r['sync']:>4} {r['items']:>6} {r['distinct']:>8} {r['legacy_calls']:>12} {r['legacy_seconds']:>9.2f} "
+            f"{r['batched_calls']:>13} {r['batched_seconds']:>9.2f} {r['analyzed']:>8}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="标题分析基准（离线假模型）")
+    parser.add_argument("--items", type=int, default=60, help="每次同步的长时长多用途条目数")
+    parser.add_argument("--syncs", type=int, default=3, help="模拟的连续同步次数")
+    parser.add_argument("--repeat", type=float, default=0.5, help="标题在之前出现过的比例")
+    parser.add_argument("--latency", type=float, default=0.3, help="每次调用的模拟延迟（秒）")
+    parser.add_argument("--concurrency", type=int, default=4, help="批量请求的最大并发数")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(format_results(run_benchmark(args.items, args.syncs, args.repeat, args.latency, args.concurrency)))
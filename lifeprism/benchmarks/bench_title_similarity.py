@@ -0,0 +1,130 @@
+"""
+近似重复标题索引（MinHash/LSH）基准
+
+构造 N 条已分类的合成标题（随机词组合 + 站点后缀，分类由站点与首词决定）建立索引，然后查询两类标题：
+- near: 已分类标题替换一个非首词（同一系列的不同集、同一项目的不同文档），应沿用原分类
+- novel: 全新随机标题，理想情况下不应命中
+
+对每个相似度阈值统计命中率与命中结果的分类准确率，并给出索引构建耗时与单条查询延迟（p50 / p99）
+
+用法:
+    python -m lifeprism.benchmarks.bench_title_similarity --titles 100000
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from lifeprism.processors.components.title_similarity_index import TitleSimilarityIndex
+
+_SYLLABLES = "ba be bi bo bu ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu".split()
+_HANZI = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处府研"
+_SITES = ["YouTube", "哔哩哔哩", "GitHub", "知乎", "飞书文档", "Google 搜索", "微信读书", "Notion"]
+_APPS = ["chrome", "msedge"]
+
+# (app, title, label)
+TitleRecord = Tuple[str, str, tuple]
+
+
+class _TitleGenerator:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        rng = self.rng
+        self.vocab = (
+            ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(3000)]
+            + ["".join(rng.choice(_HANZI) for _ in range(2)) for _ in range(3000)]
+        )
+
+    @staticmethod
+    def label(words: List[str], site: str) -> tuple:
+        return (f"c-{_SITES.index(site) % 4}", f"s-{sum(map(ord, words[0])) % 3}", None)
+
+    def make(self) -> TitleRecord:
+        rng = self.rng
+        words = [rng.choice(self.vocab) for _ in range(rng.randint(3, 7))]
+        site = rng.choice(_SITES)
+        return rng.choice(_APPS), f"{' '.join(words)} - {site}", self.label(words, site)
+
+    def near(self, record: TitleRecord) -> TitleRecord:
+        app, title, label = record
+        body, site = title.rsplit(" - ", 1)
+        words = body.split()
+        words[self.rng.randrange(1, len(words))] = self.rng.choice(self.vocab)
+        return app, f"{' '.join(words)} - {site}", label
+
+
+def run_benchmark(
+    titles: int = 100000,
+    queries: int = 2000,
+    thresholds: Sequence[float] = (0.6, 0.7, 0.75, 0.8, 0.9),
+    seed: int = 42
+) -> Dict:
+    """
+    Returns:
+        Dict: {titles, build_seconds, p50_ms, p99_ms, thresholds: [{threshold, near_hit, near_accuracy, novel_hit}]}
+    """
+    generator = _TitleGenerator(seed)
+    records = [generator.make() for _ in range(titles)]
+    index = TitleSimilarityIndex()
+    start = time.perf_counter()
+    for app, title, label in records:
+        index.add(app, title, label)
+    build_seconds = time.perf_counter() - start
+
+    near = [generator.near(record) for record in generator.rng.sample(records, queries)]
+    novel = [generator.make() for _ in range(queries)]
+
+    latencies = []
+    rows = []
+    for threshold in thresholds:
+        near_hits = near_correct = novel_hits = 0
+        for app, title, label in near:
+            start = time.perf_counter()
+            match = index.query(app, title, threshold)
+            latencies.append(time.perf_counter() - start)
+            if match:
+                near_hits += 1
+                near_correct += match[0] == label
+        for app, title, _ in novel:
+            start = time.perf_counter()
+            match = index.query(app, title, threshold)
+            latencies.append(time.perf_counter() - start)
+            novel_hits += match is not None
+        rows.append({
+            "threshold": threshold,
+            "near_hit": near_hits / queries,
+            "near_accuracy": near_correct / near_hits if near_hits else 0.0,
+            "novel_hit": novel_hits / queries,
+        })
+
+    latencies.sort()
+    return {
+        "titles": len(index),
+        "build_seconds": build_seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "thresholds": rows,
+    }
+
+
+def format_results(result: Dict) -> str:
+    """格式化为文本表格"""
+    lines = [
+        f"索引 {result['titles']} 条标题，构建 {result['build_seconds']:.1f} s，"
+        f"查询 p50 {result['p50_ms']:.3f} ms / p99 {result['p99_ms']:.3f} ms",
+        f"{'threshold':>9} {'near_hit':>9} {'near_acc':>9} {'novel_hit':>10}",
+    ]
+    for row in result['thresholds']:
+        lines.append(
+            f"{row['threshold']:>9.2f} {row['near_hit']:>9.1%} {row['near_accuracy']:>9.1%} {row['novel_hit']:>10.1%}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="近似重复标题索引基准")
+    parser.add_argument("--titles", type=int, default=100000, help="索引中的已分类标题数")
+    parser.add_argument("--queries", type=int, default=2000, help="每类查询的条数")
+    args = parser.parse_args()
+
+    print(format_results(run_benchmark(args.titles, args.queries)))
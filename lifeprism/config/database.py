@@ -2,6 +2,43 @@
 数据库配置模块
 定义数据库表结构的完整元数据
 """
+
+"""
+分类缓存表的写入版本号
+multi_purpose_map_cache / single_purpose_map_cache 的任何 INSERT / UPDATE / DELETE 都由触发器递增 version，
+进程内的派生索引据此发现未经通知的写入（updated_at 只精确到秒，同一秒内的更新无法区分）
+"""
+MAP_CACHE_VERSION_CONFIG = {
+    'table_name': 'map_cache_version',
+    'columns': {
+        'id': {
+            'type': 'INTEGER',
+            'constraints': ['PRIMARY KEY'],
+            'comment': '固定为 1（单行表）'
+        },
+        'version': {
+            'type': 'INTEGER',
+            'constraints': ['NOT NULL', 'DEFAULT 0'],
+            'comment': '分类缓存表的累计写入次数'
+        }
+    },
+    'table_constraints': [],
+    'indexes': [],
+}
+
+
+def _map_cache_version_triggers(table_name: str) -> list:
+    """分类缓存表写入后递增 map_cache_version 的触发器"""
+    bump = (
+        "INSERT INTO map_cache_version (id, version) VALUES (1, 1) "
+        "ON CONFLICT(id) DO UPDATE SET version = version + 1"
+    )
+    return [
+        {'name': f'trg_{table_name}_{event.lower()}_version', 'event': f'AFTER {event}', 'body': bump}
+        for event in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
 """
 2026-1-2
 重构cache表,将原来的表分为两个表
@@ -60,7 +97,8 @@ MULTI_PURPOSE_MAP_CACHE_CONFIG = {
     'table_constraints': ['UNIQUE (app, title, state)'],  # 唯一约束：保证数据不重复
     'indexes': [],
     'timestamps': True,  # 自动添加 created_at, updated_at
-    'update_at': True
+    'update_at': True,
+    'triggers': _map_cache_version_triggers('multi_purpose_map_cache'),
 }
 
 SINGLE_PURPOSE_MAP_CACHE_CONFIG= {
@@ -110,7 +148,8 @@ SINGLE_PURPOSE_MAP_CACHE_CONFIG= {
     'table_constraints': ['UNIQUE (app, state)'],  # 唯一约束：保证数据不重复
     'indexes': [],
     'timestamps': True,  # 自动添加 created_at, updated_at
-    'update_at': True
+    'update_at': True,
+    'triggers': _map_cache_version_triggers('single_purpose_map_cache'),
 }
 category_map_cache_CONFIG = {
     'table_name': 'category_map_cache',
@@ -688,6 +727,61 @@ CHAT_SESSION_CONFIG = {
 }
 
 
+# 聊天消息表配置（只追加，每轮对话结束时写入本轮的提问与回答；会话历史从此表分页读取）
+CHAT_MESSAGE_CONFIG = {
+    'table_name': 'chat_message',
+    'columns': {
+        'id': {
+            'type': 'INTEGER',
+            'constraints': ['PRIMARY KEY', 'AUTOINCREMENT'],
+            'comment': '自增主键'
+        },
+        'session_id': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '会话ID（chat_session.id）'
+        },
+        'seq': {
+            'type': 'INTEGER',
+            'constraints': ['NOT NULL'],
+            'comment': '会话内的消息序号（从1开始递增，作为分页游标）'
+        },
+        'role': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '消息角色: user / assistant / system'
+        },
+        'content': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '消息内容'
+        },
+        'timestamp': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '消息时间（ISO格式）'
+        },
+        'input_tokens': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '输入 token 数（回答消息记录本轮对话的使用量，提问消息为 0）'
+        },
+        'output_tokens': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '输出 token 数'
+        },
+        'total_tokens': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '总 token 数'
+        }
+    },
+    'table_constraints': ['UNIQUE (session_id, seq)'],
+    'timestamps': False  # 使用自定义时间戳字段
+}
+
+
 # Timeline 自定义时间块表配置（用户手动添加的活动记录）
 TIMELINE_CUSTOM_BLOCK_CONFIG = {
     'table_name': 'timeline_custom_block',
@@ -1107,9 +1201,272 @@ TIME_PARADOXES_CONFIG={
 
 
 
+# 分段回填任务表配置（长时间范围的历史数据导入）
+SYNC_BACKFILL_CONFIG = {
+    'table_name': 'sync_backfill',
+    'columns': {
+        'id': {
+            'type': 'TEXT',
+            'constraints': ['PRIMARY KEY'],
+            'comment': '回填任务 ID（格式：bf-{uuid[:8]}）'
+        },
+        'start_time': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '回填开始时间 YYYY-MM-DD HH:MM:SS'
+        },
+        'end_time': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '回填结束时间 YYYY-MM-DD HH:MM:SS'
+        },
+        'window_size': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '窗口粒度（day / week）'
+        },
+        'auto_classify': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 1'],
+            'comment': '是否自动分类新应用'
+        },
+        'status': {
+            'type': 'TEXT',
+            'constraints': ["DEFAULT 'pending'"],
+            'comment': '状态（pending / running / completed / failed / cancelled）'
+        }
+    },
+    'table_constraints': [],
+    'indexes': [
+        {'name': 'idx_sync_backfill_range', 'columns': ['start_time', 'end_time', 'window_size']}
+    ],
+    'timestamps': True,
+    'update_at': True
+}
+
+
+# 分段回填窗口进度表配置
+SYNC_BACKFILL_WINDOW_CONFIG = {
+    'table_name': 'sync_backfill_window',
+    'columns': {
+        'id': {
+            'type': 'INTEGER',
+            'constraints': ['PRIMARY KEY', 'AUTOINCREMENT'],
+            'comment': '自增主键'
+        },
+        'backfill_id': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '所属回填任务 ID（关联 sync_backfill.id）'
+        },
+        'window_start': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '窗口开始时间 YYYY-MM-DD HH:MM:SS'
+        },
+        'window_end': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '窗口结束时间 YYYY-MM-DD HH:MM:SS'
+        },
+        'status': {
+            'type': 'TEXT',
+            'constraints': ["DEFAULT 'pending'"],
+            'comment': '状态（pending / running / completed / failed）'
+        },
+        'saved_events': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '该窗口保存的事件数'
+        },
+        'classified_apps': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '该窗口新分类的应用数'
+        },
+        'error': {
+            'type': 'TEXT',
+            'constraints': ['DEFAULT NULL'],
+            'comment': '失败原因'
+        }
+    },
+    'table_constraints': ['UNIQUE (backfill_id, window_start)'],
+    'indexes': [
+        {'name': 'idx_sync_backfill_window_status', 'columns': ['backfill_id', 'status']}
+    ],
+    'timestamps': True,
+    'update_at': True
+}
+
+
+# 待分类队列表配置（未命中分类缓存的 app / title，去重后持久化，由分类器在后台消费）
+PENDING_CLASSIFICATION_CONFIG = {
+    'table_name': 'pending_classification',
+    'columns': {
+        'id': {
+            'type': 'INTEGER',
+            'constraints': ['PRIMARY KEY', 'AUTOINCREMENT'],
+            'comment': '自增主键'
+        },
+        'app': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '标准化后的应用名'
+        },
+        'title': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL', "DEFAULT ''"],
+            'comment': '标准化后的标题（单用途应用为空字符串，按 app 去重）'
+        },
+        'is_multipurpose_app': {
+            'type': 'INTEGER',
+            'constraints': ['NOT NULL', 'DEFAULT 0'],
+            'comment': '是否为多用途应用'
+        },
+        'sample_title': {
+            'type': 'TEXT',
+            'constraints': ['DEFAULT NULL'],
+            'comment': '代表性标题（单用途应用分类时作为上下文）'
+        },
+        'first_seen': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '首次出现时间 YYYY-MM-DD HH:MM:SS'
+        },
+        'last_seen': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '最近出现时间 YYYY-MM-DD HH:MM:SS'
+        },
+        'total_duration': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '累计时长（秒），用于决定分类优先级'
+        },
+        'attempts': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '已尝试分类次数'
+        },
+        'last_error': {
+            'type': 'TEXT',
+            'constraints': ['DEFAULT NULL'],
+            'comment': '最近一次分类失败原因'
+        }
+    },
+    'table_constraints': ['UNIQUE (app, title, is_multipurpose_app)'],
+    'indexes': [
+        {'name': 'idx_pending_classification_priority', 'columns': ['attempts', 'total_duration']}
+    ],
+    'timestamps': True,
+    'update_at': True
+}
+
+
+APP_DESCRIPTION_CONFIG = {
+    'table_name': 'app_description',
+    'columns': {
+        'app_key': {
+            'type': 'TEXT',
+            'constraints': ['PRIMARY KEY'],
+            'comment': '归一化应用名（去除首尾空白、小写），同一应用的不同大小写共用一条描述'
+        },
+        'app': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '首次获取描述时的原始应用名'
+        },
+        'description': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '应用描述'
+        },
+        'source': {
+            'type': 'TEXT',
+            'constraints': ["DEFAULT 'llm'"],
+            'comment': '描述来源: llm / manual'
+        }
+    },
+    'timestamps': True,
+    'update_at': True
+}
+
+
+TITLE_ANALYSIS_CONFIG = {
+    'table_name': 'title_analysis',
+    'columns': {
+        'title_key': {
+            'type': 'TEXT',
+            'constraints': ['PRIMARY KEY'],
+            'comment': '归一化标题（去除首尾空白、合并连续空白、小写），不同应用中的同一标题共用一条分析'
+        },
+        'title': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '首次分析时的原始标题'
+        },
+        'analysis': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': '标题分析（用户活动描述，供多用途长时长分类使用）'
+        },
+        'source': {
+            'type': 'TEXT',
+            'constraints': ["DEFAULT 'llm'"],
+            'comment': '分析来源: llm / manual'
+        }
+    },
+    'timestamps': True,
+    'update_at': True
+}
+
+
+LLM_RESPONSE_CACHE_CONFIG = {
+    'table_name': 'llm_response_cache',
+    'columns': {
+        'cache_key': {
+            'type': 'TEXT',
+            'constraints': ['PRIMARY KEY'],
+            'comment': 'sha256(模型参数 + 提示词)，模型参数包含 model / temperature 等调用参数'
+        },
+        'model': {
+            'type': 'TEXT',
+            'constraints': ['DEFAULT NULL'],
+            'comment': '模型名称（便于按模型清理）'
+        },
+        'generations': {
+            'type': 'TEXT',
+            'constraints': ['NOT NULL'],
+            'comment': 'LangChain 序列化的生成结果列表'
+        },
+        'hit_count': {
+            'type': 'INTEGER',
+            'constraints': ['DEFAULT 0'],
+            'comment': '命中次数'
+        },
+        'expires_at': {
+            'type': 'REAL',
+            'constraints': ['NOT NULL'],
+            'comment': '过期时间（Unix 时间戳）'
+        },
+        'last_used_at': {
+            'type': 'REAL',
+            'constraints': ['NOT NULL'],
+            'comment': '最近写入或命中时间（Unix 时间戳），超出容量时最久未使用的先淘汰'
+        }
+    },
+    'indexes': [
+        {'name': 'idx_llm_response_cache_last_used', 'columns': ['last_used_at']},
+        {'name': 'idx_llm_response_cache_expires', 'columns': ['expires_at']}
+    ],
+    'timestamps': True
+}
+
+
 # 所有表配置的映射
 TABLE_CONFIGS = {
     'category_map_cache': category_map_cache_CONFIG,
+    'map_cache_version': MAP_CACHE_VERSION_CONFIG,
     'multi_purpose_map_cache': MULTI_PURPOSE_MAP_CACHE_CONFIG,
     'single_purpose_map_cache': SINGLE_PURPOSE_MAP_CACHE_CONFIG,
     'user_app_behavior_log': USER_APP_BEHAVIOR_LOG_CONFIG,
@@ -1122,6 +1479,7 @@ TABLE_CONFIGS = {
     'weekly_focus': WEEKLY_FOCUS_CONFIG,
     'goal': GOAL_CONFIG,
     'chat_session': CHAT_SESSION_CONFIG,
+    'chat_message': CHAT_MESSAGE_CONFIG,
     'timeline_custom_block': TIMELINE_CUSTOM_BLOCK_CONFIG,
     'task_pool_folder': TASK_POOL_FOLDER_CONFIG,
     'goal_stats': GOAL_STATS_CONFIG,
@@ -1130,6 +1488,12 @@ TABLE_CONFIGS = {
     'weekly_report': weekly_report_config,
     'monthly_report': monthly_report_config,
     'time_paradoxes': TIME_PARADOXES_CONFIG,
+    'sync_backfill': SYNC_BACKFILL_CONFIG,
+    'sync_backfill_window': SYNC_BACKFILL_WINDOW_CONFIG,
+    'pending_classification': PENDING_CLASSIFICATION_CONFIG,
+    'app_description': APP_DESCRIPTION_CONFIG,
+    'title_analysis': TITLE_ANALYSIS_CONFIG,
+    'llm_response_cache': LLM_RESPONSE_CACHE_CONFIG,
 }
 
 
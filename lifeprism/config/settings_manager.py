@@ -29,6 +29,8 @@ class SettingsManager:
     # 环境变量映射 (yaml_key -> env_var_name)
     ENV_VAR_MAPPING = {
         'api_key': 'LIFEWATCH_API_KEY',
+        'llm_backend': 'LIFEPRISM_LLM_BACKEND',
+        'llm_fixture_path': 'LIFEPRISM_LLM_FIXTURE_PATH',
     }
     
     # 默认配置值
@@ -46,6 +48,36 @@ class SettingsManager:
         'lw_db_path': '',
         'chat_db_path': '',
         'data_cleaning_threshold': 10,
+        'title_normalization': True,
+        'title_site_fallback': False,
+        'clean_workers': 0,
+        'llm_max_concurrency': 4,
+        'llm_requests_per_second': 5,
+        'llm_tokens_per_minute': 0,
+        'llm_interactive_reserve': 0.2,
+        'llm_circuit_failure_threshold': 5,
+        'llm_circuit_cooldown_seconds': 30,
+        'llm_cache_enabled': False,
+        'llm_cache_ttl_hours': 168,
+        'llm_cache_max_entries': 5000,
+        'llm_cache_max_temperature': 0.5,
+        'llm_backend': 'tongyi',
+        'llm_fixture_path': '',
+        'llm_fake_latency': 0.0,
+        'llm_batch_token_budget': 6000,
+        'llm_batch_max_output_tokens': 1500,
+        'local_classifier_mode': 'off',
+        'local_classifier_min_confidence': 0.9,
+        'local_classifier_min_examples': 50,
+        'title_similarity_mode': 'off',
+        'title_similarity_threshold': 0.7,
+        'sync_classify_token_budget': 30000,
+        'sync_classify_time_budget': 60,
+        'sync_pipeline_enabled': False,
+        'sync_pipeline_window_minutes': 60,
+        'chat_checkpoint_keep': 10,
+        'chat_vacuum_interval_minutes': 60,
+        'chat_history_token_window': 4000,
     }
     
     def __new__(cls) -> 'SettingsManager':
@@ -289,6 +321,126 @@ class SettingsManager:
     @property
     def data_cleaning_threshold(self) -> int:
         return self.get('data_cleaning_threshold')
+    
+    @property
+    def title_normalization(self) -> bool:
+        return self.get('title_normalization')
+    
+    @property
+    def title_site_fallback(self) -> bool:
+        return self.get('title_site_fallback')
+    
+    @property
+    def clean_workers(self) -> int:
+        return self.get('clean_workers')
+    
+    @property
+    def llm_max_concurrency(self) -> int:
+        return self.get('llm_max_concurrency')
+    
+    @property
+    def llm_requests_per_second(self) -> float:
+        return self.get('llm_requests_per_second')
+    
+    @property
+    def llm_tokens_per_minute(self) -> int:
+        return self.get('llm_tokens_per_minute')
+    
+    @property
+    def llm_interactive_reserve(self) -> float:
+        return self.get('llm_interactive_reserve')
+    
+    @property
+    def llm_circuit_failure_threshold(self) -> int:
+        return self.get('llm_circuit_failure_threshold')
+    
+    @property
+    def llm_circuit_cooldown_seconds(self) -> float:
+        return self.get('llm_circuit_cooldown_seconds')
+    
+    @property
+    def llm_cache_enabled(self) -> bool:
+        return self.get('llm_cache_enabled')
+    
+    @property
+    def llm_cache_ttl_hours(self) -> float:
+        return self.get('llm_cache_ttl_hours')
+    
+    @property
+    def llm_cache_max_entries(self) -> int:
+        return self.get('llm_cache_max_entries')
+    
+    @property
+    def llm_cache_max_temperature(self) -> float:
+        return self.get('llm_cache_max_temperature')
+    
+    @property
+    def llm_backend(self) -> str:
+        return self.get('llm_backend')
+    
+    @property
+    def llm_fixture_path(self) -> str:
+        return self.get('llm_fixture_path')
+    
+    @property
+    def llm_fake_latency(self) -> float:
+        return self.get('llm_fake_latency')
+    
+    @property
+    def llm_batch_token_budget(self) -> int:
+        return self.get('llm_batch_token_budget')
+    
+    @property
+    def llm_batch_max_output_tokens(self) -> int:
+        return self.get('llm_batch_max_output_tokens')
+    
+    @property
+    def local_classifier_mode(self) -> str:
+        return self.get('local_classifier_mode')
+    
+    @property
+    def local_classifier_min_confidence(self) -> float:
+        return self.get('local_classifier_min_confidence')
+    
+    @property
+    def local_classifier_min_examples(self) -> int:
+        return self.get('local_classifier_min_examples')
+    
+    @property
+    def title_similarity_mode(self) -> str:
+        return self.get('title_similarity_mode')
+    
+    @property
+    def title_similarity_threshold(self) -> float:
+        return self.get('title_similarity_threshold')
+    
+    @property
+    def sync_classify_token_budget(self) -> int:
+        return self.get('sync_classify_token_budget')
+    
+    @property
+    def sync_classify_time_budget(self) -> float:
+        return self.get('sync_classify_time_budget')
+    
+    @property
+    def sync_pipeline_enabled(self) -> bool:
+        return self.get('sync_pipeline_enabled')
+    
+    @property
+    def sync_pipeline_window_minutes(self) -> int:
+        return self.get('sync_pipeline_window_minutes')
+    
+    @property
+    def chat_checkpoint_keep(self) -> int:
+        return self.get('chat_checkpoint_keep')
+    
+    @property
+    def chat_vacuum_interval_minutes(self) -> float:
+        return self.get('chat_vacuum_interval_minutes')
+    
+    @property
+    def chat_history_token_window(self) -> int:
+        return self.get('chat_history_token_window')
 
 
 # 全局单例实例
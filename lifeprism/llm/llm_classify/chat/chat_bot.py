@@ -4,6 +4,7 @@ V1 版本聊天机器人,带记忆功能
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from lifeprism.llm.llm_classify.utils.create_model import create_ChatTongyiModel
+from lifeprism.llm.llm_classify.utils.rate_limiter import PRIORITY_INTERACTIVE
 from langchain.agents import create_agent
 from langchain.tools import tool, ToolRuntime
 from langgraph.checkpoint.memory import InMemorySaver
@@ -52,7 +53,8 @@ class ChatBot:
         self.chat_model = create_ChatTongyiModel(
             enable_search=enable_search,
             enable_streaming=enable_streaming,
-            enable_thinking=enable_thinking
+            enable_thinking=enable_thinking,
+            priority=PRIORITY_INTERACTIVE
         )
         self.system_prompt = "You are a helpful assistant."
         self.checkpointer = checkpointer or InMemorySaver()
@@ -118,7 +120,8 @@ class ChatBot:
         self.chat_model = create_ChatTongyiModel(
             enable_search=enable_search,
             enable_streaming=enable_streaming,
-            enable_thinking=enable_thinking
+            enable_thinking=enable_thinking,
+            priority=PRIORITY_INTERACTIVE
         )
         self.agent = create_agent(
             self.chat_model,
@@ -1,21 +1,34 @@
 """
 V2 ChatBot 改为使用graph 增加功能解说和相关功能解答
+
+会话相关的状态（thread_id、本轮使用的模型配置）随每次调用的 config 传入图中，
+同一个编译后的图可以同时服务多个会话的流式对话；同一会话的多轮对话按到达顺序串行执行
+
+历史增长控制：
+- 检查点只在每轮对话结束时写入一次（durability="exit"），每轮结束后只保留会话最新的
+  chat_checkpoint_keep 个检查点；vacuum() 压缩所有会话并回收数据库空间
+- 历史消息超过 chat_history_token_window 时，较早的消息合并为滚动摘要（summarize_history 节点），
+  提示词中只放摘要和最近的消息
 """
 from lifeprism.llm.llm_classify.schemas.chatbot_schemas import ChatBotSchemas
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.checkpoint.memory import InMemorySaver
-from typing import Optional, Union, AsyncGenerator, Dict, Any
+from typing import Optional, Union, AsyncGenerator, Dict, Any, Callable, Awaitable
+import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
 from lifeprism.llm.custom_prompt.common_prompt import intent_router_template,norm_chat_template
 from lifeprism.llm.custom_prompt.chatbot_prompt.feature_introduce import intro_template,intro_router_template
-from lifeprism.llm.llm_classify.utils import create_ChatTongyiModel
+from lifeprism.llm.llm_classify.utils import create_ChatTongyiModel, PRIORITY_INTERACTIVE
+from lifeprism.llm.llm_classify.utils.token_budget import estimate_tokens, estimate_messages_tokens
 import json
 import traceback
 from datetime import datetime
 from lifeprism.utils import get_logger
 import logging
 from langchain_core.messages import HumanMessage, AIMessage,AIMessageChunk,ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph
 from langgraph.types import RetryPolicy
 from lifeprism.llm.llm_classify.tools.database_tools import get_daily_stats,get_multi_days_stats
@@ -49,8 +62,49 @@ class LLMParseError(Exception):
         return base_msg
 
 
-def get_history_messages(messages: list[HumanMessage| AIMessage]):
-    history_messages = ""
+# 滚动摘要调用的标记：不作为回答内容流式输出
+HISTORY_SUMMARY_TAG = "history_summary"
+
+HISTORY_SUMMARY_TEMPLATE = """
+你是对话记录整理助手。请把"已有摘要"和"新增对话"合并为一份新的摘要，供后续对话参考。
+要求:
+- 保留用户的目标、偏好、提到的数据和结论、尚未解决的问题
+- 省略寒暄和重复内容
+- 不超过{max_chars}字，直接输出摘要正文
+
+# 已有摘要
+{summary}
+
+# 新增对话
+{history_messages}
+"""
+
+# 删除会话中除最新 keep 个以外的检查点（按 checkpoint_ns 分别保留）
+_COMPACT_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints
+WHERE thread_id = ? AND (checkpoint_ns, checkpoint_id) IN (
+    SELECT checkpoint_ns, checkpoint_id FROM (
+        SELECT checkpoint_ns, checkpoint_id,
+               ROW_NUMBER() OVER (PARTITION BY checkpoint_ns ORDER BY checkpoint_id DESC) AS rn
+        FROM checkpoints WHERE thread_id = ?
+    ) WHERE rn > ?
+)
+"""
+
+# 删除所属检查点已不存在的写入记录
+_COMPACT_WRITES_SQL = """
+DELETE FROM writes
+WHERE thread_id = ? AND NOT EXISTS (
+    SELECT 1 FROM checkpoints c
+    WHERE c.thread_id = writes.thread_id
+      AND c.checkpoint_ns = writes.checkpoint_ns
+      AND c.checkpoint_id = writes.checkpoint_id
+)
+"""
+
+
+def get_history_messages(messages: list[HumanMessage| AIMessage], summary: Optional[str] = None):
+    history_messages = f"(更早对话的摘要) {summary}\n" if summary else ""
     for i,msg in enumerate(messages):
         if isinstance(msg, HumanMessage):
             history_messages += f"{i}. User: {msg.content}\n"
@@ -70,8 +124,18 @@ class ChatBot:
         self.llm_streaming = self.get_new_agent(enable_search=False,
                             enable_thinking=False,
                             enable_streaming=True,temperature=0.5)
+        # 默认会话（set_thread_id 设置，供命令行等单会话场景使用）；服务端每次调用显式传入 thread_id
         self.config: Optional[dict] = None
         self.thread_id = None
+        # 每个会话一把锁：不同会话并发执行，同一会话的多轮对话串行写入检查点
+        self._thread_locks: Dict[str, asyncio.Lock] = {}
+        # 本轮对话的最终回答（回答节点写入，本轮结束时取出）
+        self.turn_answers: Dict[str, str] = {}
+        # 每轮对话结束时（持有会话锁）回调 on_turn_end(thread_id, record)，
+        # record: {question, answer, started_at, finished_at, usage}，answer 为 None 表示本轮未生成回答
+        self.on_turn_end: Optional[Callable[[str, Dict[str, Any]], None]] = None
+        # 每轮对话开始时（持有会话锁，本轮写入检查点之前）等待 on_turn_start(thread_id)
+        self.on_turn_start: Optional[Callable[[str], Awaitable[None]]] = None
         # self._is_persistent = isinstance(self.checkpointer, AsyncSqliteSaver)
         # 这里的feature_list必须与lifewatch\llm\custom_prompt\common_prompt.py
         # 中的intent_router_template中的feature_list保持一致
@@ -83,7 +147,7 @@ class ChatBot:
         构建对话流程图
         
         流程：
-        START → intent_router → (根据意图分支)
+        START → summarize_history → intent_router → (根据意图分支)
             - "lifeprism软件使用和讲解" → feat_intro_router → feature_introduce → END
             - 其他意图 → norm_chat → (是否有工具调用?)
                 - 有 → tool_node → tool_result_handler → END
@@ -92,6 +156,7 @@ class ChatBot:
         from langgraph.graph import START, END
         
         # 添加节点
+        self.graph.add_node("summarize_history", self.summarize_history)
         self.graph.add_node("intent_router",
                             self.intent_router,
                             retry_policy=RetryPolicy(retry_on=[LLMParseError],max_attempts=2))
@@ -124,8 +189,9 @@ class ChatBot:
             return END
         
         # 添加边
-        # START → intent_router
-        self.graph.add_edge(START, "intent_router")
+        # START → summarize_history → intent_router
+        self.graph.add_edge(START, "summarize_history")
+        self.graph.add_edge("summarize_history", "intent_router")
         
         # intent_router → 条件分支
         self.graph.add_conditional_edges(
@@ -189,18 +255,19 @@ class ChatBot:
                 "search_count": 0
             }
     
-    def reset_turn_usage(self):
+    def reset_turn_usage(self, thread_id: str = None):
         """
         清空本轮对话的 tokens_usage（每次用户发送消息时调用）
         """
-        if self.thread_id and self.thread_id in self.tokens_usage:
-            self.tokens_usage[self.thread_id] = {
+        thread_id = thread_id or self.thread_id
+        if thread_id and thread_id in self.tokens_usage:
+            self.tokens_usage[thread_id] = {
                 "input_tokens": 0,
                 "output_tokens": 0,
                 "total_tokens": 0,
                 "search_count": 0
             }
-            logger.debug(f"清空本轮对话使用量: {self.thread_id}")
+            logger.debug(f"清空本轮对话使用量: {thread_id}")
 
     def set_thread_id(self, thread_id: str):
         """
@@ -213,6 +280,198 @@ class ChatBot:
         self.config = {"configurable": {"thread_id": thread_id}}
         self.thread_id = thread_id
         self.init_tokens_usage(thread_id)
+
+    def make_config(
+        self,
+        thread_id: str = None,
+        enable_search: Optional[bool] = None,
+        enable_thinking: Optional[bool] = None
+    ) -> dict:
+        """
+        构建单次调用的 config（不修改实例状态）
+
+        Args:
+            thread_id: 会话ID，None 时使用 set_thread_id 设置的默认会话
+            enable_search / enable_thinking: 本轮流式回答的模型配置，None 时使用 llm_streaming
+        """
+        thread_id = thread_id or self.thread_id
+        if thread_id is None:
+            raise ValueError("请先调用 set_thread_id() 或传入 thread_id 参数")
+        self.init_tokens_usage(thread_id)
+        configurable = {"thread_id": thread_id}
+        if enable_search is not None:
+            configurable["enable_search"] = enable_search
+        if enable_thinking is not None:
+            configurable["enable_thinking"] = enable_thinking
+        return {"configurable": configurable}
+
+    @staticmethod
+    def _thread_id_of(config: Optional[RunnableConfig]) -> Optional[str]:
+        return ((config or {}).get("configurable") or {}).get("thread_id")
+
+    def _streaming_llm(self, config: Optional[RunnableConfig]):
+        """本轮使用的流式模型：config 中带模型配置时从模型池获取，否则使用 llm_streaming"""
+        configurable = (config or {}).get("configurable") or {}
+        if "enable_search" not in configurable and "enable_thinking" not in configurable:
+            return self.llm_streaming
+        return self.get_new_agent(enable_search=configurable.get("enable_search", False),
+                            enable_thinking=configurable.get("enable_thinking", False),
+                            enable_streaming=True,temperature=0.5)
+
+    def thread_lock(self, thread_id: str) -> asyncio.Lock:
+        """会话锁：对话的整个过程（含 on_turn_start / on_turn_end 回调）持有，读写会话相关持久化数据的调用方也可持有"""
+        lock = self._thread_locks.get(thread_id)
+        if lock is None:
+            lock = self._thread_locks[thread_id] = asyncio.Lock()
+        return lock
+
+    def forget_thread(self, thread_id: str):
+        """释放会话在内存中的使用量记录与锁（会话删除后调用）"""
+        self.tokens_usage.pop(thread_id, None)
+        self.session_tokens_usage.pop(thread_id, None)
+        self.turn_answers.pop(thread_id, None)
+        lock = self._thread_locks.get(thread_id)
+        if lock is not None and not lock.locked():
+            del self._thread_locks[thread_id]
+
+    async def delete_thread(self, thread_id: str):
+        """删除会话的全部检查点与写入记录，并释放内存中的记录（等待进行中的对话结束）"""
+        async with self.thread_lock(thread_id):
+            await self.checkpointer.adelete_thread(thread_id)
+        self.forget_thread(thread_id)
+        logger.debug(f"已删除会话检查点: {thread_id}")
+
+    async def compact_thread(self, thread_id: str, keep: Optional[int] = None) -> int:
+        """
+        只保留会话最新的 keep 个检查点，删除更早的检查点及其写入记录
+
+        仅 AsyncSqliteSaver 生效（InMemorySaver 随进程释放）
+
+        Args:
+            thread_id: 会话ID
+            keep: 保留的检查点数，None 时读取配置 chat_checkpoint_keep，<= 0 时不压缩
+
+        Returns:
+            int: 删除的检查点数
+        """
+        keep = settings.chat_checkpoint_keep if keep is None else keep
+        if not keep or keep <= 0 or not isinstance(self.checkpointer, AsyncSqliteSaver):
+            return 0
+        await self.checkpointer.setup()
+        async with self.checkpointer.lock, self.checkpointer.conn.cursor() as cur:
+            await cur.execute(_COMPACT_CHECKPOINTS_SQL, (thread_id, thread_id, keep))
+            deleted = max(cur.rowcount, 0)
+            await cur.execute(_COMPACT_WRITES_SQL, (thread_id,))
+            await self.checkpointer.conn.commit()
+        if deleted:
+            logger.debug(f"压缩会话 {thread_id} 的检查点: 删除 {deleted} 个")
+        return deleted
+
+    def _remember_answer(self, config: Optional[RunnableConfig], result):
+        """记录本轮的最终回答（供 on_turn_end 使用）"""
+        thread_id = self._thread_id_of(config) or self.thread_id
+        self.turn_answers[thread_id] = result.content if isinstance(result.content, str) else str(result.content)
+
+    async def _start_turn(self, thread_id: str) -> str:
+        """
+        每轮对话开始时（调用方持有会话锁）清空本轮使用量并等待 on_turn_start（失败只记录日志）
+        
+        Returns:
+            str: 本轮开始时间
+        """
+        started_at = datetime.now().isoformat()
+        self.reset_turn_usage(thread_id)
+        if self.on_turn_start is not None:
+            try:
+                await self.on_turn_start(thread_id)
+            except Exception as e:
+                logger.warning(f"会话 {thread_id} 的 on_turn_start 回调失败: {e}")
+        return started_at
+
+    async def _finish_turn(self, thread_id: str, user_input: str, started_at: str):
+        """
+        每轮对话结束后（调用方持有会话锁，在 finally 中调用：出错或被取消的一轮同样回调）
+        压缩检查点并回调 on_turn_end（失败只记录日志，不影响对话）
+        """
+        try:
+            await self.compact_thread(thread_id)
+        except Exception as e:
+            logger.warning(f"压缩会话 {thread_id} 的检查点失败: {e}")
+        answer = self.turn_answers.pop(thread_id, None)
+        if self.on_turn_end is None:
+            return
+        try:
+            self.on_turn_end(thread_id, {
+                "question": user_input,
+                "answer": answer,
+                "started_at": started_at,
+                "finished_at": datetime.now().isoformat(),
+                "usage": dict(self.tokens_usage.get(thread_id, {})),
+            })
+        except Exception as e:
+            logger.warning(f"会话 {thread_id} 的 on_turn_end 回调失败: {e}")
+
+    async def vacuum(self, keep: Optional[int] = None) -> Dict[str, int]:
+        """
+        压缩所有会话的检查点（跳过正在对话的会话），再 VACUUM 回收数据库文件空间
+
+        Args:
+            keep: 每个会话保留的检查点数，None 时读取配置 chat_checkpoint_keep
+
+        Returns:
+            Dict: {threads, deleted_checkpoints, size_before, size_after}（大小单位为字节）
+        """
+        result = {"threads": 0, "deleted_checkpoints": 0, "size_before": 0, "size_after": 0}
+        if not isinstance(self.checkpointer, AsyncSqliteSaver):
+            return result
+        await self.checkpointer.setup()
+        conn = self.checkpointer.conn
+
+        async def database_size() -> int:
+            async with conn.execute("PRAGMA page_count") as cur:
+                page_count = (await cur.fetchone())[0]
+            async with conn.execute("PRAGMA page_size") as cur:
+                page_size = (await cur.fetchone())[0]
+            return page_count * page_size
+
+        result["size_before"] = await database_size()
+        async with conn.execute("SELECT DISTINCT thread_id FROM checkpoints") as cur:
+            thread_ids = [row[0] for row in await cur.fetchall()]
+        result["threads"] = len(thread_ids)
+        for thread_id in thread_ids:
+            lock = self._thread_locks.get(thread_id)
+            if lock is not None and lock.locked():
+                continue
+            result["deleted_checkpoints"] += await self.compact_thread(thread_id, keep)
+
+        async with self.checkpointer.lock:
+            await conn.commit()
+            await conn.execute("VACUUM")
+            await conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        result["size_after"] = await database_size()
+        logger.info(
+            f"对话数据库整理完成: {result['threads']} 个会话，删除 {result['deleted_checkpoints']} 个检查点，"
+            f"{result['size_before'] / 1024:.0f}KB → {result['size_after'] / 1024:.0f}KB"
+        )
+        return result
+
+    @staticmethod
+    def _turn_input(user_input: str) -> dict:
+        """单轮对话的图输入（本轮字段传 None 清空上一轮的值）"""
+        return {
+            "messages": [HumanMessage(content=user_input)],
+            "current_human_message": user_input,
+            "intent": None,
+            "guide_content": None,
+            "tools_result": None
+        }
+
+    @staticmethod
+    def _history_for_prompt(main_state: ChatBotSchemas) -> str:
+        """提示词中的历史：滚动摘要 + 尚未并入摘要的消息"""
+        start = main_state.get("summarized_count") or 0
+        return get_history_messages(main_state["messages"][start:], main_state.get("history_summary"))
+
     def get_new_agent(self,enable_search:bool,enable_thinking:bool,enable_streaming:bool,temperature:float):
         """
         用于获取新的agent
@@ -220,10 +479,11 @@ class ChatBot:
         logger.debug(f"获取新的agent: enable_search={enable_search}, enable_thinking={enable_thinking}, enable_streaming={enable_streaming}, temperature={temperature}")
         return create_ChatTongyiModel(enable_search=enable_search,
                             enable_thinking=enable_thinking,
-                            enable_streaming=enable_streaming,temperature=temperature)
-    def update_usage(self, result):
+                            enable_streaming=enable_streaming,temperature=temperature,
+                            priority=PRIORITY_INTERACTIVE)
+    def update_usage(self, result, thread_id: str = None):
         """
-        更新 token 使用量
+        更新 token 使用量（thread_id 为 None 时记到默认会话）
         
         同时更新:
         - tokens_usage: 本轮对话使用量
@@ -245,15 +505,17 @@ class ChatBot:
         output_tokens = token_usage.get("output_tokens", 0)
         total_tokens = token_usage.get("total_tokens", 0)
         
+        thread_id = thread_id or self.thread_id
+        self.init_tokens_usage(thread_id)
         # 更新本轮对话使用量
-        self.tokens_usage[self.thread_id]["input_tokens"] += input_tokens
-        self.tokens_usage[self.thread_id]["output_tokens"] += output_tokens
-        self.tokens_usage[self.thread_id]["total_tokens"] += total_tokens
+        self.tokens_usage[thread_id]["input_tokens"] += input_tokens
+        self.tokens_usage[thread_id]["output_tokens"] += output_tokens
+        self.tokens_usage[thread_id]["total_tokens"] += total_tokens
         
         # 更新会话累计使用量
-        self.session_tokens_usage[self.thread_id]["input_tokens"] += input_tokens
-        self.session_tokens_usage[self.thread_id]["output_tokens"] += output_tokens
-        self.session_tokens_usage[self.thread_id]["total_tokens"] += total_tokens
+        self.session_tokens_usage[thread_id]["input_tokens"] += input_tokens
+        self.session_tokens_usage[thread_id]["output_tokens"] += output_tokens
+        self.session_tokens_usage[thread_id]["total_tokens"] += total_tokens
 
         
 
@@ -285,7 +547,53 @@ class ChatBot:
     # ===============================================================
     # nodes 
     # ===============================================================
-    async def intent_router(self,main_state:ChatBotSchemas)->ChatBotSchemas:
+    async def summarize_history(self,main_state:ChatBotSchemas,config:RunnableConfig = None)->ChatBotSchemas:
+        """
+        滚动摘要：未并入摘要的历史（不含本轮提问）超过 chat_history_token_window 时，
+        从最新的消息往前保留不超过半个窗口，更早的消息与已有摘要合并为新摘要（不超过 1/4 个窗口）
+        """
+        window = settings.chat_history_token_window
+        if not window or window <= 0:
+            return {}
+        messages = main_state["messages"][:-1]
+        start = main_state.get("summarized_count") or 0
+        summary = main_state.get("history_summary") or ""
+        dialog = lambda items: [m for m in items if isinstance(m, (HumanMessage, AIMessage))]
+        if estimate_tokens(summary) + estimate_messages_tokens(dialog(messages[start:])) <= window:
+            return {}
+
+        cut, kept = len(messages), 0
+        while cut > start:
+            kept += estimate_messages_tokens(dialog([messages[cut - 1]]))
+            if kept > window // 2:
+                break
+            cut -= 1
+        if cut == start:
+            cut = len(messages)
+
+        max_chars = max(100, window // 4)
+        prompt = HISTORY_SUMMARY_TEMPLATE.format(
+            max_chars=max_chars,
+            summary=summary or "无",
+            history_messages=get_history_messages(messages[start:cut]),
+        )
+        llm = self.get_new_agent(enable_search=False,
+                            enable_thinking=False,
+                            enable_streaming=False,temperature=0.3)
+        logger.debug(f"[summarize_history] 合并第 {start}~{cut} 条消息到摘要...")
+        try:
+            result = await llm.ainvoke(prompt, config={"tags": [TAG_NOSTREAM, HISTORY_SUMMARY_TAG]})
+            self.update_usage(result, self._thread_id_of(config))
+            summary = result.content.strip()[:max_chars]
+        except Exception as e:
+            # 摘要失败时沿用旧摘要，较早的消息仍移出提示词，保证提示词不超出窗口
+            logger.warning(f"[summarize_history] 生成摘要失败，沿用已有摘要: {e}")
+        return {
+            "history_summary": summary,
+            "summarized_count": cut
+        }
+
+    async def intent_router(self,main_state:ChatBotSchemas,config:RunnableConfig = None)->ChatBotSchemas:
         """
         意图识别
         """
@@ -303,7 +611,7 @@ class ChatBot:
             logger.error(f"[intent_router] LLM 调用失败: {e}")
             logger.error(f"[intent_router] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
         
         # 去掉 LLM 返回内容中的引号（LLM 有时会返回带引号的字符串）
         intent_content = result.content.strip().strip('"').strip("'")
@@ -319,7 +627,7 @@ class ChatBot:
             "intent" : [intent_content]
         } 
     
-    async def feat_intro_router(self,main_state:ChatBotSchemas)->ChatBotSchemas:
+    async def feat_intro_router(self,main_state:ChatBotSchemas,config:RunnableConfig = None)->ChatBotSchemas:
         """
         功能介绍路由
         """
@@ -344,7 +652,7 @@ class ChatBot:
             logger.error(f"[feat_intro_router] 第一次路由 LLM 调用失败: {e}")
             logger.error(f"[feat_intro_router] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
         # 判断id_list是否包含在id中
         id_list = json.loads(result.content)
         logger.debug(f"路由结果: {id_list}")
@@ -373,7 +681,7 @@ class ChatBot:
             logger.error(f"[feat_intro_router] 第二次路由 LLM 调用失败: {e}")
             logger.error(f"[feat_intro_router] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
         id_list = json.loads(result.content)
         logger.debug(f"路由结果: {id_list}")
 
@@ -393,26 +701,27 @@ class ChatBot:
         logger.debug(f"获取的内容:\n{content}")
 
         
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
         logger.debug(f"功能介绍结果:\n{result.content}")
         # 打印 usage 统计
         logger.debug("\n=== Token Usage 统计 ===")
         # logger.debug(f"调用次数: {self.tokens_usage[self.thread_id]['call_count']}")
-        logger.debug(f"输入 Tokens: {self.tokens_usage[self.thread_id]['input_tokens']}")
-        logger.debug(f"输出 Tokens: {self.tokens_usage[self.thread_id]['output_tokens']}")
-        logger.debug(f"总 Tokens: {self.tokens_usage[self.thread_id]['total_tokens']}")
+        turn_usage = self.tokens_usage[self._thread_id_of(config) or self.thread_id]
+        logger.debug(f"输入 Tokens: {turn_usage['input_tokens']}")
+        logger.debug(f"输出 Tokens: {turn_usage['output_tokens']}")
+        logger.debug(f"总 Tokens: {turn_usage['total_tokens']}")
 
 
         return {
             "guide_content" : [content]
         } 
     
-    async def feature_introduce(self,main_state:ChatBotSchemas)->ChatBotSchemas:
+    async def feature_introduce(self,main_state:ChatBotSchemas,config:RunnableConfig = None)->ChatBotSchemas:
         """
         功能介绍
         """
         # 设置历史消息
-        history_messages = get_history_messages(main_state["messages"])
+        history_messages = self._history_for_prompt(main_state)
         prompt = intro_template.format(
             question=main_state["current_human_message"],
             guide_content=main_state["guide_content"][-1],
@@ -420,13 +729,14 @@ class ChatBot:
         )
         logger.debug(f"[feature_introduce] 调用 LLM...")
         try:
-            result = await self.llm_streaming.ainvoke(prompt)
+            result = await self._streaming_llm(config).ainvoke(prompt)
             logger.debug(f"[feature_introduce] LLM 返回 result type: {type(result)}")
         except Exception as e:
             logger.error(f"[feature_introduce] LLM 调用失败: {e}")
             logger.error(f"[feature_introduce] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
+        self._remember_answer(config, result)
         return {
             "messages" : [result]
         }
@@ -434,16 +744,16 @@ class ChatBot:
     # 可用工具集合（用于验证 LLM 返回的工具调用）
     VALID_TOOLS = {"get_daily_stats","get_multi_days_stats"}
     
-    async def norm_chat(self, main_state: ChatBotSchemas) -> ChatBotSchemas:
+    async def norm_chat(self, main_state: ChatBotSchemas, config: RunnableConfig = None) -> ChatBotSchemas:
         # 当前的时间
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        history_messages = get_history_messages(main_state["messages"])
+        history_messages = self._history_for_prompt(main_state)
         prompt = norm_chat_template.format(
             question=main_state["current_human_message"],
             history_messages=history_messages,
             custom_prompt=f"当前时间: {current_time}"
         )
-        llm_with_tool = self.llm_streaming.bind_tools([get_daily_stats,get_multi_days_stats])
+        llm_with_tool = self._streaming_llm(config).bind_tools([get_daily_stats,get_multi_days_stats])
         logger.debug(f"[norm_chat] 调用 LLM (with tools)...")
         try:
             result = await llm_with_tool.ainvoke(prompt)
@@ -453,7 +763,7 @@ class ChatBot:
             logger.error(f"[norm_chat] LLM 调用失败: {e}")
             logger.error(f"[norm_chat] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
         
         # 验证工具调用是否有效
         if hasattr(result, 'tool_calls') and result.tool_calls:
@@ -465,6 +775,8 @@ class ChatBot:
                         message=f"LLM 请求了未知工具: {tool_name}，可用工具: {self.VALID_TOOLS}",
                         raw_content=str(result.tool_calls)
                     )
+        else:
+            self._remember_answer(config, result)
         
         return {
             "messages": [result]
@@ -528,14 +840,14 @@ class ChatBot:
             "tools_result": tool_results
         }
     
-    async def tool_result_handler(self, main_state: ChatBotSchemas) -> ChatBotSchemas:
+    async def tool_result_handler(self, main_state: ChatBotSchemas, config: RunnableConfig = None) -> ChatBotSchemas:
         """
         结合工具调用结果信息，生成最终回答（不绑定工具，节省 tokens）
         """
         from lifeprism.llm.custom_prompt.common_prompt import tool_result_template
         
         # 1. 获取历史对话（get_history_messages 只处理 HumanMessage 和 AIMessage，自动忽略 ToolMessage）
-        history_messages = get_history_messages(main_state["messages"])
+        history_messages = self._history_for_prompt(main_state)
         
         # 2. 获取工具返回结果
         tool_result = "\n".join(main_state["tools_result"]) if main_state["tools_result"] else ""
@@ -552,13 +864,14 @@ class ChatBot:
         # 4. 调用 LLM（不绑定工具）
         logger.debug(f"[tool_result_handler] 调用 LLM...")
         try:
-            result = await self.llm_streaming.ainvoke(prompt)
+            result = await self._streaming_llm(config).ainvoke(prompt)
             logger.debug(f"[tool_result_handler] LLM 返回 result type: {type(result)}")
         except Exception as e:
             logger.error(f"[tool_result_handler] LLM 调用失败: {e}")
             logger.error(f"[tool_result_handler] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
-        self.update_usage(result)
+        self.update_usage(result, self._thread_id_of(config))
+        self._remember_answer(config, result)
         
         return {
             "messages": [result]
@@ -570,85 +883,90 @@ class ChatBot:
     # ===============================================================
     # chat 接口 not stream；stream ; stream_with_status
     # ===============================================================
-    async def chat_not_stream(self, user_input: str, thread_id: str = None) -> str:
+    async def chat_not_stream(
+        self,
+        user_input: str,
+        thread_id: str = None,
+        enable_search: Optional[bool] = None,
+        enable_thinking: Optional[bool] = None
+    ) -> str:
         """
         发送消息并获取回复（主入口）
         
         Args:
             user_input: 用户输入的消息
             thread_id: 会话ID，用于区分不同对话。如果不传则使用 self.thread_id
+            enable_search / enable_thinking: 本轮回答的模型配置，None 时使用默认模型
             
         Returns:
             AI 的回复内容
         """
         from langchain_core.messages import HumanMessage
         
-        # 使用传入的 thread_id 或者已设置的 thread_id
-        if thread_id is None and self.thread_id is None:
-            raise ValueError("请先调用 set_thread_id() 或传入 thread_id 参数")
-        
-        # 只有传入 thread_id 时才更新
-        if thread_id is not None:
-            self.set_thread_id(thread_id)
-        # 调用编译后的 graph
-        result = await self.chatbot.ainvoke(
-            {
-                "messages": [HumanMessage(content=user_input)],
-                "current_human_message": user_input,
-                "intent": [],
-                "guide_content": [],
-                "tools_result": []
-            },
-            config=self.config
-        )
+        config = self.make_config(thread_id, enable_search, enable_thinking)
+        thread_id = self._thread_id_of(config)
+        async with self.thread_lock(thread_id):
+            started_at = await self._start_turn(thread_id)
+            try:
+                # 调用编译后的 graph（检查点在本轮结束时写入一次）
+                result = await self.chatbot.ainvoke(self._turn_input(user_input), config=config, durability="exit")
+            finally:
+                # 出错或被取消的一轮也要记录（answer 为 None）
+                await self._finish_turn(thread_id, user_input, started_at)
         
         # 返回最后一条 AI 消息的内容
         return result["messages"][-1].content
     
-    async def chat_stream(self, user_input: str, thread_id: str = None):
+    async def chat_stream(
+        self,
+        user_input: str,
+        thread_id: str = None,
+        enable_search: Optional[bool] = None,
+        enable_thinking: Optional[bool] = None
+    ):
         """
         发送消息并获取流式回复
         
         Args:
             user_input: 用户输入的消息
             thread_id: 会话ID
+            enable_search / enable_thinking: 本轮回答的模型配置，None 时使用默认模型
             
         Yields:
             AI 回复的内容片段
         """
         from langchain_core.messages import HumanMessage, AIMessageChunk
         
-        # 使用传入的 thread_id 或者已设置的 thread_id
-        if thread_id is None and self.thread_id is None:
-            raise ValueError("请先调用 set_thread_id() 或传入 thread_id 参数")
-        
-        if thread_id is not None:
-            self.set_thread_id(thread_id)
-        
-        # 清空本轮对话使用量
-        self.reset_turn_usage()
-        
-        # 使用 astream 进行流式输出
-        # stream_mode="messages" 会流式输出所有消息事件
-        async for event in self.chatbot.astream(
-            {
-                "messages": [HumanMessage(content=user_input)],
-                "current_human_message": user_input,
-                "intent": [],
-                "guide_content": [],
-                "tools_result": []
-            },
-            config=self.config,
-            stream_mode="messages"
-        ):
-            # event 是一个 tuple: (message, metadata)
-            if len(event) >= 1:
-                message = event[0]
-                # 只输出 AI 消息的内容
-                if isinstance(message, AIMessageChunk) and message.content:
-                    yield message.content
+        config = self.make_config(thread_id, enable_search, enable_thinking)
+        thread_id = self._thread_id_of(config)
+        async with self.thread_lock(thread_id):
+            started_at = await self._start_turn(thread_id)
+            try:
+                # 使用 astream 进行流式输出
+                # stream_mode="messages" 会流式输出所有消息事件
+                async for event in self.chatbot.astream(
+                    self._turn_input(user_input),
+                    config=config,
+                    stream_mode="messages",
+                    durability="exit"
+                ):
+                    # event 是一个 tuple: (message, metadata)
+                    if len(event) >= 1:
+                        message = event[0]
+                        # 只输出 AI 消息的内容
+                        if isinstance(message, AIMessageChunk) and message.content:
+                            yield message.content
+            finally:
+                # 出错或调用方中途关闭生成器（客户端断开）时也要记录本轮
+                await self._finish_turn(thread_id, user_input, started_at)
     
-    async def chat_stream_with_status(self, user_input: str, thread_id: str = None):
+    async def chat_stream_with_status(
+        self,
+        user_input: str,
+        thread_id: str = None,
+        enable_search: Optional[bool] = None,
+        enable_thinking: Optional[bool] = None
+    ):
         """
         发送消息并获取流式回复（带状态信息）
         
@@ -659,22 +977,27 @@ class ChatBot:
         Args:
             user_input: 用户输入的消息
             thread_id: 会话ID
+            enable_search / enable_thinking: 本轮回答的模型配置，None 时使用默认模型
             
         Yields:
             dict: {"type": "status"|"content", "message": str, "node": str}
         """
-        
-        if thread_id is None and self.thread_id is None:
-            raise ValueError("请先调用 set_thread_id() 或传入 thread_id 参数")
-        
-        if thread_id is not None:
-            self.set_thread_id(thread_id)
-        
-        # 清空本轮对话使用量
-        self.reset_turn_usage()
-        
+        config = self.make_config(thread_id, enable_search, enable_thinking)
+        thread_id = self._thread_id_of(config)
+        async with self.thread_lock(thread_id):
+            started_at = await self._start_turn(thread_id)
+            try:
+                async for event in self._stream_with_status(user_input, config):
+                    yield event
+            finally:
+                # 调用方中途关闭生成器（客户端断开）时也要记录本轮
+                await self._finish_turn(thread_id, user_input, started_at)
+
+    async def _stream_with_status(self, user_input: str, config: dict):
+        """chat_stream_with_status 的实现（调用方已持有会话锁）"""
         # 节点名称到中文描述的映射
         node_names = {
+            "summarize_history": "正在整理对话历史...",
             "intent_router": "正在识别意图...",
             "feat_intro_router": "正在检索相关文档...",
             "feature_introduce": "正在生成回答...",
@@ -685,27 +1008,24 @@ class ChatBot:
         
         last_node = None  # 记录上一个节点，避免重复发送状态
         
-        logger.debug(f"[chat_stream_with_status] 开始 astream_events, thread_id={self.thread_id}")
+        logger.debug(f"[chat_stream_with_status] 开始 astream_events, thread_id={self._thread_id_of(config)}")
         
         try:
             # 使用 astream_events 获取更详细的事件（包括节点开始）
             async for event in self.chatbot.astream_events(
-                {
-                    "messages": [HumanMessage(content=user_input)],
-                    "current_human_message": user_input,
-                    "intent": [],
-                    "guide_content": [],
-                    "tools_result": []
-                },
-                config=self.config,
-                version="v2"  # 使用 v2 版本的事件格式
+                self._turn_input(user_input),
+                config=config,
+                version="v2",  # 使用 v2 版本的事件格式
+                durability="exit"
             ):
                 event_type = event.get("event", "")
                 # logger.debug(f"[chat_stream_with_status] 收到事件: type={event_type}, name={event.get('name', 'N/A')}")
                 
-                # 节点开始事件
+                # 节点开始事件（summarize_history 只在实际生成摘要时提示）
                 if event_type == "on_chain_start":
                     node_name = event.get("name", "")
+                    if node_name == "summarize_history":
+                        continue
                     if node_name in node_names and node_name != last_node:
                         last_node = node_name
                         logger.debug(f"[chat_stream_with_status] 节点开始: {node_name}")
@@ -715,8 +1035,16 @@ class ChatBot:
                             "message": node_names[node_name]
                         }
                 
-                # 消息流式输出事件
-                elif event_type == "on_chat_model_stream":
+                elif event_type == "on_chat_model_start" and HISTORY_SUMMARY_TAG in event.get("tags", []):
+                    last_node = "summarize_history"
+                    yield {
+                        "type": "status",
+                        "node": last_node,
+                        "message": node_names[last_node]
+                    }
+                
+                # 消息流式输出事件（滚动摘要不作为回答输出）
+                elif event_type == "on_chat_model_stream" and HISTORY_SUMMARY_TAG not in event.get("tags", []):
                     chunk = event.get("data", {}).get("chunk")
                     if chunk and hasattr(chunk, "content") and chunk.content:
                         yield {
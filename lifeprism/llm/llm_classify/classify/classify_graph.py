@@ -8,26 +8,30 @@ from lifeprism.llm.llm_classify.schemas.classify_shemas import classifyState,Goa
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import SystemMessage, HumanMessage,AIMessage
 from lifeprism.llm.llm_classify.utils import (
-    format_goals_for_prompt, 
-    format_category_tree_for_prompt,
-    format_log_items_table,
+    format_goals_compact,
+    format_category_tree_compact,
+    format_log_items_compact,
     create_ChatTongyiModel,
     split_by_purpose,
     split_by_duration,
     parse_classification_result,
     extract_json_from_response,
     parse_token_usage,
+    run_batches,
+    fill_app_descriptions,
+    fill_title_analyses,
     test_for_llm_class_state
     )
 import json
 import logging
-from langgraph.types import Send,RetryPolicy
+import threading
+from langgraph.types import Send
 from langgraph.store.memory import InMemoryStore
-import time
 import uuid
-MAX_LOG_ITEMS = 15
 MAX_TITLE_ITEMS = 5
 TEST_FLAG = False
+# 读取 token 使用记录时单个命名空间的最大条数（InMemoryStore.search 默认只返回 10 条）
+MAX_USAGE_RECORDS = 100000
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,8 +48,10 @@ class ClassifyGraph:
         """
         self.goal = goal
         self.category_tree = category_tree
-        self.chat_model = create_ChatTongyiModel()
+        self.chat_model = create_ChatTongyiModel(enable_search=False)
         self.store = InMemoryStore()
+        # 编译后的图在进程内复用（见 main_classify.get_classifier），同一实例的分类串行执行
+        self._run_lock = threading.Lock()
         self.bulit_graph()
 
     def recode_tokens_usage(self,node_name,tokens_usage):
@@ -68,7 +74,7 @@ class ClassifyGraph:
         
         for namespace in namespaces:
             # 搜索该命名空间下的所有记录
-            items = self.store.search(namespace)
+            items = self.store.search(namespace, limit=MAX_USAGE_RECORDS)
             for item in items:
                 usage = item.value
                 total['input_tokens'] += usage.get('input_tokens', 0)
@@ -78,15 +84,38 @@ class ClassifyGraph:
         
         return total
 
+    def _reset_tokens_usage(self) -> None:
+        """清空上一次分类的 token 使用记录"""
+        for namespace in self.store.list_namespaces(prefix=("tokens_usage",)):
+            for item in self.store.search(namespace, limit=MAX_USAGE_RECORDS):
+                self.store.delete(namespace, item.key)
     
+    def apply_batch_outcomes(self, node_name: str, outcomes: list) -> list:
+        """
+        按批次顺序合并 run_batches 的结果：记录 token 使用，解析成功批次的分类结果
+
+        失败的批次保留原始条目（未分类）；所有批次都失败时抛出最后一个错误，交由调用方记录失败
+        """
+        result_items = []
+        for outcome in outcomes:
+            for usage in outcome.tokens_usage:
+                self.recode_tokens_usage(node_name, usage)
+            if outcome.ok:
+                parse_classification_result(outcome.items, outcome.parsed, node_name)
+            result_items.extend(outcome.items)
+        if outcomes and not any(outcome.ok for outcome in outcomes):
+            raise outcomes[-1].error
+        return result_items
+
     def bulit_graph(self):
         
         graph = StateGraph(classifyState)
         graph.add_node("get_app_description",self.get_app_description)
-        graph.add_node("single_classify",self.single_classify,retry_policy=RetryPolicy(max_attempts=3))
+        # 分类节点在 run_batches 内逐批重试，节点级不再整体重试（避免已成功的批次重复请求）
+        graph.add_node("single_classify",self.single_classify)
         graph.add_node("multi_classify",self.multi_classify) # 空节点
-        graph.add_node("multi_classify_long",self.multi_classify_long,retry_policy=RetryPolicy(max_attempts=3))  # 长时间多用途分类
-        graph.add_node("multi_classify_short",self.multi_classify_short,retry_policy=RetryPolicy(max_attempts=3)) # 短时间多用途分类
+        graph.add_node("multi_classify_long",self.multi_classify_long)  # 长时间多用途分类
+        graph.add_node("multi_classify_short",self.multi_classify_short) # 短时间多用途分类
         graph.add_node("get_titles",self.get_titles)
 
         graph.add_edge(START,"get_app_description")
@@ -101,22 +130,33 @@ class ClassifyGraph:
         # 短时间分类
         # checkpointer = InMemorySaver()  
         self.app = graph.compile(store=self.store)
-    def classify(self, state: classifyState) -> dict:
+    def classify(self, state: classifyState, goal: list = None, category_tree: dict = None) -> dict:
         """
         执行分类任务的入口方法
         
         Args:
             state: classifyState 对象，包含待分类的数据
+            goal: 本次分类使用的用户目标列表，None 时沿用上一次
+            category_tree: 本次分类使用的分类树字典，None 时沿用上一次
             
         Returns:
             dict: 包含 result_items 和 tokens_usage 的字典
         """
-        # 执行分类
-        output = self._classify_internal(state)
-        
-        # 获取 token 使用统计
-        tokens_usage = self.get_total_tokens_usage()
-        print(tokens_usage)
+        with self._run_lock:
+            if goal is not None:
+                self.goal = goal
+            if category_tree is not None:
+                self.category_tree = category_tree
+            # 从模型池取当前配置对应的模型（配置未变化时为同一实例）
+            self.chat_model = create_ChatTongyiModel(enable_search=False)
+            self._reset_tokens_usage()
+
+            # 执行分类
+            output = self._classify_internal(state)
+            
+            # 获取 token 使用统计
+            tokens_usage = self.get_total_tokens_usage()
+        logger.debug(f"分类 token 使用: {tokens_usage}")
         return {
             "result_items": output.get("result_items"),
             "tokens_usage": tokens_usage
@@ -139,7 +179,9 @@ class ClassifyGraph:
     # node 1 获取所有app的描述
     def get_app_description(self,state: classifyState) -> classifyState:
         """
-        获取所有没有描述的 app 的描述信息（使用 for 循环顺序执行）
+        获取所有没有描述的 app 的描述信息
+        
+        先从应用描述表补全，其余并发请求 LLM 并写回描述表（见 fill_app_descriptions）
         
         Args:
             state: classifyState 对象
@@ -147,73 +189,15 @@ class ClassifyGraph:
         Returns:
             classifyState: 更新了 app_registry 的状态
         """
-        # 1. 找出所有没有描述的 app
-        app_to_search = []
-        for app, app_info in state.app_registry.items():
-            if app_info.description is None or app_info.description == "":
-                # 只有单用途应用才获取 title 样本用于辅助识别
-                title_sample = ""
-                if not app_info.is_multipurpose and app_info.titles:
-                    title_sample = app_info.titles[0]
-                app_to_search.append((app, title_sample))
-        
-        if not app_to_search:
+        if all(app_info.description for app_info in state.app_registry.values()):
             logger.info("所有 app 都已有描述，跳过搜索")
             return {}
         
-        logger.info(f"需要搜索描述的 app: {[app for app, _ in app_to_search]}")
-        
-        # 2. 顺序搜索每个 app 的描述
-        app_descriptions = {}  # app_name -> description
-        
-        system_message = SystemMessage(content="""
-        你是一个软件程序识别专家。
-        **任务流程：**
-        1. 实时查询该软件最新的描述
-        2. 根据搜索结果，结合软件名称和标题样本，生成准确的软件描述
-        
-        **输出要求：**
-        - 基于搜索结果提供软件描述（不超过20词）
-        - 如果搜索后仍无法确定是什么软件，返回 None
-        """)
-        
-        MAX_RETRIES = 3
-        for app, title in app_to_search:
-            success = False
-            for attempt in range(1, MAX_RETRIES + 1):
-                try:
-                    # 根据是否有 title 调整 prompt
-                    if title:
-                        user_message = HumanMessage(content=f"""软件名称:{app},软件标题样本:{title}""")
-                    else:
-                        user_message = HumanMessage(content=f"""软件名称:{app}""")
-                    messages = [system_message, user_message]
-                    
-                    result = self.chat_model.invoke(messages)
-                    self.recode_tokens_usage("app_descriptions", parse_token_usage(result))
-                    
-                    # 检查结果是否为空
-                    if result.content is None or result.content.strip() == "" or result.content.strip().lower() == "none":
-                        logger.warning(f"获取 {app} 的描述失败（第 {attempt}/{MAX_RETRIES} 次），结果为空")
-                        if attempt < MAX_RETRIES:
-                            
-                            time.sleep(0.5)  # 重试前等待 1 秒
-                        continue
-                    
-                    # 收到非空结果，立即更新 app_registry
-                    if app in state.app_registry:
-                        state.app_registry[app].description = result.content
-                        logger.info(f"已获取并更新 {app} 的描述: {result.content[:50]}...")
-                    success = True
-                    break  # 成功获取，跳出重试循环
-                    
-                except Exception as e:
-                    logger.warning(f"获取 {app} 的描述时发生异常（第 {attempt}/{MAX_RETRIES} 次）: {e}")
-                    if attempt < MAX_RETRIES:
-                        time.sleep(1)
-            
-            if not success:
-                logger.warning(f"获取 {app} 的描述失败，已重试 {MAX_RETRIES} 次，跳过该应用")
+        fill_app_descriptions(
+            state.app_registry,
+            chat_model=self.chat_model,
+            on_tokens_usage=lambda usage: self.recode_tokens_usage("app_descriptions", usage),
+        )
         
         # 返回更新后的状态
         return {
@@ -263,11 +247,11 @@ class ClassifyGraph:
     # @test_for_llm_class_state(TEST_FLAG)
     def single_classify(self,state: classifyStateLogitems) -> classifyState:
         """
-        单用途app分类（分批处理，每批最多 MAX_LOG_ITEMS 条）
+        单用途app分类（按 token 预算分批处理，见 TokenBudget）
         """
         # system message
-        goal = format_goals_for_prompt(self.goal)
-        category_tree = format_category_tree_for_prompt(self.category_tree)
+        goal = format_goals_compact(self.goal)
+        category_tree = format_category_tree_compact(self.category_tree)
         #print(goal)
         #print(category_tree)
         system_message = SystemMessage(content=f"""
@@ -298,46 +282,21 @@ class ClassifyGraph:
             logger.info("没有单用途应用需要分类")
             return {}
         
-        # 分批处理
-        for i in range(0, len(single_purpose_items), MAX_LOG_ITEMS):
-            batch = single_purpose_items[i:i + MAX_LOG_ITEMS]
-            batch_num = i // MAX_LOG_ITEMS + 1
-            logger.info(f"single_classify 处理第 {batch_num} 批，共 {len(batch)} 条记录")
-            
+        def build_messages(batch):
             # 使用工具函数格式化 log_items
-            app_content = format_log_items_table(
+            app_content = format_log_items_compact(
                 batch,
                 fields=["id", "app", "title"],
                 app_registry=state.private_app_registry,
                 group_by_app=True,
                 show_app_description=True
             )
-            #print(app_content)
-            
-            # 构建 human_message
-            human_message = HumanMessage(content=app_content)
-            messages = [system_message, human_message]
-            
-            # 发送请求并解析结果
-            result = self.chat_model.invoke(messages)
-            self.recode_tokens_usage("single_classify",parse_token_usage(result))
-            # 记录 token 使用到全局列表
-            # record_token_usage("single_classify", result)
-            
-            # 打印原始响应内容以便调试
-            #print(f"\n=== LLM 原始响应 (批次 {batch_num}) ===")
-            #print(result.content)
-            #print("=== 响应结束 ===\n")
-            
-            # 解析 JSON 结果（先清理可能的代码块标记）
-            clean_content = extract_json_from_response(result.content)
-            classification_result = json.loads(clean_content)
-            logger.info(f"single_classify 批次 {batch_num} 成功获取分类结果")
-            
-            # 使用通用解析函数更新 log_items
-            single_purpose_items = parse_classification_result(single_purpose_items, classification_result, "single_classify")
+            return [system_message, HumanMessage(content=app_content)]
+
+        # 按 token 预算分批并发请求，按批次顺序合并结果
+        outcomes = run_batches(self.chat_model, single_purpose_items, build_messages, node_name="single_classify")
+        single_purpose_items = self.apply_batch_outcomes("single_classify", outcomes)
 
-        
         return {
             "result_items" : single_purpose_items
         }
@@ -380,10 +339,10 @@ class ClassifyGraph:
     # @test_for_llm_class_state(TEST_FLAG)
     def multi_classify_short(self,state:classifyStateLogitems) -> classifyState:
         """
-        短时长多用途分类（分批处理，每批最多 MAX_LOG_ITEMS 条）
+        短时长多用途分类（按 token 预算分批处理，见 TokenBudget）
         """
-        category_tree = format_category_tree_for_prompt(self.category_tree) # 使用类变量
-        goal = format_goals_for_prompt(self.goal)
+        category_tree = format_category_tree_compact(self.category_tree) # 使用类变量
+        goal = format_goals_compact(self.goal)
         
         # system message
         system_message = SystemMessage(content = f"""
@@ -410,40 +369,19 @@ class ClassifyGraph:
             logger.info("没有短时长多用途应用需要分类")
             return {}
         
-        # 分批处理
-        for i in range(0, len(state.log_items_for_multi_short), MAX_LOG_ITEMS):
-            batch = state.log_items_for_multi_short[i:i + MAX_LOG_ITEMS]
-            batch_num = i // MAX_LOG_ITEMS + 1
-            logger.info(f"multi_classify_short 处理第 {batch_num} 批，共 {len(batch)} 条记录")
-            
-            items = format_log_items_table(
+        def build_messages(batch):
+            items = format_log_items_compact(
                 batch,
                 fields=["id", "app", "title", "title_analysis"]
             )
             human_message = HumanMessage(content=f"""对下面的数据进行分类:\n{items}
             """)
-            messages = [system_message, human_message]
-            
-            # 发送请求并解析结果
-            result = self.chat_model.invoke(messages)
-            self.recode_tokens_usage("multi_classify_short",parse_token_usage(result))
-            # 记录 token 使用到全局列表
-            # record_token_usage("multi_classify_short", result)
-            
-            # 打印原始响应内容以便调试
-            #print(f"\n=== LLM 原始响应 (批次 {batch_num}) ===")
-            #print(result.content)
-            #print("=== 响应结束 ===\n")
-            
-            # 解析 JSON 结果（先清理可能的代码块标记）
-            clean_content = extract_json_from_response(result.content)
-            classification_result = json.loads(clean_content)
-            logger.info(f"multi_classify_short 批次 {batch_num} 成功获取分类结果")
-            
-            # 使用通用解析函数更新 log_items
-            log_items_for_multi_short = parse_classification_result(state.log_items_for_multi_short, classification_result, "multi_classify_short")
-            
-        
+            return [system_message, human_message]
+
+        # 按 token 预算分批并发请求，按批次顺序合并结果
+        outcomes = run_batches(self.chat_model, state.log_items_for_multi_short, build_messages, node_name="multi_classify_short")
+        log_items_for_multi_short = self.apply_batch_outcomes("multi_classify_short", outcomes)
+
         return {
             "result_items" : log_items_for_multi_short
         }
@@ -451,17 +389,16 @@ class ClassifyGraph:
     # node supperstep 3 :获取title_analysis->{title_analysis_results}
     # @test_for_llm_class_state(TEST_FLAG)
     def get_titles(self,state:classifyStateLogitems)->classifyStateLogitems:
-        system_message = SystemMessage(content="""
-        你是一个通过网络搜索分析的助手,依据网络搜索结果和title分析用户的活动，要求结果在30字以内
-        # 输出格式:str 内容为:用户活动
-        """)
-        for item in state.log_items_for_multi_long:
-            if item.title:  # 只添加有title的项
-                human_message = HumanMessage(content=f"""搜索并分析{item.title}""")
-                message = [system_message, human_message]
-                result = self.chat_model.invoke(message)
-                self.recode_tokens_usage("get_titles",parse_token_usage(result))
-                item.title_analysis = result.content
+        """
+        补全长时长多用途条目的标题分析
+
+        先从标题分析表补全，其余标题去重后分批请求 LLM 并写回标题分析表（见 fill_title_analyses）
+        """
+        fill_title_analyses(
+            state.log_items_for_multi_long,
+            chat_model=self.chat_model,
+            on_tokens_usage=lambda usage: self.recode_tokens_usage("get_titles", usage),
+        )
         return {
             "log_items_for_multi_long" : state.log_items_for_multi_long
         }
@@ -470,10 +407,10 @@ class ClassifyGraph:
     # @test_for_llm_class_state(TEST_FLAG)
     def multi_classify_long(self,state:classifyStateLogitems)->classifyState:
         """
-        长时长多用途分类（分批处理，每批最多 MAX_LOG_ITEMS 条）
+        长时长多用途分类（按 token 预算分批处理，见 TokenBudget）
         """
-        goal = format_goals_for_prompt(self.goal)
-        category_tree = format_category_tree_for_prompt(self.category_tree)
+        goal = format_goals_compact(self.goal)
+        category_tree = format_category_tree_compact(self.category_tree)
         
         system_message = SystemMessage(content=f"""
         你是一个用户行为分类专家。你的任务是根据网页标题(Title)和标题分析(Title Analysis)对用户的行为进行分类。
@@ -507,45 +444,22 @@ class ClassifyGraph:
             logger.info("没有长时长多用途应用需要分类")
             return {}
         
-        # 分批处理
-        for i in range(0, len(state.log_items_for_multi_long), MAX_LOG_ITEMS):
-            batch = state.log_items_for_multi_long[i:i + MAX_LOG_ITEMS]
-            batch_num = i // MAX_LOG_ITEMS + 1
-            logger.info(f"multi_classify_long 处理第 {batch_num} 批，共 {len(batch)} 条记录")
-            
+        def build_messages(batch):
             # 使用工具函数格式化 log_items
-            items = format_log_items_table(
+            items = format_log_items_compact(
                 batch,
                 fields=["id", "app", "title", "title_analysis"]
             )
-            
             human_message = HumanMessage(content=f"""
             请对以下用户行为数据进行分类：
             {items}
             """)
-            
-            messages = [system_message, human_message]
-            
-            # 发送请求并解析结果
-            result = self.chat_model.invoke(messages)
-            self.recode_tokens_usage("multi_classify_long",parse_token_usage(result))
-            # 记录 token 使用到全局列表
-            # record_token_usage("multi_classify_long", result)
-            
-            # 打印原始响应内容以便调试
-            #print(f"\n=== LLM 原始响应 (批次 {batch_num}) ===")
-            #print(result.content)
-            #print("=== 响应结束 ===\n")
-            
-            # 解析 JSON 结果（先清理可能的代码块标记）
-            clean_content = extract_json_from_response(result.content)
-            classification_result = json.loads(clean_content)
-            logger.info(f"multi_classify_long 批次 {batch_num} 成功获取分类结果")
-            
-            # 使用通用解析函数更新 log_items
-            log_items_for_multi_long = parse_classification_result(state.log_items_for_multi_long, classification_result, "multi_classify_long")
+            return [system_message, human_message]
+
+        # 按 token 预算分批并发请求，按批次顺序合并结果
+        outcomes = run_batches(self.chat_model, state.log_items_for_multi_long, build_messages, node_name="multi_classify_long")
+        log_items_for_multi_long = self.apply_batch_outcomes("multi_classify_long", outcomes)
 
-        
         return {
             "result_items" : log_items_for_multi_long
         }
@@ -8,19 +8,19 @@
 date: 2025.12.17
 """
 
-import json
 import logging
+import threading
 from langchain_core.messages import SystemMessage, HumanMessage
 from lifeprism.llm.llm_classify.schemas.classify_shemas import classifyState, LogItem
 from lifeprism.llm.llm_classify.utils import (
     create_ChatTongyiModel,
-    extract_json_from_response,
-    parse_token_usage,
-    format_goals_for_prompt,
-    format_category_tree_for_prompt
+    format_goals_compact,
+    format_category_tree_compact,
+    LangChainToonAdapter,
+    run_batches,
+    fill_app_descriptions
 )
-
-MAX_LOG_ITEMS = 15
+from lifeprism.llm.llm_classify.utils.format_prompt_utils import truncate_field
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,27 +45,38 @@ class ClassifySimple:
         """
         self.goal = goal
         self.category_tree = category_tree
-        self.chat_model = create_ChatTongyiModel()
+        self.chat_model = create_ChatTongyiModel(enable_search=False)
         self.token_usage_list = []  # 记录 token 使用
+        # 实例在进程内复用（见 main_classify.get_classifier），同一实例的分类串行执行
+        self._run_lock = threading.Lock()
     
-    def classify(self, state: classifyState) -> dict:
+    def classify(self, state: classifyState, goal: list = None, category_tree: dict = None) -> dict:
         """
         执行分类任务的入口方法
         
         Args:
             state: classifyState 对象，包含待分类的数据
+            goal: 本次分类使用的用户目标列表，None 时沿用上一次
+            category_tree: 本次分类使用的分类树字典，None 时沿用上一次
             
         Returns:
             dict: 包含 result_items 和 tokens_usage 的字典
         """
-        # 重置 token 使用记录
-        self.token_usage_list = []
-        
-        # 执行分类
-        output = self._classify_internal(state)
-        
-        # 获取 token 使用统计
-        tokens_usage = self.get_total_tokens_usage()
+        with self._run_lock:
+            if goal is not None:
+                self.goal = goal
+            if category_tree is not None:
+                self.category_tree = category_tree
+            # 从模型池取当前配置对应的模型（配置未变化时为同一实例）
+            self.chat_model = create_ChatTongyiModel(enable_search=False)
+            # 重置 token 使用记录
+            self.token_usage_list = []
+            
+            # 执行分类
+            output = self._classify_internal(state)
+            
+            # 获取 token 使用统计
+            tokens_usage = self.get_total_tokens_usage()
         
         return {
             "result_items": output.get("result_items"),
@@ -86,9 +97,12 @@ class ClassifySimple:
             logger.info("log_items 为空，跳过分类")
             return {"result_items": None}
         
+        # 复用应用描述表中已有的描述（简化版依赖模型自带搜索，不单独请求描述）
+        fill_app_descriptions(state.app_registry)
+        
         # 使用类变量
-        goal = format_goals_for_prompt(self.goal)
-        category_tree = format_category_tree_for_prompt(self.category_tree)
+        goal = format_goals_compact(self.goal)
+        category_tree = format_category_tree_compact(self.category_tree)
         #print(goal)
         #print(category_tree)
         system_message = SystemMessage(content=f"""
@@ -118,50 +132,36 @@ class ClassifySimple:
 
             """)
         
-        all_result_items = []
+        def build_messages(batch):
+            # 应用信息每个应用只出现一次，条目只携带 id / app / title（Toon 表格，见 LangChainToonAdapter）
+            apps = list(dict.fromkeys(item.app for item in batch))
+            apps_table = LangChainToonAdapter.encode_table(
+                "apps", ["app", "app_description", "is_multipurpose"],
+                [
+                    [
+                        app,
+                        state.app_registry[app].description if app in state.app_registry else None,
+                        state.app_registry[app].is_multipurpose if app in state.app_registry else False,
+                    ]
+                    for app in apps
+                ]
+            )
+            items_table = LangChainToonAdapter.encode_table(
+                "items", ["id", "app", "title"],
+                [[item.id, item.app, truncate_field(item.title)] for item in batch]
+            )
+            human_message = HumanMessage(content=f"{apps_table}\n{items_table}")
+            return [system_message, human_message]
         
-        # 分批处理
-        for i in range(0, len(state.log_items), MAX_LOG_ITEMS):
-            batch = state.log_items[i:i + MAX_LOG_ITEMS]
-            batch_num = i // MAX_LOG_ITEMS + 1
-            logger.info(f"classify_simple 处理第 {batch_num} 批，共 {len(batch)} 条记录")
-            
-            # 构建 compact_data: [id, app_name, app_description, title, is_multipurpose]
-            compact_data = []
-            for item in batch:
-                app_info = state.app_registry.get(item.app)
-                compact_data.append([
-                    item.id,
-                    item.app,
-                    app_info.description if app_info else None,
-                    item.title,
-                    app_info.is_multipurpose if app_info else False
-                ])
-            
-            # Human Message - 留空，用户自行修改
-            human_message = HumanMessage(content=f"""
-            数据格式：[id, app_name, app_description, title, is_multipurpose]
-            {json.dumps(compact_data, ensure_ascii=False)}
-            """)
-            messages = [system_message, human_message]
-            try:
-                # 发送请求
-                result = self.chat_model.invoke(messages)
-                self.token_usage_list.append(parse_token_usage(result))
-                
-                # 解析 JSON 结果
-                clean_content = extract_json_from_response(result.content)
-                classification_result = json.loads(clean_content)
-                logger.info(f"classify_simple 批次 {batch_num} 成功获取分类结果")
-                
-                # 更新 log_items
-                batch = self._parse_classification_result(batch, classification_result)
-                all_result_items.extend(batch)
-                
-            except Exception as e:
-                logger.error(f"classify_simple 批次 {batch_num} 处理出错: {e}")
-                # 保留原始数据，不做分类
-                all_result_items.extend(batch)
+        # 分批并发请求；失败的批次保留原始数据，不做分类
+        outcomes = run_batches(self.chat_model, state.log_items, build_messages, node_name="classify_simple")
+        all_result_items = []
+        for outcome in outcomes:
+            self.token_usage_list.extend(outcome.tokens_usage)
+            batch = outcome.items
+            if outcome.ok:
+                batch = self._parse_classification_result(batch, outcome.parsed)
+            all_result_items.extend(batch)
         
         return {"result_items": all_result_items}
     
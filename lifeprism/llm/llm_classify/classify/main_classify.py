@@ -5,6 +5,7 @@ date : 2025.12.17
 from lifeprism.llm.llm_classify.classify.classify_graph import ClassifyGraph
 from lifeprism.llm.llm_classify.classify.classify_simple import ClassifySimple
 import logging
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,6 +16,30 @@ CLASSIFIER_REGISTRY = {
     "classify_simple": ClassifySimple,
 }
 
+# 进程内复用的分类器实例（每种模式一个，LangGraph 只编译一次），goal / category_tree 随每次分类传入
+_classifiers_lock = threading.Lock()
+_classifiers: dict = {}
+
+
+def get_classifier(classify_mode: str):
+    """获取（首次调用时创建）classify_mode 对应的分类器实例，模式无效时返回 None"""
+    if classify_mode not in CLASSIFIER_REGISTRY:
+        available = list(CLASSIFIER_REGISTRY.keys())
+        logger.warning(f"classify_mode: {classify_mode} 无效，必须为 {available} 中的一项")
+        return None
+    with _classifiers_lock:
+        classifier = _classifiers.get(classify_mode)
+        if classifier is None:
+            classifier = CLASSIFIER_REGISTRY[classify_mode](goal=[], category_tree={})
+            _classifiers[classify_mode] = classifier
+        return classifier
+
+
+def clear_classifiers() -> None:
+    """清空复用的分类器实例（下次分类时重新创建并编译）"""
+    with _classifiers_lock:
+        _classifiers.clear()
+
 
 class LLMClassify:
     def __init__(self, classify_mode: str, goal: list, category_tree: dict):
@@ -28,24 +53,14 @@ class LLMClassify:
         """
         self.goal = goal
         self.category_tree = category_tree
-        self.classifier = self._create_classifier(classify_mode)
-    
-    def _create_classifier(self, classify_mode: str):
-        """根据名称创建分类器实例"""
-        if classify_mode not in CLASSIFIER_REGISTRY:
-            available = list(CLASSIFIER_REGISTRY.keys())
-            logger.warning(f"classify_mode: {classify_mode} 无效，必须为 {available} 中的一项")
-            return None
-        
-        classifier_class = CLASSIFIER_REGISTRY[classify_mode]
-        return classifier_class(goal=self.goal, category_tree=self.category_tree)
+        self.classifier = get_classifier(classify_mode)
     
     def classify(self, state):
         """执行分类"""
         if self.classifier is None:
             logger.error("分类器未初始化")
             return None
-        return self.classifier.classify(state)
+        return self.classifier.classify(state, goal=self.goal, category_tree=self.category_tree)
 
 
 if __name__ == "__main__":
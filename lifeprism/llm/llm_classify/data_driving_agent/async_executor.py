@@ -6,7 +6,7 @@ from lifeprism.llm.llm_classify.schemas.data_driving_schemas import (
     Context, NodeDefinition, ExecutionPlan, NodeType
 )
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from lifeprism.llm.llm_classify.utils import create_ChatTongyiModel
+from lifeprism.llm.llm_classify.utils import create_ChatTongyiModel, PRIORITY_INTERACTIVE
 from lifeprism.llm.llm_classify.tools.database_tools import (
     get_daily_stats,
     get_multi_days_stats,
@@ -15,7 +15,8 @@ from lifeprism.llm.llm_classify.tools.database_tools import (
     query_psychological_assessment,
     query_daily_todos,
     query_behavior_timeline,
-    get_daily_breakdown
+    get_daily_breakdown,
+    query_app_descriptions
 )
 from typing import Callable
 from lifeprism.utils import get_logger, DEBUG
@@ -72,7 +73,8 @@ class AsyncExecutor:
             "query_psychological_assessment": query_psychological_assessment,
             "query_daily_todos": query_daily_todos,
             "query_behavior_timeline": query_behavior_timeline,
-            "get_daily_breakdown": get_daily_breakdown
+            "get_daily_breakdown": get_daily_breakdown,
+            "query_app_descriptions": query_app_descriptions
         }
         
         # 工具使用限制
@@ -232,7 +234,8 @@ class AsyncExecutor:
 
     def _create_llm_with_tools(self, tools: list[str] | None):
         """创建 LLM，如果有工具则绑定"""
-        llm = create_ChatTongyiModel(enable_search=False, enable_thinking=False)
+        # 报告总结由用户请求触发，与对话同属交互优先级
+        llm = create_ChatTongyiModel(enable_search=False, enable_thinking=False, priority=PRIORITY_INTERACTIVE)
         if tools:
             tool_objects = [self.tools_map[t] for t in tools]
             llm = llm.bind_tools(tool_objects)
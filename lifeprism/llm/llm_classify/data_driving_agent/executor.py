@@ -14,7 +14,8 @@ from lifeprism.llm.llm_classify.tools.database_tools import (
     query_psychological_assessment,
     query_daily_todos,
     query_behavior_timeline,
-    get_daily_breakdown
+    get_daily_breakdown,
+    query_app_descriptions
 )
 from typing import Callable
 from lifeprism.utils import get_logger,DEBUG
@@ -69,7 +70,8 @@ class Executor:
             "query_psychological_assessment": query_psychological_assessment,
             "query_daily_todos": query_daily_todos,
             "query_behavior_timeline": query_behavior_timeline,
-            "get_daily_breakdown": get_daily_breakdown
+            "get_daily_breakdown": get_daily_breakdown,
+            "query_app_descriptions": query_app_descriptions
         }
         
         # 工具使用限制
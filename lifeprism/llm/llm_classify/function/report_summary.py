@@ -1,5 +1,5 @@
 from lifeprism.llm.custom_prompt.chatbot_prompt.summary_prompt import daily_summary_template,multi_days_summary_template
-from lifeprism.llm.llm_classify.utils import create_ChatTongyiModel
+from lifeprism.llm.llm_classify.utils import create_ChatTongyiModel, PRIORITY_INTERACTIVE
 from lifeprism.llm.llm_classify.tools.database_tools import get_daily_stats,get_multi_days_stats
 from lifeprism.storage.base_providers.lw_base_data_provider import LWBaseDataProvider
 import logging
@@ -83,7 +83,7 @@ async def daily_summary_old(date : str, options : list):
                 - output_tokens: 输出 token 数量
                 - total_tokens: 总 token 数量
     """
-    llm = create_ChatTongyiModel(temperature=0.5)
+    llm = create_ChatTongyiModel(temperature=0.5, enable_search=False, priority=PRIORITY_INTERACTIVE)
     start_time = date + " 00:00:00"
     end_time = date + " 23:59:59"
     
@@ -165,7 +165,7 @@ async def multi_days_summary(start_time : str, end_time : str, split_count : int
                 - output_tokens: 输出 token 数量
                 - total_tokens: 总 token 数量
     """
-    llm = create_ChatTongyiModel(temperature=0.5)
+    llm = create_ChatTongyiModel(temperature=0.5, enable_search=False, priority=PRIORITY_INTERACTIVE)
     
     # 在线程池中运行同步的工具调用
     result = await asyncio.to_thread(
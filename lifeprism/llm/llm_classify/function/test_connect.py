@@ -18,7 +18,7 @@ async def test_connect() -> dict:
     """
     try:
         # 创建 LLM 模型
-        llm = create_ChatTongyiModel(temperature=0.1)
+        llm = create_ChatTongyiModel(temperature=0.1, use_cache=False)
         
         # 发送简单的测试请求
         test_prompt = "请回复'连接成功'这四个字。"
@@ -324,17 +324,14 @@ class LLMLWDataProvider(LWBaseDataProvider):
             end_time: 结束时间 YYYY-MM-DD HH:MM:SS
         
         Returns:
-            pd.DataFrame: 预处理后的事件 DataFrame（含 start_dt, end_dt）
+            pd.DataFrame: 预处理后的事件 DataFrame（含 start_dt, end_dt；
+                app/title/分类 id/目标 id 为 category dtype）
         """
-        df = self.load_user_app_behavior_log(start_time=start_time, end_time=end_time)
+        df = self.load_user_app_behavior_log_typed(start_time=start_time, end_time=end_time)
         
-        if df is None or df.empty:
+        if df.empty:
             return pd.DataFrame()
         
-        # 预处理时间字段
-        df['start_dt'] = pd.to_datetime(df['start_time'])
-        df['end_dt'] = pd.to_datetime(df['end_time'])
-        
         return df
     
     def _get_category_name_maps(self) -> tuple[Dict[str, str], Dict[str, tuple]]:
@@ -466,7 +463,7 @@ class LLMLWDataProvider(LWBaseDataProvider):
             total_active = int(df['duration_seconds'].sum())
             
             # 主分类统计
-            cat_stats = df.groupby('category_id').agg({
+            cat_stats = df.groupby('category_id', observed=True).agg({
                 'duration_seconds': 'sum'
             }).reset_index()
             
@@ -481,7 +478,7 @@ class LLMLWDataProvider(LWBaseDataProvider):
                 })
             
             # 子分类统计
-            sub_cat_stats = df.groupby('sub_category_id').agg({
+            sub_cat_stats = df.groupby('sub_category_id', observed=True).agg({
                 'duration_seconds': 'sum'
             }).reset_index()
             
@@ -583,7 +580,7 @@ class LLMLWDataProvider(LWBaseDataProvider):
                     calc_base = 1
                 
                 # 主分类统计
-                cat_stats = seg_df.groupby('category_id').agg({
+                cat_stats = seg_df.groupby('category_id', observed=True).agg({
                     'duration_seconds': 'sum'
                 }).reset_index()
                 
@@ -598,7 +595,7 @@ class LLMLWDataProvider(LWBaseDataProvider):
                     })
                 
                 # 子分类统计
-                sub_cat_stats = seg_df.groupby('sub_category_id').agg({
+                sub_cat_stats = seg_df.groupby('sub_category_id', observed=True).agg({
                     'duration_seconds': 'sum'
                 }).reset_index()
                 
@@ -703,7 +700,7 @@ class LLMLWDataProvider(LWBaseDataProvider):
                 results.append({
                     "segment_index": i,
                     "app": row.get('app', ''),
-                    "title": row.get('title', ''),
+                    "title": row.get('title') if pd.notna(row.get('title')) else None,
                     "duration_seconds": int(row['duration_minutes'] * 60),
                     "start_time": row['start_dt'].strftime("%Y-%m-%d %H:%M:%S"),
                     "end_time": row['end_dt'].strftime("%Y-%m-%d %H:%M:%S"),
@@ -755,7 +752,7 @@ class LLMLWDataProvider(LWBaseDataProvider):
         df['duration_seconds'] = df['duration_minutes'] * 60
         
         # 按 goal 聚合
-        goal_stats = df.groupby('link_to_goal_id').agg({
+        goal_stats = df.groupby('link_to_goal_id', observed=True).agg({
             'duration_seconds': 'sum'
         }).reset_index()
         
@@ -1067,6 +1064,8 @@ class LLMLWDataProvider(LWBaseDataProvider):
             # 构建活动描述
             app = row.get('app', '未知应用')
             title = row.get('title', '')
+            if pd.isna(title):
+                title = ''
             if title and len(title) > 50:
                 title = title[:50] + "..."
             activity = f"{app} - {title}" if title else app
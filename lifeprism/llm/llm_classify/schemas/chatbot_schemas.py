@@ -4,6 +4,17 @@ from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, BaseMe
 import operator
 
 
+def add_or_reset(left: Optional[list], right: Optional[list]) -> list:
+    """
+    累加列表；right 为 None 时清空
+
+    用于只在本轮对话内有效的字段：每轮输入传 None 重置，避免跨轮累积到检查点和提示词中
+    """
+    if right is None:
+        return []
+    return (left or []) + right
+
+
 class ChatBotSchemas(TypedDict):
     """
     LangGraph 状态 Schema
@@ -16,14 +27,20 @@ class ChatBotSchemas(TypedDict):
     # 对话消息列表 - 使用 operator.add 进行累加
     messages: Annotated[List[BaseMessage], operator.add]
     
-    # 用户意图列表
-    intent: Annotated[List[str], operator.add]
+    # 用户意图列表（本轮）
+    intent: Annotated[List[str], add_or_reset]
     
-    # 用户意图对应的引导内容
-    guide_content: Annotated[List[str], operator.add]
+    # 用户意图对应的引导内容（本轮）
+    guide_content: Annotated[List[str], add_or_reset]
     
     # 当前用户问题（本轮对话）
     current_human_message: Optional[str]
     
-    # 工具调用结果
-    tools_result: Annotated[List[str], operator.add]
+    # 工具调用结果（本轮）
+    tools_result: Annotated[List[str], add_or_reset]
+    
+    # 滚动摘要：messages[:summarized_count] 的摘要，提示词中以摘要代替这些较早的消息
+    history_summary: Optional[str]
+    
+    # 已并入 history_summary 的消息条数
+    summarized_count: Optional[int]
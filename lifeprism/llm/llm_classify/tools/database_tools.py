@@ -12,11 +12,11 @@ from lifeprism.llm.llm_classify.utils.data_base_format import(
      format_goal_time_spent,
      format_user_notes,
      format_focus_and_todos,
-     format_behavior_logs_lines,
+     format_behavior_logs_compact,
      format_pc_active_time,
      format_computer_usage_schedule,
      format_daily_goal_trend,
-     format_daily_breakdown,
+     format_daily_breakdown_compact,
      format_daily_summaries
 )
 from datetime import datetime, timedelta
@@ -383,10 +383,11 @@ def query_behavior_logs(
         category_id: 可选，主分类ID，用于筛选特定分类的记录
         sub_category_id: 可选，子分类ID，用于筛选特定子分类的记录
     返回示例:
-        22:27 ~ 22:28 (1m) antigravity - lifewatch-ai - antigravity - llm_lw_data_provider.py [工作/学习/编程] {完成lifewatch项目}
+        logs[1]{start,end,duration,app,title,category,sub_category,goal}:
+          22:27,22:28,1m,antigravity,lifewatch-ai - antigravity - llm_lw_data_provider.py,工作/学习,编程,完成lifewatch项目
     """
     result = f"下面是从{start_time}到{end_time} 按照{order_by}排序的使用记录：\n"
-    result += format_behavior_logs_lines(llm_lw_data_provider.query_behavior_logs(
+    result += format_behavior_logs_compact(llm_lw_data_provider.query_behavior_logs(
         start_time=start_time,
         end_time=end_time,
         limit=limit,
@@ -422,6 +423,20 @@ def query_psychological_assessment() -> List[Dict]:
     return llm_lw_data_provider.query_time_paradoxes()
 
 
+@tool
+def query_app_descriptions(apps: List[str]) -> str:
+    """
+    查询应用的用途描述。当行为日志中出现不熟悉的应用名、需要判断其用途时，可以使用此工具。
+    Args:
+        apps: 应用名称列表，如 ["antigravity", "obsidian"]
+    返回示例:
+        antigravity: AI 驱动的代码编辑器
+        obsidian: 本地 Markdown 笔记软件
+    """
+    descriptions = llm_lw_data_provider.load_app_descriptions(apps)
+    return "\n".join(f"{app}: {descriptions.get(app, '暂无描述')}" for app in apps) or "暂无描述"
+
+
 # ================================================
 # 周报/月报规律性总结工具
 # ================================================
@@ -442,7 +457,7 @@ def get_daily_breakdown(
     AI 可以通过此表格发现异常天，然后使用 query_behavior_logs 进一步探索。
     """
     data = llm_lw_data_provider.get_daily_breakdown(start_date, end_date)
-    return format_daily_breakdown(data)
+    return format_daily_breakdown_compact(data)
 
 
 @tool
@@ -7,12 +7,40 @@ from .format_prompt_utils import (
     format_goals_for_prompt, 
     format_category_tree_for_prompt,
     format_log_items_table,
+    format_goals_compact,
+    format_category_tree_compact,
+    format_log_items_compact,
     )
 from .parse_utils import (
     parse_classification_result,
     extract_json_from_response,
     parse_token_usage
 )
+from .token_budget import TokenBudget, get_token_budget, estimate_tokens
+from .batch_utils import (
+    BatchOutcome,
+    run_batches,
+    run_batches_async,
+)
+from .rate_limiter import (
+    RateLimiter,
+    CircuitOpenError,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND,
+    get_rate_limiter,
+)
+from .app_description_utils import fill_app_descriptions
+from .title_analysis_utils import fill_title_analyses
+from .llm_cache import LLMResponseCache, get_response_cache
+from .model_registry import (
+    create_chat_model,
+    get_chat_model,
+    clear_model_pool,
+    register_backend,
+    set_backend_override,
+    get_backend_name,
+)
+from .offline_models import FakeChatModel, RecordReplayChatModel, ReplayMissError
 from .split_utils import (
     split_by_duration,
     split_by_purpose,
@@ -30,11 +58,38 @@ __all__ = [
     "format_goals_for_prompt",
     "format_category_tree_for_prompt",
     "format_log_items_table",
+    "format_goals_compact",
+    "format_category_tree_compact",
+    "format_log_items_compact",
     "parse_classification_result",
     "extract_json_from_response",
     "split_by_duration",
     "split_by_purpose",
     "parse_token_usage",
+    "TokenBudget",
+    "get_token_budget",
+    "estimate_tokens",
+    "BatchOutcome",
+    "run_batches",
+    "run_batches_async",
+    "RateLimiter",
+    "CircuitOpenError",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND",
+    "get_rate_limiter",
+    "fill_app_descriptions",
+    "fill_title_analyses",
+    "LLMResponseCache",
+    "get_response_cache",
+    "create_chat_model",
+    "get_chat_model",
+    "clear_model_pool",
+    "register_backend",
+    "set_backend_override",
+    "get_backend_name",
+    "FakeChatModel",
+    "RecordReplayChatModel",
+    "ReplayMissError",
     "test_for_llm_class_state",
     "get_skill_non_json_content"
 ]
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+应用描述获取工具
+
+为 app_registry 中缺少描述的应用补全描述：
+1. 先查 app_description 表（按归一化应用名，所有分类器与对话工具共用）
+2. 仍缺失的应用通过 run_batches 并发请求 LLM（共享限速器、逐个重试）
+3. 新获取的描述写回 app_description 表，后续同步不再重复请求
+"""
+
+import logging
+from typing import Callable, Dict, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from lifeprism.llm.llm_classify.utils.batch_utils import run_batches
+
+logger = logging.getLogger(__name__)
+
+# 每个应用的最大尝试次数
+DESCRIPTION_MAX_ATTEMPTS = 3
+DESCRIPTION_RETRY_DELAY = 0.5
+
+DESCRIPTION_SYSTEM_MESSAGE = SystemMessage(content="""
+        你是一个软件程序识别专家。
+        **任务流程：**
+        1. 实时查询该软件最新的描述
+        2. 根据搜索结果，结合软件名称和标题样本，生成准确的软件描述
+
+        **输出要求：**
+        - 基于搜索结果提供软件描述（不超过20词）
+        - 如果搜索后仍无法确定是什么软件，返回 None
+        """)
+
+
+def _parse_description(content: str) -> str:
+    """空结果或 None 视为失败（触发重试）"""
+    content = (content or "").strip()
+    if not content or content.lower() == "none":
+        raise ValueError("描述结果为空")
+    return content
+
+
+def _build_description_messages(batch: list) -> list:
+    app, title = batch[0]
+    # 根据是否有 title 调整 prompt
+    if title:
+        user_message = HumanMessage(content=f"""软件名称:{app},软件标题样本:{title}""")
+    else:
+        user_message = HumanMessage(content=f"""软件名称:{app}""")
+    return [DESCRIPTION_SYSTEM_MESSAGE, user_message]
+
+
+def fill_app_descriptions(
+    app_registry: dict,
+    chat_model=None,
+    data_provider=None,
+    on_tokens_usage: Optional[Callable[[dict], None]] = None,
+    max_concurrency: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    补全 app_registry 中缺少描述的应用（原地更新 AppInFo.description）
+
+    Args:
+        app_registry: app -> AppInFo
+        chat_model: 聊天模型；None 时只从 app_description 表补全，不请求 LLM
+        data_provider: 提供 load_app_descriptions / save_app_descriptions 的数据提供者，
+            None 时使用 LWBaseDataProvider
+        on_tokens_usage: 每次 LLM 调用的 token 使用回调
+        max_concurrency: 最大并发请求数，None 时读取配置 llm_max_concurrency
+
+    Returns:
+        Dict[str, str]: 本次补全的 app -> 描述
+    """
+    missing = [app for app, info in app_registry.items() if not info.description]
+    if not missing:
+        return {}
+
+    if data_provider is None:
+        from lifeprism.storage import LWBaseDataProvider
+        data_provider = LWBaseDataProvider()
+
+    filled: Dict[str, str] = {}
+    try:
+        stored = data_provider.load_app_descriptions(missing)
+    except Exception as e:
+        logger.warning(f"读取应用描述表失败: {e}")
+        stored = {}
+    for app, description in stored.items():
+        app_registry[app].description = description
+        filled[app] = description
+    if stored:
+        logger.info(f"从应用描述表补全 {len(stored)} 个应用的描述")
+
+    to_search = [app for app in missing if app not in stored]
+    if not to_search or chat_model is None:
+        return filled
+
+    # 只有单用途应用才附带 title 样本用于辅助识别
+    requests = []
+    for app in to_search:
+        info = app_registry[app]
+        title_sample = info.titles[0] if not info.is_multipurpose and info.titles else ""
+        requests.append((app, title_sample))
+    logger.info(f"需要搜索描述的 app: {to_search}")
+
+    outcomes = run_batches(
+        chat_model, requests, _build_description_messages, 1,
+        node_name="app_descriptions",
+        max_concurrency=max_concurrency,
+        max_attempts=DESCRIPTION_MAX_ATTEMPTS,
+        retry_delay=DESCRIPTION_RETRY_DELAY,
+        parse=_parse_description,
+    )
+
+    searched: Dict[str, str] = {}
+    for outcome in outcomes:
+        if on_tokens_usage is not None:
+            for usage in outcome.tokens_usage:
+                on_tokens_usage(usage)
+        app = outcome.items[0][0]
+        if outcome.ok:
+            app_registry[app].description = outcome.parsed
+            searched[app] = outcome.parsed
+            logger.info(f"已获取并更新 {app} 的描述: {outcome.parsed[:50]}...")
+        else:
+            logger.warning(f"获取 {app} 的描述失败，已重试 {outcome.attempts} 次，跳过该应用")
+
+    if searched:
+        try:
+            data_provider.save_app_descriptions(searched)
+        except Exception as e:
+            logger.warning(f"保存应用描述失败: {e}")
+    filled.update(searched)
+    return filled
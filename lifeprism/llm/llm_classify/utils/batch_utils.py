@@ -0,0 +1,218 @@
+"""
+LLM 分批并发调用工具
+
+分类节点把待分类条目分批请求 LLM，批次之间互不依赖。
+未指定 batch_size 时按节点的 TokenBudget 打包（见 token_budget.py），每次成功的调用把实际 usage 反馈给预算。
+本模块用 chat_model.ainvoke 并发发送各批请求：
+- 信号量限制同时在途的请求数（配置 llm_max_concurrency）
+- 请求速率、token 速率与熔断由模型上挂载的全局共享 RateLimiter 控制（见 rate_limiter.py），
+  在响应缓存检查之后生效，命中缓存的请求不占用速率
+- 每批独立重试（调用失败或 JSON 解析失败），某批最终失败不影响其他批次；熔断器打开时不再重试
+- 结果按批次顺序返回，调用方按原顺序合并
+"""
+
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine, List, Optional
+
+from lifeprism.config import settings
+from lifeprism.llm.llm_classify.utils.parse_utils import extract_json_from_response, parse_token_usage
+from lifeprism.llm.llm_classify.utils.rate_limiter import CircuitOpenError, RateLimiter, get_rate_limiter
+from lifeprism.llm.llm_classify.utils.token_budget import TokenBudget, get_token_budget
+
+logger = logging.getLogger(__name__)
+
+# 单批最大尝试次数（含首次）
+BATCH_MAX_ATTEMPTS = 3
+# 重试退避基数（秒），第 n 次重试等待 BATCH_RETRY_DELAY * 2^(n-1)
+BATCH_RETRY_DELAY = 1.0
+
+
+def parse_json_content(content: str) -> Any:
+    """默认的结果解析：去除代码块标记后按 JSON 解析"""
+    return json.loads(extract_json_from_response(content))
+
+
+@dataclass
+class BatchOutcome:
+    """单个批次的执行结果"""
+    index: int                      # 批次序号（从 0 开始）
+    items: list                     # 该批的 LogItem
+    parsed: Any = None              # 解析结果，失败时为 None
+    error: Optional[Exception] = None
+    attempts: int = 0
+    # 每次成功返回的调用的 token 使用（解析失败的调用同样计费）
+    tokens_usage: List[dict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.parsed is not None
+
+
+def get_max_concurrency() -> int:
+    """读取配置的 LLM 最大并发数（至少为 1）"""
+    try:
+        return max(1, int(settings.llm_max_concurrency or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def run_coroutine_sync(coro: Coroutine) -> Any:
+    """
+    在同步代码中运行协程
+
+    当前线程没有运行中的事件循环时直接 asyncio.run；
+    已在事件循环中（如异步接口直接调用分类器）时转到独立线程运行，避免嵌套事件循环
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-batches") as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+async def _run_batch(
+    chat_model,
+    index: int,
+    batch: list,
+    build_messages: Callable[[list], list],
+    semaphore: asyncio.Semaphore,
+    node_name: str,
+    max_attempts: int,
+    retry_delay: float,
+    parse: Callable[[str], Any],
+    token_budget: Optional[TokenBudget] = None,
+    estimated_tokens: int = 0,
+) -> BatchOutcome:
+    outcome = BatchOutcome(index=index, items=batch)
+    messages = build_messages(batch)
+    for attempt in range(1, max_attempts + 1):
+        outcome.attempts = attempt
+        try:
+            async with semaphore:
+                result = await chat_model.ainvoke(messages)
+            usage = parse_token_usage(result)
+            outcome.tokens_usage.append(usage)
+            try:
+                outcome.parsed = parse(result.content)
+            except Exception:
+                if token_budget is not None:
+                    token_budget.record_parse_failure()
+                raise
+            if token_budget is not None:
+                token_budget.observe(estimated_tokens, usage, len(batch))
+            outcome.error = None
+            logger.info(f"{node_name} 批次 {index + 1} 请求成功")
+            return outcome
+        except CircuitOpenError as e:
+            # 上游持续失败，重试只会加重负载
+            outcome.error = e
+            logger.warning(f"{node_name} 批次 {index + 1} 未发送: {e}")
+            return outcome
+        except Exception as e:
+            outcome.error = e
+            if attempt < max_attempts:
+                delay = retry_delay * (2 ** (attempt - 1))
+                logger.warning(f"{node_name} 批次 {index + 1} 第 {attempt} 次请求失败: {e}，{delay:.1f}s 后重试")
+                await asyncio.sleep(delay)
+    logger.error(f"{node_name} 批次 {index + 1} 重试 {max_attempts} 次后仍失败: {outcome.error}")
+    return outcome
+
+
+async def run_batches_async(
+    chat_model,
+    items: list,
+    build_messages: Callable[[list], list],
+    batch_size: Optional[int] = None,
+    node_name: str = "",
+    max_concurrency: Optional[int] = None,
+    max_attempts: int = BATCH_MAX_ATTEMPTS,
+    retry_delay: float = BATCH_RETRY_DELAY,
+    parse: Callable[[str], Any] = parse_json_content,
+    token_budget: Optional[TokenBudget] = None,
+) -> List[BatchOutcome]:
+    """
+    分批并发请求 LLM（异步版本）
+
+    Args:
+        chat_model: LangChain 聊天模型（需支持 ainvoke）
+        items: 待分类的 LogItem 列表
+        build_messages: 由一批 LogItem 构建消息列表的函数（需能处理空列表，用于估算公共开销）
+        batch_size: 固定的每批条目数；None 时按 token 预算打包
+        node_name: 节点名称，用于日志输出
+        max_concurrency: 最大并发请求数，None 时读取配置 llm_max_concurrency
+        max_attempts: 单批最大尝试次数
+        retry_delay: 重试退避基数（秒）
+        parse: 解析响应内容的函数，抛出异常视为本次请求失败（触发重试）；默认按 JSON 解析
+        token_budget: 按 token 打包时使用的预算，None 时取 get_token_budget(node_name)
+
+    Returns:
+        List[BatchOutcome]: 按批次顺序排列的结果
+    """
+    if batch_size is None:
+        token_budget = token_budget or get_token_budget(node_name)
+        packed = token_budget.pack(items, build_messages)
+    else:
+        token_budget = None
+        packed = [(items[i:i + batch_size], 0) for i in range(0, len(items), batch_size)]
+    batches = [batch for batch, _ in packed]
+    if not batches:
+        return []
+    concurrency = max(1, max_concurrency or get_max_concurrency())
+    semaphore = asyncio.Semaphore(concurrency)
+    logger.info(f"{node_name} 共 {len(items)} 条记录，分 {len(batches)} 批，并发数 {min(concurrency, len(batches))}")
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*[
+        _run_batch(
+            chat_model, index, batch, build_messages, semaphore,
+            node_name, max_attempts, retry_delay, parse,
+            token_budget=token_budget, estimated_tokens=estimated_tokens
+        )
+        for index, (batch, estimated_tokens) in enumerate(packed)
+    ])
+    failed = sum(1 for outcome in outcomes if not outcome.ok)
+    logger.info(
+        f"{node_name} 分批请求完成: {len(batches) - failed}/{len(batches)} 批成功，"
+        f"耗时 {time.perf_counter() - started:.2f}s"
+    )
+    return list(outcomes)
+
+
+def run_batches(
+    chat_model,
+    items: list,
+    build_messages: Callable[[list], list],
+    batch_size: Optional[int] = None,
+    node_name: str = "",
+    max_concurrency: Optional[int] = None,
+    max_attempts: int = BATCH_MAX_ATTEMPTS,
+    retry_delay: float = BATCH_RETRY_DELAY,
+    parse: Callable[[str], Any] = parse_json_content,
+    token_budget: Optional[TokenBudget] = None,
+) -> List[BatchOutcome]:
+    """
+    分批并发请求 LLM（同步入口，供 LangGraph 同步节点调用），参数同 run_batches_async
+
+    Example:
+        >>> outcomes = run_batches(
+        ...     chat_model, items, lambda batch: [system_message, HumanMessage(...)], node_name="single_classify"
+        ... )
+        >>> for outcome in outcomes:
+        ...     if outcome.ok:
+        ...         parse_classification_result(outcome.items, outcome.parsed, "single_classify")
+    """
+    return run_coroutine_sync(run_batches_async(
+        chat_model, items, build_messages, batch_size,
+        node_name=node_name,
+        max_concurrency=max_concurrency,
+        max_attempts=max_attempts,
+        retry_delay=retry_delay,
+        parse=parse,
+        token_budget=token_budget,
+    ))
@@ -3,6 +3,13 @@ import langchain_community.llms.tongyi as llms_tongyi_module
 import langchain_community.chat_models.tongyi as chat_tongyi_module
 import logging
 from lifeprism.config import settings
+from lifeprism.llm.llm_classify.utils.llm_cache import get_response_cache
+from lifeprism.llm.llm_classify.utils.model_registry import get_chat_model, register_backend
+from lifeprism.llm.llm_classify.utils.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    get_rate_limiter,
+    get_rate_limiter_callback,
+)
 api_key = settings.api_key
 logger = logging.getLogger(__name__)
 
@@ -48,22 +55,52 @@ def _patched_check_response(resp):
 llms_tongyi_module.check_response = _patched_check_response
 chat_tongyi_module.check_response = _patched_check_response
 
-def create_ChatTongyiModel(
+def _create_tongyi_model(
                             temperature=0.2,
                             enable_search=True,
                             enable_thinking=False,
-                            enable_streaming = False):
+                            enable_streaming = False,
+                            use_cache=True,
+                            priority=PRIORITY_BACKGROUND):
+    # 开启 llm_cache_enabled 且调用为确定性时挂载响应缓存；use_cache=False 强制直连（如连通性测试）
+    cache = get_response_cache(
+        settings.model, temperature, enable_streaming,
+        enable_search=enable_search, enable_thinking=enable_thinking
+    ) if use_cache else None
     return ChatTongyi(
         model=settings.model,  # 指定使用 qwen-plus 模型，也可以改为 'qwen-max' 或 'qwen-turbo'
         temperature=temperature,
         dashscope_api_key=settings.api_key,
         streaming=enable_streaming,
+        cache=cache,
+        # 全局共享限速器，在缓存检查之后生效（命中缓存不占用速率）；回调把 token 消耗与上游错误反馈给限速器
+        rate_limiter=get_rate_limiter(priority),
+        callbacks=[get_rate_limiter_callback()],
         model_kwargs={
             "enable_search": enable_search,
             "enable_thinking": enable_thinking
         }
         # streaming=True # 如果需要流式输出，可以开启此选项
     )
+
+register_backend("tongyi", _create_tongyi_model)
+
+def create_ChatTongyiModel(
+                            temperature=0.2,
+                            enable_search=True,
+                            enable_thinking=False,
+                            enable_streaming = False,
+                            use_cache=True,
+                            priority=PRIORITY_BACKGROUND):
+    # 按配置 llm_backend 选择后端（tongyi / fake / record / replay），同一参数在进程内复用实例，见 model_registry
+    return get_chat_model(
+        temperature=temperature,
+        enable_search=enable_search,
+        enable_thinking=enable_thinking,
+        enable_streaming=enable_streaming,
+        use_cache=use_cache,
+        priority=priority,
+    )
 if __name__ == "__main__":
     model = create_ChatTongyiModel()
     message = [
@@ -1,3 +1,6 @@
+from lifeprism.llm.llm_classify.utils.langchain_toon_adapter import LangChainToonAdapter
+
+
 
 
 def format_seconds(seconds: int) -> str:
@@ -495,6 +498,51 @@ def format_behavior_logs_lines(logs: list) -> str:
     return "\n".join(lines)
 
 
+def _clock(time_str: str) -> str:
+    """从 "YYYY-MM-DD HH:MM:SS" 中提取 HH:MM"""
+    if time_str and ' ' in time_str:
+        return time_str.split()[1][:5]
+    return time_str or ''
+
+
+def _short_duration(duration: int) -> str:
+    """时长缩写: 45s / 12m / 1h30m"""
+    if duration < 60:
+        return f"{duration}s"
+    if duration < 3600:
+        return f"{duration // 60}m"
+    hours, minutes = duration // 3600, (duration % 3600) // 60
+    return f"{hours}h{minutes}m" if minutes > 0 else f"{hours}h"
+
+
+def format_behavior_logs_compact(logs: list) -> str:
+    """
+    将行为日志编码为 Toon 表格（列名只出现一次，空字段为空单元格）
+
+    示例:
+        logs[2]{start,end,duration,app,title,category,sub_category,goal}:
+          08:30,09:15,45m,Chrome,查看邮件,工作,邮件处理,提高效率
+          09:15,10:00,45m,VSCode,编写代码,工作,编程,
+    """
+    if not logs:
+        return "暂无行为日志"
+    rows = []
+    for log in logs:
+        rows.append([
+            _clock(log.get('start_time', '')),
+            _clock(log.get('end_time', '')),
+            _short_duration(log.get('duration', 0) or 0),
+            log.get('app') or '未知应用',
+            log.get('title') or None,
+            log.get('category_name') or None,
+            log.get('sub_category_name') or None,
+            log.get('goal_name') or None,
+        ])
+    return LangChainToonAdapter.encode_table(
+        "logs", ["start", "end", "duration", "app", "title", "category", "sub_category", "goal"], rows
+    )
+
+
 def format_daily_breakdown(breakdown_data: list) -> str:
     """
     格式化每日分解数据为表格形式
@@ -551,6 +599,37 @@ def format_daily_breakdown(breakdown_data: list) -> str:
     return "\n".join(output_lines)
 
 
+def format_daily_breakdown_compact(breakdown_data: list) -> str:
+    """
+    format_daily_breakdown 的 Toon 表格版本（总时长前 3 的分类各占一列，值为占比百分数）
+
+    示例:
+        电脑使用时间表:
+        days[1]{date,hours,工作%,娱乐%,学习%,pc_start,pc_end}:
+          2026-01-05,8.5,60,20,10,08:30,23:10
+    """
+    if not breakdown_data:
+        return "暂无每日数据"
+
+    category_totals = {}
+    for day in breakdown_data:
+        for cat in day.get('categories', []):
+            name = cat['name']
+            category_totals[name] = category_totals.get(name, 0) + cat.get('duration_seconds', 0)
+    top_categories = sorted(category_totals.keys(), key=lambda x: category_totals[x], reverse=True)[:3]
+
+    rows = []
+    for day in breakdown_data:
+        cat_map = {cat['name']: cat['percentage'] for cat in day.get('categories', [])}
+        rows.append(
+            [day.get('date', '-'), day.get('total_duration_hours', 0)]
+            + [cat_map.get(cat_name, 0) for cat_name in top_categories]
+            + [day.get('pc_start_time', '-'), day.get('pc_end_time', '-')]
+        )
+    fields = ["date", "hours"] + [f"{cat_name}%" for cat_name in top_categories] + ["pc_start", "pc_end"]
+    return "电脑使用时间表:\n" + LangChainToonAdapter.encode_table("days", fields, rows)
+
+
 def format_daily_summaries(summaries: list) -> str:
     """
     格式化每日 AI 摘要
@@ -1,4 +1,16 @@
 from lifeprism.llm.llm_classify.schemas.classify_shemas import Goal,LogItem
+from lifeprism.llm.llm_classify.utils.langchain_toon_adapter import LangChainToonAdapter
+
+# 单个字段的最大长度，超出截断（与表格格式一致）
+MAX_FIELD_LENGTH = 80
+
+
+def truncate_field(value):
+    """截断过长的字符串字段，其他类型原样返回"""
+    if isinstance(value, str) and len(value) > MAX_FIELD_LENGTH:
+        return value[:MAX_FIELD_LENGTH - 3] + "..."
+    return value
+
 def format_goals_for_prompt(goals: list[Goal]) -> str:
     """将 goals 列表格式化为易于 AI 理解的字符串"""
     if not goals:
@@ -117,6 +129,68 @@ def format_log_items_table(
         return result.strip()
 
 
+def format_goals_compact(goals: list[Goal]) -> str:
+    """将 goals 列表编码为 Toon 表格 goals[N]{goal,category,sub_category}"""
+    if not goals:
+        return ""
+    return LangChainToonAdapter.encode_table(
+        "goals", ["goal", "category", "sub_category"],
+        [[goal.goal, goal.category, goal.sub_category] for goal in goals]
+    )
+
+
+def format_category_tree_compact(category_tree: dict[str, list[str] | None]) -> str:
+    """将 category_tree 编码为 Toon 对象，每行 category[N]: sub_category,..."""
+    if not category_tree:
+        return "暂无分类体系"
+    return LangChainToonAdapter.encode_list_mapping("category_tree", category_tree)
+
+
+def format_log_items_compact(
+    log_items: list[LogItem],
+    fields: list[str],
+    app_registry: dict = None,
+    group_by_app: bool = False,
+    show_app_description: bool = False
+) -> str:
+    """
+    format_log_items_table 的紧凑版本：编码为 Toon 表格，列名只出现一次
+
+    - items[N]{fields}: 每条记录一行，group_by_app 时同一应用的记录相邻（按应用首次出现的顺序）
+    - show_app_description 时另附 apps[K]{app,description}，每个应用的描述只出现一次
+
+    Example:
+        >>> format_log_items_compact(items, fields=["id", "app", "title"], app_registry=registry,
+        ...                          group_by_app=True, show_app_description=True)
+        apps[1]{app,description}:
+          code,代码编辑器
+        items[2]{id,app,title}:
+          1,code,main.py
+          2,code,utils.py
+    """
+    if not log_items:
+        return "暂无待分类数据"
+
+    if group_by_app:
+        groups: dict[str, list[LogItem]] = {}
+        for item in log_items:
+            groups.setdefault(item.app, []).append(item)
+        log_items = [item for items in groups.values() for item in items]
+
+    sections = []
+    if group_by_app and show_app_description and app_registry:
+        apps = list(dict.fromkeys(item.app for item in log_items))
+        sections.append(LangChainToonAdapter.encode_table(
+            "apps", ["app", "description"],
+            [[app, truncate_field(app_registry[app].description if app in app_registry else None)] for app in apps]
+        ))
+    sections.append(LangChainToonAdapter.encode_table(
+        "items", fields,
+        [[truncate_field(getattr(item, field, None)) for field in fields] for item in log_items]
+    ))
+    return "\n".join(sections)
+
+
 if __name__ == "__main__":
     data = [i for i in range(50)]
     print(data_spliter(data,51))
\ No newline at end of file
@@ -5,8 +5,22 @@ LangChain Tool -> Toon Format 适配器（官方库实现）
 1. 使用 @tool 装饰器 + Pydantic 定义工具
 2. 从工具生成 JSON Schema
 3. 使用 toon-python 库将 JSON 转换为 Toon 格式
+
+批量提示词数据（待分类条目、分类体系、行为日志等）使用 Toon 的表格形式编码，列名只在表头出现一次：
+
+    items[2]{id,app,title}:
+      1,code,main.py
+      2,chrome,"a, b"
+
+    category_tree:
+      工作[2]: 编程,文档
+      学习[0]:
+
+含分隔符、引号、首尾空白或可能被误读为数字 / null / 布尔值的字符串按 JSON 字符串加引号；
+表格中的 None 编码为空单元格（比 null 更省 token，空字符串写作 ""），列表映射中的 None 编码为 null。encode_table / encode_list_mapping 与 decode_tables / decode_list_mapping 互逆
 """
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Iterable, Optional, Sequence
 from langchain_core.tools import BaseTool, tool
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel, Field
@@ -14,6 +28,69 @@ import json
 
 from toon_python import encode as toon_encode
 
+_NUMBER_PATTERN = re.compile(r"^-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?$")
+_TABLE_HEADER_PATTERN = re.compile(r'^(\s*)("(?:[^"\\]|\\.)*"|[^\s\[\]{}:]+)\[(\d+)\]\{([^}]*)\}:\s*$')
+_LIST_ENTRY_PATTERN = re.compile(r'^\s+("(?:[^"\\]|\\.)*"|[^\[\]]+?)\[(\d+)\]:\s?(.*)$')
+_RESERVED_WORDS = {"null", "true", "false"}
+
+
+def _encode_value(value: Any, delimiter: str = ",", null: str = "null") -> str:
+    """编码单个值（字符串在可能产生歧义时加 JSON 引号），None 编码为 null 参数的值"""
+    if value is None:
+        return null
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return json.dumps(value)
+    text = str(value)
+    if (
+        not text
+        or text != text.strip()
+        or text in _RESERVED_WORDS
+        or _NUMBER_PATTERN.match(text)
+        or any(ch in text for ch in (delimiter, '"', "\\", "\n", "\r", "[", "]", "{", "}"))
+        or text.startswith("-")
+    ):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def _decode_value(token: str) -> Any:
+    token = token.strip()
+    if token.startswith('"'):
+        return json.loads(token)
+    if token in ("null", ""):
+        return None
+    if token in ("true", "false"):
+        return token == "true"
+    if _NUMBER_PATTERN.match(token):
+        return float(token) if any(ch in token for ch in ".eE") else int(token)
+    return token
+
+
+def _split_row(line: str, delimiter: str = ",") -> List[str]:
+    """按分隔符切分一行（忽略引号内的分隔符）"""
+    cells, current, in_quotes, escaped = [], [], False, False
+    for ch in line:
+        if in_quotes:
+            current.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_quotes = False
+        elif ch == '"':
+            in_quotes = True
+            current.append(ch)
+        elif ch == delimiter:
+            cells.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    cells.append("".join(current))
+    return cells
+
 
 class LangChainToonAdapter:
     """
@@ -132,6 +209,92 @@ tool_call(tool_name, param1=value1, param2=value2)
         
         return SystemMessage(content=content)
 
+    @staticmethod
+    def encode_table(name: str, fields: Sequence[str], rows: Iterable[Sequence[Any]], indent: int = 0) -> str:
+        """
+        将同构的记录编码为 Toon 表格
+
+        Args:
+            name: 表名
+            fields: 列名
+            rows: 每行的值（与 fields 一一对应）
+            indent: 表头缩进的空格数
+
+        Returns:
+            str: name[N]{f1,f2}: 表头 + 每行一条逗号分隔的记录（None 为空单元格）
+        """
+        rows = list(rows)
+        pad = " " * indent
+        lines = [f"{pad}{_encode_value(name)}[{len(rows)}]{{{','.join(_encode_value(f) for f in fields)}}}:"]
+        for row in rows:
+            lines.append(f"{pad}  {','.join(_encode_value(value, null='') for value in row)}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def decode_tables(text: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        解析文本中的所有 Toon 表格（表格之外的内容忽略）
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 表名 -> 记录列表
+        """
+        tables: Dict[str, List[Dict[str, Any]]] = {}
+        lines = text.splitlines()
+        i = 0
+        while i < len(lines):
+            match = _TABLE_HEADER_PATTERN.match(lines[i])
+            i += 1
+            if not match:
+                continue
+            name = _decode_value(match.group(2))
+            count = int(match.group(3))
+            fields = [_decode_value(f) for f in _split_row(match.group(4))] if match.group(4) else []
+            records = []
+            for line in lines[i:i + count]:
+                values = [_decode_value(cell) for cell in _split_row(line.strip())]
+                if len(values) != len(fields):
+                    raise ValueError(f"表格 {name} 的行与表头列数不一致: {line!r}")
+                records.append(dict(zip(fields, values)))
+            if len(records) != count:
+                raise ValueError(f"表格 {name} 声明 {count} 行，实际 {len(records)} 行")
+            tables[str(name)] = records
+            i += count
+        return tables
+
+    @staticmethod
+    def encode_list_mapping(name: str, mapping: Dict[str, Optional[Sequence[Any]]]) -> str:
+        """
+        将 key -> 值列表 的映射（如分类体系 category -> sub_categories）编码为 Toon 对象
+
+        Returns:
+            str: name: 之后每行 key[N]: v1,v2
+        """
+        lines = [f"{_encode_value(name)}:"]
+        for key, values in mapping.items():
+            values = list(values or [])
+            lines.append(f"  {_encode_value(key)}[{len(values)}]: {','.join(_encode_value(v) for v in values)}".rstrip())
+        return "\n".join(lines)
+
+    @staticmethod
+    def decode_list_mapping(text: str, name: str) -> Dict[str, List[Any]]:
+        """解析 encode_list_mapping 的输出（从文本中名为 name 的对象开始）"""
+        lines = text.splitlines()
+        header = f"{_encode_value(name)}:"
+        try:
+            start = next(i for i, line in enumerate(lines) if line.strip() == header)
+        except StopIteration:
+            raise ValueError(f"未找到 {name}")
+        mapping: Dict[str, List[Any]] = {}
+        for line in lines[start + 1:]:
+            match = _LIST_ENTRY_PATTERN.match(line)
+            if not match:
+                break
+            values = [_decode_value(cell) for cell in _split_row(match.group(3))] if match.group(3).strip() else []
+            if len(values) != int(match.group(2)):
+                raise ValueError(f"{name} 的条目长度与声明不一致: {line!r}")
+            mapping[str(_decode_value(match.group(1)))] = values
+        return mapping
+
 
 # ============================================================================
 # 示例用法
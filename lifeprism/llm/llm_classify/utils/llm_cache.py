@@ -0,0 +1,240 @@
+"""
+LLM 响应缓存（SQLite，可选开启）
+
+重试、同一时间窗口的重复同步、重新生成报告都会发送完全相同的提示词。
+开启 llm_cache_enabled 后，create_ChatTongyiModel 创建的模型通过 LangChain 的 cache 接口
+挂载 LLMResponseCache：
+
+- 键: sha256(模型签名 + LangChain 调用参数 + 提示词)；ChatTongyi 的 LangChain 调用参数不含
+  model / temperature，因此每组 (model, temperature, model_kwargs) 使用独立签名的缓存实例
+- 有效期 llm_cache_ttl_hours，容量 llm_cache_max_entries（超出时淘汰最久未使用的条目）
+- 流式调用、temperature 高于 llm_cache_max_temperature 的调用视为非确定性，不缓存；
+  开启联网搜索（enable_search）的调用依赖实时搜索结果，同样不缓存
+- 命中的结果在 response_metadata 中标记 cache_hit，parse_token_usage 不再计入实际消耗；
+  命中节省的 token 单独按天累计到 tokens_usage_log（session_id = cache-YYYY-MM-DD, mode = llm_cache，
+  result_items_count 记录命中次数）
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from lifeprism.config import settings
+from lifeprism.llm.llm_classify.utils.parse_utils import parse_token_usage
+
+logger = logging.getLogger(__name__)
+
+CACHED_USAGE_MODE = "llm_cache"
+
+
+class LLMResponseCache(BaseCache):
+    """
+    基于 llm_response_cache 表的 LangChain 缓存
+
+    Args:
+        db_manager: DatabaseManager 实例，None 则使用 LW 数据库全局单例
+        model: 模型名称
+        signature: 模型签名（model / temperature 等影响输出的参数），参与缓存键计算
+        ttl_seconds: 条目有效期（秒），None 时读取配置 llm_cache_ttl_hours
+        max_entries: 最大条目数，None 时读取配置 llm_cache_max_entries
+    """
+
+    def __init__(
+        self,
+        db_manager=None,
+        model: Optional[str] = None,
+        signature: str = "",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        if db_manager is None:
+            from lifeprism.storage import lw_db_manager
+            db_manager = lw_db_manager
+        self.db = db_manager
+        self.model = model
+        self.signature = signature
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return float(settings.llm_cache_ttl_hours or 0) * 3600
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return int(settings.llm_cache_max_entries or 0)
+
+    def make_key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{self.signature}\x00{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self.db.get_connection() as conn:
+            row = conn.execute(
+                "SELECT generations FROM llm_response_cache WHERE cache_key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE llm_response_cache SET hit_count = hit_count + 1, last_used_at = ? WHERE cache_key = ?",
+                (now, key)
+            )
+        try:
+            generations = _loads_generations(row[0])
+        except Exception as e:
+            logger.warning(f"LLM 缓存条目反序列化失败，忽略该条目: {e}")
+            return None
+
+        saved = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0, 'search_count': 0}
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is None:
+                continue
+            for field, value in parse_token_usage(message).items():
+                saved[field] += value or 0
+            message.response_metadata = {**message.response_metadata, "cache_hit": True}
+        self._record_cached_usage(saved)
+        logger.debug(f"LLM 缓存命中: {key[:12]}，节省 {saved['total_tokens']} tokens")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        ttl_seconds = self.ttl_seconds
+        if ttl_seconds <= 0:
+            return
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        payload = _dumps_generations(return_val)
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO llm_response_cache (cache_key, model, generations, expires_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    generations = excluded.generations,
+                    expires_at = excluded.expires_at,
+                    last_used_at = excluded.last_used_at
+            """, (key, self.model, payload, now + ttl_seconds, now))
+            self._prune(conn, now)
+
+    def clear(self, **kwargs: Any) -> None:
+        """清空缓存（传入 model 时只清理该模型的条目）"""
+        model = kwargs.get("model")
+        with self.db.get_connection() as conn:
+            if model is None:
+                conn.execute("DELETE FROM llm_response_cache")
+            else:
+                conn.execute("DELETE FROM llm_response_cache WHERE model = ?", (model,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计: entries / expired / hits"""
+        with self.db.get_connection() as conn:
+            entries, expired, hits = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(expires_at <= ?), 0), COALESCE(SUM(hit_count), 0)
+                FROM llm_response_cache
+            """, (time.time(),)).fetchone()
+        return {"entries": entries, "expired": expired, "hits": hits}
+
+    def _prune(self, conn, now: float) -> None:
+        """删除过期条目，并按最近使用时间淘汰超出容量的条目"""
+        conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (now,))
+        max_entries = self.max_entries
+        if max_entries > 0:
+            conn.execute("""
+                DELETE FROM llm_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_response_cache
+                    ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (max_entries,))
+
+    def _record_cached_usage(self, usage: Dict[str, int]) -> None:
+        """按天累计命中缓存节省的 token（与实际消耗分开记录）"""
+        session_id = f"cache-{datetime.now().strftime('%Y-%m-%d')}"
+        try:
+            with self.db.get_connection() as conn:
+                conn.execute("""
+                    INSERT INTO tokens_usage_log
+                        (session_id, input_tokens, output_tokens, total_tokens, search_count, result_items_count, mode)
+                    VALUES (?, ?, ?, ?, ?, 1, ?)
+                    ON CONFLICT (session_id) DO UPDATE SET
+                        input_tokens = input_tokens + excluded.input_tokens,
+                        output_tokens = output_tokens + excluded.output_tokens,
+                        total_tokens = total_tokens + excluded.total_tokens,
+                        search_count = search_count + excluded.search_count,
+                        result_items_count = result_items_count + 1
+                """, (
+                    session_id, usage['input_tokens'], usage['output_tokens'],
+                    usage['total_tokens'], usage['search_count'], CACHED_USAGE_MODE
+                ))
+        except Exception as e:
+            logger.warning(f"记录缓存命中的 token 使用失败: {e}")
+
+
+def _dumps_generations(generations: RETURN_VAL_TYPE) -> str:
+    """序列化生成结果（聊天结果只保存消息本身，不经过 LangChain 的通用反序列化）"""
+    items = []
+    for generation in generations:
+        if isinstance(generation, ChatGeneration):
+            items.append({"message": message_to_dict(generation.message), "info": generation.generation_info})
+        else:
+            items.append({"text": generation.text, "info": generation.generation_info})
+    return json.dumps(items, ensure_ascii=False)
+
+
+def _loads_generations(payload: str) -> list:
+    generations = []
+    for item in json.loads(payload):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item.get("info")))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item.get("info")))
+    return generations
+
+
+_caches: Dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(
+    model: Optional[str],
+    temperature: Optional[float],
+    streaming: bool = False,
+    **model_kwargs: Any
+) -> Optional[LLMResponseCache]:
+    """
+    返回可挂载到聊天模型的响应缓存；未开启缓存、调用为非确定性或开启联网搜索时返回 None
+
+    Args:
+        model: 模型名称
+        temperature: 采样温度
+        streaming: 是否流式调用
+        **model_kwargs: 其他影响输出的模型参数（如 enable_search / enable_thinking），参与缓存键计算
+    """
+    if not settings.llm_cache_enabled or streaming:
+        return None
+    # 联网搜索的回答随搜索结果变化，相同提示词不能复用旧结果
+    if model_kwargs.get("enable_search"):
+        return None
+    max_temperature = settings.llm_cache_max_temperature
+    if temperature is not None and max_temperature is not None and temperature > float(max_temperature):
+        return None
+    signature = json.dumps(
+        {"model": model, "temperature": temperature, **model_kwargs}, sort_keys=True, ensure_ascii=False
+    )
+    with _caches_lock:
+        if signature not in _caches:
+            _caches[signature] = LLMResponseCache(model=model, signature=signature)
+        return _caches[signature]
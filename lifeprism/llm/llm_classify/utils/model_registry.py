@@ -0,0 +1,217 @@
+"""
+LLM 后端注册表
+
+所有 LLM 调用方（分类、对话、总结、数据驱动 Agent）都通过 create_ChatTongyiModel / create_chat_model
+获取聊天模型，由配置 llm_backend（环境变量 LIFEPRISM_LLM_BACKEND 优先）决定实际后端：
+
+- tongyi: DashScope ChatTongyi（默认，见 create_model.py）
+- fake:   确定性的本地假模型，延迟由 llm_fake_latency 配置，用于离线压测
+- record: 调用 tongyi 并把响应录制到夹具文件（llm_fixture_path）
+- replay: 只从夹具文件回放响应，无需网络与 API Key
+
+新后端通过 register_backend(name, factory) 注册，factory 接收与 create_chat_model 相同的关键字参数；
+访问上游（或模拟上游）的后端应挂载 get_rate_limiter(priority) 与 get_rate_limiter_callback()，
+使所有调用方共享同一组限速与熔断状态（见 rate_limiter.py）
+
+get_chat_model 在进程内按 (后端, 调用参数) 复用模型实例，POOLED_SETTINGS 中任一配置变化时重建，
+避免每次同步、每轮对话都重新构建客户端
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from lifeprism.config import settings
+from lifeprism.llm.llm_classify.utils.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    get_rate_limiter,
+    get_rate_limiter_callback,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "tongyi"
+DEFAULT_FIXTURE_FILENAME = "llm_fixtures.json"
+
+ModelFactory = Callable[..., BaseChatModel]
+
+_backends: Dict[str, ModelFactory] = {}
+_override_lock = threading.Lock()
+_backend_override: Optional[str] = None
+
+# 构建模型实例时读取的配置：任一变化时池中的实例失效
+POOLED_SETTINGS = (
+    "model", "api_key", "llm_cache_enabled", "llm_cache_max_temperature",
+    "llm_fake_latency", "llm_fixture_path", "lw_db_path",
+)
+
+_pool_lock = threading.Lock()
+# (后端, temperature, enable_search, enable_thinking, enable_streaming, use_cache, priority) -> (配置指纹, 模型)
+_model_pool: Dict[tuple, Tuple[tuple, BaseChatModel]] = {}
+
+
+def register_backend(name: str, factory: ModelFactory) -> None:
+    """注册（或替换）一个 LLM 后端"""
+    _backends[name] = factory
+
+
+def list_backends() -> List[str]:
+    return sorted(_backends)
+
+
+def set_backend_override(name: Optional[str]) -> None:
+    """
+    进程内临时覆盖后端（优先于配置），None 取消覆盖
+
+    用于基准测试与脚本，不写入配置文件
+    """
+    global _backend_override
+    if name is not None and name not in _backends:
+        raise ValueError(f"未知的 LLM 后端: {name}，可选: {list_backends()}")
+    with _override_lock:
+        _backend_override = name
+
+
+def get_backend_name() -> str:
+    """当前生效的后端名称：进程内覆盖 > 配置 llm_backend > tongyi"""
+    return _backend_override or settings.llm_backend or DEFAULT_BACKEND
+
+
+def get_fixture_path() -> str:
+    """record / replay 夹具文件路径，未配置时放在 LW 数据库所在目录"""
+    if settings.llm_fixture_path:
+        return settings.llm_fixture_path
+    return os.path.join(os.path.dirname(settings.lw_db_path or "") or ".", DEFAULT_FIXTURE_FILENAME)
+
+
+def create_chat_model(
+    temperature: float = 0.2,
+    enable_search: bool = True,
+    enable_thinking: bool = False,
+    enable_streaming: bool = False,
+    use_cache: bool = True,
+    backend: Optional[str] = None,
+    priority: str = PRIORITY_BACKGROUND,
+) -> BaseChatModel:
+    """
+    按当前后端创建聊天模型
+
+    Args:
+        temperature: 采样温度
+        enable_search: 是否开启联网搜索
+        enable_thinking: 是否开启思考模式
+        enable_streaming: 是否流式输出
+        use_cache: 是否允许挂载响应缓存（仅网络后端生效）
+        backend: 指定后端，None 时使用 get_backend_name()
+        priority: 请求优先级（interactive / background），决定在共享限速器中的排队次序
+    """
+    name = backend or get_backend_name()
+    factory = _backends.get(name)
+    if factory is None:
+        raise ValueError(f"未知的 LLM 后端: {name}，可选: {list_backends()}")
+    return factory(
+        temperature=temperature,
+        enable_search=enable_search,
+        enable_thinking=enable_thinking,
+        enable_streaming=enable_streaming,
+        use_cache=use_cache,
+        priority=priority,
+    )
+
+
+def _settings_fingerprint() -> tuple:
+    return tuple(settings.get(name) for name in POOLED_SETTINGS)
+
+
+def get_chat_model(
+    temperature: float = 0.2,
+    enable_search: bool = True,
+    enable_thinking: bool = False,
+    enable_streaming: bool = False,
+    use_cache: bool = True,
+    priority: str = PRIORITY_BACKGROUND,
+) -> BaseChatModel:
+    """
+    获取进程内复用的聊天模型（参数同 create_chat_model）
+
+    同一后端与调用参数共用一个实例；后端切换或 POOLED_SETTINGS 中的配置变化后，下次获取时重建
+    （旧实例不再被池引用，仍在使用它的调用不受影响）
+    """
+    name = get_backend_name()
+    key = (name, temperature, enable_search, enable_thinking, enable_streaming, use_cache, priority)
+    fingerprint = _settings_fingerprint()
+    with _pool_lock:
+        entry = _model_pool.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+
+    model = create_chat_model(
+        temperature=temperature,
+        enable_search=enable_search,
+        enable_thinking=enable_thinking,
+        enable_streaming=enable_streaming,
+        use_cache=use_cache,
+        backend=name,
+        priority=priority,
+    )
+    with _pool_lock:
+        # 配置已变化：丢弃所有按旧配置构建的实例
+        for stale in [k for k, (f, _) in _model_pool.items() if f != fingerprint]:
+            del _model_pool[stale]
+        entry = _model_pool.setdefault(key, (fingerprint, model))
+    if entry[1] is model:
+        logger.debug(f"已构建聊天模型: backend={name}, temperature={temperature}, search={enable_search}, "
+                     f"thinking={enable_thinking}, streaming={enable_streaming}")
+    return entry[1]
+
+
+def clear_model_pool() -> None:
+    """清空模型池（下次 get_chat_model 时重建）"""
+    with _pool_lock:
+        _model_pool.clear()
+
+
+def _create_fake_model(priority: str = PRIORITY_BACKGROUND, **kwargs) -> BaseChatModel:
+    from lifeprism.llm.llm_classify.utils.offline_models import FakeChatModel
+    # 模拟上游：与真实后端共用限速器与熔断器，便于离线验证限速与熔断行为
+    return FakeChatModel(
+        latency=float(settings.llm_fake_latency or 0),
+        rate_limiter=get_rate_limiter(priority),
+        callbacks=[get_rate_limiter_callback()],
+    )
+
+
+def _create_record_replay_model(mode: str) -> ModelFactory:
+    def factory(
+        temperature: float = 0.2,
+        enable_search: bool = True,
+        enable_thinking: bool = False,
+        enable_streaming: bool = False,
+        use_cache: bool = True,
+        priority: str = PRIORITY_BACKGROUND,
+    ) -> BaseChatModel:
+        from lifeprism.llm.llm_classify.utils.offline_models import RecordReplayChatModel
+        # 录制时直连真实模型，避免把缓存命中的结果当作新录制的响应
+        inner = create_chat_model(
+            temperature, enable_search, enable_thinking, enable_streaming,
+            use_cache=False, backend=DEFAULT_BACKEND, priority=priority
+        ) if mode == "record" else None
+        return RecordReplayChatModel(
+            fixture_path=get_fixture_path(),
+            mode=mode,
+            inner=inner,
+            signature={
+                "temperature": temperature,
+                "enable_search": enable_search,
+                "enable_thinking": enable_thinking,
+            },
+        )
+    return factory
+
+
+register_backend("fake", _create_fake_model)
+register_backend("record", _create_record_replay_model("record"))
+register_backend("replay", _create_record_replay_model("replay"))
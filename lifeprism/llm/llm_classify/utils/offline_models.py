@@ -0,0 +1,352 @@
+"""
+离线聊天模型
+
+- FakeChatModel: 确定性的本地假模型，可配置延迟、token 数和结构化输出，
+  用于在无网络环境下压测分类 / 对话 / 总结链路
+- RecordReplayChatModel: 录制真实模型的响应到 JSON 夹具文件，之后按提示词指纹回放
+
+两者都通过 model_registry 注册为后端（fake / record / replay），由配置 llm_backend 选择
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from lifeprism.llm.llm_classify.utils.langchain_toon_adapter import LangChainToonAdapter
+
+logger = logging.getLogger(__name__)
+
+# 分类提示词中的条目 id：表格行 "  12 | app | title" 或紧凑 JSON "[12, ...]"
+_TABLE_ID_PATTERN = re.compile(r"^\s+(\d+) \|", re.MULTILINE)
+_JSON_ID_PATTERN = re.compile(r"\[\s*(\d+)\s*,")
+# 分类体系中的第一个类别及其第一个子类别: "• category\n  - sub_category"（见 format_category_tree_for_prompt）
+_FIRST_CATEGORY_PATTERN = re.compile(r"^[ \t]*•[ \t]*(.+)$(?:\n[ \t]+-[ \t]*(.+)$)?", re.MULTILINE)
+
+DEFAULT_FAKE_RESPONSE = "这是离线模型的回复。"
+
+
+def _message_text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+
+
+def _estimate_tokens(text: str) -> int:
+    """粗略估算 token 数（中英文混合按 2 字符 1 token）"""
+    return max(1, len(text) // 2)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    确定性的本地假模型
+
+    响应规则（按顺序匹配）：
+    1. rules 中第一个 pattern 命中提示词的规则，返回其 response
+    2. 分类提示词（输出格式要求 id -> [category, sub_category, link_to_goal]）：
+       为提示词中出现的每个 id（Toon 表格 items 或旧版表格 / JSON 行）返回分类体系中的第一个 category / sub_category
+    3. 标题分析提示词（Toon 表格 titles，输出格式要求 id -> 用户活动）：为每个 id 返回 "<标题> 的离线分析"
+    4. 应用描述提示词（含 "软件名称:"）：返回 "<应用名> 的离线描述"
+    5. default_response
+
+    Attributes:
+        latency: 每次调用的延迟（秒）
+        output_tokens: 固定的输出 token 数，None 时按输出长度估算
+        max_output_tokens: 输出上限，超出时截断内容（模拟真实模型的输出截断）
+        rules: [{"pattern": 正则, "response": 响应内容}]
+        failure_rate: 单次调用随机失败的概率（用于验证重试）
+        seed: 随机种子（仅影响 failure_rate）
+    """
+    latency: float = 0.0
+    output_tokens: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    rules: List[Dict[str, str]] = []
+    default_response: str = DEFAULT_FAKE_RESPONSE
+    failure_rate: float = 0.0
+    seed: int = 42
+    calls: int = 0
+    _rng: Any = None
+    _lock: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "lifeprism-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """接受工具绑定以兼容对话链路（假模型不会发起工具调用）"""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        """按规则生成响应内容"""
+        prompt = "\n".join(_message_text(message) for message in messages)
+        for rule in self.rules:
+            if re.search(rule["pattern"], prompt):
+                return rule["response"]
+
+        system_text = "\n".join(_message_text(m) for m in messages if isinstance(m, SystemMessage))
+        user_text = _message_text(messages[-1]) if messages else ""
+        if "link_to_goal" in system_text and "category" in system_text:
+            ids, category, sub_category = self._parse_classification_prompt(system_text, user_text)
+            return json.dumps(
+                {item_id: [category, sub_category, None] for item_id in dict.fromkeys(ids)},
+                ensure_ascii=False
+            )
+        if "用户活动" in system_text:
+            try:
+                titles = LangChainToonAdapter.decode_tables(user_text).get("titles", [])
+            except ValueError:
+                titles = []
+            if titles:
+                return json.dumps(
+                    {str(row["id"]): f"{row['title']} 的离线分析" for row in titles if "id" in row},
+                    ensure_ascii=False
+                )
+        match = re.search(r"软件名称:([^,\n]+)", user_text)
+        if match:
+            return f"{match.group(1).strip()} 的离线描述"
+        return self.default_response
+
+    @staticmethod
+    def _parse_classification_prompt(system_text: str, user_text: str) -> tuple:
+        """提取条目 id 与分类体系中的第一个 category / sub_category（支持 Toon 表格与旧版文本格式）"""
+        try:
+            tables = LangChainToonAdapter.decode_tables(user_text)
+        except ValueError:
+            tables = {}
+        ids = [str(record["id"]) for record in tables.get("items", []) if "id" in record]
+        if not ids:
+            ids = _TABLE_ID_PATTERN.findall(user_text) or _JSON_ID_PATTERN.findall(user_text)
+
+        try:
+            tree = LangChainToonAdapter.decode_list_mapping(system_text, "category_tree")
+        except ValueError:
+            tree = {}
+        if tree:
+            category = next(iter(tree))
+            sub_category = tree[category][0] if tree[category] else None
+        else:
+            match = _FIRST_CATEGORY_PATTERN.search(system_text)
+            category = match.group(1).strip() if match else None
+            sub_category = match.group(2).strip() if match and match.group(2) else None
+        return ids, category, sub_category
+
+    def _next_call(self) -> None:
+        if self._lock is None:
+            self._lock = threading.Lock()
+        with self._lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            self.calls += 1
+            failed = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        if failed:
+            raise RuntimeError("离线模型模拟的调用失败")
+
+    def _build_message(self, messages: List[BaseMessage], content: str, chunk: bool = False):
+        if self.max_output_tokens is not None and _estimate_tokens(content) > self.max_output_tokens:
+            content = content[:self.max_output_tokens * 2]
+        input_tokens = sum(_estimate_tokens(_message_text(m)) for m in messages)
+        output_tokens = self.output_tokens if self.output_tokens is not None else _estimate_tokens(content)
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        message_cls = AIMessageChunk if chunk else AIMessage
+        return message_cls(content=content, response_metadata={"token_usage": usage, "model_name": self._llm_type})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self._next_call()
+        message = self._build_message(messages, self.respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        self._next_call()
+        message = self._build_message(messages, self.respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self._next_call()
+        yield ChatGenerationChunk(message=self._build_message(messages, self.respond(messages), chunk=True))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        self._next_call()
+        yield ChatGenerationChunk(message=self._build_message(messages, self.respond(messages), chunk=True))
+
+
+class ReplayMissError(KeyError):
+    """回放模式下夹具中没有对应提示词的响应"""
+
+
+class FixtureStore:
+    """
+    JSON 夹具文件（键: 提示词指纹，值: 响应内容与元数据）
+
+    同一路径共享一个实例，写入时整文件原子替换
+    """
+    _instances: Dict[str, "FixtureStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @classmethod
+    def open(cls, path: str) -> "FixtureStore":
+        path = os.path.abspath(path)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f).get("entries", {})
+            else:
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load().get(key)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[key] = entry
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """
+    录制 / 回放模型
+
+    - mode="record": 调用 inner 模型，把响应写入夹具文件后返回
+    - mode="replay": 只从夹具文件读取响应，未录制的提示词抛出 ReplayMissError
+
+    夹具键为 sha256(调用参数 + 消息类型与内容 + 绑定的工具名)，不包含模型名，
+    便于在未配置模型的离线环境中回放
+
+    Attributes:
+        fixture_path: 夹具文件路径
+        mode: record / replay
+        inner: 录制时调用的真实模型
+        signature: 影响输出的调用参数（temperature / enable_search 等）
+    """
+    fixture_path: str
+    mode: str = "replay"
+    inner: Optional[BaseChatModel] = None
+    signature: Dict[str, Any] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"lifeprism-{self.mode}"
+
+    @property
+    def store(self) -> FixtureStore:
+        return FixtureStore.open(self.fixture_path)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def fingerprint(self, messages: List[BaseMessage], tools: Optional[list] = None) -> str:
+        payload = {
+            "signature": self.signature,
+            "messages": [[message.type, _message_text(message)] for message in messages],
+            "tools": sorted(tool.get("function", {}).get("name", "") for tool in tools or []),
+        }
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _inner_for(self, tools: Optional[list]) -> BaseChatModel:
+        if self.inner is None:
+            raise RuntimeError("录制模式需要提供 inner 模型")
+        return self.inner.bind_tools(tools) if tools else self.inner
+
+    def _replay(self, key: str) -> AIMessage:
+        entry = self.store.get(key)
+        if entry is None:
+            raise ReplayMissError(f"夹具 {self.fixture_path} 中没有该提示词的录制响应: {key[:12]}")
+        return AIMessage(
+            content=entry["content"],
+            tool_calls=entry.get("tool_calls", []),
+            response_metadata=entry.get("response_metadata", {}),
+        )
+
+    def _record(self, key: str, messages: List[BaseMessage], message: BaseMessage) -> None:
+        self.store.put(key, {
+            "content": message.content,
+            "tool_calls": list(getattr(message, "tool_calls", []) or []),
+            "response_metadata": message.response_metadata,
+            "prompt_preview": _message_text(messages[-1])[:200] if messages else "",
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tools = kwargs.get("tools")
+        key = self.fingerprint(messages, tools)
+        if self.mode == "replay":
+            message = self._replay(key)
+        else:
+            message = self._inner_for(tools).invoke(messages, stop=stop)
+            self._record(key, messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tools = kwargs.get("tools")
+        key = self.fingerprint(messages, tools)
+        if self.mode == "replay":
+            message = self._replay(key)
+        else:
+            message = await self._inner_for(tools).ainvoke(messages, stop=stop)
+            self._record(key, messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        # 回放与录制都以完整响应作为单个分块返回（录制时内部模型按非流式调用）
+        message = self._generate(messages, stop=stop, **kwargs).generations[0].message
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content=message.content, response_metadata=message.response_metadata,
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"], ensure_ascii=False), "id": call.get("id"), "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ],
+        ))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        result = await self._agenerate(messages, stop=stop, **kwargs)
+        message = result.generations[0].message
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content=message.content, response_metadata=message.response_metadata,
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"], ensure_ascii=False), "id": call.get("id"), "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ],
+        ))
@@ -138,6 +138,9 @@ def parse_token_usage(result) -> dict:
     # 从 response_metadata 中获取 token_usage
     raw_usage = {}
     if hasattr(result, 'response_metadata'):
+        # 命中响应缓存的结果没有实际消耗（节省量由缓存单独记录）
+        if result.response_metadata.get('cache_hit'):
+            return {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0, 'search_count': 0}
         raw_usage = result.response_metadata.get('token_usage', {})
     
     # 解析 token 数量
@@ -0,0 +1,387 @@
+"""
+进程级 LLM 限速器与熔断器
+
+分类、对话、报告总结与数据驱动智能体共用同一个 RateLimiter（通过 get_rate_limiter 挂载到模型上）：
+
+- 请求令牌桶: 速率 llm_requests_per_second，容量为 1 秒的请求数（允许短时突发）
+- token 令牌桶: 速率 llm_tokens_per_minute / 60，调用结束后按实际 usage 扣减（可扣为负数，
+  之后的请求等待补足），限制每分钟的 token 消耗
+- 优先级: interactive（对话、报告总结）高于 background（分类等后台任务）。后台请求只在两个桶都
+  高于 llm_interactive_reserve 比例的余量、且没有交互请求在等待时放行，交互请求到达时总有余量可用
+- 熔断器: 连续 llm_circuit_failure_threshold 次上游调用失败后打开，llm_circuit_cooldown_seconds 内的
+  请求直接抛出 CircuitOpenError（不发往上游，调用方不再重试）；冷却结束后放行一个探测请求，
+  成功则关闭，失败则重新打开
+
+调用结果通过挂载在模型上的 RateLimiterCallback 反馈（命中响应缓存的调用不经过限速器，也不计入）
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from lifeprism.config import settings
+from lifeprism.llm.llm_classify.utils.parse_utils import parse_token_usage
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+# 等待令牌时单次休眠的上限（秒），期间到达的交互请求、配置变化可以及时生效
+MAX_WAIT_STEP = 0.25
+# 从配置刷新参数的最小间隔（秒）
+CONFIG_REFRESH_INTERVAL = 1.0
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器打开期间的 LLM 请求（快速失败，不发往上游）"""
+
+
+class RateLimiter(BaseRateLimiter):
+    """
+    令牌桶限速器 + 熔断器，实现 LangChain 的 BaseRateLimiter 接口（直接使用时按 background 优先级）
+
+    令牌的分配由线程锁保护，等待在调用方的线程或事件循环中进行，
+    因此同一个实例可以被多个线程、多个事件循环（每次 asyncio.run）共享
+
+    Args:
+        requests_per_second: 请求速率，<= 0 表示不限
+        tokens_per_minute: 每分钟 token 数，<= 0 表示不限
+        interactive_reserve: 为交互请求保留的桶容量比例（0~1）
+        failure_threshold: 熔断前允许的连续失败次数，<= 0 表示不熔断
+        cooldown_seconds: 熔断持续时间（秒）
+        clock: 单调时钟（可注入以便测试）
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 0,
+        tokens_per_minute: float = 0,
+        interactive_reserve: float = 0.2,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._updated = clock()
+        self.requests_per_second = 0.0
+        self.tokens_per_minute = 0.0
+        self.interactive_reserve = 0.0
+        self._request_tokens = 0.0
+        self._token_tokens = 0.0
+        self._interactive_waiting = 0
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self.stats: Dict[str, int] = {"acquired": 0, "rejected": 0, "opened": 0, "tokens": 0}
+        self.configure(requests_per_second, tokens_per_minute, interactive_reserve)
+
+    # ==================== 配置 ====================
+
+    def configure(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        interactive_reserve: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        cooldown_seconds: Optional[float] = None,
+    ) -> None:
+        """调整参数（None 表示不变），桶内余量按新容量截断"""
+        with self._lock:
+            self._refill()
+            if interactive_reserve is not None:
+                self.interactive_reserve = min(max(float(interactive_reserve or 0), 0.0), 0.9)
+            if failure_threshold is not None:
+                self.failure_threshold = int(failure_threshold or 0)
+            if cooldown_seconds is not None:
+                self.cooldown_seconds = max(0.0, float(cooldown_seconds or 0))
+            if requests_per_second is not None:
+                rate = max(0.0, float(requests_per_second or 0))
+                if rate != self.requests_per_second:
+                    self.requests_per_second = rate
+                    self._request_tokens = self._request_capacity
+            if tokens_per_minute is not None:
+                tpm = max(0.0, float(tokens_per_minute or 0))
+                if tpm != self.tokens_per_minute:
+                    self.tokens_per_minute = tpm
+                    self._token_tokens = tpm
+            self._request_tokens = min(self._request_tokens, self._request_capacity)
+
+    def set_rate(self, requests_per_second: float) -> None:
+        """调整请求速率，<= 0 表示不限速"""
+        self.configure(requests_per_second=requests_per_second)
+
+    @property
+    def _request_headroom(self) -> float:
+        """后台请求必须留给交互请求的请求令牌数"""
+        return self.interactive_reserve * max(1.0, self.requests_per_second)
+
+    @property
+    def _request_capacity(self) -> float:
+        return max(1.0, self.requests_per_second) + self._request_headroom
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        if self.requests_per_second > 0:
+            self._request_tokens = min(
+                self._request_capacity, self._request_tokens + elapsed * self.requests_per_second
+            )
+        if self.tokens_per_minute > 0:
+            self._token_tokens = min(
+                self.tokens_per_minute, self._token_tokens + elapsed * self.tokens_per_minute / 60
+            )
+
+    # ==================== 熔断器 ====================
+
+    @property
+    def state(self) -> str:
+        """熔断器状态: closed / open / half_open"""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at < self.cooldown_seconds:
+                return "open"
+            return "half_open"
+
+    def _check_circuit(self) -> None:
+        """熔断器打开时抛出 CircuitOpenError；冷却结束后只放行一个探测请求（需持有锁）"""
+        if self._opened_at is None:
+            return
+        now = self._clock()
+        remaining = self.cooldown_seconds - (now - self._opened_at)
+        # 探测请求迟迟没有结果（如被取消）时，再过一个冷却期允许新的探测
+        probing = self._probe_started is not None and now - self._probe_started < self.cooldown_seconds
+        if remaining > 0 or probing:
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(
+                f"LLM 熔断中（连续 {self._failures} 次调用失败），{max(remaining, 0):.0f}s 后重试"
+            )
+        self._probe_started = now
+        logger.info("LLM 熔断冷却结束，放行探测请求")
+
+    def record_success(self, total_tokens: int = 0) -> None:
+        """记录一次成功的上游调用：扣减 token 桶，关闭熔断器"""
+        with self._lock:
+            self._refill()
+            if total_tokens > 0:
+                self.stats["tokens"] += total_tokens
+                if self.tokens_per_minute > 0:
+                    self._token_tokens -= total_tokens
+            if self._opened_at is not None:
+                logger.info("LLM 探测请求成功，熔断器关闭")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """记录一次失败的上游调用：连续失败达到阈值（或探测请求失败）时打开熔断器"""
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._probe_started is not None
+            if self.failure_threshold > 0 and (probe_failed or self._failures >= self.failure_threshold):
+                if self._opened_at is None or probe_failed:
+                    self.stats["opened"] += 1
+                    logger.warning(
+                        f"LLM 连续 {self._failures} 次调用失败，熔断 {self.cooldown_seconds:.0f}s: {error}"
+                    )
+                self._opened_at = self._clock()
+                self._probe_started = None
+
+    def reset(self) -> None:
+        """关闭熔断器并填满令牌桶"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+            self._request_tokens = self._request_capacity
+            self._token_tokens = self.tokens_per_minute
+            self._updated = self._clock()
+
+    # ==================== 令牌 ====================
+
+    def reserve(self, priority: str = PRIORITY_BACKGROUND) -> float:
+        """
+        尝试取得一个请求令牌
+
+        Returns:
+            float: 0 表示已取得；否则为建议的等待秒数（未取得）
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        with self._lock:
+            self._check_circuit()
+            self._refill()
+            interactive = priority == PRIORITY_INTERACTIVE
+            if not interactive and self._interactive_waiting:
+                return MAX_WAIT_STEP
+            waits = []
+            if self.requests_per_second > 0:
+                needed = 1.0 if interactive else 1.0 + self._request_headroom
+                if self._request_tokens < needed:
+                    waits.append((needed - self._request_tokens) / self.requests_per_second)
+            if self.tokens_per_minute > 0:
+                floor = 0.0 if interactive else self.interactive_reserve * self.tokens_per_minute
+                if self._token_tokens <= floor:
+                    waits.append((floor - self._token_tokens + 1) * 60 / self.tokens_per_minute)
+            if waits:
+                # 探测请求尚未发出，交还探测资格
+                self._probe_started = None if self._opened_at is not None else self._probe_started
+                return max(waits)
+            if self.requests_per_second > 0:
+                self._request_tokens -= 1.0
+            self.stats["acquired"] += 1
+            return 0.0
+
+    def _enter_wait(self, priority: str, delta: int) -> None:
+        if priority == PRIORITY_INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += delta
+
+    def acquire_for(self, priority: str = PRIORITY_BACKGROUND, blocking: bool = True) -> bool:
+        """按优先级取得请求令牌（阻塞等待）"""
+        refresh_config(self)
+        delay = self.reserve(priority)
+        if delay <= 0:
+            return True
+        if not blocking:
+            return False
+        self._enter_wait(priority, 1)
+        try:
+            while delay > 0:
+                time.sleep(min(delay, MAX_WAIT_STEP))
+                delay = self.reserve(priority)
+        finally:
+            self._enter_wait(priority, -1)
+        return True
+
+    async def aacquire_for(self, priority: str = PRIORITY_BACKGROUND, blocking: bool = True) -> bool:
+        """按优先级取得请求令牌（异步等待）"""
+        refresh_config(self)
+        delay = self.reserve(priority)
+        if delay <= 0:
+            return True
+        if not blocking:
+            return False
+        self._enter_wait(priority, 1)
+        try:
+            while delay > 0:
+                await asyncio.sleep(min(delay, MAX_WAIT_STEP))
+                delay = self.reserve(priority)
+        finally:
+            self._enter_wait(priority, -1)
+        return True
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        return self.acquire_for(PRIORITY_BACKGROUND, blocking)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        return await self.aacquire_for(PRIORITY_BACKGROUND, blocking)
+
+    def for_priority(self, priority: str) -> "PriorityRateLimiter":
+        """返回按指定优先级取令牌的视图（共享同一组令牌桶与熔断器）"""
+        return PriorityRateLimiter(self, priority)
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """RateLimiter 的优先级视图，挂载到模型上（LangChain 的 acquire 接口不带优先级参数）"""
+
+    def __init__(self, limiter: RateLimiter, priority: str):
+        self.limiter = limiter
+        self.priority = priority
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        return self.limiter.acquire_for(self.priority, blocking)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        return await self.limiter.aacquire_for(self.priority, blocking)
+
+
+class RateLimiterCallback(BaseCallbackHandler):
+    """把模型调用的结果反馈给限速器：成功时扣减 token 桶，上游错误计入熔断器"""
+
+    run_inline = True
+
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        total_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is None:
+                    continue
+                if message.response_metadata.get("cache_hit"):
+                    # 命中缓存的调用没有经过限速器，也没有访问上游
+                    return
+                total_tokens += parse_token_usage(message).get("total_tokens", 0) or 0
+        self.limiter.record_success(total_tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        if isinstance(error, (CircuitOpenError, asyncio.CancelledError)):
+            return
+        self.limiter.record_failure(error)
+
+
+_rate_limiter = RateLimiter()
+_callback = RateLimiterCallback(_rate_limiter)
+_refresh_lock = threading.Lock()
+_refreshed_at = float("-inf")
+
+
+def refresh_config(limiter: RateLimiter, force: bool = False) -> None:
+    """从配置刷新全局限速器的参数（至多每 CONFIG_REFRESH_INTERVAL 秒一次）"""
+    global _refreshed_at
+    if limiter is not _rate_limiter:
+        return
+    now = time.monotonic()
+    with _refresh_lock:
+        if not force and now - _refreshed_at < CONFIG_REFRESH_INTERVAL:
+            return
+        _refreshed_at = now
+
+    def read(name: str, cast, default):
+        try:
+            return cast(settings.get(name) or 0)
+        except (TypeError, ValueError):
+            return default
+
+    limiter.configure(
+        requests_per_second=read("llm_requests_per_second", float, 0.0),
+        tokens_per_minute=read("llm_tokens_per_minute", float, 0.0),
+        interactive_reserve=read("llm_interactive_reserve", float, 0.0),
+        failure_threshold=read("llm_circuit_failure_threshold", int, 0),
+        cooldown_seconds=read("llm_circuit_cooldown_seconds", float, 0.0),
+    )
+
+
+def get_rate_limiter(priority: Optional[str] = None) -> BaseRateLimiter:
+    """
+    获取全局共享的 LLM 限速器（参数随配置更新）
+
+    Args:
+        priority: None 时返回 RateLimiter 本身（background）；interactive / background 时返回对应优先级的视图
+    """
+    refresh_config(_rate_limiter, force=True)
+    if priority is None:
+        return _rate_limiter
+    if priority not in PRIORITIES:
+        raise ValueError(f"未知的 LLM 请求优先级: {priority}，可选: {', '.join(PRIORITIES)}")
+    return _rate_limiter.for_priority(priority)
+
+
+def get_rate_limiter_callback() -> RateLimiterCallback:
+    """获取把调用结果反馈给全局限速器的回调（挂载到模型的 callbacks）"""
+    return _callback
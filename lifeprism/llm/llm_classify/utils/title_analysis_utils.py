@@ -0,0 +1,146 @@
+"""
+标题分析工具
+
+为多用途长时长条目补全 title_analysis（用户活动描述）：
+1. 先查 title_analysis 表（按归一化标题，同一标题在不同应用、不同同步间共用）
+2. 仍缺失的标题去重后每 TITLE_ANALYSIS_BATCH_SIZE 条合成一个结构化提示词，通过 run_batches
+   并发请求 LLM（共享限速器、逐批重试），替代逐条 invoke
+3. 新得到的分析写回 title_analysis 表，后续同步不再重复请求
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from lifeprism.llm.llm_classify.utils.batch_utils import parse_json_content, run_batches
+from lifeprism.llm.llm_classify.utils.langchain_toon_adapter import LangChainToonAdapter
+
+logger = logging.getLogger(__name__)
+
+# 每次请求分析的标题数（每个标题都需要联网搜索，批次过大时分析质量下降）
+TITLE_ANALYSIS_BATCH_SIZE = 10
+# 单条分析的最大长度（字符），超出部分截断
+MAX_ANALYSIS_LENGTH = 60
+
+TITLE_ANALYSIS_SYSTEM_MESSAGE = SystemMessage(content="""
+        你是一个通过网络搜索分析的助手,依据网络搜索结果和title分析用户的活动，每条结果在30字以内
+        # 输入: titles 表格,每行为 id,title
+        # 输出格式为json,key为数据的id,value为用户活动(str)
+        {
+            "id": "用户活动"
+        }
+        注意:
+        - 每个id都要输出,无法分析时value为null
+        - key必须是id,不是title
+        """)
+
+
+def _build_title_analysis_messages(batch: list) -> list:
+    rows = LangChainToonAdapter.encode_table("titles", ["id", "title"], [[index, title] for index, title in batch])
+    return [TITLE_ANALYSIS_SYSTEM_MESSAGE, HumanMessage(content=f"搜索并分析以下标题:\n{rows}")]
+
+
+def _parse_title_analyses(content: str) -> Dict[int, str]:
+    """解析 {id: 分析}；没有任何有效分析时视为失败（触发重试）"""
+    parsed = parse_json_content(content)
+    if not isinstance(parsed, dict):
+        raise ValueError("标题分析结果不是 JSON 对象")
+    analyses = {}
+    for key, value in parsed.items():
+        if not isinstance(value, str) or not value.strip() or value.strip().lower() in ("none", "null"):
+            continue
+        try:
+            analyses[int(key)] = value.strip()[:MAX_ANALYSIS_LENGTH]
+        except (TypeError, ValueError):
+            continue
+    if not analyses:
+        raise ValueError("标题分析结果为空")
+    return analyses
+
+
+def fill_title_analyses(
+    items: list,
+    chat_model=None,
+    data_provider=None,
+    on_tokens_usage: Optional[Callable[[dict], None]] = None,
+    max_concurrency: Optional[int] = None,
+    batch_size: int = TITLE_ANALYSIS_BATCH_SIZE,
+) -> Dict[str, str]:
+    """
+    补全条目的标题分析（原地更新 LogItem.title_analysis，无标题或已有分析的条目跳过）
+
+    Args:
+        items: LogItem 列表
+        chat_model: 聊天模型；None 时只从 title_analysis 表补全，不请求 LLM
+        data_provider: 提供 load_title_analyses / save_title_analyses / normalize_title_key 的数据提供者，
+            None 时使用 LWBaseDataProvider
+        on_tokens_usage: 每次 LLM 调用的 token 使用回调
+        max_concurrency: 最大并发请求数，None 时读取配置 llm_max_concurrency
+        batch_size: 每次请求的标题数
+
+    Returns:
+        Dict[str, str]: 本次补全的 标题 -> 分析
+    """
+    pending = [item for item in items if item.title and not item.title_analysis]
+    if not pending:
+        return {}
+
+    if data_provider is None:
+        from lifeprism.storage import LWBaseDataProvider
+        data_provider = LWBaseDataProvider()
+
+    # 同一归一化标题只分析一次
+    groups: Dict[str, List] = {}
+    for item in pending:
+        groups.setdefault(data_provider.normalize_title_key(item.title), []).append(item)
+    titles = [group[0].title for group in groups.values()]
+
+    filled: Dict[str, str] = {}
+    try:
+        stored = data_provider.load_title_analyses(titles)
+    except Exception as e:
+        logger.warning(f"读取标题分析表失败: {e}")
+        stored = {}
+    for title, analysis in stored.items():
+        for item in groups[data_provider.normalize_title_key(title)]:
+            item.title_analysis = analysis
+        filled[title] = analysis
+    if stored:
+        logger.info(f"从标题分析表补全 {len(stored)} 个标题的分析")
+
+    to_analyze = [(index, title) for index, title in enumerate(titles) if title not in stored]
+    if not to_analyze or chat_model is None:
+        return filled
+    logger.info(f"需要分析的标题 {len(to_analyze)} 个，分 {(len(to_analyze) + batch_size - 1) // batch_size} 批请求")
+
+    outcomes = run_batches(
+        chat_model, to_analyze, _build_title_analysis_messages, batch_size,
+        node_name="get_titles",
+        max_concurrency=max_concurrency,
+        parse=_parse_title_analyses,
+    )
+
+    analyzed: Dict[str, str] = {}
+    for outcome in outcomes:
+        if on_tokens_usage is not None:
+            for usage in outcome.tokens_usage:
+                on_tokens_usage(usage)
+        if not outcome.ok:
+            logger.warning(f"标题分析批次 {outcome.index + 1} 失败，已重试 {outcome.attempts} 次，这些条目不带分析分类")
+            continue
+        for index, title in outcome.items:
+            analysis = outcome.parsed.get(index)
+            if analysis is None:
+                continue
+            for item in groups[data_provider.normalize_title_key(title)]:
+                item.title_analysis = analysis
+            analyzed[title] = analysis
+
+    if analyzed:
+        try:
+            data_provider.save_title_analyses(analyzed)
+        except Exception as e:
+            logger.warning(f"保存标题分析失败: {e}")
+    filled.update(analyzed)
+    return filled
@@ -0,0 +1,155 @@
+"""
+按 token 预算自适应分批
+
+固定每批 15 条时，短标题的批次浪费请求次数，长标题的批次又可能超出输出长度被截断。
+TokenBudget 按估算的 token 数把条目打包成批：
+
+- 输入: 公共开销（系统提示词中的分类体系、用户目标、规则，即 build_messages([]) 的估算）
+  + 每条目的增量（build_messages([item]) 相对公共开销的估算），不超过 llm_batch_token_budget
+- 输出: 条目数 × 每条目输出 token，不超过 llm_batch_max_output_tokens，避免 JSON 被截断
+
+估算按字符计（CJK 字符 1 token，其他字符 4 个 1 token），并用实际 usage 反馈校正：
+- 输入校正系数 = 实际输入 token / 估算输入 token 的滑动平均
+- 每条目输出 token = 实际输出 token / 批次条目数 的滑动平均
+- 结果解析失败（通常是输出被截断）时预算减半，之后成功的批次逐步恢复
+
+每个分类节点（node_name）各自维护一个 TokenBudget，进程内共享
+"""
+
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from lifeprism.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 初始的每条目输出 token（"123": ["category", "sub_category", null], 约 15~25 tokens）
+DEFAULT_OUTPUT_TOKENS_PER_ITEM = 24
+# 输出上限的安全余量（每条目输出长度有波动，按上限的 85% 打包）
+OUTPUT_MARGIN = 0.85
+# 滑动平均的权重
+FEEDBACK_ALPHA = 0.3
+# 输入校正系数的范围
+MIN_INPUT_RATIO, MAX_INPUT_RATIO = 0.3, 3.0
+# 解析失败后预算缩放的下限，以及每次成功后的恢复倍数
+MIN_SCALE = 0.25
+SCALE_RECOVERY = 1.25
+
+_CJK_PATTERN = re.compile(r"[⺀-鿿가-힯豈-﫿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数（CJK 字符按 1 个，其余每 4 个字符按 1 个）"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_messages_tokens(messages: list) -> int:
+    """估算消息列表的 token 数（每条消息另加 4 个 token 的格式开销）"""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += estimate_tokens(content) + 4
+    return total
+
+
+class TokenBudget:
+    """
+    单个节点的 token 预算与 usage 反馈
+
+    Args:
+        token_budget: 每批输入 token 上限，None 时读取配置 llm_batch_token_budget
+        max_output_tokens: 每批输出 token 上限，None 时读取配置 llm_batch_max_output_tokens
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, max_output_tokens: Optional[int] = None):
+        self._token_budget = token_budget
+        self._max_output_tokens = max_output_tokens
+        self._lock = threading.Lock()
+        self.input_ratio = 1.0
+        self.output_tokens_per_item = float(DEFAULT_OUTPUT_TOKENS_PER_ITEM)
+        self.scale = 1.0
+
+    @property
+    def token_budget(self) -> int:
+        if self._token_budget is not None:
+            return self._token_budget
+        return int(settings.llm_batch_token_budget or 0)
+
+    @property
+    def max_output_tokens(self) -> int:
+        if self._max_output_tokens is not None:
+            return self._max_output_tokens
+        return int(settings.llm_batch_max_output_tokens or 0)
+
+    def pack(self, items: list, build_messages: Callable[[list], list]) -> List[tuple]:
+        """
+        按预算把条目顺序打包成批（保持原顺序，每批至少 1 条）
+
+        Returns:
+            List[tuple]: [(batch, 估算输入 token), ...]，估算值未乘校正系数，供 observe 反馈使用
+        """
+        if not items:
+            return []
+        with self._lock:
+            input_ratio, output_per_item, scale = self.input_ratio, self.output_tokens_per_item, self.scale
+        input_limit = self.token_budget * scale
+        output_limit = self.max_output_tokens * scale * OUTPUT_MARGIN
+
+        overhead = estimate_messages_tokens(build_messages([]))
+        batches = []
+        batch, batch_tokens = [], overhead
+        for item in items:
+            cost = max(1, estimate_messages_tokens(build_messages([item])) - overhead)
+            over_input = input_limit > 0 and (batch_tokens + cost) * input_ratio > input_limit
+            over_output = output_limit > 0 and (len(batch) + 1) * output_per_item > output_limit
+            if batch and (over_input or over_output):
+                batches.append((batch, batch_tokens))
+                batch, batch_tokens = [], overhead
+            batch.append(item)
+            batch_tokens += cost
+        batches.append((batch, batch_tokens))
+        return batches
+
+    def observe(self, estimated_tokens: int, usage: dict, item_count: int) -> None:
+        """用一次成功调用的实际 usage 校正估算（命中缓存或联网搜索的调用不参与输入校正）"""
+        input_tokens = usage.get('input_tokens') or 0
+        output_tokens = usage.get('output_tokens') or 0
+        with self._lock:
+            self.scale = min(1.0, self.scale * SCALE_RECOVERY)
+            if input_tokens > 0 and estimated_tokens > 0 and not usage.get('search_count'):
+                ratio = min(MAX_INPUT_RATIO, max(MIN_INPUT_RATIO, input_tokens / estimated_tokens))
+                self.input_ratio += FEEDBACK_ALPHA * (ratio - self.input_ratio)
+            if output_tokens > 0 and item_count > 0:
+                per_item = output_tokens / item_count
+                self.output_tokens_per_item += FEEDBACK_ALPHA * (per_item - self.output_tokens_per_item)
+
+    def record_parse_failure(self) -> None:
+        """结果解析失败（多为输出截断），缩小后续批次的预算"""
+        with self._lock:
+            self.scale = max(MIN_SCALE, self.scale * 0.5)
+            logger.warning(f"批次结果解析失败，后续批次预算缩放至 {self.scale:.2f}")
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "input_ratio": round(self.input_ratio, 3),
+                "output_tokens_per_item": round(self.output_tokens_per_item, 1),
+                "scale": round(self.scale, 3),
+            }
+
+
+_budgets: Dict[str, TokenBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_token_budget(node_name: str) -> TokenBudget:
+    """获取节点的 TokenBudget（进程内共享，反馈跨同步累积）"""
+    with _budgets_lock:
+        if node_name not in _budgets:
+            _budgets[node_name] = TokenBudget()
+        return _budgets[node_name]
@@ -1,12 +1,36 @@
 # Components package for data processing
+from lifeprism.processors.components.title_normalizer import TitleNormalizer, TitleRule
 from lifeprism.processors.components.category_cache import CategoryCache
 from lifeprism.processors.components.event_transformer import EventTransformer
 from lifeprism.processors.components.cache_matcher import CacheMatcher
 from lifeprism.processors.components.classify_collector import ClassifyCollector
+from lifeprism.processors.components.map_cache_index_manager import MapCacheIndexManager
+from lifeprism.processors.components.category_cache_manager import CategoryCacheManager, category_cache_manager
+from lifeprism.processors.components.local_classifier import (
+    NaiveBayesClassifier,
+    LocalClassifierManager,
+    local_classifier_manager,
+)
+from lifeprism.processors.components.title_similarity_index import (
+    TitleSimilarityIndex,
+    TitleSimilarityIndexManager,
+    title_similarity_index_manager,
+)
 
 __all__ = [
+    'TitleNormalizer',
+    'TitleRule',
     'CategoryCache',
     'EventTransformer', 
     'CacheMatcher',
     'ClassifyCollector',
+    'MapCacheIndexManager',
+    'CategoryCacheManager',
+    'category_cache_manager',
+    'NaiveBayesClassifier',
+    'LocalClassifierManager',
+    'local_classifier_manager',
+    'TitleSimilarityIndex',
+    'TitleSimilarityIndexManager',
+    'title_similarity_index_manager',
 ]
@@ -3,6 +3,7 @@
 负责使用缓存索引匹配事件的分类
 """
 from lifeprism.processors.models.processed_event import ProcessedEvent
+from lifeprism.processors.models.event_batch import EventBatch
 from lifeprism.processors.components.category_cache import CategoryCache
 from lifeprism.utils import get_logger, DEBUG
 
@@ -16,6 +17,7 @@ class CacheMatcher:
     职责：
     - 尝试从缓存中匹配事件的分类
     - 根据单用途/多用途使用不同的匹配策略
+    - 多用途精确 title 未命中时，按归一化标题兜底匹配
     - 填充匹配成功的分类信息
     """
     
@@ -29,6 +31,7 @@ class CacheMatcher:
         self.cache = cache
         self._match_count = 0
         self._miss_count = 0
+        self._normalized_match_count = 0
     
     def match(self, event: ProcessedEvent) -> ProcessedEvent:
         """
@@ -50,6 +53,59 @@ class CacheMatcher:
         
         return event
     
+    def match_batch(self, batch: EventBatch) -> EventBatch:
+        """
+        批量匹配列式批次中的所有事件（原地填充分类列）
+        
+        同一 app（单用途）或 (app, title)（多用途）只查询一次缓存
+        
+        Args:
+            batch: 待匹配的事件批次
+            
+        Returns:
+            更新后的批次（原地修改）
+        """
+        lookups = {}
+        apps, titles, is_multipurpose = batch.apps, batch.titles, batch.is_multipurpose
+        
+        for index in range(len(batch)):
+            app = apps[index]
+            if is_multipurpose[index]:
+                key = (app, titles[index])
+                if key not in lookups:
+                    lookups[key] = self._lookup_multipurpose(app, key[1])
+            else:
+                key = app
+                if key not in lookups:
+                    lookups[key] = (self.cache.get_single_purpose_category(app), False)
+            
+            category, normalized = lookups[key]
+            if category:
+                batch.set_category(index, category)
+                self._match_count += 1
+                if normalized:
+                    self._normalized_match_count += 1
+            else:
+                self._miss_count += 1
+        
+        logger.debug(f"✅ 批量缓存匹配: {len(batch)} 条事件, {len(lookups)} 个唯一键")
+        return batch
+    
+    def _lookup_multipurpose(self, app: str, title: str) -> tuple:
+        """
+        查询多用途分类：先精确 title，再归一化标题
+        
+        Returns:
+            (分类 或 None, 是否通过归一化命中)
+        """
+        if not self.cache.is_multipurpose_app_cached(app):
+            return None, False
+        category = self.cache.get_multipurpose_category(app, title)
+        if category:
+            return category, False
+        category = self.cache.get_normalized_multipurpose_category(app, title)
+        return category, category is not None
+    
     def _match_single_purpose(self, event: ProcessedEvent) -> None:
         """
         单用途应用匹配
@@ -78,42 +134,57 @@ class CacheMatcher:
         - 基于 app + title 组合匹配
         - 同一个 app 不同 title 可能有不同分类
         """
-        # 首先检查 app 是否在多用途缓存中
-        if not self.cache.is_multipurpose_app_cached(event.app):
-            self._miss_count += 1
-            return
-        
-        category = self.cache.get_multipurpose_category(event.app, event.title)
+        # app 不在多用途缓存中，或 title（含归一化标题）未命中，均算 miss
+        category, normalized = self._lookup_multipurpose(event.app, event.title)
         if category:
             event.category_id = category[0]
             event.sub_category_id = category[1]
             event.link_to_goal_id = category[2]
             event.cache_matched = True
             self._match_count += 1
+            if normalized:
+                self._normalized_match_count += 1
             logger.debug(
-                f"✅ 多用途缓存命中: app={event.app}, title={event.title[:30]}..., "
-                f"category={category[0]}, sub={category[1]}"
+                f"✅ 多用途缓存命中{'(归一化)' if normalized else ''}: app={event.app}, "
+                f"title={event.title[:30]}..., category={category[0]}, sub={category[1]}"
             )
         else:
-            # app 在缓存中但 title 没有，仍然算 miss
             self._miss_count += 1
     
     def get_stats(self) -> dict:
         """
         获取匹配统计信息
         """
+        total = self._match_count + self._miss_count
+        exact_matched = self._match_count - self._normalized_match_count
         return {
             'matched': self._match_count,
             'missed': self._miss_count,
-            'total': self._match_count + self._miss_count,
+            'total': total,
+            'normalized_matched': self._normalized_match_count,
+            # 命中率：exact_hit_rate 为仅精确匹配的命中率，hit_rate 包含归一化兜底
+            'exact_hit_rate': exact_matched / total if total else 0.0,
+            'hit_rate': self._match_count / total if total else 0.0,
         }
     
+    def merge_stats(self, stats: dict) -> None:
+        """
+        累加其他匹配器的统计（用于合并子进程的匹配结果）
+        
+        Args:
+            stats: 另一个 CacheMatcher.get_stats() 的返回值
+        """
+        self._match_count += stats['matched']
+        self._miss_count += stats['missed']
+        self._normalized_match_count += stats['normalized_matched']
+    
     def reset_stats(self) -> None:
         """
         重置统计信息
         """
         self._match_count = 0
         self._miss_count = 0
+        self._normalized_match_count = 0
 
 if __name__ == "__main__":
     from lifeprism.processors.components.category_cache import CategoryCache
@@ -3,28 +3,57 @@
 负责从 DataFrame 构建高效的缓存索引，提供分类查询接口
 """
 import pandas as pd
-from typing import Dict, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Set, Tuple, Optional
+from lifeprism.config.settings_manager import settings
+from lifeprism.processors.components.title_normalizer import SITE_KEY_PREFIX, TitleNormalizer
 from lifeprism.utils import get_logger, DEBUG
 
 logger = get_logger(__name__,)
 
 
+CategoryTuple = Tuple[str, Optional[str], Optional[str]]
+
+# 站点/域名键生效所需的最少记录数（且分类一致），避免单条记录决定整个站点的分类
+SITE_KEY_MIN_RECORDS = 3
+
+
+def _none_if_na(value):
+    """将 NaN/NA 转为 None（保持与数据库 NULL 一致）"""
+    return None if pd.isna(value) else value
+
+
 class CategoryCache:
     """
     分类缓存索引管理器
     
     职责：
-    - 从 category_map_cache DataFrame 构建索引
+    - 从 category_map_cache DataFrame 构建索引（按列构建，不使用 iterrows）
     - 提供高效的缓存查询接口
     - 管理单用途/多用途应用的分类映射
+    - 支持按自然键增量刷新（refresh_records），供进程级缓存复用；
+      进程级缓存在副本（copy）上刷新后整体替换，已发布的实例不再修改，读取方无需加锁
+    
+    同一个小写键可能对应多条记录（大小写不同的 app、不同 app 的相同 title），
+    此时以最先出现的记录为准，与整表重建的结果一致
+    
+    多用途记录额外按 (app, 归一化键) 建立兜底索引：精确 title 未命中时，
+    只在同一归一化键下所有记录的分类一致时才返回该分类；
+    站点/域名键还要求至少 SITE_KEY_MIN_RECORDS 条记录
     """
     
-    def __init__(self, cache_df: Optional[pd.DataFrame] = None):
+    def __init__(
+        self,
+        cache_df: Optional[pd.DataFrame] = None,
+        title_normalizer: Optional[TitleNormalizer] = None,
+        normalize_titles: Optional[bool] = None
+    ):
         """
         初始化缓存索引
         
         Args:
             cache_df: category_map_cache 表的 DataFrame
+            title_normalizer: 标题归一化器，None 时使用默认 TitleNormalizer（站点键读取配置 title_site_fallback）
+            normalize_titles: 是否建立归一化标题索引，None 时读取配置 title_normalization
         """
         # 已分类的应用集合
         self._single_purpose_apps: Set[str] = set()
@@ -32,12 +61,34 @@ class CategoryCache:
         self._multipurpose_titles: Set[str] = set()
         
         # 分类映射: app/title -> (category_id, sub_category_id, link_to_goal_id)
-        self._app_category_map: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
-        self._title_category_map: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
+        self._app_category_map: Dict[str, CategoryTuple] = {}
+        self._title_category_map: Dict[str, CategoryTuple] = {}
+        
+        # 候选记录（用于增量刷新）:
+        # 小写 app -> {原始 app: 分类}，小写 title -> {(原始 app, 原始 title): 分类}
+        self._single_entries: Dict[str, Dict[str, CategoryTuple]] = {}
+        self._title_entries: Dict[str, Dict[Tuple[str, str], CategoryTuple]] = {}
+        # 小写 app -> 有分类的多用途记录数
+        self._multipurpose_app_counts: Dict[str, int] = {}
+        
+        # 归一化标题索引: (小写 app, 归一化键) -> {(原始 app, 原始 title): 分类}
+        if normalize_titles is None:
+            normalize_titles = bool(settings.title_normalization)
+        if normalize_titles:
+            self.title_normalizer = title_normalizer or TitleNormalizer(site_fallback=bool(settings.title_site_fallback))
+        else:
+            self.title_normalizer = None
+        self._normalized_entries: Dict[Tuple[str, str], Dict[Tuple[str, str], CategoryTuple]] = {}
+        self._normalized_category_map: Dict[Tuple[str, str], CategoryTuple] = {}
         
         # 应用描述映射: app -> description
         self._app_description_map: Dict[str, str] = {}
         
+        # 每次索引变化递增
+        self.version = 0
+        # 只读快照不允许增量刷新
+        self.frozen = False
+        
         # 构建索引
         if cache_df is not None and not cache_df.empty:
             self._build_indexes(cache_df)
@@ -49,72 +100,231 @@ class CategoryCache:
         Args:
             cache_df: category_map_cache 表的 DataFrame
         """
-        # 过滤有效记录（state=1 表示启用）
+        self._add_records(cache_df)
+        self._rebuild_effective(
+            self._single_entries.keys(), self._title_entries.keys(), self._normalized_entries.keys()
+        )
+        
+        logger.debug(
+            f"索引构建完成: 原始 {len(cache_df)} 行, "
+            f"单用途(有分类) {len(self._single_purpose_apps)} 个, "
+            f"多用途(有分类) {len(self._multipurpose_apps)} 个, "
+            f"titles(有分类) {len(self._multipurpose_titles)} 个, "
+            f"归一化键 {len(self._normalized_category_map)} 个, "
+            f"描述 {len(self._app_description_map)} 个"
+        )
+    
+    def refresh_records(
+        self,
+        single_apps: Iterable[str],
+        multi_pairs: Iterable[Tuple[str, str]],
+        records_df: Optional[pd.DataFrame]
+    ) -> None:
+        """
+        按自然键增量刷新索引
+        
+        先移除 single_apps / multi_pairs 对应的旧记录，再用 records_df 中这些键的
+        最新数据库记录（任意 state）重新加入
+        
+        Args:
+            single_apps: 变更的单用途 app（原始大小写）
+            multi_pairs: 变更的多用途 (app, title)（原始大小写）
+            records_df: 这些键的当前数据库记录，列与 load_category_map_cache_V2 一致
+        """
+        if self.frozen:
+            raise RuntimeError("CategoryCache 只读快照不支持增量刷新")
+        touched_apps: Set[str] = set()
+        touched_titles: Set[str] = set()
+        touched_normalized: Set[Tuple[str, str]] = set()
+        
+        for app in single_apps:
+            app_key = app.lower()
+            entries = self._single_entries.get(app_key)
+            if entries is not None and entries.pop(app, None) is not None:
+                touched_apps.add(app_key)
+        
+        for app, title in multi_pairs:
+            title_key = title.lower()
+            entries = self._title_entries.get(title_key)
+            if entries is not None and entries.pop((app, title), None) is not None:
+                touched_titles.add(title_key)
+                self._multipurpose_app_counts[app.lower()] -= 1
+                for normalized_key in self._normalized_keys(app, title):
+                    normalized_entries = self._normalized_entries.get(normalized_key)
+                    if normalized_entries is not None:
+                        normalized_entries.pop((app, title), None)
+                        touched_normalized.add(normalized_key)
+        
+        if records_df is not None and not records_df.empty:
+            added_apps, added_titles, added_normalized = self._add_records(records_df)
+            touched_apps |= added_apps
+            touched_titles |= added_titles
+            touched_normalized |= added_normalized
+        
+        self._rebuild_effective(touched_apps, touched_titles, touched_normalized)
+    
+    def copy(self) -> 'CategoryCache':
+        """
+        创建可增量刷新的完整副本（写时复制：在副本上 refresh_records，原实例保持不变）
+        
+        Returns:
+            与原缓存互不影响的 CategoryCache
+        """
+        clone = CategoryCache.__new__(CategoryCache)
+        clone._single_purpose_apps = set(self._single_purpose_apps)
+        clone._multipurpose_apps = set(self._multipurpose_apps)
+        clone._multipurpose_titles = set(self._multipurpose_titles)
+        clone._app_category_map = dict(self._app_category_map)
+        clone._title_category_map = dict(self._title_category_map)
+        clone._single_entries = {key: dict(entries) for key, entries in self._single_entries.items()}
+        clone._title_entries = {key: dict(entries) for key, entries in self._title_entries.items()}
+        clone._multipurpose_app_counts = dict(self._multipurpose_app_counts)
+        clone.title_normalizer = self.title_normalizer
+        clone._normalized_entries = {key: dict(entries) for key, entries in self._normalized_entries.items()}
+        clone._normalized_category_map = dict(self._normalized_category_map)
+        clone._app_description_map = dict(self._app_description_map)
+        clone.version = self.version
+        clone.frozen = False
+        return clone
+    
+    def snapshot(self) -> 'CategoryCache':
+        """
+        创建只读快照（用于传给子进程）
+        
+        只复制查询所需的生效索引，不含增量刷新用的候选记录，序列化体积更小；
+        快照与原缓存互不影响
+        
+        Returns:
+            frozen=True 的 CategoryCache
+        """
+        snapshot = CategoryCache.__new__(CategoryCache)
+        snapshot._single_purpose_apps = set(self._single_purpose_apps)
+        snapshot._multipurpose_apps = set(self._multipurpose_apps)
+        snapshot._multipurpose_titles = set(self._multipurpose_titles)
+        snapshot._app_category_map = dict(self._app_category_map)
+        snapshot._title_category_map = dict(self._title_category_map)
+        snapshot._single_entries = {}
+        snapshot._title_entries = {}
+        snapshot._multipurpose_app_counts = {}
+        snapshot.title_normalizer = self.title_normalizer
+        snapshot._normalized_entries = {}
+        snapshot._normalized_category_map = dict(self._normalized_category_map)
+        snapshot._app_description_map = dict(self._app_description_map)
+        snapshot.version = self.version
+        snapshot.frozen = True
+        return snapshot
+    
+    def _add_records(self, cache_df: pd.DataFrame) -> Tuple[Set[str], Set[str], Set[Tuple[str, str]]]:
+        """
+        将 DataFrame 中的记录加入候选索引（已存在的键保持先到优先）
+        
+        Returns:
+            (涉及的小写 app, 涉及的小写 title, 涉及的 (小写 app, 归一化键))
+        """
+        added_apps: Set[str] = set()
+        added_titles: Set[str] = set()
+        added_normalized: Set[Tuple[str, str]] = set()
+        
+        # 过滤有效记录（state=1 表示启用），只缓存有有效分类(category_id)的记录
         if 'state' in cache_df.columns:
-            valid_df = cache_df[cache_df['state'] == 1].copy()
+            valid_df = cache_df[(cache_df['state'] == 1) & cache_df['category_id'].notna()]
         else:
-            valid_df = cache_df.copy()
+            valid_df = cache_df[cache_df['category_id'].notna()]
         
-        logger.debug(f"构建缓存索引: 原始 {len(cache_df)} 行, 有效 {len(valid_df)} 行")
+        # 分类列统一为 object，NaN -> None
+        category_cols = [
+            valid_df[col].astype(object).where(valid_df[col].notna(), None)
+            if col in valid_df.columns else pd.Series([None] * len(valid_df), index=valid_df.index, dtype=object)
+            for col in ('category_id', 'sub_category_id', 'link_to_goal_id')
+        ]
+        categories = pd.Series(list(zip(*category_cols)), index=valid_df.index, dtype=object)
+        is_multi = valid_df['is_multipurpose_app'] == 1
         
-        # 分离单用途和多用途记录
-        single_purpose_df = valid_df[valid_df['is_multipurpose_app'] == 0]
-        multi_purpose_df = valid_df[valid_df['is_multipurpose_app'] == 1]
+        # 单用途：基于 app
+        single_mask = ~is_multi & valid_df['app'].notna()
+        for app, category in zip(valid_df.loc[single_mask, 'app'], categories[single_mask]):
+            if not app:
+                continue
+            app_key = app.lower()
+            self._single_entries.setdefault(app_key, {}).setdefault(app, category)
+            added_apps.add(app_key)
         
-        # 只缓存有有效分类(category_id)的 app
-        # 单用途：只有 category_id 不为空的 app 才被缓存
-        single_with_category = single_purpose_df[single_purpose_df['category_id'].notna()]
-        self._single_purpose_apps = set(single_with_category['app'].str.lower().dropna())
+        # 多用途：基于 title（需要 title 不为空）
+        multi_mask = is_multi & valid_df['app'].notna() & valid_df['title'].notna()
+        for app, title, category in zip(
+            valid_df.loc[multi_mask, 'app'], valid_df.loc[multi_mask, 'title'], categories[multi_mask]
+        ):
+            if not app or not title:
+                continue
+            title_key = title.lower()
+            entries = self._title_entries.setdefault(title_key, {})
+            if (app, title) not in entries:
+                entries[(app, title)] = category
+                app_key = app.lower()
+                self._multipurpose_app_counts[app_key] = self._multipurpose_app_counts.get(app_key, 0) + 1
+                for normalized_key in self._normalized_keys(app, title):
+                    self._normalized_entries.setdefault(normalized_key, {})[(app, title)] = category
+                    added_normalized.add(normalized_key)
+            added_titles.add(title_key)
         
-        # 多用途：只有 category_id 不为空且 title 不为空的才被缓存
-        multi_with_category = multi_purpose_df[
-            multi_purpose_df['category_id'].notna() & 
-            multi_purpose_df['title'].notna()
-        ]
-        self._multipurpose_apps = set(multi_with_category['app'].str.lower().dropna())
-        self._multipurpose_titles = set(multi_with_category['title'].str.lower().dropna())
-        
-        # 构建单用途应用分类映射（只处理有分类的记录）
-        for _, row in single_with_category.iterrows():
-            app = row.get('app', '')
-            if app:
-                app = app.lower()
-                cat_id = row.get('category_id')
-                sub_cat_id = row.get('sub_category_id')
-                goal_id = row.get('link_to_goal_id')
-                
-                # 只添加第一个匹配（避免重复覆盖）
-                if app not in self._app_category_map:
-                    self._app_category_map[app] = (cat_id, sub_cat_id, goal_id)
-        
-        # 构建多用途应用分类映射（只处理有分类的记录）
-        for _, row in multi_with_category.iterrows():
-            title = row.get('title', '')
-            if title:
-                title = title.lower()
-                cat_id = row.get('category_id')
-                sub_cat_id = row.get('sub_category_id')
-                goal_id = row.get('link_to_goal_id')
-                
-                if title not in self._title_category_map:
-                    self._title_category_map[title] = (cat_id, sub_cat_id, goal_id)
-        
-        # 构建应用描述映射（使用完整 DataFrame，包括禁用的记录和无分类的记录）
+        # 应用描述映射（使用完整 DataFrame，包括禁用的记录和无分类的记录）
         # app_description 只要存在就可以复用，与分类无关
-        for _, row in cache_df.iterrows():
-            app = row.get('app', '')
-            desc = row.get('app_description', '')
-            if app and desc:
-                app = app.lower()
-                if app not in self._app_description_map:
-                    self._app_description_map[app] = desc
+        if 'app_description' in cache_df.columns:
+            desc_df = cache_df[cache_df['app'].notna() & cache_df['app_description'].notna()]
+            for app, desc in zip(desc_df['app'], desc_df['app_description']):
+                if app and desc:
+                    self._app_description_map.setdefault(app.lower(), desc)
         
-        logger.debug(
-            f"索引构建完成: 单用途(有分类) {len(self._single_purpose_apps)} 个, "
-            f"多用途(有分类) {len(self._multipurpose_apps)} 个, "
-            f"titles(有分类) {len(self._multipurpose_titles)} 个, "
-            f"描述 {len(self._app_description_map)} 个"
-        )
+        return added_apps, added_titles, added_normalized
+    
+    def _normalized_keys(self, app: str, title: str) -> List[Tuple[str, str]]:
+        """计算 (小写 app, 归一化键) 列表，未启用归一化时为空"""
+        if self.title_normalizer is None:
+            return []
+        app_key = app.lower()
+        return [(app_key, key) for key in self.title_normalizer.keys(app_key, title.lower())]
+    
+    def _rebuild_effective(
+        self,
+        app_keys: Iterable[str],
+        title_keys: Iterable[str],
+        normalized_keys: Iterable[Tuple[str, str]] = ()
+    ) -> None:
+        """根据候选记录重新计算指定键的生效分类"""
+        for app_key in list(app_keys):
+            entries = self._single_entries.get(app_key)
+            if entries:
+                self._app_category_map[app_key] = next(iter(entries.values()))
+                self._single_purpose_apps.add(app_key)
+            else:
+                self._single_entries.pop(app_key, None)
+                self._app_category_map.pop(app_key, None)
+                self._single_purpose_apps.discard(app_key)
+        
+        for title_key in list(title_keys):
+            entries = self._title_entries.get(title_key)
+            if entries:
+                self._title_category_map[title_key] = next(iter(entries.values()))
+                self._multipurpose_titles.add(title_key)
+            else:
+                self._title_entries.pop(title_key, None)
+                self._title_category_map.pop(title_key, None)
+                self._multipurpose_titles.discard(title_key)
+        
+        # 归一化键只在所有候选记录分类一致时生效，避免把不同用途的标题混为一谈
+        for normalized_key in list(normalized_keys):
+            entries = self._normalized_entries.get(normalized_key)
+            categories = set(entries.values()) if entries else set()
+            enough = not normalized_key[1].startswith(SITE_KEY_PREFIX) or len(entries) >= SITE_KEY_MIN_RECORDS
+            if len(categories) == 1 and enough:
+                self._normalized_category_map[normalized_key] = next(iter(categories))
+            else:
+                if not entries:
+                    self._normalized_entries.pop(normalized_key, None)
+                self._normalized_category_map.pop(normalized_key, None)
+        
+        self._multipurpose_apps = {app for app, count in self._multipurpose_app_counts.items() if count > 0}
+        self.version += 1
     
     def get_single_purpose_category(self, app: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
         """
@@ -144,6 +354,27 @@ class CategoryCache:
             return None
         return self._title_category_map.get(title)
     
+    def get_normalized_multipurpose_category(self, app: str, title: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        按归一化标题获取多用途应用的分类（精确 title 未命中时的兜底）
+        
+        依次尝试掩码标题、站点/域名两级归一化键
+        
+        Args:
+            app: 应用名称（应已小写化）
+            title: 窗口标题（应已小写化）
+            
+        Returns:
+            (category_id, sub_category_id, link_to_goal_id) 或 None
+        """
+        if app not in self._multipurpose_apps or self.title_normalizer is None:
+            return None
+        for key in self.title_normalizer.keys(app, title):
+            category = self._normalized_category_map.get((app, key))
+            if category is not None:
+                return category
+        return None
+    
     def get_app_description(self, app: str) -> str:
         """
         获取应用描述（用于复用已有描述）
@@ -192,6 +423,7 @@ class CategoryCache:
             'single_purpose_apps': len(self._single_purpose_apps),
             'multipurpose_apps': len(self._multipurpose_apps),
             'multipurpose_titles': len(self._multipurpose_titles),
+            'normalized_title_keys': len(self._normalized_category_map),
             'app_descriptions': len(self._app_description_map),
         }
 
@@ -0,0 +1,67 @@
+"""
+进程级分类缓存管理器
+在进程生命周期内复用同一个 CategoryCache，避免每次同步都整表读取并重建索引
+"""
+from typing import List, Tuple
+
+from lifeprism.config.settings_manager import settings
+from lifeprism.processors.components.category_cache import CategoryCache
+from lifeprism.processors.components.map_cache_index_manager import MapCacheIndexManager
+from lifeprism.utils import LazySingleton, get_logger
+
+logger = get_logger(__name__)
+
+
+class CategoryCacheManager(MapCacheIndexManager[CategoryCache]):
+    """
+    进程级分类缓存管理器
+
+    - 首次 get_cache() 时整表加载并构建 CategoryCache
+    - 写入分类缓存表的路径（save_category_map_cache_V2、CategoryService 的更新/启用/禁用/删除）
+      通过 LWBaseDataProvider.notify_map_cache_changed 通知，按自然键在副本上增量刷新后替换（写时复制），
+      get_cache() 返回的实例发布后不再修改
+    - 每次 get_cache() 比较表的版本指纹，发现未经通知的写入或标题归一化配置变更时整体重建
+    """
+
+    index_name = "缓存索引"
+
+    def get_cache(self) -> CategoryCache:
+        """
+        获取当前分类缓存（必要时重建）
+
+        Returns:
+            CategoryCache: 进程内共享的缓存实例
+        """
+        return self.get()
+
+    def _build(self) -> CategoryCache:
+        cache = CategoryCache(self.lw_data_provider.load_category_map_cache_V2())
+        logger.info(f"分类缓存索引已构建: {cache.get_stats()}")
+        return cache
+
+    def _apply_changes(
+        self,
+        cache: CategoryCache,
+        single_apps: List[str],
+        multi_pairs: List[Tuple[str, str]]
+    ) -> CategoryCache:
+        # 写时复制：清洗流程（包括子进程快照）可能正在读取已发布的实例，在副本上刷新后由基类整体替换
+        records_df = self.lw_data_provider.load_map_cache_rows_by_keys(single_apps, multi_pairs)
+        refreshed = cache.copy()
+        refreshed.refresh_records(single_apps, multi_pairs, records_df)
+        logger.debug(
+            f"分类缓存增量刷新: 单用途 {len(single_apps)} 个, 多用途 {len(multi_pairs)} 个, "
+            f"version={refreshed.version}"
+        )
+        return refreshed
+
+    def _needs_rebuild(self, cache: CategoryCache) -> bool:
+        """标题归一化 / 站点兜底配置是否与当前缓存不一致"""
+        normalizer = cache.title_normalizer
+        if (normalizer is not None) != bool(settings.title_normalization):
+            return True
+        return normalizer is not None and normalizer.site_fallback != bool(settings.title_site_fallback)
+
+
+# 懒加载单例（首次访问时才初始化）
+category_cache_manager = LazySingleton(CategoryCacheManager)
@@ -4,6 +4,7 @@
 """
 from typing import Dict, List, Set
 from lifeprism.processors.models.processed_event import ProcessedEvent
+from lifeprism.processors.models.event_batch import EventBatch
 from lifeprism.processors.components.category_cache import CategoryCache
 from lifeprism.llm.llm_classify import AppInFo, LogItem, classifyState
 from lifeprism.utils import get_logger, DEBUG
@@ -61,6 +62,23 @@ class ClassifyCollector:
         else:
             self._collect_multipurpose(event)
     
+    def collect_batch(self, batch: EventBatch) -> None:
+        """
+        收集列式批次中未命中缓存的事件
+        
+        Args:
+            batch: 已经过 CacheMatcher.match_batch 的事件批次
+        """
+        cache_matched = batch.cache_matched
+        for index in range(len(batch)):
+            if cache_matched[index]:
+                continue
+            app, title, duration = batch.apps[index], batch.titles[index], batch.durations[index]
+            if batch.is_multipurpose[index]:
+                self._add_multipurpose(app, title, duration)
+            else:
+                self._add_single_purpose(app, title, duration)
+    
     def _collect_single_purpose(self, event: ProcessedEvent) -> None:
         """
         收集单用途应用
@@ -68,28 +86,31 @@ class ClassifyCollector:
         - 每个 app 只收集一次
         - 复用缓存中的应用描述
         """
-        if event.app in self._seen_apps:
+        self._add_single_purpose(event.app, event.title, event.duration)
+    
+    def _add_single_purpose(self, app: str, title: str, duration: int) -> None:
+        if app in self._seen_apps:
             return
         
         # 添加到应用注册表
-        existing_desc = self.cache.get_app_description(event.app)
-        self._app_registry[event.app] = AppInFo(
+        existing_desc = self.cache.get_app_description(app)
+        self._app_registry[app] = AppInFo(
             description=existing_desc,  # 复用已有描述，空则待 LLM 填充
             is_multipurpose=False,
-            titles=[event.title] if event.title else []
+            titles=[title] if title else []
         )
-        self._seen_apps.add(event.app)
+        self._seen_apps.add(app)
         
         # 创建 LogItem
         self._log_items.append(LogItem(
             id=self._id_counter,
-            app=event.app,
-            duration=event.duration,
-            title=event.title
+            app=app,
+            duration=duration,
+            title=title
         ))
         self._id_counter += 1
         
-        logger.debug(f"📝 收集单用途应用: {event.app}")
+        logger.debug(f"📝 收集单用途应用: {app}")
     
     def _collect_multipurpose(self, event: ProcessedEvent) -> None:
         """
@@ -98,35 +119,38 @@ class ClassifyCollector:
         - 每个 title 收集一次（同一 app 可能有多个 title）
         - 复用缓存中的应用描述
         """
+        self._add_multipurpose(event.app, event.title, event.duration)
+    
+    def _add_multipurpose(self, app: str, title: str, duration: int) -> None:
         # 确保 app 在注册表中
-        if event.app not in self._seen_apps:
-            existing_desc = self.cache.get_app_description(event.app)
-            self._app_registry[event.app] = AppInFo(
+        if app not in self._seen_apps:
+            existing_desc = self.cache.get_app_description(app)
+            self._app_registry[app] = AppInFo(
                 description=existing_desc,
                 is_multipurpose=True,
                 titles=[]
             )
-            self._seen_apps.add(event.app)
+            self._seen_apps.add(app)
         
         # 检查 title 是否已收集
-        if not event.title or event.title in self._seen_titles:
+        if not title or title in self._seen_titles:
             return
         
         # 添加 title 到对应 app 的 titles 列表
-        if self._app_registry[event.app].titles is not None:
-            self._app_registry[event.app].titles.append(event.title)
+        if self._app_registry[app].titles is not None:
+            self._app_registry[app].titles.append(title)
         
         # 创建 LogItem
         self._log_items.append(LogItem(
             id=self._id_counter,
-            app=event.app,
-            duration=event.duration,
-            title=event.title
+            app=app,
+            duration=duration,
+            title=title
         ))
         self._id_counter += 1
-        self._seen_titles.add(event.title)
+        self._seen_titles.add(title)
         
-        logger.debug(f"📝 收集多用途应用: {event.app} - {event.title[:30]}...")
+        logger.debug(f"📝 收集多用途应用: {app} - {title[:30]}...")
     
     def build_state(self) -> classifyState:
         """
@@ -3,10 +3,11 @@
 负责将 ActivityWatch 原始事件转换为标准化的 ProcessedEvent
 """
 from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import pytz
 
 from lifeprism.processors.models.processed_event import ProcessedEvent
+from lifeprism.processors.models.event_batch import EventBatch
 from lifeprism.config import LOCAL_TIMEZONE
 from lifeprism.config.settings_manager import settings
 from lifeprism.utils import is_multipurpose_app, get_logger, DEBUG
@@ -19,7 +20,7 @@ class EventTransformer:
     ActivityWatch 事件转换器
     
     职责：
-    - 将原始 AW 事件转换为标准化的 ProcessedEvent
+    - 将原始 AW 事件转换为标准化的 ProcessedEvent 或列式 EventBatch
     - 过滤短时长事件
     - 标准化时间戳、应用名称、窗口标题
     """
@@ -39,6 +40,8 @@ class EventTransformer:
         self.min_duration = min_duration or settings.data_cleaning_threshold
         self.timezone = timezone
         self._target_tz = pytz.timezone(timezone)
+        # 原始应用名 -> (标准化应用名, 是否多用途)
+        self._app_cache: Dict[str, Tuple[str, bool]] = {}
     
     def transform(self, raw_event: dict) -> Optional[ProcessedEvent]:
         """
@@ -50,45 +53,12 @@ class EventTransformer:
         Returns:
             ProcessedEvent 或 None（如果被过滤）
         """
-        # 1. 检查时长
-        duration = int(raw_event.get('duration', 0))
-        if duration < self.min_duration:
-            return None
-        
-        # 2. 获取并标准化应用名称
-        app_name = raw_event.get('data', {}).get('app')
-        if not app_name:
-            return None
-        app_name = self._normalize_app_name(app_name)
-        
-        # 3. 获取并标准化标题
-        title = raw_event.get('data', {}).get('title', '')
-        title = self._normalize_title(title)
-        
-        # 4. 判断是否多用途应用
-        is_multipurpose = is_multipurpose_app(app_name)
-        
-        # 5. 多用途应用必须有 title，否则视为脏数据过滤掉
-        if is_multipurpose and not title:
-            logger.debug(f"过滤脏数据: 多用途应用 {app_name} 无 title")
+        fields = self._transform_fields(raw_event)
+        if fields is None:
             return None
-
-        # 6. 转换时间戳
-        timestamp_str = raw_event.get('timestamp', '')
-        start_time = self._convert_timestamp(timestamp_str)
-        if not start_time:
-            logger.warning(f"时间戳转换失败: {timestamp_str}")
-            return None
-        
-        # 7. 计算结束时间
-        start_dt = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
-        end_dt = start_dt + timedelta(seconds=duration)
-        end_time = end_dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        
-        
+        event_id, start_time, end_time, duration, app_name, title, is_multipurpose = fields
         return ProcessedEvent(
-            id=str(raw_event.get('id', '')),
+            id=event_id,
             start_time=start_time,
             end_time=end_time,
             duration=duration,
@@ -119,6 +89,80 @@ class EventTransformer:
         
         return valid_events, removed_count
     
+    def transform_to_batch(self, raw_events: List[dict]) -> Tuple[EventBatch, int]:
+        """
+        批量转换事件，直接写入列式 EventBatch（不创建逐事件对象）
+        
+        Args:
+            raw_events: 原始事件列表
+            
+        Returns:
+            (有效事件批次, 被过滤数量)
+        """
+        batch = EventBatch()
+        removed_count = 0
+        
+        for raw_event in raw_events:
+            fields = self._transform_fields(raw_event)
+            if fields is None:
+                removed_count += 1
+            else:
+                batch.append(*fields)
+        
+        return batch, removed_count
+    
+    def _transform_fields(self, raw_event: dict) -> Optional[tuple]:
+        """
+        转换单个事件为字段元组
+        
+        Returns:
+            (id, start_time, end_time, duration, app, title, is_multipurpose) 或 None（如果被过滤）
+        """
+        # 1. 检查时长
+        duration = int(raw_event.get('duration', 0))
+        if duration < self.min_duration:
+            return None
+        
+        # 2. 获取并标准化应用名称（同一 app 只计算一次）
+        data = raw_event.get('data', {})
+        raw_app = data.get('app')
+        if not raw_app:
+            return None
+        app_info = self._app_cache.get(raw_app)
+        if app_info is None:
+            app_name = self._normalize_app_name(raw_app)
+            app_info = (app_name, is_multipurpose_app(app_name))
+            self._app_cache[raw_app] = app_info
+        app_name, is_multipurpose = app_info
+        
+        # 3. 获取并标准化标题
+        title = self._normalize_title(data.get('title', ''))
+        
+        # 4. 多用途应用必须有 title，否则视为脏数据过滤掉
+        if is_multipurpose and not title:
+            logger.debug(f"过滤脏数据: 多用途应用 {app_name} 无 title")
+            return None
+
+        # 5. 转换时间戳
+        timestamp_str = raw_event.get('timestamp', '')
+        start_dt = self._convert_timestamp_dt(timestamp_str)
+        if start_dt is None:
+            logger.warning(f"时间戳转换失败: {timestamp_str}")
+            return None
+        
+        # 6. 计算结束时间
+        end_dt = start_dt + timedelta(seconds=duration)
+        
+        return (
+            str(raw_event.get('id', '')),
+            start_dt.strftime('%Y-%m-%d %H:%M:%S'),
+            end_dt.strftime('%Y-%m-%d %H:%M:%S'),
+            duration,
+            app_name,
+            title,
+            is_multipurpose,
+        )
+    
     def _normalize_app_name(self, app: str) -> str:
         """
         标准化应用名称
@@ -151,6 +195,19 @@ class EventTransformer:
         Returns:
             本地时间字符串 (YYYY-MM-DD HH:MM:SS) 或 None
         """
+        dt_local = self._convert_timestamp_dt(utc_timestamp_str)
+        return dt_local.strftime('%Y-%m-%d %H:%M:%S') if dt_local else None
+    
+    def _convert_timestamp_dt(self, utc_timestamp_str: str) -> Optional[datetime]:
+        """
+        将 UTC 时间戳转换为本地时间（精确到秒的 datetime）
+        
+        Args:
+            utc_timestamp_str: ISO 8601 格式的 UTC 时间戳
+            
+        Returns:
+            本地时区 datetime 或 None
+        """
         if not utc_timestamp_str:
             return None
         
@@ -159,10 +216,8 @@ class EventTransformer:
             clean_timestamp = utc_timestamp_str.replace('Z', '+00:00')
             dt_utc = datetime.fromisoformat(clean_timestamp)
             
-            # 转换到本地时区
-            dt_local = dt_utc.astimezone(self._target_tz)
-            
-            return dt_local.strftime('%Y-%m-%d %H:%M:%S')
+            # 转换到本地时区，截断到秒（与字符串格式保持一致）
+            return dt_utc.astimezone(self._target_tz).replace(microsecond=0)
         except Exception as e:
             logger.warning(f"时间戳转换失败: {utc_timestamp_str} -> {str(e)}")
             return None
@@ -0,0 +1,280 @@
+"""
+本地预分类器
+由用户自己的分类缓存表（single_purpose_map_cache / multi_purpose_map_cache）训练的字符 n-gram
+朴素贝叶斯分类器，在调用 LLM 之前预测未命中缓存的条目，只有低置信度的条目才交给 LLM
+
+- 样本: state=1 且 category_id 非空的缓存记录，标签为 (category_id, sub_category_id, link_to_goal_id)
+- 特征: app 整体 + app / 标题的字符 1~3-gram（每条记录去重计数）
+- 增量训练: 每条记录按自然键记账，缓存表变更时（notify_map_cache_changed）撤销旧样本并加入新样本
+- 预测结果不写回分类缓存（见 DataProcessingService.classify_pending），训练集只包含 LLM / 用户给出的分类；
+  local_classifier_mode 默认 off，shadow 模式只与 LLM 结果对比并记录一致率
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from lifeprism.config.settings_manager import settings
+from lifeprism.processors.components.map_cache_index_manager import MapCacheIndexManager
+from lifeprism.storage import LWBaseDataProvider
+from lifeprism.utils import LazySingleton, get_logger
+
+logger = get_logger(__name__)
+
+Label = Tuple[str, Optional[str], Optional[str]]
+SampleKey = Tuple[str, ...]
+
+# 标题参与特征提取的最大长度（超长标题的尾部多为站点名等噪声）
+MAX_TITLE_LENGTH = 120
+# 拉普拉斯平滑系数
+SMOOTHING_ALPHA = 0.1
+# 后验温度：朴素贝叶斯的特征独立假设使后验过于极端，按特征数开方缩放对数似然后再归一化
+CONFIDENCE_TEMPERATURE = 0.5
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", (text or "").lower()).strip()
+
+
+def _char_ngrams(text: str, prefix: str, ngram_range: Tuple[int, int]) -> Iterable[str]:
+    padded = f"^{text}$"
+    low, high = ngram_range
+    for n in range(low, high + 1):
+        for i in range(len(padded) - n + 1):
+            yield prefix + padded[i:i + n]
+
+
+def extract_features(app: str, title: Optional[str], ngram_range: Tuple[int, int] = (1, 3)) -> Set[str]:
+    """
+    提取 (app, title) 的特征集合
+
+    Returns:
+        Set[str]: "a=app" 整体特征、"a:" 前缀的 app n-gram、"t:" 前缀的标题 n-gram
+    """
+    app_text = _normalize_text(app)
+    title_text = _normalize_text(title)[:MAX_TITLE_LENGTH]
+    features = {f"a={app_text}"}
+    features.update(_char_ngrams(app_text, "a:", ngram_range))
+    if title_text:
+        features.update(_char_ngrams(title_text, "t:", ngram_range))
+    return features
+
+
+class NaiveBayesClassifier:
+    """
+    支持增量增删样本的多项式朴素贝叶斯（特征按文档去重计数）
+
+    Args:
+        alpha: 平滑系数
+        temperature: 后验温度（见 CONFIDENCE_TEMPERATURE）
+    """
+
+    def __init__(self, alpha: float = SMOOTHING_ALPHA, temperature: float = CONFIDENCE_TEMPERATURE):
+        self.alpha = alpha
+        self.temperature = temperature
+        self._samples: Dict[SampleKey, Tuple[Label, Set[str]]] = {}
+        self._label_docs: Counter = Counter()
+        self._label_feature_totals: Counter = Counter()
+        self._feature_counts: Dict[Label, Counter] = defaultdict(Counter)
+        self._vocabulary: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def labels(self) -> List[Label]:
+        return list(self._label_docs)
+
+    def add(self, key: SampleKey, label: Label, features: Set[str]) -> None:
+        """加入（或替换）一条样本"""
+        self.remove(key)
+        self._samples[key] = (label, features)
+        self._label_docs[label] += 1
+        self._label_feature_totals[label] += len(features)
+        self._feature_counts[label].update(features)
+        self._vocabulary.update(features)
+
+    def remove(self, key: SampleKey) -> bool:
+        """撤销一条样本，样本不存在时返回 False"""
+        sample = self._samples.pop(key, None)
+        if sample is None:
+            return False
+        label, features = sample
+        self._label_docs[label] -= 1
+        self._label_feature_totals[label] -= len(features)
+        self._feature_counts[label].subtract(features)
+        self._vocabulary.subtract(features)
+        if self._label_docs[label] <= 0:
+            del self._label_docs[label]
+            del self._label_feature_totals[label]
+            del self._feature_counts[label]
+        for feature in features:
+            if self._vocabulary[feature] <= 0:
+                del self._vocabulary[feature]
+        return True
+
+    def predict(
+        self,
+        features: Set[str],
+        allowed: Optional[Set[Tuple[str, Optional[str]]]] = None
+    ) -> Tuple[Optional[Label], float]:
+        """
+        预测标签
+
+        Args:
+            features: extract_features 的结果
+            allowed: 可选的 (category_id, sub_category_id) 集合，不在其中的标签不参与预测
+
+        Returns:
+            Tuple[Optional[Label], float]: (最可能的标签, 置信度)，无可用标签时为 (None, 0.0)
+        """
+        candidates = [
+            label for label in self._label_docs
+            if allowed is None or (label[0], label[1]) in allowed
+        ]
+        known = [f for f in features if f in self._vocabulary]
+        if not candidates or not known:
+            return None, 0.0
+
+        total_docs = sum(self._label_docs[label] for label in candidates)
+        vocabulary_size = len(self._vocabulary)
+        scale = self.temperature / math.sqrt(len(known))
+        scores = []
+        for label in candidates:
+            counts = self._feature_counts[label]
+            denominator = self._label_feature_totals[label] + self.alpha * vocabulary_size
+            log_likelihood = sum(math.log((counts.get(f, 0) + self.alpha) / denominator) for f in known)
+            scores.append(math.log(self._label_docs[label] / total_docs) + log_likelihood * scale)
+
+        best = max(range(len(candidates)), key=scores.__getitem__)
+        normalizer = sum(math.exp(score - scores[best]) for score in scores)
+        return candidates[best], 1.0 / normalizer
+
+
+def _sample_key(app: str, title: Optional[str], is_multipurpose_app) -> SampleKey:
+    return ("m", app, title or "") if int(is_multipurpose_app) else ("s", app)
+
+
+class LocalClassifierManager(MapCacheIndexManager[NaiveBayesClassifier]):
+    """
+    进程级本地预分类器管理器
+
+    - 首次 get_classifier() 时整表训练
+    - 分类缓存表的写入通过 LWBaseDataProvider.notify_map_cache_changed 按自然键增量重训
+    - 每次 get_classifier() 比较表的版本指纹，发现未经通知的写入时整体重训
+    """
+
+    index_name = "本地分类器"
+
+    def __init__(self, lw_data_provider: Optional[LWBaseDataProvider] = None):
+        super().__init__(lw_data_provider)
+        self._stats = Counter()
+
+    def get_classifier(self) -> NaiveBayesClassifier:
+        """获取当前模型（必要时整表重训）"""
+        return self.get()
+
+    def predict_items(
+        self,
+        items: List[Tuple[str, Optional[str], bool]],
+        allowed: Optional[Set[Tuple[str, Optional[str]]]] = None,
+        min_confidence: Optional[float] = None
+    ) -> List[Optional[Label]]:
+        """
+        批量预测，置信度不足或模型样本不足时对应位置为 None
+
+        Args:
+            items: [(app, title, is_multipurpose_app), ...]
+            allowed: 可选的 (category_id, sub_category_id) 集合（通常为当前启用的分类）
+            min_confidence: 直接采用的最低置信度，None 时读取配置 local_classifier_min_confidence
+
+        Returns:
+            List[Optional[Label]]: 与 items 对齐的 (category_id, sub_category_id, link_to_goal_id)
+        """
+        threshold = settings.local_classifier_min_confidence if min_confidence is None else min_confidence
+        with self._lock:
+            model = self.get_classifier()
+            if len(model) < int(settings.local_classifier_min_examples or 0):
+                logger.info(f"本地分类器样本不足（{len(model)} 条），全部交给 LLM")
+                return [None] * len(items)
+            results = []
+            for app, title, is_multipurpose_app in items:
+                label, confidence = model.predict(
+                    extract_features(app, title if is_multipurpose_app else None), allowed
+                )
+                results.append(label if label is not None and confidence >= threshold else None)
+        accepted = sum(1 for label in results if label is not None)
+        self._stats['predicted'] += len(items)
+        self._stats['accepted'] += accepted
+        return results
+
+    def record_shadow(self, compared: int, agreed: int) -> None:
+        """记录 shadow 模式下与 LLM 分类对比的条目数与一致数"""
+        with self._lock:
+            self._stats['shadow_compared'] += compared
+            self._stats['shadow_agreed'] += agreed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "samples": len(self._index) if self._index is not None else 0,
+                "labels": len(self._index.labels) if self._index is not None else 0,
+                "predicted": self._stats['predicted'],
+                "accepted": self._stats['accepted'],
+                "shadow_compared": self._stats['shadow_compared'],
+                "shadow_agreed": self._stats['shadow_agreed'],
+            }
+
+    def _build(self) -> NaiveBayesClassifier:
+        model = NaiveBayesClassifier()
+        self._fit(model, self.lw_data_provider.load_category_map_cache_V2())
+        logger.info(f"本地分类器已训练: {len(model)} 条样本, {len(model.labels)} 个标签")
+        return model
+
+    def _apply_changes(
+        self,
+        model: NaiveBayesClassifier,
+        single_apps: List[str],
+        multi_pairs: List[Tuple[str, str]]
+    ) -> NaiveBayesClassifier:
+        # 预测在 _lock 内进行，原地更新即可
+        for app in single_apps:
+            model.remove(("s", app))
+        for app, title in multi_pairs:
+            model.remove(("m", app, title))
+        added = self._fit(model, self.lw_data_provider.load_map_cache_rows_by_keys(single_apps, multi_pairs))
+        logger.debug(
+            f"本地分类器增量重训: 单用途 {len(single_apps)} 个, 多用途 {len(multi_pairs)} 个, "
+            f"有效样本 {added} 条, 总样本 {len(model)} 条"
+        )
+        return model
+
+    @staticmethod
+    def _fit(model: NaiveBayesClassifier, records_df: Optional[pd.DataFrame]) -> int:
+        if records_df is None or records_df.empty:
+            return 0
+        added = 0
+        for record in records_df.to_dict('records'):
+            if record.get('state', 1) != 1 or pd.isna(record.get('category_id')):
+                continue
+            is_multi = int(record['is_multipurpose_app'])
+            label = (
+                record['category_id'],
+                None if pd.isna(record.get('sub_category_id')) else record['sub_category_id'],
+                None if pd.isna(record.get('link_to_goal_id')) else record['link_to_goal_id'],
+            )
+            model.add(
+                _sample_key(record['app'], record['title'], is_multi),
+                label,
+                extract_features(record['app'], record['title'] if is_multi else None),
+            )
+            added += 1
+        return added
+
+
+# 懒加载单例（首次访问时才初始化）
+local_classifier_manager = LazySingleton(LocalClassifierManager)
@@ -0,0 +1,89 @@
+"""
+分类缓存派生索引的管理器基类
+CategoryCache、本地预分类器与近似标题索引都由分类缓存表（single_purpose_map_cache /
+multi_purpose_map_cache）派生，在进程内共享并按同一策略与表保持同步
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from lifeprism.storage import LWBaseDataProvider
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+IndexT = TypeVar("IndexT")
+
+
+class MapCacheIndexManager(ABC, Generic[IndexT]):
+    """
+    由分类缓存表派生的进程级内存索引的管理器
+
+    - 首次 get() 时整表构建（_build）
+    - 分类缓存表的写入通过 LWBaseDataProvider.notify_map_cache_changed 按自然键增量更新（_apply_changes），
+      _apply_changes 返回更新后的索引并在锁内替换（可原地修改后返回原索引，也可返回新副本）
+    - 每次 get() 比较表的版本指纹（get_map_cache_fingerprint），发现未经通知的写入时整体重建；
+      _needs_rebuild() 为真（如相关配置已变更）时同样重建
+
+    子类必须实现 _build / _apply_changes（抽象方法，缺少时实例化即报错），index_name 用于日志
+    """
+
+    index_name = "索引"
+
+    def __init__(self, lw_data_provider: Optional[LWBaseDataProvider] = None):
+        self.lw_data_provider = lw_data_provider or LWBaseDataProvider()
+        self._index: Optional[IndexT] = None
+        self._fingerprint: Optional[tuple] = None
+        self._lock = threading.RLock()
+        LWBaseDataProvider.add_map_cache_listener(self.refresh_keys)
+
+    def get(self) -> IndexT:
+        """获取当前索引（必要时整表重建）"""
+        with self._lock:
+            fingerprint = self.lw_data_provider.get_map_cache_fingerprint()
+            if self._index is None:
+                self._rebuild(fingerprint)
+            elif fingerprint != self._fingerprint:
+                logger.info(f"分类缓存表存在未同步的变更，重建{self.index_name}")
+                self._rebuild(fingerprint)
+            elif self._needs_rebuild(self._index):
+                logger.info(f"相关配置已变更，重建{self.index_name}")
+                self._rebuild(fingerprint)
+            return self._index
+
+    def refresh_keys(self, single_apps: List[str], multi_pairs: List[Tuple[str, str]]) -> None:
+        """
+        按自然键增量更新（由 notify_map_cache_changed 回调）
+
+        Args:
+            single_apps: 变更的单用途 app
+            multi_pairs: 变更的多用途 (app, title)
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            self._index = self._apply_changes(self._index, single_apps, multi_pairs)
+            self._fingerprint = self.lw_data_provider.get_map_cache_fingerprint()
+
+    def invalidate(self) -> None:
+        """丢弃当前索引，下次 get() 时重建"""
+        with self._lock:
+            self._index = None
+            self._fingerprint = None
+
+    def _rebuild(self, fingerprint: tuple) -> None:
+        # 先取指纹再读数据：读取期间的并发写入会在下次检查时触发重建
+        self._index = self._build()
+        self._fingerprint = fingerprint
+
+    @abstractmethod
+    def _build(self) -> IndexT:
+        """从分类缓存表整表构建索引"""
+
+    @abstractmethod
+    def _apply_changes(self, index: IndexT, single_apps: List[str], multi_pairs: List[Tuple[str, str]]) -> IndexT:
+        """按变更的自然键重新读取记录并更新索引，返回更新后的索引"""
+
+    def _needs_rebuild(self, index: IndexT) -> bool:
+        """指纹未变时是否仍需重建（默认否）"""
+        return False
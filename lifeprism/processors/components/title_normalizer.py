@@ -0,0 +1,188 @@
+"""
+窗口标题归一化器
+将只在易变部分（未读计数、数字、浏览器后缀、URL 路径等）不同的标题映射为同一个归一化键，
+供 CategoryCache 在精确 (app, title) 未命中时做兜底匹配
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+# 归一化键前缀：t = 掩码后的标题，s = 站点/域名
+MASKED_KEY_PREFIX = "t:"
+SITE_KEY_PREFIX = "s:"
+
+
+@dataclass(frozen=True)
+class TitleRule:
+    """
+    单条标题改写规则（正则替换）
+
+    Attributes:
+        pattern: 正则表达式（匹配小写标题）
+        replacement: 替换内容，支持 \\1 等分组引用
+    """
+    pattern: str
+    replacement: str = ""
+    _regex: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_regex", re.compile(self.pattern))
+
+    def apply(self, title: str) -> str:
+        return self._regex.sub(self.replacement, title)
+
+
+# 所有应用通用的规则：去掉浏览器/编辑器名称后缀和浏览器配置文件后缀
+DEFAULT_RULES: List[TitleRule] = [
+    TitleRule(r"\s*[-–—|]\s*(google chrome|microsoft​?\s?edge|mozilla firefox|firefox|visual studio code)$"),
+    TitleRule(r"\s*[-–—]\s*(个人|工作|personal|work|profile \d+)$"),
+]
+
+# 按应用的规则（应用名为标准化后的小写名称）
+DEFAULT_APP_RULES: Dict[str, List[TitleRule]] = {
+    # "● main.py - project - visual studio code" -> "project"（只保留工作区）
+    "code": [
+        TitleRule(r"^[●•]\s*"),
+        TitleRule(r"^.+? - (.+?)( - visual studio code)?$", r"\1"),
+    ],
+}
+
+# 未读数/计数器："(3) 收件箱"、"[12] inbox"、"inbox (99+)"
+_COUNTER_RE = re.compile(r"^\s*[\(\[（]\d+\+?[\)\]）]\s*|\s*[\(\[（]\d+\+?[\)\]）]\s*$")
+_DIGITS_RE = re.compile(r"\d+")
+_SPACES_RE = re.compile(r"\s+")
+# 形如 URL 的标题："https://github.com/a/b"、"github.com/a/b?x=1"
+_URL_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*://)?(?:www\.)?((?:[a-z0-9-]+\.)+[a-z]{2,})(?::\d+)?(?:[/?#]\S*)?$")
+# 站点名后缀："视频标题 - youtube"、"issue #12 · owner/repo · github"
+_SITE_SEPARATORS = (" - ", " | ", " · ", " — ", " – ")
+MAX_SITE_LENGTH = 30
+
+
+class TitleNormalizer:
+    """
+    标题归一化器（可替换）
+
+    对每个 (app, title) 生成若干归一化键，按从精确到宽松排序：
+    - t:<掩码标题>  去掉计数器、浏览器后缀，数字替换为 #，URL 去掉查询参数
+    - s:<站点>      URL 的域名或标题末尾的站点名（site_fallback=True 时生成，默认关闭：
+                    同一站点的标题用途差异很大，由 CategoryCache 要求多条记录一致后才采用）
+
+    自定义实现只需提供 keys(app, title) -> List[str]
+    """
+
+    def __init__(
+        self,
+        app_rules: Optional[Dict[str, List[TitleRule]]] = None,
+        default_rules: Optional[List[TitleRule]] = None,
+        mask_digits: bool = True,
+        site_fallback: bool = False
+    ):
+        """
+        Args:
+            app_rules: 按应用的规则集，None 时使用 DEFAULT_APP_RULES
+            default_rules: 所有应用通用的规则，None 时使用 DEFAULT_RULES
+            mask_digits: 是否将数字替换为 #
+            site_fallback: 是否生成站点/域名级别的键
+        """
+        self.app_rules: Dict[str, List[TitleRule]] = {
+            app: list(rules) for app, rules in (DEFAULT_APP_RULES if app_rules is None else app_rules).items()
+        }
+        self.default_rules = list(DEFAULT_RULES if default_rules is None else default_rules)
+        self.mask_digits = mask_digits
+        self.site_fallback = site_fallback
+
+    def register_app_rules(self, app: str, rules: Iterable[TitleRule]) -> None:
+        """为指定应用追加规则（在通用规则之前执行）"""
+        self.app_rules.setdefault(app.lower(), []).extend(rules)
+
+    def keys(self, app: str, title: str) -> List[str]:
+        """
+        生成归一化键（已带前缀，按优先级排序，不含重复）
+
+        Args:
+            app: 标准化后的应用名
+            title: 标准化后的标题
+
+        Returns:
+            归一化键列表，无法归一化时返回空列表
+        """
+        if not title:
+            return []
+        title = title.lower()
+        keys = []
+
+        masked = self.normalize(app, title)
+        if masked:
+            keys.append(MASKED_KEY_PREFIX + masked)
+
+        if self.site_fallback:
+            site = self.extract_site(app, title)
+            if site:
+                keys.append(SITE_KEY_PREFIX + site)
+        return keys
+
+    def normalize(self, app: str, title: str) -> str:
+        """
+        归一化标题：按应用规则和通用规则改写，去计数器，URL 去参数，数字掩码
+
+        Returns:
+            归一化后的标题（可能为空字符串）
+        """
+        title = self._apply_rules(app, title)
+
+        url_match = _URL_RE.match(title)
+        if url_match:
+            # URL 只保留 域名 + 路径，去掉查询参数和锚点
+            title = re.split(r"[?#]", title, maxsplit=1)[0]
+            title = re.sub(r"^[a-z][a-z0-9+.-]*://(www\.)?", "", title).rstrip("/")
+
+        title = _COUNTER_RE.sub("", title)
+        if self.mask_digits:
+            title = _DIGITS_RE.sub("#", title)
+        return _SPACES_RE.sub(" ", title).strip()
+
+    def extract_site(self, app: str, title: str) -> Optional[str]:
+        """
+        提取站点：URL 标题取域名，否则取末尾的站点名后缀
+
+        Returns:
+            站点名，无法提取时返回 None
+        """
+        title = self._apply_rules(app, title)
+
+        url_match = _URL_RE.match(title)
+        if url_match:
+            return url_match.group(1)
+
+        # 取最靠后的分隔符之后的部分
+        position, separator = max((title.rfind(sep), sep) for sep in _SITE_SEPARATORS)
+        if position <= 0:
+            return None
+        site = title[position + len(separator):].strip()
+        if not site or len(site) > MAX_SITE_LENGTH or _DIGITS_RE.fullmatch(site):
+            return None
+        return _DIGITS_RE.sub("#", site) if self.mask_digits else site
+
+    def _apply_rules(self, app: str, title: str) -> str:
+        for rule in self.app_rules.get(app, ()):
+            title = rule.apply(title)
+        for rule in self.default_rules:
+            title = rule.apply(title)
+        return title.strip()
+
+
+if __name__ == "__main__":
+    normalizer = TitleNormalizer()
+    samples = [
+        ("chrome", "(3) 收件箱 - gmail - google chrome"),
+        ("chrome", "(12) 收件箱 - gmail - google chrome"),
+        ("msedge", "python 教程 第12集 - youtube - 个人 - microsoft​ edge"),
+        ("firefox", "https://github.com/lifeprism/issues/42?tab=1"),
+        ("code", "● main.py - lifeprism - visual studio code"),
+    ]
+    for app, title in samples:
+        print(f"{app:8} {title!r:60} -> {normalizer.keys(app, title)}")
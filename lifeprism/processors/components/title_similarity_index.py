@@ -0,0 +1,306 @@
+"""
+近似重复标题索引（MinHash + LSH）
+同一剧集的不同集数、同一项目的不同文档、聊天窗口的不同联系人等标题只在局部不同，
+精确 (app, title) 与归一化键都无法命中。本索引对已分类的多用途标题建立按 app 划分的
+MinHash 签名与 LSH 分桶，查询时只比较同桶候选，相似度达到阈值即沿用最相似标题的分类
+
+- 相似度: 标题字符 3-gram（小写、合并空白、数字统一为 0）集合的 Jaccard 相似度，由 MinHash 签名估计
+- LSH: 签名分为 bands 段，每段 rows 个值，任一段完全相同即为候选
+- 增量维护: 每条记录占用一个槽位，删除时归还槽位并从分桶中移除
+- 沿用的分类不写回分类缓存（见 DataProcessingService.classify_pending），索引只包含 LLM / 用户给出的分类；
+  title_similarity_mode 默认 off，shadow 模式只与 LLM 结果对比并记录一致率
+"""
+import hashlib
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lifeprism.config.settings_manager import settings
+from lifeprism.processors.components.map_cache_index_manager import MapCacheIndexManager
+from lifeprism.storage import LWBaseDataProvider
+from lifeprism.utils import LazySingleton, get_logger
+
+logger = get_logger(__name__)
+
+Label = Tuple[str, Optional[str], Optional[str]]
+
+SHINGLE_SIZE = 3
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+# 标题参与签名计算的最大长度
+MAX_TITLE_LENGTH = 200
+
+_DIGITS_PATTERN = re.compile(r"\d")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def title_shingles(title: str) -> Set[str]:
+    """标题的字符 3-gram 集合（短于 3 个字符的标题整体作为一个元素）"""
+    text = _WHITESPACE_PATTERN.sub(" ", _DIGITS_PATTERN.sub("0", (title or "").lower())).strip()[:MAX_TITLE_LENGTH]
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _shingle_hash(shingle: str) -> int:
+    """与进程无关的 64 位 shingle 哈希"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class TitleSimilarityIndex:
+    """
+    按 app 划分的 MinHash LSH 索引
+
+    Args:
+        num_perm: MinHash 签名长度
+        bands: LSH 分段数（num_perm 须能被整除；bands 越多召回越高、候选越多）
+        seed: 哈希参数的随机种子
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) 必须能被 bands ({bands}) 整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # 乘法-移位哈希：(a * x + b) mod 2^64 取高 32 位，a 为奇数
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._band_weights = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        self._slot_keys: List[Optional[Tuple[str, str]]] = []
+        self._slot_labels: List[Optional[Label]] = []
+        self._slot_bands: List[Optional[List[int]]] = []
+        self._free_slots: List[int] = []
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def signature(self, title: str) -> Optional[np.ndarray]:
+        """计算标题的 MinHash 签名，空标题返回 None"""
+        shingles = title_shingles(title)
+        if not shingles:
+            return None
+        # 内置 hash() 对 str 按进程加盐，改用 blake2b，同一标题在任何进程中的签名都相同
+        hashes = np.array([_shingle_hash(s) for s in shingles], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) & _MASK64
+        return (permuted >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, app_key: str, signature: np.ndarray) -> List[int]:
+        with np.errstate(over="ignore"):
+            values = (signature.reshape(self.bands, self.rows).astype(np.uint64) * self._band_weights).sum(axis=1)
+        app_hash = zlib.crc32(app_key.encode("utf-8"))
+        return [(value << 32) ^ app_hash for value in values.tolist()]
+
+    def add(self, app: str, title: str, label: Label) -> bool:
+        """加入（或替换）一条已分类标题，空标题返回 False"""
+        self.remove(app, title)
+        app_key = app.lower()
+        signature = self.signature(title)
+        if signature is None:
+            return False
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._slot_keys)
+            self._slot_keys.append(None)
+            self._slot_labels.append(None)
+            self._slot_bands.append(None)
+            if slot >= len(self._signatures):
+                self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+        band_keys = self._band_keys(app_key, signature)
+        self._signatures[slot] = signature
+        self._slot_keys[slot] = (app, title)
+        self._slot_labels[slot] = label
+        self._slot_bands[slot] = band_keys
+        self._slots[(app, title)] = slot
+        for buckets, key in zip(self._buckets, band_keys):
+            buckets.setdefault(key, []).append(slot)
+        return True
+
+    def remove(self, app: str, title: str) -> bool:
+        """移除一条标题，不存在时返回 False"""
+        slot = self._slots.pop((app, title), None)
+        if slot is None:
+            return False
+        for buckets, key in zip(self._buckets, self._slot_bands[slot]):
+            members = buckets.get(key)
+            if members is not None:
+                members.remove(slot)
+                if not members:
+                    del buckets[key]
+        self._slot_keys[slot] = None
+        self._slot_labels[slot] = None
+        self._slot_bands[slot] = None
+        self._free_slots.append(slot)
+        return True
+
+    def query(
+        self,
+        app: str,
+        title: str,
+        threshold: float,
+        allowed: Optional[Set[Tuple[str, Optional[str]]]] = None
+    ) -> Optional[Tuple[Label, float, str]]:
+        """
+        查找同一 app 下最相似的已分类标题
+
+        Args:
+            app: 应用名称
+            title: 待查询的标题
+            threshold: 估计 Jaccard 相似度的下限
+            allowed: 可选的 (category_id, sub_category_id) 集合，不在其中的记录不参与匹配
+
+        Returns:
+            (分类, 相似度, 匹配到的标题) 或 None
+        """
+        signature = self.signature(title)
+        if signature is None or not self._slots:
+            return None
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(app.lower(), signature)):
+            members = buckets.get(key)
+            if members:
+                candidates.update(members)
+        if not candidates:
+            return None
+
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = (self._signatures[slots] == signature).mean(axis=1)
+        app_key = app.lower()
+        for index in np.argsort(-similarities, kind="stable"):
+            similarity = float(similarities[index])
+            if similarity < threshold:
+                break
+            slot = int(slots[index])
+            matched_app, matched_title = self._slot_keys[slot]
+            label = self._slot_labels[slot]
+            # 不同 app 的分桶键可能碰撞，需再次确认 app
+            if matched_app.lower() != app_key:
+                continue
+            if allowed is not None and (label[0], label[1]) not in allowed:
+                continue
+            return label, similarity, matched_title
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "titles": len(self._slots),
+            "buckets": sum(len(buckets) for buckets in self._buckets),
+        }
+
+
+class TitleSimilarityIndexManager(MapCacheIndexManager[TitleSimilarityIndex]):
+    """
+    进程级近似重复标题索引管理器
+
+    - 首次 get_index() 时由多用途缓存记录整表构建
+    - 分类缓存表的写入通过 LWBaseDataProvider.notify_map_cache_changed 按自然键增量更新（只涉及多用途记录）
+    - 每次 get_index() 比较表的版本指纹，发现未经通知的写入时整体重建
+    """
+
+    index_name = "近似标题索引"
+
+    def __init__(self, lw_data_provider: Optional[LWBaseDataProvider] = None):
+        super().__init__(lw_data_provider)
+        self._stats = Counter()
+
+    def get_index(self) -> TitleSimilarityIndex:
+        """获取当前索引（必要时重建）"""
+        return self.get()
+
+    def suggest(
+        self,
+        items: Iterable[Tuple[str, str]],
+        allowed: Optional[Set[Tuple[str, Optional[str]]]] = None,
+        threshold: Optional[float] = None
+    ) -> List[Optional[Label]]:
+        """
+        为多用途 (app, title) 批量给出分类建议
+
+        Args:
+            items: [(app, title), ...]
+            allowed: 可选的 (category_id, sub_category_id) 集合（通常为当前启用的分类）
+            threshold: 相似度下限，None 时读取配置 title_similarity_threshold
+
+        Returns:
+            List[Optional[Label]]: 与 items 对齐的 (category_id, sub_category_id, link_to_goal_id)，无足够相似的标题时为 None
+        """
+        threshold = settings.title_similarity_threshold if threshold is None else threshold
+        results = []
+        with self._lock:
+            index = self.get_index()
+            for app, title in items:
+                match = index.query(app, title, threshold, allowed) if title else None
+                results.append(match[0] if match else None)
+                if match:
+                    logger.debug(f"近似标题命中: {app} '{title[:30]}' ≈ '{match[2][:30]}' ({match[1]:.2f})")
+            self._stats['queried'] += len(results)
+            self._stats['matched'] += sum(1 for label in results if label is not None)
+        return results
+
+    def record_shadow(self, compared: int, agreed: int) -> None:
+        """记录 shadow 模式下与 LLM 分类对比的条目数与一致数"""
+        with self._lock:
+            self._stats['shadow_compared'] += compared
+            self._stats['shadow_agreed'] += agreed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = self._index.get_stats() if self._index is not None else {"titles": 0, "buckets": 0}
+            stats.update(
+                queried=self._stats['queried'],
+                matched=self._stats['matched'],
+                shadow_compared=self._stats['shadow_compared'],
+                shadow_agreed=self._stats['shadow_agreed'],
+            )
+            return stats
+
+    def _build(self) -> TitleSimilarityIndex:
+        index = TitleSimilarityIndex()
+        self._add_records(index, self.lw_data_provider.load_category_map_cache_V2(is_multipurpose_app=True))
+        return index
+
+    def _apply_changes(
+        self,
+        index: TitleSimilarityIndex,
+        single_apps: List[str],
+        multi_pairs: List[Tuple[str, str]]
+    ) -> TitleSimilarityIndex:
+        # 查询在 _lock 内进行，原地更新即可
+        if not multi_pairs:
+            return index
+        for app, title in multi_pairs:
+            index.remove(app, title)
+        self._add_records(index, self.lw_data_provider.load_map_cache_rows_by_keys([], multi_pairs))
+        logger.debug(f"近似标题索引增量更新: 多用途 {len(multi_pairs)} 个, 共 {len(index)} 条标题")
+        return index
+
+    @staticmethod
+    def _add_records(index: TitleSimilarityIndex, records_df: Optional[pd.DataFrame]) -> None:
+        if records_df is None or records_df.empty:
+            return
+        valid = records_df[
+            (records_df['is_multipurpose_app'] == 1) & (records_df['state'] == 1)
+            & records_df['category_id'].notna() & records_df['title'].notna()
+        ]
+        for record in valid.to_dict('records'):
+            index.add(record['app'], record['title'], (
+                record['category_id'],
+                None if pd.isna(record.get('sub_category_id')) else record['sub_category_id'],
+                None if pd.isna(record.get('link_to_goal_id')) else record['link_to_goal_id'],
+            ))
+
+
+# 懒加载单例（首次访问时才初始化）
+title_similarity_index_manager = LazySingleton(TitleSimilarityIndexManager)
@@ -7,9 +7,10 @@
 """
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Callable, Optional
 import pytz
-from lifeprism.storage import LWBaseDataProvider
+from concurrent.futures import ProcessPoolExecutor
+from lifeprism.storage import LWBaseDataProvider, AWBaseDataProvider
 from lifeprism.processors import processor_aw_data_provider
 from lifeprism.utils import is_multipurpose_app
 from lifeprism.config import LOCAL_TIMEZONE
@@ -25,7 +26,7 @@ from lifeprism.processors.components import (
     CacheMatcher,
     ClassifyCollector,
 )
-from lifeprism.processors.models import ProcessedEvent
+from lifeprism.processors.models import ProcessedEvent, EventBatch
 
 logger = get_logger(__name__)
 
@@ -333,20 +334,21 @@ def clean_activitywatch_data_old(
 # 重构版本 - 组件化架构
 # ============================================================================
 
-def _events_to_dataframe(events: List[ProcessedEvent]) -> pd.DataFrame:
+def _events_to_dataframe(events: EventBatch | List[ProcessedEvent]) -> pd.DataFrame:
     """
-    将 ProcessedEvent 列表转换为 DataFrame
+    将事件批次转换为 DataFrame
     
     Args:
-        events: ProcessedEvent 列表
+        events: EventBatch（按列直接构建）或 ProcessedEvent 列表（兼容旧调用）
         
     Returns:
         包含事件数据的 DataFrame
     """
-    if not events: 
+    if not len(events):
         return pd.DataFrame(columns=get_table_columns('user_app_behavior_log'))
-    print(events[0].to_dict().keys())
-    return pd.DataFrame([event.to_dict() for event in events])
+    if not isinstance(events, EventBatch):
+        events = EventBatch.from_events(events)
+    return events.to_dataframe()
 
 
 def _process_events_batch(
@@ -355,7 +357,7 @@ def _process_events_batch(
     transformer: 'EventTransformer',
     matcher: 'CacheMatcher',
     collector: 'ClassifyCollector'
-) -> Tuple[List[ProcessedEvent], int]:
+) -> Tuple[EventBatch, int]:
     """
     处理一批原始事件数据
     
@@ -372,21 +374,86 @@ def _process_events_batch(
         collector: ClassifyCollector 实例
     
     Returns:
-        Tuple[List[ProcessedEvent], int]:
-            - events: 处理后的事件列表
+        Tuple[EventBatch, int]:
+            - events: 处理后的列式事件批次
             - removed_count: 被过滤的事件数量
     """
     # 1. 转换事件
-    events, removed_count = transformer.transform_batch(raw_events)
+    events, removed_count = transformer.transform_to_batch(raw_events)
     
     # 2. 匹配缓存 & 收集待分类项
-    for event in events:
-        matcher.match(event)  # 匹配后的数据标记 cache_matched = True
-        collector.collect(event)
+    matcher.match_batch(events)  # 匹配后的数据标记 cache_matched = 1
+    collector.collect_batch(events)
     
     return events, removed_count
 
 
+# ==================== 多进程分批清洗 ====================
+
+# 子进程内的组件（由 _init_clean_worker 初始化，进程内复用）
+_worker_transformer: Optional[EventTransformer] = None
+_worker_matcher: Optional[CacheMatcher] = None
+
+
+def _init_clean_worker(cache_snapshot: CategoryCache, min_duration: int, timezone: str) -> None:
+    """子进程初始化：接收只读缓存快照，创建转换器和匹配器"""
+    global _worker_transformer, _worker_matcher
+    _worker_transformer = EventTransformer(min_duration=min_duration, timezone=timezone)
+    _worker_matcher = CacheMatcher(cache_snapshot)
+
+
+def _clean_batch_in_worker(raw_events: List[Dict]) -> Tuple[EventBatch, int, dict]:
+    """
+    子进程中转换并匹配一批事件
+    
+    Returns:
+        (匹配后的列式批次, 被过滤数量, 本批匹配统计)
+    """
+    _worker_matcher.reset_stats()
+    events, removed_count = _worker_transformer.transform_to_batch(raw_events)
+    _worker_matcher.match_batch(events)
+    return events, removed_count, _worker_matcher.get_stats()
+
+
+def _clean_batches_in_pool(
+    raw_events: List[Dict],
+    batch_size: int,
+    workers: int,
+    cache: CategoryCache,
+    transformer: EventTransformer,
+    matcher: CacheMatcher,
+    collector: ClassifyCollector,
+    report: Callable[[str, float, str], None]
+) -> Tuple[EventBatch, int]:
+    """
+    使用进程池并行转换和匹配各批次，父进程按批次顺序合并
+    
+    子进程只读取缓存快照，待分类项收集仍在父进程按原顺序进行，
+    因此结果与单进程逐批处理完全一致
+    """
+    num_batches = (len(raw_events) + batch_size - 1) // batch_size
+    chunks = (raw_events[i:i + batch_size] for i in range(0, len(raw_events), batch_size))
+    all_events = EventBatch()
+    total_removed = 0
+    
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_clean_worker,
+        initargs=(cache.snapshot(), transformer.min_duration, transformer.timezone)
+    ) as executor:
+        # map 按提交顺序返回结果，保证合并顺序确定
+        for batch_idx, (events, removed_count, match_stats) in enumerate(
+            executor.map(_clean_batch_in_worker, chunks)
+        ):
+            matcher.merge_stats(match_stats)
+            collector.collect_batch(events)
+            all_events.extend(events)
+            total_removed += removed_count
+            logger.debug(f"  批次 {batch_idx + 1}/{num_batches} (进程池): 有效 {len(events)}, 过滤 {removed_count}")
+            report('clean', (batch_idx + 1) / num_batches, f"批次 {batch_idx + 1}/{num_batches}")
+    
+    return all_events, total_removed
+
 
 # 默认批次大小：50,000 条事件
 DEFAULT_BATCH_SIZE = 50000
@@ -395,8 +462,12 @@ DEFAULT_BATCH_SIZE = 50000
 def clean_activitywatch_data(
     start_time: datetime, 
     end_time: datetime, 
-    category_map_cache_df: pd.DataFrame,
-    batch_size: int = DEFAULT_BATCH_SIZE
+    category_map_cache_df: Optional[pd.DataFrame] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress_callback: Optional[Callable[[str, float, str], None]] = None,
+    category_cache: Optional[CategoryCache] = None,
+    workers: Optional[int] = None,
+    aw_data_provider: Optional[AWBaseDataProvider] = None
 ) -> Tuple[pd.DataFrame, classifyState]:
     """
     完整的数据清洗流程（重构版本 - 组件化架构 + 分批处理）
@@ -414,6 +485,13 @@ def clean_activitywatch_data(
         end_time: 结束时间 (datetime 对象)
         category_map_cache_df: 分类缓存 DataFrame
         batch_size: 每批处理的事件数量，默认 50,000
+        progress_callback: 进度回调 (stage, progress, message)，stage 为 'fetch' 或 'clean'，
+            回调抛出的异常（如取消同步）会中断清洗流程
+        category_cache: 已构建的 CategoryCache（如进程级缓存），提供时忽略 category_map_cache_df
+        workers: 进程池大小，> 1 且事件多于一批时并行转换和匹配各批次；
+            None 时读取配置 clean_workers（默认 0，即单进程）
+        aw_data_provider: ActivityWatch 数据源，None 时使用全局 processor_aw_data_provider
+            （基准测试等场景可指向其他 AW 数据库文件）
     
     Returns:
         Tuple[pd.DataFrame, classifyState]:
@@ -422,16 +500,22 @@ def clean_activitywatch_data(
     """
     logger.info(f"🧹 开始数据清洗流程 (v2)...")
     
+    def report(stage: str, progress: float, message: str = "") -> None:
+        if progress_callback:
+            progress_callback(stage, progress, message)
+    
     # 1. 获取原始数据
-    raw_events = processor_aw_data_provider.get_window_events(
+    report('fetch', 0.0, "读取 ActivityWatch 数据")
+    raw_events = (aw_data_provider or processor_aw_data_provider).get_window_events(
         start_time=start_time,
         end_time=end_time
     )
     total_events = len(raw_events)
     logger.info(f"📥 原始数据: {total_events} 个事件")
+    report('fetch', 1.0, f"获取 {total_events} 个事件")
     
     # 2. 初始化组件（全局共享，跨批次累积状态）
-    cache = CategoryCache(category_map_cache_df)
+    cache = category_cache if category_cache is not None else CategoryCache(category_map_cache_df)
     transformer = EventTransformer()
     matcher = CacheMatcher(cache)
     collector = ClassifyCollector(cache)
@@ -439,7 +523,9 @@ def clean_activitywatch_data(
     logger.debug(f"📦 缓存统计: {cache.get_stats()}")
     
     # 3. 分批处理
-    all_events: List[ProcessedEvent] = []
+    if workers is None:
+        workers = settings.clean_workers or 0
+    all_events = EventBatch()
     total_removed = 0
     
     if total_events <= batch_size:
@@ -450,6 +536,14 @@ def clean_activitywatch_data(
         all_events = events
         total_removed = removed_count
         logger.debug(f"🔄 事件转换完成: 有效 {len(events)}, 过滤 {removed_count}")
+        report('clean', 1.0, f"有效 {len(events)} 条")
+    elif workers > 1:
+        # 数据量较大且启用了进程池，并行处理各批次
+        num_batches = (total_events + batch_size - 1) // batch_size
+        logger.info(f"📦 数据量较大，分 {num_batches} 批处理 (每批 {batch_size} 条, {workers} 个进程)")
+        all_events, total_removed = _clean_batches_in_pool(
+            raw_events, batch_size, workers, cache, transformer, matcher, collector, report
+        )
     else:
         # 数据量较大，分批处理
         num_batches = (total_events + batch_size - 1) // batch_size
@@ -470,6 +564,7 @@ def clean_activitywatch_data(
                 f"  批次 {batch_idx + 1}/{num_batches}: "
                 f"处理 {len(batch_events)} 条, 有效 {len(events)}, 过滤 {removed_count}"
             )
+            report('clean', (batch_idx + 1) / num_batches, f"批次 {batch_idx + 1}/{num_batches}")
     
     # 4. 构建输出
     filtered_events_df = _events_to_dataframe(all_events)
@@ -480,7 +575,10 @@ def clean_activitywatch_data(
     collect_stats = collector.get_stats()
     
     logger.info(f"📊 过滤统计: 总事件 {total_events} -> 保留 {len(all_events)} -> 删除 {total_removed}")
-    logger.info(f"📊 缓存匹配: 命中 {match_stats['matched']}, 未命中 {match_stats['missed']}")
+    logger.info(
+        f"📊 缓存匹配: 命中 {match_stats['matched']} (归一化 {match_stats['normalized_matched']}), "
+        f"未命中 {match_stats['missed']}, 命中率 {match_stats['exact_hit_rate']:.1%} -> {match_stats['hit_rate']:.1%}"
+    )
     logger.info(f"📊 待分类统计: 总项目 {collect_stats['total']} -> 单用途 {collect_stats['single']} -> 多用途 {collect_stats['multi']}")
     logger.info(f"📊 应用注册表: {collect_stats['apps']} 个应用")
     
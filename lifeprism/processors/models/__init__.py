@@ -1,4 +1,5 @@
 # Models package for data processing
 from lifeprism.processors.models.processed_event import ProcessedEvent
+from lifeprism.processors.models.event_batch import EventBatch
 
-__all__ = ['ProcessedEvent']
+__all__ = ['ProcessedEvent', 'EventBatch']
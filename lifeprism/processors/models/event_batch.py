@@ -0,0 +1,161 @@
+"""
+列式事件批次
+以 struct-of-arrays 方式存储清洗过程中的事件，替代 List[ProcessedEvent] + to_dict() 的逐行结构
+
+- 数值列使用 array 紧凑存储（duration / is_multipurpose / cache_matched）
+- app / title 使用 sys.intern 驻留，大量重复的应用名和标题只保存一份字符串
+- 分类结果列按行位置填充，最终一次性构建 DataFrame 或写库参数
+"""
+import sys
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from lifeprism.processors.models.processed_event import ProcessedEvent
+
+
+class EventBatch:
+    """
+    列式事件批次
+
+    行号即事件下标，各列长度始终一致；
+    分类结果列（category_id / sub_category_id / link_to_goal_id）默认为 None
+    """
+
+    __slots__ = (
+        'ids', 'start_times', 'end_times', 'durations',
+        'apps', 'titles', 'is_multipurpose',
+        'category_ids', 'sub_category_ids', 'link_to_goal_ids',
+        'cache_matched',
+    )
+
+    # DataFrame / 数据库列顺序（与 ProcessedEvent.to_dict 保持一致）
+    COLUMNS = (
+        'id', 'start_time', 'end_time', 'duration', 'app', 'title',
+        'is_multipurpose_app', 'category_id', 'sub_category_id', 'link_to_goal_id',
+    )
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.start_times: List[str] = []
+        self.end_times: List[str] = []
+        self.durations = array('q')
+        self.apps: List[str] = []
+        self.titles: List[str] = []
+        self.is_multipurpose = array('b')
+        self.category_ids: List[Optional[str]] = []
+        self.sub_category_ids: List[Optional[str]] = []
+        self.link_to_goal_ids: List[Optional[str]] = []
+        self.cache_matched = array('b')
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(
+        self,
+        id: str,
+        start_time: str,
+        end_time: str,
+        duration: int,
+        app: str,
+        title: str,
+        is_multipurpose: bool
+    ) -> None:
+        """追加一行未分类事件"""
+        self.ids.append(id)
+        self.start_times.append(start_time)
+        self.end_times.append(end_time)
+        self.durations.append(duration)
+        self.apps.append(sys.intern(app))
+        self.titles.append(sys.intern(title))
+        self.is_multipurpose.append(1 if is_multipurpose else 0)
+        self.category_ids.append(None)
+        self.sub_category_ids.append(None)
+        self.link_to_goal_ids.append(None)
+        self.cache_matched.append(0)
+
+    def extend(self, other: 'EventBatch') -> None:
+        """合并另一个批次（原地追加）"""
+        for name in self.__slots__:
+            getattr(self, name).extend(getattr(other, name))
+
+    def set_category(self, index: int, category: Tuple[str, str, Optional[str]], matched: bool = True) -> None:
+        """
+        填充第 index 行的分类结果
+
+        Args:
+            index: 行号
+            category: (category_id, sub_category_id, link_to_goal_id)
+            matched: 是否标记为缓存命中
+        """
+        self.category_ids[index] = category[0]
+        self.sub_category_ids[index] = category[1]
+        self.link_to_goal_ids[index] = category[2]
+        if matched:
+            self.cache_matched[index] = 1
+
+    def row(self, index: int) -> ProcessedEvent:
+        """按行号取出单个事件（仅用于调试和兼容旧接口）"""
+        return ProcessedEvent(
+            id=self.ids[index],
+            start_time=self.start_times[index],
+            end_time=self.end_times[index],
+            duration=self.durations[index],
+            app=self.apps[index],
+            title=self.titles[index],
+            is_multipurpose=bool(self.is_multipurpose[index]),
+            category_id=self.category_ids[index],
+            sub_category_id=self.sub_category_ids[index],
+            link_to_goal_id=self.link_to_goal_ids[index],
+            cache_matched=bool(self.cache_matched[index]),
+        )
+
+    def __iter__(self) -> Iterator[ProcessedEvent]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    @classmethod
+    def from_events(cls, events: List[ProcessedEvent]) -> 'EventBatch':
+        """由 ProcessedEvent 列表构建批次（兼容旧调用方）"""
+        batch = cls()
+        for event in events:
+            batch.append(
+                event.id, event.start_time, event.end_time, event.duration,
+                event.app, event.title, event.is_multipurpose
+            )
+            if event.category_id is not None or event.cache_matched:
+                batch.set_category(
+                    len(batch) - 1,
+                    (event.category_id, event.sub_category_id, event.link_to_goal_id),
+                    matched=event.cache_matched
+                )
+        return batch
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        按列构建 DataFrame，不经过逐行 dict
+
+        Returns:
+            列与 user_app_behavior_log 对齐的 DataFrame
+        """
+        return pd.DataFrame({
+            'id': self.ids,
+            'start_time': self.start_times,
+            'end_time': self.end_times,
+            'duration': pd.Series(self.durations, dtype='int64'),
+            'app': self.apps,
+            'title': self.titles,
+            'is_multipurpose_app': pd.Series(self.is_multipurpose, dtype='int8'),
+            'category_id': self.category_ids,
+            'sub_category_id': self.sub_category_ids,
+            'link_to_goal_id': self.link_to_goal_ids,
+        }, columns=list(self.COLUMNS))
+
+    def iter_records(self) -> Iterator[tuple]:
+        """按 COLUMNS 顺序逐行产出元组，用于 executemany 写库"""
+        return zip(
+            self.ids, self.start_times, self.end_times, self.durations,
+            self.apps, self.titles, self.is_multipurpose,
+            self.category_ids, self.sub_category_ids, self.link_to_goal_ids,
+        )
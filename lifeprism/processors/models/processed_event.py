@@ -2,16 +2,18 @@
 数据模型定义
 用于数据清洗过程中的中间数据结构
 """
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class ProcessedEvent:
     """
     标准化后的事件数据模型
     
     包含从 ActivityWatch 原始事件转换而来的标准化数据，
     以及可选的分类结果（来自缓存或待 LLM 分类）
+    
+    使用 __slots__ 减少单个对象内存；批量处理请使用列式的 EventBatch
     """
     # 基础字段
     id: str
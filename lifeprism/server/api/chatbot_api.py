@@ -78,14 +78,19 @@ async def delete_session(
 
 @router.get("/sessions/{session_id}/history", response_model=ChatHistoryResponse)
 async def get_chat_history(
-    session_id: str = Path(..., description="会话 ID")
+    session_id: str = Path(..., description="会话 ID"),
+    before: Optional[int] = Query(default=None, ge=1, description="游标：只返回 seq 小于该值的消息，为空时返回最新一页"),
+    limit: int = Query(default=50, ge=1, le=200, description="每页数量")
 ):
     """
-    获取会话的聊天历史
+    获取会话的聊天历史（游标分页）
+    
+    - **before**: 上一页响应中的 next_cursor，为空时返回最新的消息
+    - **limit**: 每页数量，最大200
     
-    返回指定会话的所有历史消息
+    返回按 seq 升序排列的一页消息；has_more 为 True 时可用 next_cursor 继续向前翻页
     """
-    result = await chatbot_service.get_chat_history(session_id)
+    result = await chatbot_service.get_chat_history(session_id, before=before, limit=limit)
     if not result:
         raise HTTPException(status_code=404, detail="会话不存在")
     return result
@@ -2,13 +2,35 @@
 数据同步API路由
 """
 
-from fastapi import APIRouter
-from lifeprism.server.schemas.sync import SyncRequest, SyncResponse, SyncTimeRangeRequest
-from lifeprism.server.services.sync_service import SyncService
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from lifeprism.server.schemas.sync import (
+    SyncRequest, SyncResponse, SyncTimeRangeRequest,
+    SyncJobResponse, SyncJobListResponse,
+    SyncBackfillRequest, SyncBackfillResumeRequest,
+    SyncBackfillResponse, SyncBackfillListResponse,
+    PendingClassificationListResponse, PendingClassificationDrainResponse
+)
+from lifeprism.server.services.sync_job_service import SyncJobService, TERMINAL_STATUSES
+from lifeprism.server.services.pending_classification_service import pending_classification_service
 from lifeprism.utils import LazySingleton
 
 router = APIRouter(prefix="/sync", tags=["Data Synchronization"])
-sync_service = LazySingleton(SyncService)
+sync_job_service = LazySingleton(SyncJobService)
+
+# SSE 推送轮询间隔（秒）
+SYNC_EVENTS_POLL_INTERVAL = 0.5
+
+
+async def _wait_job_result(job: dict) -> dict:
+    """等待后台任务结束并返回同步结果（兼容原同步接口）"""
+    future = sync_job_service.get_future(job["job_id"])
+    if future is not None:
+        await asyncio.wrap_future(future)
+    return sync_job_service.get_job(job["job_id"])["result"]
 
 
 @router.post("/activitywatch", response_model=SyncResponse, summary="增量同步ActivityWatch数据")
@@ -40,10 +62,8 @@ async def sync_from_activitywatch(
     - 如需同步指定时间范围，请使用 /activitywatch/timerange 接口
     """
     print("sync_request (incremental)", sync_request)
-    result = sync_service.sync_from_activitywatch(
-        auto_classify=sync_request.auto_classify
-    )
-    return result
+    job = sync_job_service.submit_incremental(auto_classify=sync_request.auto_classify)
+    return await _wait_job_result(job)
 
 
 @router.post("/activitywatch/timerange", response_model=SyncResponse, summary="按时间范围同步ActivityWatch数据")
@@ -76,9 +96,201 @@ async def sync_from_activitywatch_by_time_range(
     - 时间范围不宜过大，建议不超过7天
     """
     print("sync_time_range_request", sync_request)
-    result = sync_service.sync_by_time_range(
-        start_time=sync_request.start_time,
-        end_time=sync_request.end_time,
-        auto_classify=sync_request.auto_classify
+    try:
+        job = sync_job_service.submit_time_range(
+            start_time=sync_request.start_time,
+            end_time=sync_request.end_time,
+            auto_classify=sync_request.auto_classify
+        )
+    except ValueError as e:
+        return {
+            "status": "failed",
+            "synced_events": 0,
+            "new_apps_classified": 0,
+            "duration": 0.0,
+            "message": f"时间参数错误: {str(e)}"
+        }
+    return await _wait_job_result(job)
+
+
+# ============================================================================
+# 后台同步任务接口
+# ============================================================================
+
+@router.post("/jobs/activitywatch", response_model=SyncJobResponse, summary="提交增量同步后台任务")
+async def submit_sync_job(
+    sync_request: SyncRequest = SyncRequest()
+):
+    """
+    提交增量同步后台任务，立即返回任务 ID
+
+    - 已有增量任务在排队或运行时，请求会合并到该任务（coalesced=True）
+    - 通过 GET /sync/jobs/{job_id} 轮询进度，或订阅 /sync/jobs/{job_id}/events (SSE)
+    """
+    return sync_job_service.submit_incremental(auto_classify=sync_request.auto_classify)
+
+
+@router.post("/jobs/activitywatch/timerange", response_model=SyncJobResponse, summary="提交时间范围同步后台任务")
+async def submit_sync_job_by_time_range(
+    sync_request: SyncTimeRangeRequest
+):
+    """
+    提交时间范围同步后台任务，立即返回任务 ID
+
+    - 请求范围被活动任务完全覆盖时，合并到该任务（coalesced=True）
+    """
+    try:
+        return sync_job_service.submit_time_range(
+            start_time=sync_request.start_time,
+            end_time=sync_request.end_time,
+            auto_classify=sync_request.auto_classify
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"时间参数错误: {str(e)}")
+
+
+@router.post("/jobs/activitywatch/backfill", response_model=SyncJobResponse, summary="提交分段回填后台任务")
+async def submit_backfill_job(
+    sync_request: SyncBackfillRequest
+):
+    """
+    按固定窗口（day / week）分段回填长时间范围的历史数据，立即返回任务 ID
+
+    - 每个窗口完成后记录进度，中断（取消、失败、重启）后以相同参数重新提交即从未完成的窗口继续
+    - max_in_flight 控制同时处理的窗口数，内存占用与其成正比
+    - 通过 GET /sync/backfills/{backfill_id} 查看窗口进度
+    """
+    try:
+        return sync_job_service.submit_backfill(
+            start_time=sync_request.start_time,
+            end_time=sync_request.end_time,
+            window_size=sync_request.window_size,
+            auto_classify=sync_request.auto_classify,
+            max_in_flight=sync_request.max_in_flight
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"回填参数错误: {str(e)}")
+
+
+@router.get("/backfills", response_model=SyncBackfillListResponse, summary="获取分段回填列表")
+async def list_backfills():
+    """获取分段回填任务及窗口进度（按创建时间倒序）"""
+    backfills = sync_job_service.backfill_service.list_backfills()
+    return {"items": backfills, "total": len(backfills)}
+
+
+@router.get("/backfills/{backfill_id}", response_model=SyncBackfillResponse, summary="获取分段回填进度")
+async def get_backfill(backfill_id: str):
+    """获取分段回填任务的窗口完成情况"""
+    backfill = sync_job_service.backfill_service.get_backfill(backfill_id)
+    if backfill is None:
+        raise HTTPException(status_code=404, detail=f"回填任务 {backfill_id} 不存在")
+    return backfill
+
+
+@router.post("/backfills/{backfill_id}/resume", response_model=SyncJobResponse, summary="继续分段回填")
+async def resume_backfill(
+    backfill_id: str,
+    resume_request: SyncBackfillResumeRequest = SyncBackfillResumeRequest()
+):
+    """从未完成的窗口继续回填（提交为后台任务）"""
+    try:
+        return sync_job_service.resume_backfill(backfill_id, max_in_flight=resume_request.max_in_flight)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+# ============================================================================
+# 待分类队列接口
+# ============================================================================
+
+@router.get("/pending", response_model=PendingClassificationListResponse, summary="获取待分类队列")
+async def list_pending_classifications(limit: int = 50, offset: int = 0):
+    """获取待分类队列统计，以及按累计时长降序的条目"""
+    stats = pending_classification_service.get_stats()
+    items = pending_classification_service.list_pending(limit=limit, offset=offset)
+    return {**stats, "items": items}
+
+
+@router.post("/pending/drain", response_model=PendingClassificationDrainResponse, summary="后台消费待分类队列")
+async def drain_pending_classifications():
+    """
+    在后台分类待分类队列中的条目，完成后回填已保存的行为日志
+
+    - 已有消费在进行时不重复提交（scheduled=False）
+    """
+    scheduled = pending_classification_service.request_drain()
+    return {"scheduled": scheduled, "pending": pending_classification_service.get_stats()["pending"]}
+
+
+@router.post("/pending/retry", response_model=PendingClassificationDrainResponse, summary="重试达到上限的待分类项")
+async def retry_pending_classifications():
+    """清零已达重试上限条目的尝试次数，并在后台重新消费队列"""
+    reset = pending_classification_service.retry_exhausted()
+    scheduled = pending_classification_service.request_drain()
+    return {"scheduled": scheduled, "reset": reset, "pending": pending_classification_service.get_stats()["pending"]}
+
+
+@router.get("/jobs", response_model=SyncJobListResponse, summary="获取同步任务列表")
+async def list_sync_jobs():
+    """获取最近的同步任务（按创建时间倒序）"""
+    jobs = sync_job_service.list_jobs()
+    return {"items": jobs, "total": len(jobs)}
+
+
+@router.get("/jobs/{job_id}", response_model=SyncJobResponse, summary="获取同步任务进度")
+async def get_sync_job(job_id: str):
+    """获取同步任务状态及各阶段进度（fetch / clean / classify / save）"""
+    job = sync_job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"同步任务 {job_id} 不存在")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=SyncJobResponse, summary="取消同步任务")
+async def cancel_sync_job(job_id: str):
+    """
+    取消同步任务
+
+    **注意**: 取消为协作式，运行中的任务会在当前阶段/批次结束后停止，
+    正在进行中的 LLM 调用不会被中断
+    """
+    job = sync_job_service.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"同步任务 {job_id} 不存在")
+    return job
+
+
+@router.get("/jobs/{job_id}/events", summary="订阅同步任务进度 (SSE)")
+async def stream_sync_job_events(job_id: str):
+    """
+    以 Server-Sent Events 推送同步任务进度
+
+    每次任务状态变化推送一条 `data: {job}`，任务结束后推送 `data: [DONE]` 并关闭连接
+    """
+    if sync_job_service.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"同步任务 {job_id} 不存在")
+
+    async def event_generator():
+        last_version = -1
+        while True:
+            job = sync_job_service.get_job(job_id)
+            if job is None:
+                break
+            if job["version"] != last_version:
+                last_version = job["version"]
+                yield f"data: {json.dumps(job, ensure_ascii=False)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(SYNC_EVENTS_POLL_INTERVAL)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
     )
-    return result
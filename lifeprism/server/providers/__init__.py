@@ -12,6 +12,8 @@ from .goal_provider import GoalProvider
 from .timeline_provider import TimelineProvider
 from .reward_provider import RewardProvider
 from .goal_stats_provider import GoalStatsProvider
+from .backfill_provider import BackfillProvider
+from .pending_classification_provider import PendingClassificationProvider
 
 # 创建懒加载单例
 server_lw_data_provider = LazySingleton(ServerLWDataProvider)
@@ -20,6 +22,8 @@ goal_provider = LazySingleton(GoalProvider)
 timeline_provider = LazySingleton(TimelineProvider)
 reward_provider = LazySingleton(RewardProvider)
 goal_stats_provider = LazySingleton(GoalStatsProvider)
+backfill_provider = LazySingleton(BackfillProvider)
+pending_classification_provider = LazySingleton(PendingClassificationProvider)
 
 # 对外导出
 __all__ = [
@@ -29,4 +33,6 @@ __all__ = [
     "timeline_provider",
     "reward_provider",
     "goal_stats_provider",
+    "backfill_provider",
+    "pending_classification_provider",
 ]
@@ -0,0 +1,187 @@
+"""
+Backfill 数据提供者
+提供分段回填任务及其窗口进度的数据库操作
+"""
+import uuid
+from typing import Optional, List, Dict, Any, Tuple
+
+from lifeprism.storage import LWBaseDataProvider
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class BackfillProvider(LWBaseDataProvider):
+    """
+    回填进度数据提供者
+
+    继承 LWBaseDataProvider，读写 sync_backfill / sync_backfill_window 表
+    """
+
+    def __init__(self, db_manager=None):
+        super().__init__(db_manager)
+
+    # ==================== 回填任务 ====================
+
+    def find_unfinished_backfill(
+        self,
+        start_time: str,
+        end_time: str,
+        window_size: str,
+        auto_classify: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        查找相同参数（含 auto_classify）且尚未完成的回填任务（用于断点续传）
+
+        Returns:
+            Optional[Dict]: 最近创建的未完成任务，不存在返回 None
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM sync_backfill
+                WHERE start_time = ? AND end_time = ? AND window_size = ? AND auto_classify = ?
+                AND status != 'completed'
+                ORDER BY created_at DESC
+                LIMIT 1
+            """, (start_time, end_time, window_size, int(auto_classify)))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [description[0] for description in cursor.description]
+            return dict(zip(columns, row))
+
+    def create_backfill(
+        self,
+        start_time: str,
+        end_time: str,
+        window_size: str,
+        auto_classify: bool,
+        windows: List[Tuple[str, str]]
+    ) -> str:
+        """
+        创建回填任务并写入全部窗口（同一事务）
+
+        Args:
+            windows: [(window_start, window_end), ...]
+
+        Returns:
+            str: 回填任务 ID
+        """
+        backfill_id = f"bf-{uuid.uuid4().hex[:8]}"
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO sync_backfill (id, start_time, end_time, window_size, auto_classify, status)
+                VALUES (?, ?, ?, ?, ?, 'pending')
+            """, (backfill_id, start_time, end_time, window_size, int(auto_classify)))
+            cursor.executemany("""
+                INSERT OR IGNORE INTO sync_backfill_window (backfill_id, window_start, window_end)
+                VALUES (?, ?, ?)
+            """, [(backfill_id, window_start, window_end) for window_start, window_end in windows])
+        logger.info(f"创建回填任务 {backfill_id}: {start_time} ~ {end_time}, {len(windows)} 个窗口")
+        return backfill_id
+
+    def get_backfill(self, backfill_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取回填任务及窗口统计
+
+        Returns:
+            Optional[Dict]: 任务数据（含 total_windows / completed_windows / failed_windows /
+                saved_events / classified_apps），不存在返回 None
+        """
+        backfills = self._query_backfills("WHERE b.id = ?", (backfill_id,))
+        return backfills[0] if backfills else None
+
+    def list_backfills(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """按创建时间倒序列出回填任务（含窗口统计）"""
+        return self._query_backfills("", (), limit=limit)
+
+    def _query_backfills(self, where_clause: str, params: tuple, limit: int = 50) -> List[Dict[str, Any]]:
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT b.*,
+                       COUNT(w.id) AS total_windows,
+                       COALESCE(SUM(w.status = 'completed'), 0) AS completed_windows,
+                       COALESCE(SUM(w.status = 'failed'), 0) AS failed_windows,
+                       COALESCE(SUM(w.saved_events), 0) AS saved_events,
+                       COALESCE(SUM(w.classified_apps), 0) AS classified_apps
+                FROM sync_backfill b
+                LEFT JOIN sync_backfill_window w ON w.backfill_id = b.id
+                {where_clause}
+                GROUP BY b.id
+                ORDER BY b.created_at DESC
+                LIMIT ?
+            """, (*params, limit))
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def set_backfill_status(self, backfill_id: str, status: str) -> None:
+        """更新回填任务状态"""
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                UPDATE sync_backfill SET status = ?, updated_at = datetime('now', 'localtime')
+                WHERE id = ?
+            """, (status, backfill_id))
+
+    # ==================== 窗口进度 ====================
+
+    def get_unfinished_windows(self, backfill_id: str) -> List[Dict[str, Any]]:
+        """
+        获取未完成的窗口（pending / running / failed），按时间顺序
+
+        running 状态的窗口说明上次进程在处理中退出，需要重新处理；
+        行为日志写入为 INSERT OR IGNORE，重复处理同一窗口不会产生重复数据
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT window_start, window_end, status FROM sync_backfill_window
+                WHERE backfill_id = ? AND status != 'completed'
+                ORDER BY window_start ASC
+            """, (backfill_id,))
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def update_window(
+        self,
+        backfill_id: str,
+        window_start: str,
+        status: str,
+        saved_events: int = 0,
+        classified_apps: int = 0,
+        error: Optional[str] = None
+    ) -> None:
+        """记录窗口处理状态"""
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                UPDATE sync_backfill_window
+                SET status = ?, saved_events = ?, classified_apps = ?, error = ?,
+                    updated_at = datetime('now', 'localtime')
+                WHERE backfill_id = ? AND window_start = ?
+            """, (status, saved_events, classified_apps, error, backfill_id, window_start))
+
+    # ==================== 待分类项 ====================
+
+    def get_unclassified_keys(self, start_time: str, end_time: str) -> List[Tuple[str, str, int]]:
+        """
+        时间范围内未分类行为日志的待分类自然键（与 enqueue_pending_classifications 的键一致）
+
+        Args:
+            start_time: 开始时间（含）
+            end_time: 结束时间（不含）
+
+        Returns:
+            List[Tuple[str, str, int]]: [(app, title, is_multipurpose_app)]，单用途应用的 title 为空字符串
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT DISTINCT app,
+                    CASE WHEN is_multipurpose_app = 1 THEN COALESCE(title, '') ELSE '' END,
+                    CASE WHEN is_multipurpose_app = 1 THEN 1 ELSE 0 END
+                FROM user_app_behavior_log
+                WHERE start_time >= ? AND start_time < ? AND category_id IS NULL
+                AND (is_multipurpose_app != 1 OR COALESCE(title, '') != '')
+            """, (start_time, end_time))
+            return [(app, title, int(flag)) for app, title, flag in cursor.fetchall()]
@@ -7,13 +7,15 @@ Chat Session Provider - 聊天会话元数据数据库操作
 """
 Chat Session Provider - 聊天会话元数据数据库操作
 负责会话元数据的持久化存储（存储在 lifewatch_ai.db）
-注意：聊天消息内容由 LangGraph 的 AsyncSqliteSaver 管理，
+注意：对话状态（checkpoint）由 LangGraph 的 AsyncSqliteSaver 管理，
 存储在独立的 chat_history.db 中。两个数据库通过 session_id（即 thread_id）关联。
+展示用的聊天消息另存一份到 chat_message 表（只追加，每轮对话结束时写入），
+读取会话历史时按 seq 游标分页，不再反序列化 checkpoint。
 架构决策原因：
 1. LangGraph 管理的 checkpoint 表结构可能随版本变化
 2. 应用层元数据（name, message_count）与其他业务数据一起管理更合理
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
 from lifeprism.storage import LWBaseDataProvider
@@ -28,6 +30,7 @@ class ChatSessionProvider(LWBaseDataProvider):
     def __init__(self, db_manager=None):
         super().__init__(db_manager)
         self._table_name = 'chat_session'
+        self._message_table_name = 'chat_message'
     
     def get_all_sessions(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """
@@ -224,6 +227,10 @@ class ChatSessionProvider(LWBaseDataProvider):
                     (session_id,)
                 )
                 success = cursor.rowcount > 0
+                cursor.execute(
+                    f"DELETE FROM {self._message_table_name} WHERE session_id = ?",
+                    (session_id,)
+                )
                 if success:
                     logger.info(f"删除会话 {session_id} 成功")
                 return success
@@ -254,6 +261,106 @@ class ChatSessionProvider(LWBaseDataProvider):
         except Exception as e:
             logger.error(f"检查会话存在失败: {e}")
             return False
+    
+    # ========== 聊天消息 ==========
+    
+    def append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> List[int]:
+        """
+        追加会话消息（seq 接着会话已有的最大序号递增）
+        
+        Args:
+            session_id: 会话 ID
+            messages: 消息列表，每条包含 role, content, timestamp，
+                可选 input_tokens, output_tokens, total_tokens
+            
+        Returns:
+            List[int]: 写入消息的 seq
+        """
+        if not messages:
+            return []
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT COALESCE(MAX(seq), 0) FROM {self._message_table_name} WHERE session_id = ?",
+                (session_id,)
+            )
+            last_seq = cursor.fetchone()[0]
+            rows = [
+                (
+                    session_id,
+                    last_seq + offset,
+                    message['role'],
+                    message['content'],
+                    message['timestamp'],
+                    message.get('input_tokens', 0),
+                    message.get('output_tokens', 0),
+                    message.get('total_tokens', 0),
+                )
+                for offset, message in enumerate(messages, start=1)
+            ]
+            cursor.executemany(
+                f"""
+                INSERT INTO {self._message_table_name}
+                (session_id, seq, role, content, timestamp, input_tokens, output_tokens, total_tokens)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+        return [row[1] for row in rows]
+    
+    def get_messages(
+        self,
+        session_id: str,
+        before_seq: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        按 seq 游标分页读取会话消息（从最新往前翻页，使用 (session_id, seq) 唯一索引，与会话长度无关）
+        
+        Args:
+            session_id: 会话 ID
+            before_seq: 只返回 seq 小于该值的消息，None 时从最新的消息开始
+            limit: 每页数量
+            
+        Returns:
+            Tuple[List[Dict], bool]: (按 seq 升序的消息列表, 是否还有更早的消息)
+        """
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""
+                    SELECT seq, role, content, timestamp, input_tokens, output_tokens, total_tokens
+                    FROM {self._message_table_name}
+                    WHERE session_id = ? AND seq < ?
+                    ORDER BY seq DESC
+                    LIMIT ?
+                    """,
+                    (session_id, before_seq if before_seq is not None else 2 ** 62, limit + 1)
+                )
+                columns = [description[0] for description in cursor.description]
+                rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            return [dict(zip(columns, row)) for row in reversed(rows[:limit])], has_more
+            
+        except Exception as e:
+            logger.error(f"读取会话 {session_id} 的消息失败: {e}")
+            return [], False
+    
+    def has_messages(self, session_id: str) -> bool:
+        """会话在 chat_message 表中是否已有消息"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT 1 FROM {self._message_table_name} WHERE session_id = ? LIMIT 1",
+                    (session_id,)
+                )
+                return cursor.fetchone() is not None
+                
+        except Exception as e:
+            logger.error(f"检查会话 {session_id} 的消息失败: {e}")
+            return False
 
 
 # 创建全局单例
@@ -0,0 +1,175 @@
+"""
+待分类队列数据提供者
+持久化未命中分类缓存的 (app, title, 是否多用途)，按自然键去重并累计时长，
+供分类器按优先级分批消费
+"""
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+from lifeprism.storage import LWBaseDataProvider
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+# 队列自然键: (app, title, is_multipurpose_app)，单用途应用 title 为空字符串
+PendingKey = Tuple[str, str, int]
+
+# 按键查询时每条 SQL 携带的键数量（每个键 3 个参数，低于 SQLite 参数上限）
+KEY_CHUNK_SIZE = 300
+
+
+class PendingClassificationProvider(LWBaseDataProvider):
+    """
+    待分类队列数据提供者
+
+    继承 LWBaseDataProvider，读写 pending_classification 表：
+    - enqueue(): 按自然键 upsert，累计时长、扩展首次/最近出现时间
+    - fetch_pending(): 尝试次数少、累计时长高的优先，取出未达到重试上限的条目
+    - record_failure() / resolve(): 记录失败次数 / 分类完成后出队
+    """
+
+    def __init__(self, db_manager=None):
+        super().__init__(db_manager)
+
+    def enqueue(self, records: List[Dict[str, Any]]) -> int:
+        """
+        批量入队（已存在的键累计时长，不重置尝试次数）
+
+        Args:
+            records: [{app, title, is_multipurpose_app, sample_title,
+                       first_seen, last_seen, total_duration}, ...]
+
+        Returns:
+            int: 处理的记录数
+        """
+        if not records:
+            return 0
+        values = [
+            (
+                r['app'], r['title'], int(r['is_multipurpose_app']), r.get('sample_title'),
+                r['first_seen'], r['last_seen'], int(r.get('total_duration') or 0)
+            )
+            for r in records
+        ]
+        with self.db.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO pending_classification
+                    (app, title, is_multipurpose_app, sample_title, first_seen, last_seen, total_duration)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (app, title, is_multipurpose_app) DO UPDATE SET
+                    total_duration = total_duration + excluded.total_duration,
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    last_seen = MAX(last_seen, excluded.last_seen),
+                    sample_title = COALESCE(sample_title, excluded.sample_title),
+                    updated_at = datetime('now', 'localtime')
+            """, values)
+        logger.debug(f"待分类队列入队 {len(values)} 条")
+        return len(values)
+
+    def fetch_pending(
+        self,
+        max_attempts: int,
+        limit: Optional[int] = None,
+        keys: Optional[Iterable[PendingKey]] = None,
+        exclude_ids: Optional[Iterable[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        取出待分类条目（尝试次数少的优先，其次按累计时长降序、首次出现时间升序）
+
+        Args:
+            max_attempts: 尝试次数达到该值的条目不再取出
+            limit: 最多返回条数，None 表示不限
+            keys: 只取指定自然键的条目，None 表示全部
+            exclude_ids: 不取出的条目 ID（已被其他调用方认领）
+
+        Returns:
+            List[Dict]: 队列行
+        """
+        order_clause = "ORDER BY attempts ASC, total_duration DESC, first_seen ASC"
+        exclude_ids = list(exclude_ids or ())
+        if keys is None:
+            exclude_clause = f"AND id NOT IN ({', '.join(['?'] * len(exclude_ids))})" if exclude_ids else ""
+            return self._query(
+                f"SELECT * FROM pending_classification WHERE attempts < ? {exclude_clause} {order_clause}"
+                + (" LIMIT ?" if limit is not None else ""),
+                (max_attempts, *exclude_ids, *([limit] if limit is not None else []))
+            )
+
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        for start in range(0, len(keys), KEY_CHUNK_SIZE):
+            chunk = keys[start:start + KEY_CHUNK_SIZE]
+            placeholders = ", ".join(["(?, ?, ?)"] * len(chunk))
+            params = [value for key in chunk for value in key]
+            rows.extend(self._query(f"""
+                SELECT * FROM pending_classification
+                WHERE attempts < ? AND (app, title, is_multipurpose_app) IN (VALUES {placeholders})
+            """, (max_attempts, *params)))
+        if exclude_ids:
+            excluded = set(exclude_ids)
+            rows = [row for row in rows if row['id'] not in excluded]
+        rows.sort(key=lambda row: (row['attempts'], -(row['total_duration'] or 0), row['first_seen']))
+        return rows[:limit] if limit is not None else rows
+
+    def list_pending(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """按累计时长降序分页列出队列（含已达重试上限的条目）"""
+        return self._query("""
+            SELECT * FROM pending_classification
+            ORDER BY total_duration DESC, first_seen ASC
+            LIMIT ? OFFSET ?
+        """, (limit, offset))
+
+    def get_stats(self, max_attempts: int) -> Dict[str, Any]:
+        """
+        队列统计
+
+        Returns:
+            Dict: pending（可分类）/ exhausted（达到重试上限）/ total_duration（可分类条目的累计时长）
+        """
+        rows = self._query("""
+            SELECT COALESCE(SUM(attempts < ?), 0) AS pending,
+                   COALESCE(SUM(attempts >= ?), 0) AS exhausted,
+                   COALESCE(SUM(CASE WHEN attempts < ? THEN total_duration ELSE 0 END), 0) AS total_duration
+            FROM pending_classification
+        """, (max_attempts, max_attempts, max_attempts))
+        return rows[0]
+
+    def record_failure(self, ids: List[int], error: str) -> None:
+        """分类失败：尝试次数 +1 并记录原因"""
+        if not ids:
+            return
+        with self.db.get_connection() as conn:
+            conn.executemany("""
+                UPDATE pending_classification
+                SET attempts = attempts + 1, last_error = ?, updated_at = datetime('now', 'localtime')
+                WHERE id = ?
+            """, [(error, pending_id) for pending_id in ids])
+
+    def resolve(self, ids: List[int]) -> int:
+        """分类完成：从队列删除"""
+        if not ids:
+            return 0
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "DELETE FROM pending_classification WHERE id = ?",
+                [(pending_id,) for pending_id in ids]
+            )
+            return cursor.rowcount
+
+    def reset_attempts(self) -> int:
+        """清零所有条目的尝试次数（用于手动重试已达上限的条目）"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE pending_classification
+                SET attempts = 0, last_error = NULL, updated_at = datetime('now', 'localtime')
+                WHERE attempts > 0
+            """)
+            return cursor.rowcount
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -142,9 +142,17 @@ class ChatMessage(BaseModel):
     role: MessageRole = Field(..., description="消息角色")
     content: str = Field(..., description="消息内容")
     timestamp: Optional[str] = Field(default=None, description="消息时间戳")
+    seq: Optional[int] = Field(default=None, description="会话内的消息序号")
+    token_usage: Optional[TokenUsageEstimate] = Field(default=None, description="本轮对话的 Token 使用情况（仅回答消息）")
 
 class ChatHistoryResponse(BaseModel):
-    """聊天历史响应"""
+    """
+    聊天历史响应（按 seq 游标分页，从最新的消息往前翻页）
+    
+    has_more 为 True 时，以 next_cursor 作为 before 参数请求更早的一页
+    """
     session_id: str = Field(..., description="会话 ID")
     session_name: str = Field(..., description="会话名称")
-    messages: Optional[List[ChatMessage]] = Field(default=[], description="消息列表")
\ No newline at end of file
+    messages: Optional[List[ChatMessage]] = Field(default=[], description="消息列表（按 seq 升序）")
+    has_more: bool = Field(default=False, description="是否还有更早的消息")
+    next_cursor: Optional[int] = Field(default=None, description="请求更早一页时传入的 before 游标")
\ No newline at end of file
@@ -30,6 +30,36 @@ class SettingItems(BaseModel):
     chat_db_path: str = Field(description="Chat DB 保存路径")
     # 数据清洗配置
     data_cleaning_threshold: int = Field(description="数据清洗时长阈值 (秒)")
+    title_normalization: bool = Field(default=True, description="缓存匹配时是否启用标题归一化兜底")
+    title_site_fallback: bool = Field(default=False, description="标题归一化兜底是否按站点/域名匹配 (需同一站点至少 3 条已分类记录且分类一致)")
+    clean_workers: int = Field(default=0, description="数据清洗进程数 (0/1 为单进程，仅对多批次的大范围同步生效)")
+    llm_max_concurrency: int = Field(default=4, description="LLM 分类批次的最大并发请求数 (1 为逐批串行)")
+    llm_requests_per_second: float = Field(default=5, description="LLM 请求速率上限 (次/秒，0 为不限速)")
+    llm_tokens_per_minute: int = Field(default=0, description="LLM 每分钟 token 上限 (0 为不限)")
+    llm_interactive_reserve: float = Field(default=0.2, description="为对话等交互请求保留的速率余量比例 (0~0.9，后台分类不占用这部分余量)")
+    llm_circuit_failure_threshold: int = Field(default=5, description="LLM 连续调用失败多少次后熔断 (0 为不熔断)")
+    llm_circuit_cooldown_seconds: float = Field(default=30, description="LLM 熔断持续时间 (秒)，期间的请求直接失败")
+    llm_cache_enabled: bool = Field(default=False, description="是否缓存 LLM 响应 (相同模型参数与提示词直接复用结果)")
+    llm_cache_ttl_hours: float = Field(default=168, description="LLM 响应缓存有效期 (小时)")
+    llm_cache_max_entries: int = Field(default=5000, description="LLM 响应缓存最大条数 (超出时淘汰最久未使用的条目)")
+    llm_cache_max_temperature: float = Field(default=0.5, description="允许缓存的最高 temperature (更高视为非确定性调用，不缓存)")
+    llm_backend: str = Field(default="tongyi", description="LLM 后端 (tongyi / fake 离线假模型 / record 录制 / replay 回放)")
+    llm_fixture_path: str = Field(default="", description="record / replay 后端的夹具文件路径 (留空使用数据目录下的 llm_fixtures.json)")
+    llm_fake_latency: float = Field(default=0.0, description="fake 后端每次调用的模拟延迟 (秒)")
+    llm_batch_token_budget: int = Field(default=6000, description="分类时每批提示词的输入 token 上限 (按估算打包条目)")
+    llm_batch_max_output_tokens: int = Field(default=1500, description="分类时每批的输出 token 上限 (限制每批条目数，避免结果被截断)")
+    local_classifier_mode: str = Field(default="off", description="本地分类器 (由分类缓存训练) 模式：off 关闭 / shadow 只与 LLM 结果对比并记录一致率 / on 高置信度条目直接采用 (不写入分类缓存)，其余交给 LLM")
+    local_classifier_min_confidence: float = Field(default=0.9, description="本地分类器结果直接采用的最低置信度 (0~1)")
+    local_classifier_min_examples: int = Field(default=50, description="启用本地分类器所需的最少已标注缓存记录数")
+    title_similarity_mode: str = Field(default="off", description="近似标题 (MinHash/LSH) 沿用已分类标题的分类：off 关闭 / shadow 只与 LLM 结果对比并记录一致率 / on 直接采用 (不写入分类缓存)")
+    title_similarity_threshold: float = Field(default=0.7, description="沿用近似标题分类的最低相似度 (标题字符 3-gram 的 Jaccard 相似度，0~1)")
+    sync_classify_token_budget: int = Field(default=30000, description="每次同步内分类的 token 预算 (按累计时长从高到低分类，超出部分留给后台；0 为不限)")
+    sync_classify_time_budget: float = Field(default=60, description="每次同步内分类的时间预算 (秒，0 为不限)")
+    sync_pipeline_enabled: bool = Field(default=False, description="是否以流水线方式同步 (按时间窗口读取、清洗、写库与分类并行重叠，分类结果回填到已保存的行为日志；清洗阶段不使用 clean_workers 进程池)")
+    sync_pipeline_window_minutes: int = Field(default=60, description="流水线同步每个读取窗口的时长 (分钟)")
+    chat_checkpoint_keep: int = Field(default=10, description="每个会话保留的最新检查点数 (每轮对话后压缩更早的检查点；0 为不压缩)")
+    chat_vacuum_interval_minutes: float = Field(default=60, description="后台压缩并 VACUUM 对话数据库的间隔 (分钟，0 为关闭)")
+    chat_history_token_window: int = Field(default=4000, description="对话提示词中历史消息的 token 上限 (超出时较早的消息合并为滚动摘要；0 为不限)")
 
 
 class SettingsResponse(BaseModel):
@@ -52,6 +82,36 @@ class UpdateSettingsRequest(BaseModel):
     lw_db_path: Optional[str] = None
     chat_db_path: Optional[str] = None
     data_cleaning_threshold: Optional[int] = None
+    title_normalization: Optional[bool] = None
+    title_site_fallback: Optional[bool] = None
+    clean_workers: Optional[int] = None
+    llm_max_concurrency: Optional[int] = None
+    llm_requests_per_second: Optional[float] = None
+    llm_tokens_per_minute: Optional[int] = None
+    llm_interactive_reserve: Optional[float] = None
+    llm_circuit_failure_threshold: Optional[int] = None
+    llm_circuit_cooldown_seconds: Optional[float] = None
+    llm_cache_enabled: Optional[bool] = None
+    llm_cache_ttl_hours: Optional[float] = None
+    llm_cache_max_entries: Optional[int] = None
+    llm_cache_max_temperature: Optional[float] = None
+    llm_backend: Optional[str] = None
+    llm_fixture_path: Optional[str] = None
+    llm_fake_latency: Optional[float] = None
+    llm_batch_token_budget: Optional[int] = None
+    llm_batch_max_output_tokens: Optional[int] = None
+    local_classifier_mode: Optional[str] = None
+    local_classifier_min_confidence: Optional[float] = None
+    local_classifier_min_examples: Optional[int] = None
+    title_similarity_mode: Optional[str] = None
+    title_similarity_threshold: Optional[float] = None
+    sync_classify_token_budget: Optional[int] = None
+    sync_classify_time_budget: Optional[float] = None
+    sync_pipeline_enabled: Optional[bool] = None
+    sync_pipeline_window_minutes: Optional[int] = None
+    chat_checkpoint_keep: Optional[int] = None
+    chat_vacuum_interval_minutes: Optional[float] = None
+    chat_history_token_window: Optional[int] = None
 
 
 class UpdateApiKeyRequest(BaseModel):
@@ -3,7 +3,7 @@
 """
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 
 class SyncRequest(BaseModel):
@@ -18,6 +18,20 @@ class SyncTimeRangeRequest(BaseModel):
     auto_classify: bool = True
 
 
+class SyncBackfillRequest(BaseModel):
+    """分段回填请求参数"""
+    start_time: str  # Format: YYYY-MM-DD HH:MM:SS
+    end_time: str    # Format: YYYY-MM-DD HH:MM:SS
+    window_size: str = "day"  # day / week
+    auto_classify: bool = True
+    max_in_flight: int = 1  # 同时处理的窗口数（1 ~ 4）
+
+
+class SyncBackfillResumeRequest(BaseModel):
+    """继续回填请求参数"""
+    max_in_flight: int = 1
+
+
 class SyncResponse(BaseModel):
     """同步响应结果"""
     status: str
@@ -25,3 +39,99 @@ class SyncResponse(BaseModel):
     new_apps_classified: int
     duration: float
     message: Optional[str] = None
+
+
+# ============================================================================
+# 后台同步任务 Schemas
+# ============================================================================
+
+class SyncJobStage(BaseModel):
+    """同步任务单个阶段的进度（fetch / clean / classify / save）"""
+    name: str
+    status: str = "pending"  # pending / running / completed / skipped
+    progress: float = 0.0    # 0.0 ~ 1.0
+    message: Optional[str] = None
+
+
+class SyncJobResponse(BaseModel):
+    """后台同步任务状态"""
+    job_id: str
+    status: str  # queued / running / succeeded / failed / cancelled
+    sync_mode: str  # incremental / time_range / backfill
+    auto_classify: bool
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    coalesced: bool = False  # 是否合并到了已有的运行中任务
+    backfill_id: Optional[str] = None
+    stages: List[SyncJobStage] = []
+    result: Optional[SyncResponse] = None
+    created_at: str
+    updated_at: str
+    version: int = 0  # 每次状态变化递增
+
+
+class SyncJobListResponse(BaseModel):
+    """同步任务列表"""
+    items: List[SyncJobResponse] = []
+    total: int = 0
+
+
+# ============================================================================
+# 分段回填 Schemas
+# ============================================================================
+
+class SyncBackfillResponse(BaseModel):
+    """分段回填任务及窗口进度"""
+    id: str
+    start_time: str
+    end_time: str
+    window_size: str
+    auto_classify: bool
+    status: str  # pending / running / completed / failed
+    total_windows: int = 0
+    completed_windows: int = 0
+    failed_windows: int = 0
+    saved_events: int = 0
+    classified_apps: int = 0
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class SyncBackfillListResponse(BaseModel):
+    """分段回填任务列表"""
+    items: List[SyncBackfillResponse] = []
+    total: int = 0
+
+
+# ============================================================================
+# 待分类队列 Schemas
+# ============================================================================
+
+class PendingClassificationItem(BaseModel):
+    """待分类队列条目"""
+    id: int
+    app: str
+    title: str = ""  # 单用途应用为空字符串
+    is_multipurpose_app: bool
+    sample_title: Optional[str] = None
+    first_seen: str
+    last_seen: str
+    total_duration: int = 0
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+class PendingClassificationListResponse(BaseModel):
+    """待分类队列统计及条目"""
+    pending: int = 0  # 可自动分类的条目数
+    exhausted: int = 0  # 达到重试上限的条目数
+    total_duration: int = 0  # 可自动分类条目的累计时长（秒）
+    draining: bool = False  # 是否有后台消费在进行
+    items: List[PendingClassificationItem] = []
+
+
+class PendingClassificationDrainResponse(BaseModel):
+    """提交待分类队列消费的结果"""
+    scheduled: bool  # False 表示已有消费在进行，本次请求合并到该消费
+    reset: int = 0  # 重置尝试次数的条目数（仅 retry 接口）
+    pending: int = 0
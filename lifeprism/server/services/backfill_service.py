@@ -0,0 +1,264 @@
+"""
+分段回填服务
+将长时间范围的历史导入拆成固定窗口（天/周）逐段处理：
+每个窗口完成后记录进度，中断后从未完成的窗口继续，同时处理的窗口数有上限；
+多个窗口并发时分类统一经由待分类队列，避免相同的待分类项被重复交给 LLM
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lifeprism.server.providers import backfill_provider
+from lifeprism.server.services.data_processing_service import DataProcessingService
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 支持的窗口粒度
+BACKFILL_WINDOW_SIZES = ("day", "week")
+
+# 同时处理的窗口数上限
+MAX_IN_FLIGHT_LIMIT = 4
+
+
+def split_windows(start_dt: datetime, end_dt: datetime, window_size: str) -> List[Tuple[datetime, datetime]]:
+    """
+    将时间范围拆分为按自然日/自然周（周一 00:00）对齐的窗口
+
+    首尾窗口按 start_dt / end_dt 截断，例如 2025-01-01 12:00 ~ 2025-01-03 08:00 按天拆分为
+    [01-01 12:00, 01-02 00:00), [01-02 00:00, 01-03 00:00), [01-03 00:00, 01-03 08:00)
+
+    Args:
+        start_dt: 开始时间
+        end_dt: 结束时间
+        window_size: 'day' 或 'week'
+
+    Returns:
+        List[Tuple[datetime, datetime]]: 按时间顺序排列的窗口
+    """
+    if window_size not in BACKFILL_WINDOW_SIZES:
+        raise ValueError(f"不支持的窗口粒度: {window_size}，可选: {', '.join(BACKFILL_WINDOW_SIZES)}")
+    if start_dt >= end_dt:
+        raise ValueError("start_time 必须早于 end_time")
+
+    boundary = start_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window_size == "week":
+        boundary -= timedelta(days=boundary.weekday())
+    step = timedelta(days=1 if window_size == "day" else 7)
+
+    windows = []
+    window_start = start_dt
+    while window_start < end_dt:
+        boundary += step
+        window_end = min(boundary, end_dt)
+        if window_end > window_start:
+            windows.append((window_start, window_end))
+            window_start = window_end
+    return windows
+
+
+class BackfillService:
+    """
+    分段回填服务
+
+    - plan(): 拆分窗口并写入进度表；相同参数（含 auto_classify）的未完成任务直接复用（断点续传）
+    - run(): 处理所有未完成窗口，最多 max_in_flight 个窗口同时处理，
+      每个窗口完成后立即记录，进程重启后再次 run() 会跳过已完成窗口
+    - 分类：单窗口时每个窗口在同步内分类；多窗口并发时窗口只写入待分类队列，
+      全部窗口结束后消费一次队列（并发窗口各自分类会把相同的待分类项重复交给 LLM）
+    """
+
+    def __init__(self, data_processor: Optional[DataProcessingService] = None):
+        self.data_processor = data_processor or DataProcessingService()
+        self.backfill_provider = backfill_provider
+
+    def plan(self, start_time: str, end_time: str, window_size: str = "day", auto_classify: bool = True) -> Dict:
+        """
+        创建或复用回填任务
+
+        Args:
+            start_time: 开始时间，格式: YYYY-MM-DD HH:MM:SS
+            end_time: 结束时间，格式: YYYY-MM-DD HH:MM:SS
+            window_size: 窗口粒度 day / week
+            auto_classify: 是否自动分类新应用
+
+        Returns:
+            Dict: 回填任务（含窗口统计）
+
+        Raises:
+            ValueError: 时间格式或窗口粒度错误
+        """
+        start_dt = datetime.strptime(start_time, TIME_FORMAT)
+        end_dt = datetime.strptime(end_time, TIME_FORMAT)
+        windows = split_windows(start_dt, end_dt, window_size)
+
+        existing = self.backfill_provider.find_unfinished_backfill(start_time, end_time, window_size, auto_classify)
+        if existing is not None:
+            logger.info(f"复用未完成的回填任务 {existing['id']}，从未完成的窗口继续")
+            return self.backfill_provider.get_backfill(existing['id'])
+
+        backfill_id = self.backfill_provider.create_backfill(
+            start_time, end_time, window_size, auto_classify,
+            [(ws.strftime(TIME_FORMAT), we.strftime(TIME_FORMAT)) for ws, we in windows]
+        )
+        return self.backfill_provider.get_backfill(backfill_id)
+
+    def get_backfill(self, backfill_id: str) -> Optional[Dict]:
+        """获取回填任务及窗口统计，不存在返回 None"""
+        return self.backfill_provider.get_backfill(backfill_id)
+
+    def list_backfills(self) -> List[Dict]:
+        """按创建时间倒序列出回填任务"""
+        return self.backfill_provider.list_backfills()
+
+    def run(
+        self,
+        backfill_id: str,
+        auto_classify: Optional[bool] = None,
+        max_in_flight: int = 1,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
+    ) -> Dict:
+        """
+        处理回填任务中所有未完成的窗口
+
+        Args:
+            backfill_id: 回填任务 ID
+            auto_classify: 是否自动分类，None 时使用创建任务时的设置
+            max_in_flight: 同时处理的窗口数（1 ~ MAX_IN_FLIGHT_LIMIT），决定内存上限；
+                大于 1 时分类在全部窗口结束后统一进行
+            progress_callback: 进度回调 (stage, progress, message)，透传给每个窗口的处理流程，
+                回调抛出的异常（如取消同步）会停止提交新窗口并向上抛出
+
+        Returns:
+            Dict: 本次运行的统计（与 process_activitywatch_data_by_time_range 的结果字段一致）
+        """
+        backfill = self.backfill_provider.get_backfill(backfill_id)
+        if backfill is None:
+            raise ValueError(f"回填任务 {backfill_id} 不存在")
+        if auto_classify is None:
+            auto_classify = bool(backfill['auto_classify'])
+        max_in_flight = min(max(int(max_in_flight), 1), MAX_IN_FLIGHT_LIMIT)
+        classify_in_window = auto_classify and max_in_flight == 1
+
+        windows = self.backfill_provider.get_unfinished_windows(backfill_id)
+        total_windows = backfill['total_windows']
+        done_count = total_windows - len(windows)
+        logger.info(
+            f"开始回填 {backfill_id}: 共 {total_windows} 个窗口，已完成 {done_count}，"
+            f"待处理 {len(windows)}，并发窗口数 {max_in_flight}"
+        )
+        self.backfill_provider.set_backfill_status(backfill_id, "running")
+
+        totals = {
+            "total_events": 0, "filtered_events": 0, "apps_to_classify": 0,
+            "classified_apps": 0, "saved_events": 0, "unclassified_events": 0,
+        }
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def window_progress(index: int) -> Callable[[str, float, str], None]:
+            def report(stage: str, progress: float, message: str = "") -> None:
+                if progress_callback:
+                    progress_callback(stage, progress, f"窗口 {index}/{total_windows}: {message}")
+            return report
+
+        def process_window(index: int, window: Dict) -> None:
+            window_start, window_end = window['window_start'], window['window_end']
+            if stop.is_set():
+                return
+            self.backfill_provider.update_window(backfill_id, window_start, "running")
+            try:
+                result = self.data_processor.process_activitywatch_data_by_time_range(
+                    start_time=datetime.strptime(window_start, TIME_FORMAT),
+                    end_time=datetime.strptime(window_end, TIME_FORMAT),
+                    auto_classify=classify_in_window,
+                    progress_callback=window_progress(index)
+                )
+            except Exception as e:
+                # 窗口保持未完成状态，下次运行重新处理
+                self.backfill_provider.update_window(backfill_id, window_start, "failed", error=str(e))
+                raise
+            self.backfill_provider.update_window(
+                backfill_id, window_start, "completed",
+                saved_events=result["saved_events"], classified_apps=result["classified_apps"]
+            )
+            with lock:
+                for key in totals:
+                    totals[key] += result.get(key, 0)
+            logger.info(f"  ✓ 回填窗口 {index}/{total_windows} 完成: {window_start} ~ {window_end}")
+
+        first_error: Optional[BaseException] = None
+        # 按时间顺序提交，同时在处理中的窗口不超过 max_in_flight
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="backfill") as executor:
+            pending = {}
+            queue = list(enumerate(windows, start=done_count + 1))
+            while queue or pending:
+                while queue and len(pending) < max_in_flight and not stop.is_set():
+                    index, window = queue.pop(0)
+                    pending[executor.submit(process_window, index, window)] = window
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    window = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        logger.error(f"回填窗口 {window['window_start']} 失败: {error}")
+                        # 第一个失败后不再提交新窗口，等待在途窗口结束
+                        stop.set()
+                        first_error = first_error or error
+
+        if first_error is None and auto_classify and not classify_in_window:
+            totals["classified_apps"] += self._classify_queued(backfill, progress_callback)
+
+        backfill = self.backfill_provider.get_backfill(backfill_id)
+        if first_error is None and backfill['completed_windows'] == backfill['total_windows']:
+            self.backfill_provider.set_backfill_status(backfill_id, "completed")
+        else:
+            self.backfill_provider.set_backfill_status(backfill_id, "failed")
+        if first_error is not None:
+            raise first_error
+
+        logger.info(
+            f"回填 {backfill_id} 完成: 本次处理 {len(windows)} 个窗口，保存 {totals['saved_events']} 条事件"
+        )
+        return {
+            **totals,
+            "sync_mode": "backfill",
+            "time_range": f"{backfill['start_time']} ~ {backfill['end_time']}",
+            "backfill_id": backfill_id,
+            "total_windows": backfill['total_windows'],
+            "completed_windows": backfill['completed_windows'],
+        }
+
+    def _classify_queued(
+        self,
+        backfill: Dict,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
+    ) -> int:
+        """
+        并发窗口全部结束后，分类本回填范围内未分类的条目（结果回填到已保存的行为日志）
+
+        与同步相同，按累计时长分轮、受本次同步的 token / 时间预算限制（classify_pending_within_budget），
+        每轮后通过 progress_callback 上报进度（回调抛出的取消会中断剩余轮次）；未分类的条目保留在队列中
+
+        Returns:
+            int: 新分类的条目数
+        """
+        keys = self.backfill_provider.get_unclassified_keys(backfill['start_time'], backfill['end_time'])
+        if progress_callback:
+            progress_callback("classify", 0.0, f"分类回填范围内的 {len(keys)} 个待分类项")
+        if not keys:
+            return 0
+        _, stats = self.data_processor.classify_pending_within_budget(keys, progress_callback=progress_callback)
+        if stats["error"] is not None:
+            logger.warning(f"回填后的分类未完成，其余条目保留在待分类队列中: {stats['error']}")
+        if stats["deferred"]:
+            logger.info(f"回填分类预算已用完，{stats['deferred']} 项留给后台分类")
+        if progress_callback:
+            progress_callback("classify", 1.0, f"新分类 {stats['classified']} 项")
+        return stats["classified"]
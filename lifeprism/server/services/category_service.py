@@ -894,6 +894,7 @@ class CategoryService:
         禁用主分类时，将 multi_purpose_map_cache 和 single_purpose_map_cache 中该分类的所有记录 state 置为 0
         """
         try:
+            affected_keys = self.server_lw_data_provider.get_map_cache_keys(category_id=category_id)
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 total_affected = 0
@@ -916,6 +917,7 @@ class CategoryService:
                 
                 conn.commit()
                 logger.info(f"禁用分类 '{category_id}' 时，置 {total_affected} 条记录为无效")
+            self.server_lw_data_provider.notify_map_cache_changed(*affected_keys)
         except Exception as e:
             logger.error(f"禁用分类记录失败: {e}")
             raise
@@ -925,6 +927,7 @@ class CategoryService:
         禁用子分类时，将 multi_purpose_map_cache 和 single_purpose_map_cache 中该子分类的所有记录 state 置为 0
         """
         try:
+            affected_keys = self.server_lw_data_provider.get_map_cache_keys(sub_category_id=sub_category_id)
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 total_affected = 0
@@ -947,6 +950,7 @@ class CategoryService:
                 
                 conn.commit()
                 logger.info(f"禁用子分类 '{sub_category_id}' 时，置 {total_affected} 条记录为无效")
+            self.server_lw_data_provider.notify_map_cache_changed(*affected_keys)
         except Exception as e:
             logger.error(f"禁用子分类记录失败: {e}")
             raise
@@ -959,6 +963,7 @@ class CategoryService:
         恢复前：删除同 (app, title) 中 created_at 更晚的记录
         """
         try:
+            affected_keys = self.server_lw_data_provider.get_map_cache_keys(category_id=category_id)
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 
@@ -1031,6 +1036,7 @@ class CategoryService:
                 
                 conn.commit()
                 logger.info(f"启用分类 '{category_id}' 时，恢复 {total_enabled} 条记录，删除 {total_deleted} 条冲突记录")
+            self.server_lw_data_provider.notify_map_cache_changed(*affected_keys)
                 
         except Exception as e:
             logger.error(f"启用分类记录失败: {e}")
@@ -1044,6 +1050,7 @@ class CategoryService:
         恢复前：删除同 (app, title) 中 created_at 更晚的记录
         """
         try:
+            affected_keys = self.server_lw_data_provider.get_map_cache_keys(sub_category_id=sub_category_id)
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 
@@ -1112,6 +1119,7 @@ class CategoryService:
                 
                 conn.commit()
                 logger.info(f"启用子分类 '{sub_category_id}' 时，恢复 {total_enabled} 条记录，删除 {total_deleted} 条冲突记录")
+            self.server_lw_data_provider.notify_map_cache_changed(*affected_keys)
                 
         except Exception as e:
             logger.error(f"启用子分类记录失败: {e}")
@@ -1253,6 +1261,9 @@ class CategoryService:
             )
             
             if result:
+                self.server_lw_data_provider.notify_map_cache_changed(
+                    *self.server_lw_data_provider.get_map_cache_keys(record_ids=[record_id])
+                )
                 logger.info(f"成功更新 category_map_cache 记录 ID={record_id} 的分类")
             else:
                 logger.warning(f"未找到 category_map_cache 记录 ID={record_id}")
@@ -1291,6 +1302,10 @@ class CategoryService:
                 record_ids=record_ids,
                 update_fields=update_fields
             )
+            if count:
+                self.server_lw_data_provider.notify_map_cache_changed(
+                    *self.server_lw_data_provider.get_map_cache_keys(record_ids=record_ids)
+                )
             
             logger.info(f"批量更新 {count} 条 category_map_cache 记录的分类")
             return count
@@ -1310,9 +1325,11 @@ class CategoryService:
             bool: 是否删除成功
         """
         try:
+            affected_keys = self.server_lw_data_provider.get_map_cache_keys(record_ids=[record_id])
             result = self.server_lw_data_provider.delete_category_map_cache_by_id(record_id)
             
             if result:
+                self.server_lw_data_provider.notify_map_cache_changed(*affected_keys)
                 logger.info(f"成功删除 category_map_cache 记录 ID={record_id}")
             else:
                 logger.warning(f"未找到 category_map_cache 记录 ID={record_id}")
@@ -1334,7 +1351,10 @@ class CategoryService:
             int: 成功删除的数量
         """
         try:
+            affected_keys = self.server_lw_data_provider.get_map_cache_keys(record_ids=record_ids)
             count = self.server_lw_data_provider.batch_delete_category_map_cache_by_ids(record_ids)
+            if count:
+                self.server_lw_data_provider.notify_map_cache_changed(*affected_keys)
             
             logger.info(f"批量删除 {count} 条 category_map_cache 记录")
             return count
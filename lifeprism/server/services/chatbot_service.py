@@ -9,6 +9,7 @@ V2: 使用 chat_bot_graph.py (当前版本，支持带状态的流式输出)
 """
 from typing import Optional, List, Dict, Any, AsyncGenerator
 from datetime import datetime
+import asyncio
 import uuid
 import warnings
 
@@ -22,8 +23,10 @@ from lifeprism.server.schemas.chatbot_schemas import (
     ChatHistoryResponse,
     MessageRole,
     ChatStreamStartResponse,
+    TokenUsageEstimate,
 )
 from lifeprism.server.providers.chat_session_provider import get_chat_session_provider
+from lifeprism.config.settings_manager import settings
 from lifeprism.utils import get_logger
 
 logger = get_logger(__name__)
@@ -364,7 +367,14 @@ class ChatbotService:
     - 功能介绍路由（Feature Intro Router）
     - 带状态的流式输出（Stream with Status）
     
-    管理 ChatBot 实例和会话
+    管理 ChatBot 实例和会话。会话ID与模型配置在每次调用时传入 ChatBot（不保存"当前会话"），
+    多个会话可以同时流式对话，共用一个编译后的图
+
+    初始化后启动后台整理任务，每隔 chat_vacuum_interval_minutes 分钟压缩检查点并 VACUUM 对话数据库
+    
+    每轮对话结束时（ChatBot.on_turn_end）把本轮的提问与回答追加到 chat_message 表，
+    会话历史从该表按游标分页读取，不再反序列化 checkpoint；chat_message 表出现之前的会话
+    在首次读取历史或下一轮对话开始时（ChatBot.on_turn_start）从 checkpoint 补写一次
     """
     
     def __init__(self):
@@ -373,9 +383,9 @@ class ChatbotService:
         self._ChatBot = ChatBot
         self._chatbot: Optional[Any] = None
         self._chatbot_context = None  # 异步上下文管理器
-        self._current_session_id: Optional[str] = None
         self._model_config = ModelConfig()
         self._session_provider = get_chat_session_provider()  # 会话元数据及tokens_usage持久化
+        self._vacuum_task: Optional[asyncio.Task] = None
         self._is_initialized = False
     
     async def initialize(self):
@@ -391,6 +401,9 @@ class ChatbotService:
             # 使用持久化存储的异步上下文管理器
             self._chatbot_context = self._ChatBot.create_with_persistence()
             self._chatbot = await self._chatbot_context.__aenter__()
+            self._chatbot.on_turn_start = self._backfill_before_turn
+            self._chatbot.on_turn_end = self._record_turn
+            self._vacuum_task = asyncio.create_task(self._vacuum_loop())
             self._is_initialized = True
             logger.info("ChatBot V2 (Graph) 初始化成功")
         except Exception as e:
@@ -399,6 +412,13 @@ class ChatbotService:
     
     async def shutdown(self):
         """关闭服务，清理资源"""
+        if self._vacuum_task:
+            self._vacuum_task.cancel()
+            try:
+                await self._vacuum_task
+            except asyncio.CancelledError:
+                pass
+            self._vacuum_task = None
         if self._chatbot_context:
             try:
                 await self._chatbot_context.__aexit__(None, None, None)
@@ -412,6 +432,18 @@ class ChatbotService:
         if not self._is_initialized:
             await self.initialize()
     
+    async def _vacuum_loop(self):
+        """后台整理对话数据库（间隔为 0 时暂停，每分钟重新读取配置）"""
+        while True:
+            interval = settings.chat_vacuum_interval_minutes
+            await asyncio.sleep(interval * 60 if interval and interval > 0 else 60)
+            if not interval or interval <= 0 or not self._chatbot:
+                continue
+            try:
+                await self._chatbot.vacuum()
+            except Exception as e:
+                logger.warning(f"整理对话数据库失败: {e}")
+    
     # ========== 会话管理 ==========
     
     def _generate_session_id(self) -> str:
@@ -497,9 +529,7 @@ class ChatbotService:
             session_data = self._session_provider.get_session_by_id(session_id)
             name = session_data["name"] if session_data else "未知会话"
         
-        # 设置当前会话
-        self._current_session_id = session_id
-        self._chatbot.set_thread_id(session_id)
+        self._chatbot.init_tokens_usage(session_id)
         
         # 从数据库加载该会话的已有使用量到 chatbot.session_tokens_usage
         existing_usage = self._session_provider.get_session_tokens_usage(session_id)
@@ -528,7 +558,7 @@ class ChatbotService:
     
     async def delete_session(self, session_id: str) -> bool:
         """
-        删除会话
+        删除会话（会话元数据及 checkpoint 数据库中的会话历史）
         
         Args:
             session_id: 会话 ID
@@ -536,12 +566,14 @@ class ChatbotService:
         Returns:
             bool: 是否成功
         """
-        # TODO: 从 checkpoint 数据库删除会话历史
+        await self._ensure_initialized()
         success = self._session_provider.delete_session(session_id)
         
-        # 如果删除的是当前会话，清空当前会话
-        if success and self._current_session_id == session_id:
-            self._current_session_id = None
+        if success:
+            try:
+                await self._chatbot.delete_thread(session_id)
+            except Exception as e:
+                logger.error(f"删除会话 {session_id} 的检查点失败: {e}")
         
         return success
     
@@ -553,7 +585,7 @@ class ChatbotService:
     
     async def update_model_config(self, request: UpdateModelConfigRequest) -> ModelConfig:
         """
-        更新模型配置
+        更新模型配置（对之后开始的对话生效，进行中的对话继续使用开始时的配置）
         
         Args:
             request: 更新请求
@@ -561,22 +593,13 @@ class ChatbotService:
         Returns:
             ModelConfig: 更新后的配置
         """
-        await self._ensure_initialized()
-        
+        model_config = self._model_config.model_copy()
         if request.enable_search is not None:
-            self._model_config.enable_search = request.enable_search
+            model_config.enable_search = request.enable_search
         if request.enable_thinking is not None:
-            self._model_config.enable_thinking = request.enable_thinking
-        
-        # 重新创建 agent 以应用新配置
-        if self._chatbot:
-            self._chatbot.llm_streaming = self._chatbot.get_new_agent(
-                enable_search=self._model_config.enable_search,
-                enable_thinking=self._model_config.enable_thinking,
-                enable_streaming=True,
-                temperature=0.5
-            )
-            logger.info(f"模型配置已更新: search={self._model_config.enable_search}, thinking={self._model_config.enable_thinking}")
+            model_config.enable_thinking = request.enable_thinking
+        self._model_config = model_config
+        logger.info(f"模型配置已更新: search={model_config.enable_search}, thinking={model_config.enable_thinking}")
         
         return self._model_config
     
@@ -598,17 +621,18 @@ class ChatbotService:
             str: 响应内容片段
         """
         await self._ensure_initialized()
-        
-        # 确保使用正确的会话
-        if self._current_session_id != session_id:
-            self._current_session_id = session_id
-            self._chatbot.set_thread_id(session_id)
+        model_config = self._model_config
         
         # 更新会话的消息计数
         self._session_provider.increment_message_count(session_id)
         
-        # 使用 chat_stream 进行流式输出
-        async for chunk in self._chatbot.chat_stream(content):
+        # 使用 chat_stream 进行流式输出（会话与模型配置随本次调用传入）
+        async for chunk in self._chatbot.chat_stream(
+            content,
+            thread_id=session_id,
+            enable_search=model_config.enable_search,
+            enable_thinking=model_config.enable_thinking
+        ):
             yield chunk
         
         # 对话完成后，保存使用量到数据库
@@ -634,31 +658,39 @@ class ChatbotService:
             dict: {"type": "status"|"content", "message": str, "node": str}
         """
         await self._ensure_initialized()
-        
-        # 确保使用正确的会话
-        if self._current_session_id != session_id:
-            self._current_session_id = session_id
-            self._chatbot.set_thread_id(session_id)
+        model_config = self._model_config
         
         # 更新会话的消息计数
         self._session_provider.increment_message_count(session_id)
         
-        # 使用 chat_stream_with_status 进行带状态的流式输出
-        async for event in self._chatbot.chat_stream_with_status(content):
+        # 使用 chat_stream_with_status 进行带状态的流式输出（会话与模型配置随本次调用传入）
+        async for event in self._chatbot.chat_stream_with_status(
+            content,
+            thread_id=session_id,
+            enable_search=model_config.enable_search,
+            enable_thinking=model_config.enable_thinking
+        ):
             yield event
         
         # 对话完成后，保存使用量到数据库
         await self._save_session_tokens_usage(session_id)
     
-    async def get_chat_history(self, session_id: str) -> Optional[ChatHistoryResponse]:
+    async def get_chat_history(
+        self,
+        session_id: str,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> Optional[ChatHistoryResponse]:
         """
-        获取会话历史
+        获取会话历史（从 chat_message 表按 seq 游标分页读取，耗时与会话长度无关）
         
         Args:
             session_id: 会话 ID
+            before: 游标，只返回 seq 小于该值的消息；None 时返回最新的一页
+            limit: 每页数量
             
         Returns:
-            Optional[ChatHistoryResponse]: 历史消息，不存在返回 None
+            Optional[ChatHistoryResponse]: 一页历史消息（按 seq 升序），会话不存在返回 None
         """
         await self._ensure_initialized()
         
@@ -666,47 +698,114 @@ class ChatbotService:
         if not session_data:
             return None
         
-        # 从 checkpoint 读取历史消息
-        messages: List[ChatMessage] = []
+        if before is None:
+            await self._backfill_messages(session_id, session_data)
+        
+        rows, has_more = self._session_provider.get_messages(session_id, before_seq=before, limit=limit)
+        messages = [
+            ChatMessage(
+                role=MessageRole(row["role"]),
+                content=row["content"],
+                timestamp=row["timestamp"],
+                seq=row["seq"],
+                token_usage=TokenUsageEstimate(
+                    input_tokens=row["input_tokens"] or 0,
+                    output_tokens=row["output_tokens"] or 0,
+                    total_tokens=row["total_tokens"] or 0
+                ) if row["total_tokens"] else None
+            )
+            for row in rows
+        ]
+        logger.debug(f"会话 {session_id} 读取到 {len(messages)} 条历史消息 (before={before}, has_more={has_more})")
+        
+        return ChatHistoryResponse(
+            session_id=session_id,
+            session_name=session_data["name"],
+            messages=messages,
+            has_more=has_more,
+            next_cursor=messages[0].seq if has_more and messages else None
+        )
+    
+    def _record_turn(self, session_id: str, record: Dict[str, Any]):
+        """
+        ChatBot.on_turn_end 回调：把本轮的提问与回答追加到 chat_message 表
+        
+        本轮的 token 使用量记在回答消息上；本轮未生成回答（出错或被取消）时只记录提问
+        """
+        usage = record.get("usage") or {}
+        messages = [{
+            "role": MessageRole.USER.value,
+            "content": record["question"],
+            "timestamp": record["started_at"],
+        }]
+        if record.get("answer") is not None:
+            messages.append({
+                "role": MessageRole.ASSISTANT.value,
+                "content": record["answer"],
+                "timestamp": record["finished_at"],
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0),
+            })
+        try:
+            self._session_provider.append_messages(session_id, messages)
+        except Exception as e:
+            logger.error(f"保存会话 {session_id} 的消息失败: {e}")
+    
+    async def _backfill_messages(self, session_id: str, session_data: Dict[str, Any]):
+        """
+        为 chat_message 表出现之前的会话补写消息（读取历史时调用，持有会话锁，避免与进行中的对话重复写入）
         
+        每轮对话开始时也会先补写（_backfill_before_turn），因此会话已有消息即表示已补写过
+        """
+        if self._session_provider.has_messages(session_id):
+            return
+        async with self._chatbot.thread_lock(session_id):
+            if not self._session_provider.has_messages(session_id):
+                await self._backfill_from_checkpoint(session_id, session_data)
+    
+    async def _backfill_before_turn(self, session_id: str):
+        """ChatBot.on_turn_start 回调（已持有会话锁）：本轮写入检查点与消息之前为旧会话补写消息"""
+        if self._session_provider.has_messages(session_id):
+            return
+        session_data = self._session_provider.get_session_by_id(session_id)
+        if session_data:
+            await self._backfill_from_checkpoint(session_id, session_data)
+    
+    async def _backfill_from_checkpoint(self, session_id: str, session_data: Dict[str, Any]):
+        """从最新的 checkpoint 读取会话消息并追加到 chat_message 表（调用方持有会话锁）"""
         try:
             config = {"configurable": {"thread_id": session_id}}
             checkpoint_tuple = await self._chatbot.checkpointer.aget_tuple(config)
-            
-            if checkpoint_tuple and checkpoint_tuple.checkpoint:
-                channel_values = checkpoint_tuple.checkpoint.get("channel_values", {})
-                raw_messages = channel_values.get("messages", [])
-                
-                for msg in raw_messages:
-                    msg_type = type(msg).__name__
-                    
-                    if msg_type == "HumanMessage":
-                        role = MessageRole.USER
-                    elif msg_type in ("AIMessage", "AIMessageChunk"):
-                        role = MessageRole.ASSISTANT
-                    elif msg_type == "SystemMessage":
-                        role = MessageRole.SYSTEM
-                    else:
-                        # 跳过未知类型的消息
-                        continue
-                    
-                    messages.append(ChatMessage(
-                        role=role,
-                        content=msg.content,
-                        timestamp=None  # checkpoint 中没有单独的时间戳
-                    ))
-                    
-            logger.debug(f"会话 {session_id} 读取到 {len(messages)} 条历史消息")
-            
         except Exception as e:
-            logger.error(f"读取会话历史失败: {e}")
-            # 出错时返回空消息列表，而不是 None
+            logger.error(f"读取会话 {session_id} 的 checkpoint 失败: {e}")
+            return
+        if not checkpoint_tuple or not checkpoint_tuple.checkpoint:
+            return
         
-        return ChatHistoryResponse(
-            session_id=session_id,
-            session_name=session_data["name"],
-            messages=messages
-        )
+        raw_messages = checkpoint_tuple.checkpoint.get("channel_values", {}).get("messages", [])
+        roles = {
+            "HumanMessage": MessageRole.USER,
+            "AIMessage": MessageRole.ASSISTANT,
+            "AIMessageChunk": MessageRole.ASSISTANT,
+            "SystemMessage": MessageRole.SYSTEM,
+        }
+        messages = [
+            {
+                "role": roles[type(msg).__name__].value,
+                "content": msg.content if isinstance(msg.content, str) else str(msg.content),
+                # checkpoint 中没有单独的时间戳，使用会话的创建时间
+                "timestamp": session_data["created_at"],
+            }
+            for msg in raw_messages
+            # 跳过未知类型的消息与工具调用（无内容的 AI 消息）
+            if type(msg).__name__ in roles and msg.content
+        ]
+        try:
+            self._session_provider.append_messages(session_id, messages)
+            logger.info(f"会话 {session_id} 从 checkpoint 补写 {len(messages)} 条消息")
+        except Exception as e:
+            logger.error(f"补写会话 {session_id} 的消息失败: {e}")
     
     async def _save_session_tokens_usage(self, session_id: str):
         """
@@ -735,7 +834,7 @@ class ChatbotService:
         获取指定会话的 token 使用情况
         
         Args:
-            session_id: 会话 ID，为 None 时使用当前会话
+            session_id: 会话 ID，为 None 时返回空使用量
         
         Returns:
             Dict: 包含 turn_usage (本轮对话) 和 session_usage (会话累计)
@@ -752,12 +851,8 @@ class ChatbotService:
             'session_usage': default_usage.copy()   # 会话累计使用量
         }
         
-        if not self._chatbot:
-            return result
-        
-        # 使用指定的 session_id 或当前会话 ID
-        target_session = session_id or self._current_session_id
-        if not target_session:
+        target_session = session_id
+        if not self._chatbot or not target_session:
             return result
         
         # 获取本轮对话使用量
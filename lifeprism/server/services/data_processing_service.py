@@ -2,15 +2,23 @@
 数据处理服务
 负责 ActivityWatch 数据的完整处理流程
 """
+import threading
+import time
 import pandas as pd
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional, Callable
 from datetime import datetime, timedelta
 import pytz
 
-from lifeprism.server.providers import server_lw_data_provider, goal_provider
+from lifeprism.server.providers import server_lw_data_provider, goal_provider, pending_classification_provider
 from lifeprism.processors.data_clean import clean_activitywatch_data
+from lifeprism.server.services.sync_pipeline import SyncPipeline
+from lifeprism.processors.components import (
+    category_cache_manager,
+    local_classifier_manager,
+    title_similarity_index_manager,
+)
 from lifeprism.llm.llm_classify.classify.main_classify import LLMClassify
-from lifeprism.llm.llm_classify.schemas import classifyState
+from lifeprism.llm.llm_classify.schemas import classifyState, AppInFo, LogItem
 from lifeprism.config import settings,LOCAL_TIMEZONE
 
 import logging
@@ -18,6 +26,17 @@ from lifeprism.utils import get_logger
 # 配置日志
 logger = get_logger(__name__,logging.DEBUG)
 
+# 待分类队列条目的最大尝试次数，达到后不再自动分类（可通过接口重置）
+MAX_CLASSIFY_ATTEMPTS = 3
+
+# 同步内分类时每轮的最大条目数（按预算剩余量动态缩小）
+SYNC_CLASSIFY_ROUND_SIZE = 40
+
+# 待分类队列的认领表：调用方只在认领 / 出队时持有锁，LLM 分类期间不持有，
+# 同步与后台消费可以同时分类各自认领的条目，不会重复分类同一条目
+_pending_classify_lock = threading.Lock()
+_claimed_pending_ids: Set[int] = set()
+
  
 class DataProcessingService:
     """
@@ -34,20 +53,25 @@ class DataProcessingService:
         使用全局单例数据提供者
         """
         self.server_lw_data_provider = server_lw_data_provider
+        self.pending_classification_provider = pending_classification_provider
         self._category_mappings_cache = None  # 缓存分类映射
         self._goal_name_to_id_cache = None  # 缓存 goal 名称到 ID 的映射
         
     def process_activitywatch_data(
         self,
-        auto_classify: bool = True
+        auto_classify: bool = True,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
     ) -> Dict:
         """
         增量同步处理 ActivityWatch 数据
         
         从数据库最新的 end_time 开始获取到现在的数据
+        配置 sync_pipeline_enabled 开启时以流水线方式执行（见 _process_pipelined）
         
         Args:
             auto_classify: 是否自动分类新应用
+            progress_callback: 进度回调 (stage, progress, message)，
+                stage 为 fetch / clean / classify / save
             
         Returns:
             Dict: 处理结果统计
@@ -64,14 +88,18 @@ class DataProcessingService:
             sync_mode = 'incremental'
             start_time, end_time = self._get_incremental_time_range()
             time_range = f"{start_time.strftime('%Y-%m-%d %H:%M:%S')} ~ {end_time.strftime('%Y-%m-%d %H:%M:%S')}"
+            if settings.sync_pipeline_enabled:
+                return self._process_pipelined(
+                    start_time, end_time, auto_classify, progress_callback, sync_mode, time_range
+                )
             
             # 1-2. 获取 ActivityWatch 数据并清洗
             logger.info("步骤 1-2/6: 获取 ActivityWatch 数据并清洗...")
-            category_map_cache_df = self.server_lw_data_provider.load_category_map_cache_V2()  # 获取已缓存的分类结果
             filtered_data, classify_state = clean_activitywatch_data(
                 start_time=start_time,
                 end_time=end_time, 
-                category_map_cache_df=category_map_cache_df
+                category_cache=category_cache_manager.get_cache(),  # 进程级分类缓存（增量维护）
+                progress_callback=progress_callback
             )
             total_events = len(filtered_data) + (len(classify_state.log_items) if classify_state.log_items else 0)
             filtered_events = len(filtered_data)
@@ -81,30 +109,10 @@ class DataProcessingService:
                 logger.info(f"  {filtered_data[['app','duration','start_time','end_time']]}")
             logger.info(f"  ✓ 发现 {apps_to_classify} 条待分类日志项")
             
-            classified_apps = 0
-            
-            # 3. LLM 分类（如果需要）
-            if auto_classify and apps_to_classify > 0:
-                logger.info(f"步骤 3/6: LLM 分类 {apps_to_classify} 条日志项...")
-                classified_app_df = self._classify_apps(classify_state, filtered_events)
-                
-                # 4. 保存分类结果
-                logger.info("步骤 4/6: 保存分类结果...")
-                if classified_app_df is not None and not classified_app_df.empty:
-                    self.server_lw_data_provider.save_category_map_cache_V2(classified_app_df)
-                    classified_apps = len(classified_app_df)
-                    logger.info(f"  ✓ 保存了 {classified_apps} 个应用的分类")
-                    
-                    # 5. 合并分类结果到事件数据
-                    logger.info("步骤 5/6: 合并分类结果...")
-                    filtered_data = self._merge_classification_results(
-                        filtered_data, 
-                        classified_app_df
-                    )
-                else:
-                    logger.warning("  ⚠ 分类结果为空，跳过保存和合并")
-            else:
-                logger.info("步骤 3-5/6: 跳过分类（auto_classify=False 或无待分类应用）")
+            # 3-5. 未命中缓存的项入队，需要时立即分类并合并到本次事件
+            filtered_data, classified_apps = self._classify_new_items(
+                filtered_data, auto_classify, progress_callback
+            )
             
             # 6. 映射 category_id 和 sub_category_id
             logger.info("步骤 6/6: 映射分类 ID...")
@@ -112,9 +120,11 @@ class DataProcessingService:
             
             # 7. 保存行为日志
             logger.info("保存行为日志到数据库...")
+            self._report_progress(progress_callback, 'save', 0.0, "保存行为日志")
             self.server_lw_data_provider.save_user_app_behavior_log(filtered_data)
             saved_events = len(filtered_data)
             logger.info(f"  ✓ 保存了 {saved_events} 条行为日志")
+            self._report_progress(progress_callback, 'save', 1.0, f"保存 {saved_events} 条行为日志")
             
             # 统计结果
             result = {
@@ -149,15 +159,18 @@ class DataProcessingService:
         self,
         start_time: datetime,
         end_time: datetime,
-        auto_classify: bool
+        auto_classify: bool,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
     ) -> Dict:
         """
         按时间范围处理 ActivityWatch 数据
+        配置 sync_pipeline_enabled 开启时以流水线方式执行（见 _process_pipelined）
         
         Args:
             start_time: 开始时间 (datetime对象)
             end_time: 结束时间 (datetime对象)
             auto_classify: 是否自动分类新应用
+            progress_callback: 进度回调 (stage, progress, message)
             
         Returns:
             Dict: 处理结果统计
@@ -165,14 +178,18 @@ class DataProcessingService:
         try:
             time_range = f"{start_time.strftime('%Y-%m-%d %H:%M:%S')} ~ {end_time.strftime('%Y-%m-%d %H:%M:%S')}"
             logger.info(f"开始按时间范围同步数据: {time_range}")
+            if settings.sync_pipeline_enabled:
+                return self._process_pipelined(
+                    start_time, end_time, auto_classify, progress_callback, "time_range", time_range
+                )
             
             # 1-2. 获取 ActivityWatch 数据并清洗
             logger.info("步骤 1-2/6: 获取 ActivityWatch 数据并清洗...")
-            category_map_cache_df = self.server_lw_data_provider.load_category_map_cache_V2()
             filtered_data, classify_state = clean_activitywatch_data(
                 start_time=start_time,
                 end_time=end_time,
-                category_map_cache_df=category_map_cache_df
+                category_cache=category_cache_manager.get_cache(),
+                progress_callback=progress_callback
             )
             total_events = len(filtered_data) + (len(classify_state.log_items) if classify_state.log_items else 0)
             filtered_events = len(filtered_data)
@@ -180,30 +197,10 @@ class DataProcessingService:
             logger.info(f"  ✓ 获取并过滤后保留 {filtered_events} 条事件")
             logger.info(f"  ✓ 发现 {apps_to_classify} 条待分类日志项")
             
-            classified_apps = 0
-            
-            # 3. LLM 分类（如果需要）
-            if auto_classify and apps_to_classify > 0:
-                logger.info(f"步骤 3/6: LLM 分类 {apps_to_classify} 条日志项...")
-                classified_app_df = self._classify_apps(classify_state, filtered_events)
-                
-                # 4. 保存分类结果
-                logger.info("步骤 4/6: 保存分类结果...")
-                if classified_app_df is not None and not classified_app_df.empty:
-                    self.server_lw_data_provider.save_category_map_cache_V2(classified_app_df)
-                    classified_apps = len(classified_app_df)
-                    logger.info(f"  ✓ 保存了 {classified_apps} 个应用的分类")
-                    
-                    # 5. 合并分类结果到事件数据
-                    logger.info("步骤 5/6: 合并分类结果...")
-                    filtered_data = self._merge_classification_results(
-                        filtered_data, 
-                        classified_app_df
-                    )
-                else:
-                    logger.warning("  ⚠ 分类结果为空，跳过保存和合并")
-            else:
-                logger.info("步骤 3-5/6: 跳过分类（auto_classify=False 或无待分类应用）")
+            # 3-5. 未命中缓存的项入队，需要时立即分类并合并到本次事件
+            filtered_data, classified_apps = self._classify_new_items(
+                filtered_data, auto_classify, progress_callback
+            )
             
             # 6. 映射 category_id 和 sub_category_id
             logger.info("步骤 6/6: 映射分类 ID...")
@@ -211,9 +208,11 @@ class DataProcessingService:
             
             # 7. 保存行为日志
             logger.info("保存行为日志到数据库...")
+            self._report_progress(progress_callback, 'save', 0.0, "保存行为日志")
             self.server_lw_data_provider.save_user_app_behavior_log(filtered_data)
             saved_events = len(filtered_data)
             logger.info(f"  ✓ 保存了 {saved_events} 条行为日志")
+            self._report_progress(progress_callback, 'save', 1.0, f"保存 {saved_events} 条行为日志")
             
             # 统计结果
             result = {
@@ -245,6 +244,54 @@ class DataProcessingService:
             raise
     
 
+    def _process_pipelined(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        auto_classify: bool,
+        progress_callback: Optional[Callable[[str, float, str], None]],
+        sync_mode: str,
+        time_range: str
+    ) -> Dict:
+        """
+        流水线同步（见 SyncPipeline）：按时间窗口读取、清洗、写库与分类相互重叠，
+        命中缓存的事件立即写库，分类结果由 classify_pending 回填到已保存的行为日志
+        
+        Returns:
+            Dict: 与顺序同步相同的统计字段 + pipeline（各阶段忙碌时间与总耗时）
+        """
+        logger.info("流水线同步: 读取 / 清洗 / 写库 / 分类 并行执行...")
+        result = SyncPipeline(self).run(start_time, end_time, auto_classify, progress_callback)
+        result["sync_mode"] = sync_mode
+        result["time_range"] = time_range
+        
+        logger.info("=" * 60)
+        logger.info("数据处理完成！")
+        logger.info(f"  - 同步模式: {sync_mode} (pipeline)")
+        logger.info(f"  - 时间范围: {time_range}")
+        logger.info(f"  - 总事件数: {result['total_events']}")
+        logger.info(f"  - 有效事件数: {result['filtered_events']}")
+        logger.info(f"  - 新分类应用数: {result['classified_apps']}")
+        logger.info(f"  - 保存事件数: {result['saved_events']}")
+        logger.info(f"  - 未分类事件数: {result['unclassified_events']}")
+        logger.info("=" * 60)
+        return result
+
+    @staticmethod
+    def _report_progress(
+        progress_callback: Optional[Callable[[str, float, str], None]],
+        stage: str,
+        progress: float,
+        message: str = ""
+    ) -> None:
+        """
+        上报阶段进度（未提供回调时忽略）
+        
+        回调可以通过抛出异常中断处理流程（例如同步任务被取消）
+        """
+        if progress_callback:
+            progress_callback(stage, progress, message)
+
     def _get_incremental_time_range(self):
         """
         获取增量同步的时间范围
@@ -278,6 +325,344 @@ class DataProcessingService:
 
         return start_time, end_time
 
+    def _classify_new_items(
+        self,
+        filtered_data: pd.DataFrame,
+        auto_classify: bool,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        未命中缓存的项写入待分类队列；auto_classify 时按累计时长从高到低、在本次同步的
+        token / 时间预算内分类本次出现的条目并合并结果（见 classify_pending_within_budget）
+        
+        超出预算、分类失败或未开启自动分类时条目保留在队列中，由后台消费
+        （PendingClassificationService）分类后回填到已保存的行为日志，无需重新扫描历史事件
+        
+        Returns:
+            Tuple[pd.DataFrame, int]: (合并分类结果后的事件数据, 新分类的条目数)
+        """
+        pending_keys = self.enqueue_pending_classifications(filtered_data)
+        logger.info(f"  ✓ 待分类队列入队 {len(pending_keys)} 项")
+        
+        classified_apps = 0
+        if auto_classify and pending_keys:
+            logger.info(f"步骤 3/6: LLM 分类 {len(pending_keys)} 个待分类项...")
+            self._report_progress(progress_callback, 'classify', 0.0, f"分类 {len(pending_keys)} 个待分类项")
+            classified_app_df, stats = self.classify_pending_within_budget(
+                pending_keys, progress_callback=progress_callback
+            )
+            classified_apps = stats['classified']
+            
+            if not classified_app_df.empty:
+                # 5. 合并分类结果到事件数据
+                logger.info("步骤 5/6: 合并分类结果...")
+                filtered_data = self._merge_classification_results(filtered_data, classified_app_df)
+            else:
+                logger.warning("  ⚠ 分类结果为空，待分类项保留在队列中")
+            if stats['deferred']:
+                logger.info(f"  本次同步预算已用完，{stats['deferred']} 项留给后台分类")
+        else:
+            logger.info("步骤 3-5/6: 跳过分类（auto_classify=False 或无待分类应用）")
+        self._report_progress(progress_callback, 'classify', 1.0, f"新分类 {classified_apps} 项")
+        return filtered_data, classified_apps
+
+    def enqueue_pending_classifications(self, filtered_data: pd.DataFrame) -> List[Tuple[str, str, int]]:
+        """
+        将未命中缓存的事件按 (app, title, 是否多用途) 去重后写入待分类队列
+        
+        单用途应用按 app 去重（title 键为空字符串），多用途应用按 (app, title) 去重，
+        累计时长、首次/最近出现时间随重复出现不断更新
+        
+        Args:
+            filtered_data: 清洗后的事件数据（category_id 为空表示未命中缓存）
+            
+        Returns:
+            List[Tuple[str, str, int]]: 本次入队的自然键
+        """
+        if filtered_data is None or filtered_data.empty:
+            return []
+        
+        unmatched = filtered_data[filtered_data['category_id'].isna()]
+        is_multi = unmatched['is_multipurpose_app'].astype(int)
+        # 多用途应用没有标题时无法分类（与 ClassifyCollector 一致）
+        unmatched = unmatched[(is_multi == 0) | (unmatched['title'].fillna('') != '')]
+        if unmatched.empty:
+            return []
+        
+        is_multi = unmatched['is_multipurpose_app'].astype(int)
+        grouped = unmatched.assign(
+            is_multipurpose_app=is_multi,
+            key_title=unmatched['title'].fillna('').where(is_multi == 1, ''),
+        ).groupby(['app', 'key_title', 'is_multipurpose_app'], sort=False).agg(
+            sample_title=('title', 'first'),
+            first_seen=('start_time', 'min'),
+            last_seen=('end_time', 'max'),
+            total_duration=('duration', 'sum'),
+        ).reset_index()
+        
+        records = [
+            {
+                'app': app, 'title': key_title, 'is_multipurpose_app': int(flag),
+                'sample_title': sample_title or None, 'first_seen': str(first_seen),
+                'last_seen': str(last_seen), 'total_duration': int(total_duration),
+            }
+            for app, key_title, flag, sample_title, first_seen, last_seen, total_duration in grouped.itertuples(
+                index=False, name=None
+            )
+        ]
+        self.pending_classification_provider.enqueue(records)
+        return [(r['app'], r['title'], r['is_multipurpose_app']) for r in records]
+
+    def classify_pending(
+        self,
+        keys: Optional[List[Tuple[str, str, int]]] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
+        """
+        消费待分类队列：分类、保存到分类缓存、回填已保存的行为日志并出队
+        
+        - 已被缓存覆盖的条目（其他途径已分类）直接回填并出队，不调用 LLM
+        - LLM 调用失败或未得到有效分类的条目尝试次数 +1，保留在队列中
+        - 取出的条目先认领，其他调用方在其出队或释放之前不会取到；只有认领与回填出队时持有
+          _pending_classify_lock，LLM 分类期间不阻塞其他调用方（例如后台消费期间的交互式同步）
+        
+        Args:
+            keys: 只处理指定自然键的条目，None 表示按累计时长从高到低处理
+            limit: 最多处理的条目数
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict]: (
+                已得到分类的记录（含缓存命中的条目，可直接用于 _merge_classification_results），
+                统计 {fetched, cached, classified, resolved, failed, backfilled_events, error}
+            )
+        """
+        with _pending_classify_lock:
+            rows = self.pending_classification_provider.fetch_pending(
+                MAX_CLASSIFY_ATTEMPTS, limit=limit, keys=keys, exclude_ids=_claimed_pending_ids
+            )
+            claimed_ids = {row['id'] for row in rows}
+            _claimed_pending_ids.update(claimed_ids)
+        try:
+            stats = {
+                "fetched": len(rows), "cached": 0, "classified": 0, "resolved": 0,
+                "failed": 0, "backfilled_events": 0, "error": None,
+            }
+            if not rows:
+                return pd.DataFrame(), stats
+            
+            cache = category_cache_manager.get_cache()
+            resolved_frames = []
+            resolved_ids = []
+            
+            # 1. 已被缓存覆盖的条目直接出队
+            cached_records, to_classify = [], []
+            for row in rows:
+                if row['is_multipurpose_app']:
+                    category = cache.get_multipurpose_category(row['app'], row['title'])
+                else:
+                    category = cache.get_single_purpose_category(row['app'])
+                if category is None:
+                    to_classify.append(row)
+                    continue
+                cached_records.append({
+                    'app': row['app'], 'title': row['title'],
+                    'is_multipurpose_app': row['is_multipurpose_app'],
+                    'category_id': category[0], 'sub_category_id': category[1], 'link_to_goal_id': category[2],
+                })
+                resolved_ids.append(row['id'])
+            if cached_records:
+                resolved_frames.append(pd.DataFrame(cached_records))
+                stats['cached'] = len(cached_records)
+            
+            # 2. 其余条目交给 LLM 分类
+            classify_state, conflicted = self._build_pending_state(to_classify, cache)
+            if conflicted:
+                conflicted_ids = {row['id'] for row in conflicted}
+                self.pending_classification_provider.record_failure(list(conflicted_ids), "同一应用同时存在单用途与多用途条目")
+                stats['failed'] += len(conflicted_ids)
+                to_classify = [row for row in to_classify if row['id'] not in conflicted_ids]
+            
+            if to_classify:
+                try:
+                    classified_app_df = self._classify_apps(classify_state, len(to_classify))
+                except Exception as e:
+                    logger.error(f"待分类项分类失败，保留在队列中: {e}", exc_info=True)
+                    self.pending_classification_provider.record_failure([row['id'] for row in to_classify], str(e))
+                    stats['failed'] += len(to_classify)
+                    stats['error'] = str(e)
+                    classified_app_df = None
+                
+                if classified_app_df is not None:
+                    if not classified_app_df.empty:
+                        # 本地预分类（近似标题 / 本地分类器）的结果只回填本次的行为日志，不写入分类缓存：
+                        # 避免索引与模型用自己的预测重建、重训，也避免预测成为永久的精确命中
+                        local_mask = classified_app_df.pop('local_prediction').astype(bool)
+                        llm_df = classified_app_df[~local_mask]
+                        if not llm_df.empty:
+                            self.server_lw_data_provider.save_category_map_cache_V2(llm_df)
+                        stats['classified'] = len(classified_app_df)
+                        logger.info(
+                            f"  ✓ 保存了 {len(llm_df)} 个应用的分类（本地预分类 {int(local_mask.sum())} 个，不写入缓存）"
+                        )
+                        valid = classified_app_df[classified_app_df['category_id'].notna()]
+                    else:
+                        valid = pd.DataFrame(columns=['app', 'title', 'is_multipurpose_app', 'category_id'])
+                    
+                    # 得到有效分类的条目出队，其余记录一次失败
+                    valid_keys = {
+                        (app, title if is_multi else '', int(is_multi))
+                        for app, title, is_multi in zip(valid['app'], valid['title'], valid['is_multipurpose_app'])
+                    }
+                    unresolved_ids = []
+                    for row in to_classify:
+                        key = (row['app'], row['title'], int(row['is_multipurpose_app']))
+                        (resolved_ids if key in valid_keys else unresolved_ids).append(row['id'])
+                    self.pending_classification_provider.record_failure(unresolved_ids, "未得到有效分类")
+                    stats['failed'] += len(unresolved_ids)
+                    if not valid.empty:
+                        resolved_frames.append(valid)
+            
+            # 3. 回填已保存的行为日志并出队
+            resolved_df = pd.concat(resolved_frames, ignore_index=True) if resolved_frames else pd.DataFrame()
+            with _pending_classify_lock:
+                if not resolved_df.empty:
+                    stats['backfilled_events'] = self.server_lw_data_provider.backfill_behavior_log_categories(resolved_df)
+                stats['resolved'] = self.pending_classification_provider.resolve(resolved_ids)
+            
+            logger.info(
+                f"  ✓ 待分类队列: 取出 {stats['fetched']} 项，缓存已覆盖 {stats['cached']} 项，"
+                f"LLM 分类 {stats['classified']} 项，出队 {stats['resolved']} 项，失败 {stats['failed']} 项，"
+                f"回填 {stats['backfilled_events']} 条行为日志"
+            )
+            return resolved_df, stats
+        finally:
+            with _pending_classify_lock:
+                _claimed_pending_ids.difference_update(claimed_ids)
+
+    def classify_pending_within_budget(
+        self,
+        keys: List[Tuple[str, str, int]],
+        token_budget: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
+        """
+        按累计时长从高到低分轮分类指定的待分类项，直到 token 或时间预算用完
+        
+        - token 消耗按 tokens_usage_log 中分类会话（c-YYYY-MM-DD）的 total_tokens 增量计算
+        - 每轮条目数按已观测的每条目 token / 耗时与剩余预算估算，不超过 SYNC_CLASSIFY_ROUND_SIZE
+        - 预算用完或某一轮分类失败时停止，其余条目保留在队列中由后台消费
+          （PendingClassificationService）
+        
+        Args:
+            keys: 待分类项的自然键
+            token_budget: token 预算，None 时读取配置 sync_classify_token_budget（0 表示不限）
+            time_budget: 时间预算（秒），None 时读取配置 sync_classify_time_budget（0 表示不限）
+            progress_callback: 进度回调 (stage, progress, message)
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict]: (已得到分类的记录, classify_pending 的累计统计
+                + {rounds, deferred, tokens_spent, elapsed})
+        """
+        token_budget = int(settings.sync_classify_token_budget or 0) if token_budget is None else token_budget
+        time_budget = float(settings.sync_classify_time_budget or 0) if time_budget is None else time_budget
+        totals = {
+            "fetched": 0, "cached": 0, "classified": 0, "resolved": 0, "failed": 0,
+            "backfilled_events": 0, "error": None, "rounds": 0, "deferred": 0,
+            "tokens_spent": 0, "elapsed": 0.0,
+        }
+        
+        # 按累计时长排序（与 fetch_pending 的顺序一致：尝试次数少的优先）
+        ranked = [
+            (row['app'], row['title'], row['is_multipurpose_app'])
+            for row in self.pending_classification_provider.fetch_pending(MAX_CLASSIFY_ATTEMPTS, keys=keys)
+        ]
+        token_baseline: Dict[str, int] = {}
+        self._classification_tokens_spent(token_baseline)
+        start = time.monotonic()
+        frames = []
+        position = 0
+        
+        while position < len(ranked):
+            elapsed = time.monotonic() - start
+            spent = self._classification_tokens_spent(token_baseline)
+            round_size = SYNC_CLASSIFY_ROUND_SIZE
+            if totals['fetched']:
+                if token_budget > 0:
+                    if spent >= token_budget:
+                        break
+                    tokens_per_item = spent / totals['fetched']
+                    if tokens_per_item > 0:
+                        round_size = min(round_size, int((token_budget - spent) / tokens_per_item))
+                if time_budget > 0:
+                    if elapsed >= time_budget:
+                        break
+                    seconds_per_item = elapsed / totals['fetched']
+                    if seconds_per_item > 0:
+                        round_size = min(round_size, int((time_budget - elapsed) / seconds_per_item))
+            round_keys = ranked[position:position + max(1, round_size)]
+            position += len(round_keys)
+            
+            classified_df, stats = self.classify_pending(keys=round_keys)
+            totals['rounds'] += 1
+            for key in ("fetched", "cached", "classified", "resolved", "failed", "backfilled_events"):
+                totals[key] += stats[key]
+            if not classified_df.empty:
+                frames.append(classified_df)
+            self._report_progress(
+                progress_callback, 'classify', position / len(ranked), f"已分类 {position}/{len(ranked)} 项"
+            )
+            if stats['error'] is not None:
+                totals['error'] = stats['error']
+                break
+        
+        totals['deferred'] = len(ranked) - position
+        totals['tokens_spent'] = self._classification_tokens_spent(token_baseline)
+        totals['elapsed'] = round(time.monotonic() - start, 3)
+        logger.info(
+            f"  ✓ 同步内分类: {totals['rounds']} 轮，处理 {position}/{len(ranked)} 项，"
+            f"消耗 {totals['tokens_spent']} tokens，耗时 {totals['elapsed']}s，推迟 {totals['deferred']} 项"
+        )
+        classified_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return classified_df, totals
+
+    @staticmethod
+    def _build_pending_state(rows: List[Dict], cache) -> Tuple[classifyState, List[Dict]]:
+        """
+        由待分类队列行构建 classifyState（与 ClassifyCollector 的结构一致）
+        
+        LogItem.duration 使用累计时长；同一 app 的用途类型以第一条（累计时长最高）为准，
+        类型冲突的条目单独返回
+        
+        Returns:
+            Tuple[classifyState, List[Dict]]: (分类状态, 类型冲突的行)
+        """
+        app_registry: Dict[str, AppInFo] = {}
+        log_items: List[LogItem] = []
+        conflicted = []
+        for row in rows:
+            app = row['app']
+            is_multipurpose = bool(row['is_multipurpose_app'])
+            title = row['title'] if is_multipurpose else (row['sample_title'] or '')
+            if app not in app_registry:
+                app_registry[app] = AppInFo(
+                    description=cache.get_app_description(app),
+                    is_multipurpose=is_multipurpose,
+                    titles=[]
+                )
+            elif app_registry[app].is_multipurpose != is_multipurpose:
+                conflicted.append(row)
+                continue
+            if title:
+                app_registry[app].titles.append(title)
+            log_items.append(LogItem(
+                id=len(log_items),
+                app=app,
+                duration=int(row['total_duration'] or 0),
+                title=title
+            ))
+        return classifyState(app_registry=app_registry, log_items=log_items, result_items=None), conflicted
+
     def _classify_apps(self, classify_state: classifyState, filtered_events: int) -> pd.DataFrame:
         """
         使用 LLM 分类应用
@@ -363,28 +748,36 @@ class DataProcessingService:
         
         logger.info(f"  ✓ 构建 goals 列表，共 {len(goals_for_llm)} 个活跃目标（已过滤被禁用分类）")
         
-        # 初始化 LLMClassify 分类器
-        classifier = LLMClassify(
-            classify_mode=classify_mode,
-            goal=goals_for_llm,
-            category_tree=category_tree
+        # 本地预分类：置信度足够的条目直接采用，其余条目交给 LLM
+        local_items, llm_state, predicted_keys, shadow_labels = self._local_preclassify(
+            classify_state, category, sub_category, category_tree, goal_name_to_id
         )
         
-        # 执行分类
-        logger.info(f"  调用 LLM 分类器...")
-        result = classifier.classify(classify_state)
-        logger.info(f"  ✓ 分类完成")
-        print(result)
-        # 处理分类结果
-        if result is None or not result.get('result_items'):
+        result = None
+        if llm_state.log_items:
+            # 初始化 LLMClassify 分类器
+            classifier = LLMClassify(
+                classify_mode=classify_mode,
+                goal=goals_for_llm,
+                category_tree=category_tree
+            )
+            
+            # 执行分类
+            logger.info(f"  调用 LLM 分类器（{len(llm_state.log_items)} 条）...")
+            result = classifier.classify(llm_state)
+            logger.info(f"  ✓ 分类完成")
+        
+        llm_items = result.get('result_items') if result else None
+        result_items = local_items + (llm_items or [])
+        if not result_items:
             logger.warning("  ⚠ 分类结果为空")
             return pd.DataFrame()
         
-        result_items = result['result_items']
-        logger.info(f"  ✓ 获取到 {len(result_items)} 条分类结果")
+        logger.info(f"  ✓ 获取到 {len(result_items)} 条分类结果（本地 {len(local_items)} 条）")
         
         # 保存 token 使用数据（使用 filtered_events 作为 result_items_count）
-        self._save_tokens_usage(result, filtered_events)
+        if llm_items:
+            self._save_tokens_usage(result, filtered_events)
         
         # 转换为 DataFrame 格式（适配 category_map 表结构）
         # 按 app 分组处理：单用途应用只保存一条，多用途应用保存所有 title
@@ -424,6 +817,7 @@ class DataProcessingService:
                     'link_to_goal_id': goal_id,  # 新增: 关联的目标ID
                     'category': item.category,  # 保留用于调试
                     'sub_category': item.sub_category,  # 保留用于调试
+                    'local_prediction': (item.app, item.title) in predicted_keys,
                 })
                 if len(items) > 1:
                     logger.info(f"    单用途应用 '{app}' 有 {len(items)} 条记录，只保存第一条")
@@ -449,6 +843,7 @@ class DataProcessingService:
                         'link_to_goal_id': goal_id,  # 新增: 关联的目标ID
                         'category': item.category,  # 保留用于调试
                         'sub_category': item.sub_category,  # 保留用于调试
+                        'local_prediction': (item.app, item.title) in predicted_keys,
                     })
         
         logger.info(f"  ✓ 处理后保留 {len(classified_records)} 条分类记录（原始 {len(result_items)} 条）")
@@ -459,8 +854,154 @@ class DataProcessingService:
         classified_app_df = self._validate_classification_results(classified_app_df, category_tree)
         logger.info(f"  ✓ 验证完成")
         
+        for source, labels in shadow_labels.items():
+            self._compare_shadow_predictions(classified_app_df, source, labels)
+        
         return classified_app_df
     
+    def _local_preclassify(
+        self,
+        classify_state: classifyState,
+        category: pd.DataFrame,
+        sub_category: pd.DataFrame,
+        category_tree: dict,
+        goal_name_to_id: Dict[str, str]
+    ) -> Tuple[List[LogItem], classifyState, Set[Tuple[str, str]], Dict[str, Dict[Tuple[str, str], tuple]]]:
+        """
+        用分类缓存预分类，只有本地无法确定的条目交给 LLM
+        
+        1. 近似标题索引（多用途，title_similarity_mode）：与已分类标题的相似度达到 title_similarity_threshold 时沿用其分类
+        2. 本地分类器（local_classifier_mode）：置信度达到 local_classifier_min_confidence 时采用
+        
+        两者的模式相同：
+           - on: 直接采用（调用方不写入分类缓存）
+           - shadow: 只记录预测，条目仍交给 LLM，由 _compare_shadow_predictions 对比
+        
+        只在当前启用的分类中预测；预测出的目标已不活跃时不关联目标
+        
+        Returns:
+            Tuple: (本地已分类的条目, 仍需 LLM 分类的 classifyState,
+                本地直接采用的 (app, title), shadow 模式下的预测 {来源: {(app, title): 标签}})
+        """
+        similarity_mode = settings.title_similarity_mode
+        classifier_mode = settings.local_classifier_mode
+        use_similarity = similarity_mode in ('on', 'shadow')
+        use_classifier = classifier_mode in ('on', 'shadow')
+        if not (use_similarity or use_classifier) or not classify_state.log_items:
+            return [], classify_state, set(), {}
+        
+        category_id_to_name = {
+            cat_id: name for cat_id, name in zip(category['id'], category['name']) if name in category_tree
+        }
+        sub_category_id_to_name = {}
+        allowed = {(cat_id, None) for cat_id in category_id_to_name}
+        for sub_id, cat_id, name in zip(sub_category['id'], sub_category['category_id'], sub_category['name']):
+            if cat_id in category_id_to_name and name in category_tree[category_id_to_name[cat_id]]:
+                sub_category_id_to_name[sub_id] = name
+                allowed.add((cat_id, sub_id))
+        goal_id_to_name = {goal_id: name for name, goal_id in goal_name_to_id.items()}
+        
+        app_registry = classify_state.app_registry
+        items = classify_state.log_items
+        is_multi = [bool(app_registry.get(item.app) and app_registry[item.app].is_multipurpose) for item in items]
+        labels = [None] * len(items)
+        
+        predicted_keys = set()
+        shadow_labels: Dict[str, Dict[Tuple[str, str], tuple]] = {}
+        
+        def accept(source: str, mode: str, indexes: List[int], predictions: List[Optional[tuple]]) -> int:
+            accepted = 0
+            for i, label in zip(indexes, predictions):
+                if label is None:
+                    continue
+                key = (items[i].app, items[i].title)
+                if mode == 'on':
+                    labels[i] = label
+                    predicted_keys.add(key)
+                    accepted += 1
+                else:
+                    shadow_labels.setdefault(source, {})[key] = label
+            return accepted
+        
+        similar_count = 0
+        multi_indexes = [i for i, item in enumerate(items) if is_multi[i] and item.title]
+        if use_similarity and multi_indexes:
+            try:
+                suggestions = title_similarity_index_manager.suggest(
+                    [(items[i].app, items[i].title) for i in multi_indexes], allowed
+                )
+                similar_count = accept('similarity', similarity_mode, multi_indexes, suggestions)
+            except Exception as e:
+                logger.error(f"近似标题匹配失败，跳过: {e}", exc_info=True)
+        
+        classifier_count = 0
+        rest = [i for i, label in enumerate(labels) if label is None]
+        if use_classifier and rest:
+            try:
+                predictions = local_classifier_manager.predict_items(
+                    [(items[i].app, items[i].title, is_multi[i]) for i in rest], allowed
+                )
+                classifier_count = accept('classifier', classifier_mode, rest, predictions)
+            except Exception as e:
+                logger.error(f"本地分类器预测失败，跳过: {e}", exc_info=True)
+        
+        local_items, llm_items = [], []
+        for item, label in zip(classify_state.log_items, labels):
+            if label is None:
+                llm_items.append(item)
+                continue
+            cat_id, sub_id, goal_id = label
+            item.category = category_id_to_name[cat_id]
+            item.sub_category = sub_category_id_to_name.get(sub_id) if sub_id else None
+            item.link_to_goal = goal_id_to_name.get(goal_id) if goal_id else None
+            local_items.append(item)
+        
+        logger.info(
+            f"  ✓ 本地预分类: {len(local_items)}/{len(items)} 条直接采用（近似标题 {similar_count} 条，"
+            f"本地分类器 {classifier_count} 条），{len(llm_items)} 条交给 LLM"
+        )
+        llm_apps = {item.app for item in llm_items}
+        llm_state = classifyState(
+            app_registry={app: info for app, info in app_registry.items() if app in llm_apps},
+            log_items=llm_items,
+            result_items=None
+        )
+        return local_items, llm_state, predicted_keys, shadow_labels
+    
+    @staticmethod
+    def _compare_shadow_predictions(
+        classified_app_df: pd.DataFrame,
+        source: str,
+        shadow_labels: Dict[Tuple[str, str], tuple]
+    ) -> None:
+        """
+        shadow 模式：对比本地预测与 LLM 的分类（主分类与子分类都相同视为一致）
+        
+        Args:
+            classified_app_df: LLM 的分类结果
+            source: 预测来源，similarity（近似标题索引）或 classifier（本地分类器）
+            shadow_labels: {(app, title): 预测标签}
+        """
+        compared = agreed = 0
+        for app, title, category_id, sub_category_id in zip(
+            classified_app_df['app'], classified_app_df['title'],
+            classified_app_df['category_id'], classified_app_df['sub_category_id']
+        ):
+            label = shadow_labels.get((app, title))
+            if label is None or pd.isna(category_id):
+                continue
+            compared += 1
+            sub_category_id = None if pd.isna(sub_category_id) else sub_category_id
+            agreed += int(label[0] == category_id and label[1] == sub_category_id)
+        if source == 'similarity':
+            title_similarity_index_manager.record_shadow(compared, agreed)
+            name = "近似标题"
+        else:
+            local_classifier_manager.record_shadow(compared, agreed)
+            name = "本地分类器"
+        if compared:
+            logger.info(f"  {name} shadow 对比: {agreed}/{compared} 条与 LLM 一致")
+    
     def _validate_classification_results(self, df: pd.DataFrame, category_tree: dict) -> pd.DataFrame:
         """
         验证分类结果是否符合层级规则
@@ -700,9 +1241,7 @@ class DataProcessingService:
             result_items_count: 分类结果项目数
         """
         try:
-            # 生成当天的 session_id（格式：c-YYYY-MM-DD）
-            today = datetime.now().strftime('%Y-%m-%d')
-            session_id = f"c-{today}"
+            session_id = self._classification_session_id()
             
             # 从 result 中提取 tokens_usage 字典
             tokens_usage = result.get('tokens_usage', {})
@@ -717,23 +1256,36 @@ class DataProcessingService:
                 'mode': 'classification'
             }
             
-            # 读取已有数据并累加
-            existing = self.server_lw_data_provider.get_session_tokens_usage(session_id)
-            if existing:
-                new_usage['input_tokens'] += existing.get('input_tokens', 0)
-                new_usage['output_tokens'] += existing.get('output_tokens', 0)
-                new_usage['total_tokens'] += existing.get('total_tokens', 0)
-                new_usage['search_count'] += existing.get('search_count', 0)
-                new_usage['result_items_count'] += existing.get('result_items_count', 0)
-            
-            # 保存到数据库
-            self.server_lw_data_provider.upsert_session_tokens_usage(session_id, new_usage)
-            logger.info(f"  ✓ 保存 token 使用数据到 {session_id}: input={new_usage['input_tokens']}, output={new_usage['output_tokens']}, total={new_usage['total_tokens']}")
+            # 在数据库中原子累加（并发的 classify_pending 共用同一天的记录）
+            self.server_lw_data_provider.add_session_tokens_usage(session_id, new_usage)
+            logger.info(f"  ✓ 累加 token 使用数据到 {session_id}: input={new_usage['input_tokens']}, output={new_usage['output_tokens']}, total={new_usage['total_tokens']}")
             
         except Exception as e:
             logger.error(f"保存 token 使用数据失败: {e}")
             # 不抛出异常，避免影响主流程
     
+    @staticmethod
+    def _classification_session_id() -> str:
+        """分类 token 用量按天累加的 session_id（格式：c-YYYY-MM-DD）"""
+        return f"c-{datetime.now().strftime('%Y-%m-%d')}"
+    
+    def _classification_tokens_spent(self, baseline: Dict[str, int]) -> int:
+        """
+        自记录 baseline 以来分类消耗的 total_tokens（读取 tokens_usage_log 中的分类会话）
+        
+        Args:
+            baseline: {session_id: 起始 total_tokens}，首次调用时传入空字典记录起点；
+                跨天后的新会话以 0 为起点加入
+        """
+        session_id = self._classification_session_id()
+        if session_id not in baseline:
+            baseline[session_id] = self._session_total_tokens(session_id) if not baseline else 0
+        return sum(self._session_total_tokens(sid) - start for sid, start in baseline.items())
+    
+    def _session_total_tokens(self, session_id: str) -> int:
+        usage = self.server_lw_data_provider.get_session_tokens_usage(session_id) or {}
+        return int(usage.get('total_tokens') or 0)
+    
     def clear_cache(self):
         """清除缓存的映射字典"""
         self._category_mappings_cache = None
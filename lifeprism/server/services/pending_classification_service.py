@@ -0,0 +1,118 @@
+"""
+待分类队列消费服务
+在后台按累计时长从高到低分批分类待分类队列中的条目，并把结果回填到已保存的行为日志
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from lifeprism.server.providers import pending_classification_provider
+from lifeprism.server.services.data_processing_service import DataProcessingService, MAX_CLASSIFY_ATTEMPTS
+from lifeprism.utils import LazySingleton, get_logger
+
+logger = get_logger(__name__)
+
+# 每批从队列取出的条目数
+DRAIN_BATCH_SIZE = 50
+
+
+class PendingClassificationService:
+    """
+    待分类队列消费服务
+
+    - drain(): 同步消费队列一轮（每个条目最多尝试一次），某一批分类失败时提前结束
+      （避免 LLM 不可用时反复重试）
+    - request_drain(): 提交到单个后台线程执行；已有消费在排队或运行时直接复用
+    """
+
+    def __init__(self, data_processor: Optional[DataProcessingService] = None):
+        self.data_processor = data_processor or DataProcessingService()
+        self.pending_provider = pending_classification_provider
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classify-drain")
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def get_stats(self) -> Dict:
+        """
+        队列统计
+
+        Returns:
+            Dict: pending / exhausted / total_duration / draining
+        """
+        stats = self.pending_provider.get_stats(MAX_CLASSIFY_ATTEMPTS)
+        stats["draining"] = self.is_draining()
+        return stats
+
+    def list_pending(self, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """按累计时长降序分页列出队列条目"""
+        return self.pending_provider.list_pending(limit=limit, offset=offset)
+
+    def is_draining(self) -> bool:
+        """是否有后台消费在排队或运行"""
+        with self._lock:
+            return self._future is not None and not self._future.done()
+
+    def drain(self, batch_size: int = DRAIN_BATCH_SIZE, max_batches: Optional[int] = None) -> Dict:
+        """
+        分批消费待分类队列
+
+        Args:
+            batch_size: 每批条目数
+            max_batches: 最多处理的批数，None 表示直到队列为空
+
+        Returns:
+            Dict: 累计统计 {batches, fetched, cached, classified, resolved, failed, backfilled_events, error}
+        """
+        totals = {
+            "batches": 0, "fetched": 0, "cached": 0, "classified": 0,
+            "resolved": 0, "failed": 0, "backfilled_events": 0, "error": None,
+        }
+        # 每次只处理开始时队列中的条目数：失败的条目尝试次数 +1 后排到队尾，不会在同一轮中被反复重试
+        remaining = self.pending_provider.get_stats(MAX_CLASSIFY_ATTEMPTS)["pending"]
+        while remaining > 0 and (max_batches is None or totals["batches"] < max_batches):
+            _, stats = self.data_processor.classify_pending(limit=min(batch_size, remaining))
+            remaining -= stats["fetched"]
+            if stats["fetched"] == 0:
+                break
+            totals["batches"] += 1
+            for key in ("fetched", "cached", "classified", "resolved", "failed", "backfilled_events"):
+                totals[key] += stats[key]
+            if stats["error"] is not None:
+                totals["error"] = stats["error"]
+                logger.warning(f"待分类队列消费中止（本批分类失败）: {stats['error']}")
+                break
+
+        logger.info(
+            f"待分类队列消费完成: {totals['batches']} 批，出队 {totals['resolved']} 项，"
+            f"失败 {totals['failed']} 项，回填 {totals['backfilled_events']} 条行为日志"
+        )
+        return totals
+
+    def request_drain(self) -> bool:
+        """
+        在后台线程消费队列（已有消费在排队或运行时不重复提交）
+
+        Returns:
+            bool: 是否提交了新的消费任务
+        """
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return False
+            self._future = self._executor.submit(self._drain_in_background)
+            return True
+
+    def retry_exhausted(self) -> int:
+        """清零已达重试上限条目的尝试次数，使其重新参与分类"""
+        return self.pending_provider.reset_attempts()
+
+    def _drain_in_background(self) -> Dict:
+        try:
+            return self.drain()
+        except Exception as e:
+            logger.error(f"后台消费待分类队列失败: {e}", exc_info=True)
+            raise
+
+
+# 懒加载单例（首次访问时才初始化）
+pending_classification_service = LazySingleton(PendingClassificationService)
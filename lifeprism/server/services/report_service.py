@@ -568,17 +568,16 @@ def _calc_sunburst_data(
         # 加载数据
         start_time = f"{start_date} 00:00:00"
         end_time = f"{end_date} 23:59:59"
-        df = server_lw_data_provider.load_user_app_behavior_log(
+        df = server_lw_data_provider.load_user_app_behavior_log_typed(
             start_time=start_time, 
-            end_time=end_time
+            end_time=end_time,
+            columns=['start_time', 'end_time', 'app', 'title', 'category_id', 'sub_category_id']
         )
         
-        if df is None or df.empty:
+        if df.empty:
             return _build_empty_sunburst(start_date, end_date, title, total_range_minutes)
         
         # 预计算时长（分钟）
-        df['start_dt'] = pd.to_datetime(df['start_time'])
-        df['end_dt'] = pd.to_datetime(df['end_time'])
         df['duration_minutes'] = (df['end_dt'] - df['start_dt']).dt.total_seconds() / 60
         
         # 获取分类名称映射
@@ -792,12 +791,13 @@ def _calc_goal_time_invested(goal_id: str, start_date: str, end_date: str) -> in
         start_time = f"{start_date} 00:00:00"
         end_time = f"{end_date} 23:59:59"
         
-        df = server_lw_data_provider.load_user_app_behavior_log(
+        df = server_lw_data_provider.load_user_app_behavior_log_typed(
             start_time=start_time,
-            end_time=end_time
+            end_time=end_time,
+            columns=['start_time', 'end_time', 'link_to_goal_id']
         )
         
-        if df is None or df.empty:
+        if df.empty:
             return 0
         
         # 筛选关联到该目标的记录
@@ -807,12 +807,9 @@ def _calc_goal_time_invested(goal_id: str, start_date: str, end_date: str) -> in
             return 0
         
         # 计算时长
-        goal_df = goal_df.copy()
-        goal_df['start_dt'] = pd.to_datetime(goal_df['start_time'])
-        goal_df['end_dt'] = pd.to_datetime(goal_df['end_time'])
-        goal_df['duration_minutes'] = (goal_df['end_dt'] - goal_df['start_dt']).dt.total_seconds() / 60
+        duration_minutes = (goal_df['end_dt'] - goal_df['start_dt']).dt.total_seconds() / 60
         
-        return int(goal_df['duration_minutes'].sum())
+        return int(duration_minutes.sum())
         
     except Exception as e:
         logger.error(f"计算目标 {goal_id} 时间投入失败: {e}")
@@ -831,12 +828,13 @@ def _calc_hourly_trend(date: str) -> List[Dict[str, Any]]:
         start_time = f"{date} 00:00:00"
         end_time = f"{date} 23:59:59"
         
-        df = server_lw_data_provider.load_user_app_behavior_log(
+        df = server_lw_data_provider.load_user_app_behavior_log_typed(
             start_time=start_time,
-            end_time=end_time
+            end_time=end_time,
+            columns=['start_time', 'end_time', 'category_id']
         )
         
-        if df is None or df.empty:
+        if df.empty:
             return _build_empty_hourly_trend()
         
         # 获取分类名称映射
@@ -845,10 +843,6 @@ def _calc_hourly_trend(date: str) -> List[Dict[str, Any]]:
         if categories_df is not None and not categories_df.empty:
             category_name_map = {str(row['id']): row['name'] for _, row in categories_df.iterrows()}
         
-        # 预处理时间
-        df['start_dt'] = pd.to_datetime(df['start_time'])
-        df['end_dt'] = pd.to_datetime(df['end_time'])
-        
         # 按小时统计各分类时长
         hourly_data = defaultdict(lambda: defaultdict(int))
         
@@ -901,12 +895,13 @@ def _calc_weekly_trend(start_date: str, end_date: str) -> List[Dict[str, Any]]:
         start_time = f"{start_date} 00:00:00"
         end_time = f"{end_date} 23:59:59"
         
-        df = server_lw_data_provider.load_user_app_behavior_log(
+        df = server_lw_data_provider.load_user_app_behavior_log_typed(
             start_time=start_time,
-            end_time=end_time
+            end_time=end_time,
+            columns=['start_time', 'end_time', 'category_id']
         )
         
-        if df is None or df.empty:
+        if df.empty:
             return _build_empty_weekly_trend(start_date)
         
         # 获取分类名称映射
@@ -916,24 +911,14 @@ def _calc_weekly_trend(start_date: str, end_date: str) -> List[Dict[str, Any]]:
             category_name_map = {str(row['id']): row['name'] for _, row in categories_df.iterrows()}
         
         # 预处理时间
-        df['start_dt'] = pd.to_datetime(df['start_time'])
-        df['end_dt'] = pd.to_datetime(df['end_time'])
         df['date'] = df['start_dt'].dt.date
         df['duration_minutes'] = (df['end_dt'] - df['start_dt']).dt.total_seconds() / 60
         
         # 按日期和分类聚合
-        daily_data = defaultdict(lambda: defaultdict(int))
+        daily_data = _sum_minutes_by_date_and_category(df, category_name_map)
         
         start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
         
-        for _, row in df.iterrows():
-            row_date = row['date']
-            cat_id = str(row['category_id']) if pd.notna(row['category_id']) else 'unknown'
-            cat_name = category_name_map.get(cat_id, 'Uncategorized')
-            minutes = row['duration_minutes']
-            
-            daily_data[row_date][cat_name] += minutes
-        
         # 收集所有出现过的分类名称
         all_categories = set()
         for day_data in daily_data.values():
@@ -971,12 +956,13 @@ def _calc_monthly_trend(start_date: str, end_date: str) -> List[Dict[str, Any]]:
         start_time = f"{start_date} 00:00:00"
         end_time = f"{end_date} 23:59:59"
         
-        df = server_lw_data_provider.load_user_app_behavior_log(
+        df = server_lw_data_provider.load_user_app_behavior_log_typed(
             start_time=start_time,
-            end_time=end_time
+            end_time=end_time,
+            columns=['start_time', 'end_time', 'category_id']
         )
         
-        if df is None or df.empty:
+        if df.empty:
             return _build_empty_monthly_trend(start_date, end_date)
         
         # 获取分类名称映射
@@ -986,25 +972,15 @@ def _calc_monthly_trend(start_date: str, end_date: str) -> List[Dict[str, Any]]:
             category_name_map = {str(row['id']): row['name'] for _, row in categories_df.iterrows()}
         
         # 预处理时间
-        df['start_dt'] = pd.to_datetime(df['start_time'])
-        df['end_dt'] = pd.to_datetime(df['end_time'])
         df['date'] = df['start_dt'].dt.date
         df['duration_minutes'] = (df['end_dt'] - df['start_dt']).dt.total_seconds() / 60
         
         # 按日期和分类聚合
-        daily_data = defaultdict(lambda: defaultdict(int))
+        daily_data = _sum_minutes_by_date_and_category(df, category_name_map)
         
         start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        for _, row in df.iterrows():
-            row_date = row['date']
-            cat_id = str(row['category_id']) if pd.notna(row['category_id']) else 'unknown'
-            cat_name = category_name_map.get(cat_id, 'Uncategorized')
-            minutes = row['duration_minutes']
-            
-            daily_data[row_date][cat_name] += minutes
-        
         # 收集所有出现过的分类名称
         all_categories = set()
         for day_data in daily_data.values():
@@ -1042,12 +1018,13 @@ def _calc_heatmap_data(start_date: str, end_date: str) -> List[HeatmapDataItem]:
         start_time = f"{start_date} 00:00:00"
         end_time = f"{end_date} 23:59:59"
         
-        df = server_lw_data_provider.load_user_app_behavior_log(
+        df = server_lw_data_provider.load_user_app_behavior_log_typed(
             start_time=start_time,
-            end_time=end_time
+            end_time=end_time,
+            columns=['start_time', 'end_time', 'category_id']
         )
         
-        if df is None or df.empty:
+        if df.empty:
             return _build_empty_heatmap(start_date, end_date)
         
         # 获取分类名称映射
@@ -1057,23 +1034,15 @@ def _calc_heatmap_data(start_date: str, end_date: str) -> List[HeatmapDataItem]:
             category_name_map = {str(row['id']): row['name'] for _, row in categories_df.iterrows()}
         
         # 预处理时间
-        df['start_dt'] = pd.to_datetime(df['start_time'])
-        df['end_dt'] = pd.to_datetime(df['end_time'])
         df['date'] = df['start_dt'].dt.date
         df['duration_minutes'] = (df['end_dt'] - df['start_dt']).dt.total_seconds() / 60
         
         # 按日期和分类聚合（使用 float 累加保持精度）
-        daily_totals = defaultdict(float)
-        daily_breakdown = defaultdict(lambda: defaultdict(float))
-        
-        for _, row in df.iterrows():
-            row_date = row['date']
-            cat_id = str(row['category_id']) if pd.notna(row['category_id']) else 'unknown'
-            cat_name = category_name_map.get(cat_id, 'Uncategorized')
-            minutes = row['duration_minutes']
-            
-            daily_totals[row_date] += minutes
-            daily_breakdown[row_date][cat_name] += minutes
+        daily_breakdown = _sum_minutes_by_date_and_category(df, category_name_map)
+        daily_totals = {
+            row_date: sum(breakdown.values())
+            for row_date, breakdown in daily_breakdown.items()
+        }
         
         # 构建结果
         start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
@@ -1104,6 +1073,25 @@ def _calc_heatmap_data(start_date: str, end_date: str) -> List[HeatmapDataItem]:
 
 # ==================== 辅助构建函数 ====================
 
+def _sum_minutes_by_date_and_category(
+    df: pd.DataFrame,
+    category_name_map: dict
+) -> Dict[Any, Dict[str, float]]:
+    """
+    按 (日期, 主分类名称) 汇总时长（分钟）
+
+    df 需包含 date / category_id / duration_minutes 列，未分类记录归入 'unknown'
+    """
+    grouped = df.groupby(['date', 'category_id'], observed=True, dropna=False)['duration_minutes'].sum()
+    
+    daily_data = defaultdict(lambda: defaultdict(float))
+    for (row_date, cat_id), minutes in grouped.items():
+        cat_key = str(cat_id) if pd.notna(cat_id) else 'unknown'
+        daily_data[row_date][category_name_map.get(cat_key, 'Uncategorized')] += minutes
+    
+    return daily_data
+
+
 def _build_category_level(
     df: pd.DataFrame, 
     name_map: dict, 
@@ -1111,7 +1099,7 @@ def _build_category_level(
     group_field: str = 'category_id'
 ) -> TimeOverviewData:
     """构建分类级别数据"""
-    stats = df.groupby(group_field).agg({
+    stats = df.groupby(group_field, observed=True).agg({
         'duration_minutes': 'sum'
     }).reset_index()
     stats.columns = ['id', 'minutes']
@@ -1165,7 +1153,7 @@ def _build_app_level(
     parent_category_id: str = None
 ) -> TimeOverviewData:
     """构建应用级别数据（Top 5 + Other）"""
-    stats = df.groupby('app')['duration_minutes'].sum().sort_values(ascending=False)
+    stats = df.groupby('app', observed=True)['duration_minutes'].sum().sort_values(ascending=False)
     total_minutes = int(stats.sum())
     
     top_5 = stats.head(5)
@@ -1188,7 +1176,7 @@ def _build_app_level(
         
         # 获取该应用的 top 3 titles
         app_df = df[df['app'] == app_name]
-        title_stats = app_df.groupby('title')['duration_minutes'].sum().sort_values(ascending=False).head(3)
+        title_stats = app_df.groupby('title', observed=True)['duration_minutes'].sum().sort_values(ascending=False).head(3)
         top_titles = "-split-".join(title_stats.index.tolist())
         
         pie_data.append(ChartSegment(
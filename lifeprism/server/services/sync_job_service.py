@@ -0,0 +1,378 @@
+"""
+后台同步任务服务
+将 ActivityWatch 同步封装为后台任务：立即返回任务 ID，按阶段上报进度，支持取消，
+并把重叠的同步请求合并到已在运行（或排队）的任务中（single-flight）
+"""
+
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from lifeprism.server.services.sync_service import SyncService
+from lifeprism.server.services.backfill_service import BackfillService
+from lifeprism.server.services.pending_classification_service import pending_classification_service
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+# 同步流水线阶段（与 DataProcessingService 上报的 stage 名称一致）
+SYNC_STAGES = ("fetch", "clean", "classify", "save")
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+# 内存中保留的已结束任务数量
+MAX_FINISHED_JOBS = 50
+
+
+class SyncCancelledError(Exception):
+    """同步任务被取消（由进度回调抛出，用于中断处理流程）"""
+
+
+@dataclass
+class SyncJob:
+    """
+    单个后台同步任务
+
+    stages 记录每个阶段的 status / progress / message，
+    version 在每次状态变化时递增，供 SSE 推送判断是否有更新
+    """
+    job_id: str
+    sync_mode: str  # incremental / time_range / backfill
+    auto_classify: bool
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    backfill_id: Optional[str] = None  # 仅 backfill 模式
+    max_in_flight: int = 1  # 仅 backfill 模式：同时处理的窗口数
+    status: str = JOB_QUEUED
+    stages: Dict[str, dict] = field(default_factory=lambda: {
+        name: {"name": name, "status": "pending", "progress": 0.0, "message": None}
+        for name in SYNC_STAGES
+    })
+    result: Optional[dict] = None
+    created_at: str = field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    updated_at: str = field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    version: int = 0
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+
+    def covers(
+        self,
+        sync_mode: str,
+        start_time: Optional[str],
+        end_time: Optional[str],
+        auto_classify: bool,
+        backfill_id: Optional[str] = None
+    ) -> bool:
+        """
+        判断一个新请求是否可以合并到本任务
+
+        - 增量同步：任意活动中的增量任务都可以承接
+        - 时间范围同步：请求范围必须被本任务范围完全覆盖
+        - 分段回填：同一个回填任务只运行一次
+        - 本任务不做分类时，不能承接需要分类的请求
+        """
+        if self.status not in ACTIVE_STATUSES or self.cancel_event.is_set():
+            return False
+        if self.sync_mode != sync_mode:
+            return False
+        if auto_classify and not self.auto_classify:
+            return False
+        if sync_mode == "incremental":
+            return True
+        if sync_mode == "backfill":
+            return self.backfill_id == backfill_id
+        # 时间字符串格式固定为 YYYY-MM-DD HH:MM:SS，可直接按字典序比较
+        return self.start_time <= start_time and end_time <= self.end_time
+
+    def touch(self) -> None:
+        """记录一次状态变化"""
+        self.version += 1
+        self.updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def to_dict(self, coalesced: bool = False) -> dict:
+        """转换为 SyncJobResponse 兼容的字典"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "sync_mode": self.sync_mode,
+            "auto_classify": self.auto_classify,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "coalesced": coalesced,
+            "backfill_id": self.backfill_id,
+            "stages": [dict(self.stages[name]) for name in SYNC_STAGES],
+            "result": self.result,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "version": self.version,
+        }
+
+
+class SyncJobService:
+    """
+    后台同步任务服务
+
+    - 使用单个工作线程串行执行同步任务，同一时间只有一个任务读写同一批数据
+    - 新请求若被活动任务覆盖则直接返回该任务（合并），否则排队
+    - 取消为协作式：在阶段进度上报时检查取消标记，正在进行的 LLM 调用会在返回后停止
+    """
+
+    def __init__(self, sync_service: Optional[SyncService] = None):
+        self.sync_service = sync_service or SyncService()
+        self.backfill_service: BackfillService = self.sync_service.backfill_service
+        self._jobs: Dict[str, SyncJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync-job")
+
+    # ========== 提交任务 ==========
+
+    def submit_incremental(self, auto_classify: bool = True) -> dict:
+        """
+        提交增量同步任务
+
+        Returns:
+            dict: 任务状态（coalesced=True 表示合并到了已有任务）
+        """
+        return self._submit("incremental", auto_classify)
+
+    def submit_time_range(self, start_time: str, end_time: str, auto_classify: bool = True) -> dict:
+        """
+        提交时间范围同步任务
+
+        Args:
+            start_time: 开始时间，格式: YYYY-MM-DD HH:MM:SS
+            end_time: 结束时间，格式: YYYY-MM-DD HH:MM:SS
+            auto_classify: 是否自动分类新应用
+
+        Raises:
+            ValueError: 时间格式错误或开始时间不早于结束时间
+        """
+        start_dt = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
+        end_dt = datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S")
+        if start_dt >= end_dt:
+            raise ValueError("start_time 必须早于 end_time")
+        return self._submit("time_range", auto_classify, start_time, end_time)
+
+    def submit_backfill(
+        self,
+        start_time: str,
+        end_time: str,
+        window_size: str = "day",
+        auto_classify: bool = True,
+        max_in_flight: int = 1
+    ) -> dict:
+        """
+        提交分段回填任务（相同参数的未完成回填会从未完成的窗口继续）
+
+        Args:
+            start_time: 开始时间，格式: YYYY-MM-DD HH:MM:SS
+            end_time: 结束时间，格式: YYYY-MM-DD HH:MM:SS
+            window_size: 窗口粒度 day / week
+            auto_classify: 是否自动分类新应用
+            max_in_flight: 同时处理的窗口数
+
+        Raises:
+            ValueError: 时间格式或窗口粒度错误
+        """
+        backfill = self.backfill_service.plan(start_time, end_time, window_size, auto_classify)
+        return self.resume_backfill(backfill["id"], max_in_flight=max_in_flight)
+
+    def resume_backfill(self, backfill_id: str, max_in_flight: int = 1) -> dict:
+        """
+        继续已有的回填任务（跳过已完成的窗口）
+
+        Raises:
+            ValueError: 回填任务不存在
+        """
+        backfill = self.backfill_service.get_backfill(backfill_id)
+        if backfill is None:
+            raise ValueError(f"回填任务 {backfill_id} 不存在")
+        return self._submit(
+            "backfill", bool(backfill["auto_classify"]), backfill["start_time"], backfill["end_time"],
+            backfill_id=backfill_id, max_in_flight=max_in_flight
+        )
+
+    def _submit(
+        self,
+        sync_mode: str,
+        auto_classify: bool,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        backfill_id: Optional[str] = None,
+        max_in_flight: int = 1
+    ) -> dict:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.covers(sync_mode, start_time, end_time, auto_classify, backfill_id):
+                    logger.info(f"同步请求合并到已有任务 {job.job_id} ({job.status})")
+                    return job.to_dict(coalesced=True)
+
+            job = SyncJob(
+                job_id=f"sync-{uuid.uuid4().hex[:8]}",
+                sync_mode=sync_mode,
+                auto_classify=auto_classify,
+                start_time=start_time,
+                end_time=end_time,
+                backfill_id=backfill_id,
+                max_in_flight=max_in_flight,
+            )
+            self._jobs[job.job_id] = job
+            self._prune_finished_jobs()
+            job.future = self._executor.submit(self._run_job, job)
+            logger.info(f"创建同步任务 {job.job_id}: mode={sync_mode}, range={start_time} ~ {end_time}")
+            return job.to_dict()
+
+    def get_future(self, job_id: str) -> Optional[Future]:
+        """获取任务的 Future（用于同步接口等待任务完成）"""
+        job = self._jobs.get(job_id)
+        return job.future if job else None
+
+    # ========== 查询与取消 ==========
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """获取任务状态，不存在返回 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self) -> List[dict]:
+        """按创建时间倒序列出任务"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+            return [job.to_dict() for job in jobs]
+
+    def cancel_job(self, job_id: str) -> Optional[dict]:
+        """
+        请求取消任务
+
+        - 排队中的任务直接标记为 cancelled
+        - 运行中的任务在下一次进度上报时停止
+
+        Returns:
+            Optional[dict]: 任务状态，不存在返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ACTIVE_STATUSES:
+                job.cancel_event.set()
+                if job.status == JOB_QUEUED:
+                    self._finish(job, JOB_CANCELLED, self._cancelled_result())
+                else:
+                    job.touch()
+                logger.info(f"请求取消同步任务 {job_id}")
+            return job.to_dict()
+
+    # ========== 执行 ==========
+
+    def _run_job(self, job: SyncJob) -> dict:
+        """在工作线程中执行同步任务，返回同步结果字典"""
+        with self._lock:
+            if job.cancel_event.is_set():
+                return job.result
+            job.status = JOB_RUNNING
+            job.touch()
+
+        def on_progress(stage: str, progress: float, message: str = "") -> None:
+            self._update_stage(job, stage, progress, message)
+            if job.cancel_event.is_set():
+                raise SyncCancelledError(f"同步任务 {job.job_id} 已取消")
+
+        if job.sync_mode == "incremental":
+            result = self.sync_service.sync_from_activitywatch(
+                auto_classify=job.auto_classify,
+                progress_callback=on_progress
+            )
+        elif job.sync_mode == "backfill":
+            result = self.sync_service.sync_backfill(
+                backfill_id=job.backfill_id,
+                auto_classify=job.auto_classify,
+                max_in_flight=job.max_in_flight,
+                progress_callback=on_progress
+            )
+        else:
+            result = self.sync_service.sync_by_time_range(
+                start_time=job.start_time,
+                end_time=job.end_time,
+                auto_classify=job.auto_classify,
+                progress_callback=on_progress
+            )
+
+        with self._lock:
+            if job.cancel_event.is_set() and result.get("status") != "success":
+                result = self._cancelled_result(result.get("duration", 0.0))
+                self._finish(job, JOB_CANCELLED, result)
+            elif result.get("status") == "success":
+                self._finish(job, JOB_SUCCEEDED, result)
+            else:
+                self._finish(job, JOB_FAILED, result)
+        logger.info(f"同步任务 {job.job_id} 结束: {job.status}")
+        if job.status == JOB_SUCCEEDED and job.auto_classify:
+            self._drain_pending_classifications()
+        return result
+
+    @staticmethod
+    def _drain_pending_classifications() -> None:
+        """同步结束后在后台消费积压的待分类项（之前未分类或分类失败的条目）"""
+        try:
+            if pending_classification_service.get_stats()["pending"] > 0:
+                pending_classification_service.request_drain()
+        except Exception as e:
+            logger.warning(f"提交待分类队列消费失败: {e}")
+
+    def _update_stage(self, job: SyncJob, stage: str, progress: float, message: str) -> None:
+        """更新阶段进度；进入新阶段时将之前未开始的阶段标记为 skipped"""
+        if stage not in job.stages:
+            return
+        with self._lock:
+            for name in SYNC_STAGES:
+                if name == stage:
+                    break
+                previous = job.stages[name]
+                if previous["status"] == "pending":
+                    previous["status"] = "skipped"
+                elif previous["status"] == "running":
+                    previous["status"] = "completed"
+                    previous["progress"] = 1.0
+            current = job.stages[stage]
+            current["progress"] = round(min(max(progress, 0.0), 1.0), 4)
+            current["status"] = "completed" if progress >= 1.0 else "running"
+            if message:
+                current["message"] = message
+            job.touch()
+
+    def _finish(self, job: SyncJob, status: str, result: dict) -> None:
+        """标记任务结束（调用方需持有锁）"""
+        job.status = status
+        job.result = result
+        job.touch()
+
+    @staticmethod
+    def _cancelled_result(duration: float = 0.0) -> dict:
+        return {
+            "status": JOB_CANCELLED,
+            "synced_events": 0,
+            "new_apps_classified": 0,
+            "duration": duration,
+            "message": "同步任务已取消"
+        }
+
+    def _prune_finished_jobs(self) -> None:
+        """只保留最近 MAX_FINISHED_JOBS 个已结束任务（调用方需持有锁）"""
+        finished = [job for job in self._jobs.values() if job.status in TERMINAL_STATUSES]
+        if len(finished) <= MAX_FINISHED_JOBS:
+            return
+        finished.sort(key=lambda j: j.updated_at)
+        for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+            del self._jobs[job.job_id]
@@ -0,0 +1,315 @@
+"""
+流水线同步
+将一次同步拆成四个阶段，阶段之间用有界队列连接，读取、清洗、写库与 LLM 分类相互重叠：
+
+    读取 AW（按时间窗口） -> 转换 & 匹配缓存 -> 写库 & 入队待分类 -> 预算内分类 & 回填
+
+- 命中缓存的事件随所在窗口立即写库，无需等待本次同步的分类结果
+- 未命中的事件先以空分类写库并进入待分类队列，分类阶段得到结果后由 classify_pending
+  回填已保存的行为日志（backfill_behavior_log_categories）
+- 分类阶段写入分类缓存后，后续窗口直接命中新的缓存条目
+- 任一阶段出错（包括进度回调抛出的取消）时通知其余阶段停止，并在调用线程重新抛出
+
+与顺序同步（clean_activitywatch_data）的差异：清洗阶段不使用 clean_workers 进程池、不记录缓存命中率，
+total_events 为读取到的原始事件数。因此 sync_pipeline_enabled 默认关闭
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lifeprism.config import settings
+from lifeprism.processors import processor_aw_data_provider
+from lifeprism.processors.components import CacheMatcher, EventTransformer, category_cache_manager
+from lifeprism.storage import AWBaseDataProvider
+from lifeprism.utils import get_logger
+
+logger = get_logger(__name__)
+
+# 阶段之间队列的容量（窗口数），限制读取阶段领先写库阶段的距离，控制内存占用
+STAGE_QUEUE_SIZE = 4
+
+# 单次同步的最大窗口数：跨度很长（首次同步、长时间未同步、回填）时加长窗口，
+# 避免每个窗口固定的查询与提交开销超过流水线重叠带来的收益
+MAX_WINDOWS = 24
+
+# 进度阶段的顺序（与 SYNC_STAGES 一致）
+_STAGE_ORDER = ("fetch", "clean", "classify", "save")
+
+_DONE = None
+
+
+class _StageStopped(Exception):
+    """其他阶段出错，当前阶段停止"""
+
+
+class SyncPipeline:
+    """
+    一次流水线同步
+
+    Args:
+        data_processor: DataProcessingService（写库、入队与分类逻辑复用其实现）
+        window: 读取阶段的时间窗口长度，None 时读取配置 sync_pipeline_window_minutes
+        aw_data_provider: ActivityWatch 数据源，None 时使用全局 processor_aw_data_provider
+    """
+
+    def __init__(
+        self,
+        data_processor,
+        window: Optional[timedelta] = None,
+        aw_data_provider: Optional[AWBaseDataProvider] = None
+    ):
+        self.data_processor = data_processor
+        self.window = window or timedelta(minutes=max(1, int(settings.sync_pipeline_window_minutes or 60)))
+        self.aw_data_provider = aw_data_provider or processor_aw_data_provider
+
+    def run(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        auto_classify: bool = True,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
+    ) -> Dict:
+        """
+        执行流水线同步
+
+        Returns:
+            Dict: 与 process_activitywatch_data 相同的统计字段（不含 sync_mode / time_range）
+                + pipeline: {windows, deferred, stage_seconds, wall_seconds}
+        """
+        windows = self._split_windows(start_time, end_time)
+        self._window_count = len(windows)
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._progress_lock = threading.Lock()
+        self._furthest_stage = -1
+        self._last_report: Optional[Tuple[str, float, str]] = None
+        self._progress_callback = progress_callback
+        self._stage_seconds = Counter()
+        self._stats = Counter()
+        self._miss_events: Counter = Counter()
+        self._resolved_keys = set()
+
+        raw_queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+        batch_queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+        # 待分类键的消费很慢，队列不设上限，避免写库阶段被分类阶段阻塞
+        key_queue = queue.Queue() if auto_classify else None
+
+        started = time.perf_counter()
+        # (阶段名, 阶段函数, 参数, 下游队列)
+        stages = [
+            ("fetch", self._read_stage, (windows, raw_queue), raw_queue),
+            ("clean", self._transform_stage, (raw_queue, batch_queue), batch_queue),
+            ("save", self._persist_stage, (batch_queue, key_queue), key_queue),
+        ]
+        if auto_classify:
+            stages.append(("classify", self._classify_stage, (key_queue,), None))
+        threads = [
+            threading.Thread(target=self._guard, args=spec, name=f"sync-{spec[0]}", daemon=True)
+            for spec in stages
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+        wall_seconds = time.perf_counter() - started
+        saved_events = self._stats['saved_events']
+        unclassified_events = sum(
+            count for key, count in self._miss_events.items() if key not in self._resolved_keys
+        )
+        self._report('save', 1.0, f"保存 {saved_events} 条行为日志")
+        logger.info(
+            f"  ✓ 流水线同步: {len(windows)} 个窗口，耗时 {wall_seconds:.2f}s，各阶段忙碌 "
+            + ", ".join(f"{stage} {self._stage_seconds[stage]:.2f}s" for stage in _STAGE_ORDER)
+        )
+        return {
+            "total_events": self._stats['total_events'],
+            "filtered_events": self._stats['filtered_events'],
+            "apps_to_classify": len(self._miss_events),
+            "classified_apps": self._stats['classified_apps'],
+            "saved_events": saved_events,
+            "unclassified_events": unclassified_events,
+            "pipeline": {
+                "windows": len(windows),
+                "deferred": self._stats['deferred'],
+                "stage_seconds": {stage: round(self._stage_seconds[stage], 3) for stage in _STAGE_ORDER},
+                "wall_seconds": round(wall_seconds, 3),
+            },
+        }
+
+    # ==================== 阶段 ====================
+
+    def _read_stage(self, windows: List[Tuple[datetime, datetime]], output: queue.Queue) -> None:
+        """按时间窗口读取 AW 事件（窗口为 [start, end)，互不重叠）"""
+        for index, (window_start, window_end) in enumerate(windows, start=1):
+            began = time.perf_counter()
+            raw_events = self.aw_data_provider.get_window_events(start_time=window_start, end_time=window_end)
+            self._stage_seconds['fetch'] += time.perf_counter() - began
+            self._stats['total_events'] += len(raw_events)
+            self._report('fetch', index / len(windows), f"窗口 {index}/{len(windows)}: 获取 {len(raw_events)} 个事件")
+            self._put(output, raw_events)
+
+    def _transform_stage(self, source: queue.Queue, output: queue.Queue) -> None:
+        """转换事件并匹配分类缓存（每个窗口取最新的进程级缓存，分类阶段写入的条目随即生效）"""
+        transformer = EventTransformer()
+        processed = 0
+        while (raw_events := self._get(source)) is not _DONE:
+            began = time.perf_counter()
+            events, _ = transformer.transform_to_batch(raw_events)
+            CacheMatcher(category_cache_manager.get_cache()).match_batch(events)
+            self._stage_seconds['clean'] += time.perf_counter() - began
+            processed += 1
+            self._report('clean', processed / self._window_count, f"窗口 {processed}/{self._window_count}: 有效 {len(events)} 条")
+            self._put(output, events)
+
+    def _persist_stage(self, source: queue.Queue, key_queue: Optional[queue.Queue]) -> None:
+        """写入行为日志（未命中的事件分类为空），未命中项入队后交给分类阶段"""
+        provider = self.data_processor.server_lw_data_provider
+        while (events := self._get(source)) is not _DONE:
+            if not len(events):
+                continue
+            began = time.perf_counter()
+            events_df = events.to_dataframe()
+            provider.save_user_app_behavior_log(events_df)
+            # 写库之后再入队：分类阶段回填时这些行为日志已经存在
+            keys = self.data_processor.enqueue_pending_classifications(events_df)
+            unmatched = events_df[events_df['category_id'].isna()]
+            for app, title, is_multi in zip(unmatched['app'], unmatched['title'], unmatched['is_multipurpose_app']):
+                self._miss_events[(app, (title or '') if is_multi else '', int(is_multi))] += 1
+            self._stage_seconds['save'] += time.perf_counter() - began
+            self._stats['filtered_events'] += len(events_df)
+            self._stats['saved_events'] += len(events_df)
+            if key_queue is not None and keys:
+                key_queue.put(keys)
+
+    def _classify_stage(self, source: queue.Queue) -> None:
+        """
+        在本次同步的 token / 时间预算内分类待分类项
+
+        每次取出当前已到达的全部键，交给 classify_pending_within_budget（按累计时长从高到低分轮），
+        预算用完后只计数，剩余条目留给后台消费
+        """
+        token_budget = int(settings.sync_classify_token_budget or 0)
+        time_budget = float(settings.sync_classify_time_budget or 0)
+        tokens_spent, elapsed = 0, 0.0
+        received = processed = 0
+        finished = False
+        while not finished:
+            batch = self._get(source)
+            if batch is _DONE:
+                break
+            keys = list(batch)
+            # 合并已经到达的其他窗口的键，减少分轮次数
+            while True:
+                try:
+                    more = source.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _DONE:
+                    finished = True
+                    break
+                keys.extend(more)
+            keys = list(dict.fromkeys(keys))
+            received += len(keys)
+
+            remaining_tokens = token_budget - tokens_spent if token_budget > 0 else 0
+            remaining_time = time_budget - elapsed if time_budget > 0 else 0
+            if (token_budget > 0 and remaining_tokens <= 0) or (time_budget > 0 and remaining_time <= 0):
+                self._stats['deferred'] += len(keys)
+                processed += len(keys)
+                self._report('classify', processed / received, f"预算已用完，{self._stats['deferred']} 项留给后台分类")
+                continue
+
+            def on_round(stage: str, progress: float, message: str = "") -> None:
+                # 每轮分类后上报本次同步的整体进度（回调抛出的取消会中断剩余轮次）
+                done = processed + int(progress * len(keys))
+                self._report('classify', done / received, f"已处理 {done}/{received} 个待分类项")
+
+            classified_df, stats = self.data_processor.classify_pending_within_budget(
+                keys, token_budget=remaining_tokens, time_budget=remaining_time, progress_callback=on_round
+            )
+            tokens_spent += stats['tokens_spent']
+            elapsed += stats['elapsed']
+            self._stage_seconds['classify'] += stats['elapsed']
+            self._stats['classified_apps'] += stats['classified']
+            self._stats['deferred'] += stats['deferred']
+            if not classified_df.empty:
+                self._resolved_keys.update(
+                    (app, (title or '') if is_multi else '', int(is_multi))
+                    for app, title, is_multi in zip(
+                        classified_df['app'], classified_df['title'], classified_df['is_multipurpose_app']
+                    )
+                )
+            processed += len(keys)
+            self._report('classify', processed / received, f"已处理 {processed}/{received} 个待分类项")
+
+        if self._stats['deferred']:
+            logger.info(f"  本次同步预算已用完，{self._stats['deferred']} 项留给后台分类")
+
+    # ==================== 调度 ====================
+
+    def _guard(self, stage: str, target: Callable, args: tuple, output: Optional[queue.Queue]) -> None:
+        """运行阶段函数：出错时记录并通知其他阶段停止；正常结束时向下游发送结束标记"""
+        try:
+            target(*args)
+            if output is not None:
+                self._put(output, _DONE)
+        except _StageStopped:
+            pass
+        except BaseException as e:
+            logger.error(f"流水线同步阶段 {stage} 失败: {e}", exc_info=True)
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, target: queue.Queue, item) -> None:
+        """放入下游队列（队列满时等待）；其他阶段出错时停止"""
+        while True:
+            if self._stop.is_set():
+                raise _StageStopped()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue):
+        """从上游队列取出一项；其他阶段出错时停止"""
+        while True:
+            if self._stop.is_set():
+                raise _StageStopped()
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _report(self, stage: str, progress: float, message: str) -> None:
+        """
+        上报进度：阶段并行运行，只转发不早于已上报的最靠后阶段的进度，
+        使 SyncJob 的阶段状态保持单调；较早阶段的上报改为重发最近一次进度，
+        回调中的取消检查在每次上报时都会执行（抛出的异常由 _guard 处理为取消）
+        """
+        if self._progress_callback is None:
+            return
+        order = _STAGE_ORDER.index(stage)
+        with self._progress_lock:
+            if order < self._furthest_stage:
+                self._progress_callback(*self._last_report)
+                return
+            self._furthest_stage = order
+            self._last_report = (stage, progress, message)
+            self._progress_callback(stage, progress, message)
+
+    def _split_windows(self, start_time: datetime, end_time: datetime) -> List[Tuple[datetime, datetime]]:
+        window = max(self.window, (end_time - start_time) / MAX_WINDOWS)
+        windows = []
+        cursor = start_time
+        while cursor < end_time:
+            window_end = min(cursor + window, end_time)
+            windows.append((cursor, window_end))
+            cursor = window_end
+        return windows or [(start_time, end_time)]
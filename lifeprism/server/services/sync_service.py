@@ -5,8 +5,9 @@
 
 import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional, Callable
 from lifeprism.server.services.data_processing_service import DataProcessingService
+from lifeprism.server.services.backfill_service import BackfillService
 
 
 class SyncService:
@@ -18,16 +19,19 @@ class SyncService:
     
     def __init__(self):
         self.data_processor = DataProcessingService()
+        self.backfill_service = BackfillService(self.data_processor)
     
     def sync_from_activitywatch(
         self,
-        auto_classify: bool = True
+        auto_classify: bool = True,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
     ) -> Dict:
         """
         增量同步 ActivityWatch 数据（从数据库最新时间同步到现在）
         
         Args:
             auto_classify: 是否自动分类新应用
+            progress_callback: 阶段进度回调 (stage, progress, message)
             
         Returns:
             Dict: 同步结果
@@ -37,7 +41,8 @@ class SyncService:
         try:
             # 使用 DataProcessingService 处理增量同步
             result = self.data_processor.process_activitywatch_data(
-                auto_classify=auto_classify
+                auto_classify=auto_classify,
+                progress_callback=progress_callback
             )
             
             duration = time.time() - start_time
@@ -72,7 +77,8 @@ class SyncService:
         self,
         start_time: str,
         end_time: str,
-        auto_classify: bool = True
+        auto_classify: bool = True,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
     ) -> Dict:
         """
         按时间范围同步 ActivityWatch 数据
@@ -81,6 +87,7 @@ class SyncService:
             start_time: 开始时间，格式: YYYY-MM-DD HH:MM:SS
             end_time: 结束时间，格式: YYYY-MM-DD HH:MM:SS
             auto_classify: 是否自动分类新应用
+            progress_callback: 阶段进度回调 (stage, progress, message)
             
         Returns:
             Dict: 同步结果
@@ -96,7 +103,8 @@ class SyncService:
             result = self.data_processor.process_activitywatch_data_by_time_range(
                 start_time=start_dt,
                 end_time=end_dt,
-                auto_classify=auto_classify
+                auto_classify=auto_classify,
+                progress_callback=progress_callback
             )
             
             duration = time.time() - sync_start
@@ -126,3 +134,61 @@ class SyncService:
                 "duration": round(duration, 2),
                 "message": f"时间范围同步失败: {str(e)}"
             }
+    
+    def sync_backfill(
+        self,
+        backfill_id: str,
+        auto_classify: Optional[bool] = None,
+        max_in_flight: int = 1,
+        progress_callback: Optional[Callable[[str, float, str], None]] = None
+    ) -> Dict:
+        """
+        分段回填：按窗口处理回填任务中未完成的部分（已完成的窗口自动跳过）
+        
+        Args:
+            backfill_id: 回填任务 ID（由 BackfillService.plan 创建）
+            auto_classify: 是否自动分类新应用，None 时使用创建任务时的设置
+            max_in_flight: 同时处理的窗口数
+            progress_callback: 阶段进度回调 (stage, progress, message)
+            
+        Returns:
+            Dict: 同步结果
+        """
+        sync_start = time.time()
+        
+        try:
+            result = self.backfill_service.run(
+                backfill_id=backfill_id,
+                auto_classify=auto_classify,
+                max_in_flight=max_in_flight,
+                progress_callback=progress_callback
+            )
+            
+            duration = time.time() - sync_start
+            
+            return {
+                "status": "success",
+                "synced_events": result["saved_events"],
+                "new_apps_classified": result["classified_apps"],
+                "duration": round(duration, 2),
+                "message": f"回填完成（{result['completed_windows']}/{result['total_windows']} 个窗口）",
+                "details": {
+                    "sync_mode": "backfill",
+                    "backfill_id": backfill_id,
+                    "time_range": result["time_range"],
+                    "total_events": result["total_events"],
+                    "filtered_events": result["filtered_events"],
+                    "apps_to_classify": result["apps_to_classify"],
+                    "unclassified_events": result["unclassified_events"]
+                }
+            }
+            
+        except Exception as e:
+            duration = time.time() - sync_start
+            return {
+                "status": "failed",
+                "synced_events": 0,
+                "new_apps_classified": 0,
+                "duration": round(duration, 2),
+                "message": f"回填中断（可重新提交继续）: {str(e)}"
+            }
@@ -13,6 +13,9 @@ from lifeprism.config import WINDOW_BUCKET_ID, LOCAL_TIMEZONE
 
 logger = logging.getLogger(__name__)
 
+# 分页读取事件时每页的行数（按 (timestamp, id) 键集分页，不跳过任何事件）
+EVENT_PAGE_SIZE = 50000
+
 
 class AWBaseDataProvider:
     """
@@ -124,16 +127,16 @@ class AWBaseDataProvider:
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         hours: Optional[int] = None,
-        limit: int = 500000
+        limit: Optional[int] = None
     ) -> List[Dict]:
         """
-        获取窗口事件
+        获取窗口事件（按时间倒序）
         
         Args:
             start_time: 开始时间（本地时间）
             end_time: 结束时间（本地时间）
             hours: 获取最近 N 小时的数据
-            limit: 最大返回条数，默认 500,000
+            limit: 最大返回条数（保留最新的事件），None 表示返回时间范围内的全部事件
             
         Returns:
             List[Dict]: 窗口事件列表
@@ -190,9 +193,14 @@ class AWBaseDataProvider:
         bucket_key: str,
         start_time: str,
         end_time: str,
-        limit: int = 500000
+        limit: Optional[int] = None
     ) -> List[Dict]:
-        """获取指定存储桶的事件数据"""
+        """
+        获取指定存储桶的事件数据（按时间倒序）
+        
+        以 (timestamp, id) 为键集分页读取，每页 EVENT_PAGE_SIZE 行，
+        时间范围内的事件不会因单次查询的行数上限被截断
+        """
         with self.db.get_connection() as conn:
             cursor = conn.cursor()
             
@@ -205,29 +213,49 @@ class AWBaseDataProvider:
             
             bucket_id = bucket_row['key']
             
-            query = """
+            # +bucket_id：不走 bucket_id 索引，按 timestamp 索引倒序扫描，每页无需对整个存储桶排序
+            first_page_query = """
                 SELECT id, timestamp, duration, datastr
                 FROM eventmodel
-                WHERE bucket_id = ?
+                WHERE +bucket_id = ?
                 AND timestamp >= ?
                 AND timestamp < ?
-                ORDER BY timestamp DESC LIMIT ?
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+            """
+            next_page_query = """
+                SELECT id, timestamp, duration, datastr
+                FROM eventmodel
+                WHERE +bucket_id = ?
+                AND timestamp >= ?
+                AND timestamp <= ?
+                AND (timestamp < ? OR id < ?)
+                ORDER BY timestamp DESC, id DESC LIMIT ?
             """
-            params = [bucket_id, start_time, end_time, limit]
-            
-            cursor.execute(query, params)
             
             events = []
-            for row in cursor.fetchall():
-                timestamp_utc = self._parse_timestamp(row['timestamp'])
-                data = json.loads(row['datastr']) if row['datastr'] else {}
-                
-                event = {
-                    'id': row['id'],
-                    'timestamp': timestamp_utc.isoformat(),
-                    'duration': row['duration'],
-                    'data': data
-                }
-                events.append(event)
+            last_row = None
+            while limit is None or len(events) < limit:
+                page_size = EVENT_PAGE_SIZE if limit is None else min(EVENT_PAGE_SIZE, limit - len(events))
+                if last_row is None:
+                    cursor.execute(first_page_query, (bucket_id, start_time, end_time, page_size))
+                else:
+                    cursor.execute(next_page_query, (
+                        bucket_id, start_time, last_row['timestamp'], last_row['timestamp'], last_row['id'], page_size
+                    ))
+                rows = cursor.fetchall()
+                for row in rows:
+                    timestamp_utc = self._parse_timestamp(row['timestamp'])
+                    data = json.loads(row['datastr']) if row['datastr'] else {}
+                    
+                    event = {
+                        'id': row['id'],
+                        'timestamp': timestamp_utc.isoformat(),
+                        'duration': row['duration'],
+                        'data': data
+                    }
+                    events.append(event)
+                if len(rows) < page_size:
+                    break
+                last_row = rows[-1]
             
             return events
@@ -4,10 +4,14 @@ LifeWatch 基础数据提供者
 """
 import pandas as pd
 import logging
-from typing import Set, Optional, List, Dict
+from typing import Callable, Iterable, Set, Optional, List, Dict, Tuple
 
 logger = logging.getLogger(__name__)
 
+# 分类缓存表变更监听器: fn(single_apps, multi_pairs)
+# single_apps 为单用途 app 列表，multi_pairs 为多用途 (app, title) 列表
+_map_cache_listeners: List[Callable[[List[str], List[Tuple[str, str]]], None]] = []
+
 
 class LWBaseDataProvider:
     """
@@ -457,6 +461,135 @@ class LWBaseDataProvider:
         
         return (df if not df.empty else None, total)
     
+    # ==================== 分类缓存增量同步 ====================
+    
+    @staticmethod
+    def add_map_cache_listener(listener: Callable[[List[str], List[Tuple[str, str]]], None]) -> None:
+        """
+        注册分类缓存表变更监听器（进程内）
+        
+        写入 single_purpose_map_cache / multi_purpose_map_cache 的路径通过
+        notify_map_cache_changed 通知受影响的自然键，监听器据此增量刷新内存索引
+        """
+        if listener not in _map_cache_listeners:
+            _map_cache_listeners.append(listener)
+    
+    @staticmethod
+    def notify_map_cache_changed(
+        single_apps: Iterable[str] = (),
+        multi_pairs: Iterable[Tuple[str, str]] = ()
+    ) -> None:
+        """
+        通知分类缓存表中指定自然键的记录已变更
+        
+        Args:
+            single_apps: 变更的单用途 app
+            multi_pairs: 变更的多用途 (app, title)
+        """
+        single_apps = list(dict.fromkeys(a for a in single_apps if a))
+        multi_pairs = list(dict.fromkeys((a, t) for a, t in multi_pairs if a and t))
+        if not single_apps and not multi_pairs:
+            return
+        for listener in list(_map_cache_listeners):
+            try:
+                listener(single_apps, multi_pairs)
+            except Exception as e:
+                logger.error(f"分类缓存变更监听器执行失败: {e}")
+    
+    def get_map_cache_fingerprint(self) -> tuple:
+        """
+        获取分类缓存表的版本指纹（触发器维护的写入版本号，以及各表的行数、最大 rowid、最近更新时间）
+        
+        内存索引据此判断是否有未经通知的写入，需要整体重建
+        """
+        sql = """
+        SELECT COALESCE(MAX(version), 0), NULL, NULL FROM map_cache_version
+        UNION ALL
+        SELECT COUNT(*), MAX(rowid), MAX(updated_at) FROM multi_purpose_map_cache
+        UNION ALL
+        SELECT COUNT(*), MAX(rowid), MAX(updated_at) FROM single_purpose_map_cache
+        """
+        with self.db.get_connection() as conn:
+            return tuple(tuple(row) for row in conn.execute(sql).fetchall())
+    
+    def get_map_cache_keys(
+        self,
+        record_ids: Optional[List[str]] = None,
+        category_id: Optional[str] = None,
+        sub_category_id: Optional[str] = None
+    ) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """
+        查询分类缓存记录的自然键（不区分 state）
+        
+        Args:
+            record_ids: 按记录 ID（m-xxx / s-xxx）查询
+            category_id: 按主分类查询
+            sub_category_id: 按子分类查询
+        
+        Returns:
+            (单用途 app 列表, 多用途 (app, title) 列表)
+        """
+        conditions = []
+        params = []
+        if record_ids is not None:
+            if not record_ids:
+                return [], []
+            conditions.append(f"id IN ({', '.join('?' for _ in record_ids)})")
+            params.extend(record_ids)
+        if category_id is not None:
+            conditions.append("category_id = ?")
+            params.append(category_id)
+        if sub_category_id is not None:
+            conditions.append("sub_category_id = ?")
+            params.append(sub_category_id)
+        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        
+        with self.db.get_connection() as conn:
+            single_apps = [
+                row[0] for row in conn.execute(
+                    f"SELECT app FROM single_purpose_map_cache WHERE {where_clause}", params
+                ).fetchall()
+            ]
+            multi_pairs = [
+                (row[0], row[1]) for row in conn.execute(
+                    f"SELECT app, title FROM multi_purpose_map_cache WHERE {where_clause}", params
+                ).fetchall()
+            ]
+        return single_apps, multi_pairs
+    
+    def load_map_cache_rows_by_keys(
+        self,
+        single_apps: List[str],
+        multi_pairs: List[Tuple[str, str]],
+        chunk_size: int = 400
+    ) -> pd.DataFrame:
+        """
+        按自然键加载分类缓存记录（所有 state），列与 load_category_map_cache_V2 一致
+        
+        Args:
+            single_apps: 单用途 app 列表
+            multi_pairs: 多用途 (app, title) 列表
+            chunk_size: 每次查询的键数量（避免超出 SQLite 参数上限）
+        """
+        columns = "id, app, title, {is_multi} AS is_multipurpose_app, app_description, " \
+                  "category_id, sub_category_id, link_to_goal_id, state"
+        frames = []
+        with self.db.get_connection() as conn:
+            for i in range(0, len(single_apps), chunk_size):
+                chunk = single_apps[i:i + chunk_size]
+                sql = (f"SELECT {columns.format(is_multi=0)} FROM single_purpose_map_cache "
+                       f"WHERE app IN ({', '.join('?' for _ in chunk)}) ORDER BY rowid")
+                frames.append(pd.read_sql_query(sql, conn, params=chunk))
+            for i in range(0, len(multi_pairs), chunk_size):
+                chunk = multi_pairs[i:i + chunk_size]
+                values = ', '.join('(?, ?)' for _ in chunk)
+                params = [v for pair in chunk for v in pair]
+                sql = (f"SELECT {columns.format(is_multi=1)} FROM multi_purpose_map_cache "
+                       f"WHERE (app, title) IN (VALUES {values}) ORDER BY rowid")
+                frames.append(pd.read_sql_query(sql, conn, params=params))
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
     def save_category_map_cache_V2(self, cache_df: pd.DataFrame) -> int:
         """
         保存app分类缓存数据到 multi_purpose_map_cache 表 和 single_purpose_map_cache 表
@@ -522,6 +655,10 @@ class LWBaseDataProvider:
             if multi_purpose_data:
                 # 保存多用途，'app', 'title', 'state' 为冲突键
                 affected += self.db.upsert_many('multi_purpose_map_cache', multi_purpose_data, conflict_columns=['app', 'title', 'state'])
+            self.notify_map_cache_changed(
+                single_apps=[row['app'] for row in single_purpose_data],
+                multi_pairs=[(row['app'], row['title']) for row in multi_purpose_data]
+            )
             return affected
         except Exception as e:
             logger.error(f"保存AI元数据失败: {e}")
@@ -657,58 +794,326 @@ class LWBaseDataProvider:
                               order_by='start_time DESC')
             return df if not df.empty else None
     
-    def save_user_app_behavior_log(self, cleaned_events_df: pd.DataFrame) -> int:
+    # 行为日志中高重复度的字符串列，分析场景下使用 category dtype（字典编码）
+    BEHAVIOR_LOG_CATEGORY_COLUMNS = ('app', 'title', 'category_id', 'sub_category_id', 'link_to_goal_id')
+    
+    # 分析场景默认加载的列（不含 created_at 等无关列）
+    BEHAVIOR_LOG_ANALYTICS_COLUMNS = (
+        'start_time', 'end_time', 'duration', 'app', 'title',
+        'category_id', 'sub_category_id', 'link_to_goal_id',
+    )
+    
+    def load_user_app_behavior_log_typed(self,
+                                         start_time: str = None,
+                                         end_time: str = None,
+                                         columns: Optional[List[str]] = None,
+                                         app_filter: str = None) -> pd.DataFrame:
+        """
+        按类型加载行为日志（供统计分析使用）
+        
+        与 load_user_app_behavior_log 的时间过滤语义相同，但：
+        - 只查询 columns 指定的列（默认 BEHAVIOR_LOG_ANALYTICS_COLUMNS）
+        - app/title/分类 id/目标 id 转为 category dtype，缺失值为 NaN
+        - 含 start_time/end_time 时额外生成 start_dt/end_dt（datetime64）
+        
+        注意: category 列 groupby 时需传 observed=True，否则会输出未出现的分类
+        
+        Args:
+            start_time: 开始时间（可选），格式：'YYYY-MM-DD HH:MM:SS'
+            end_time: 结束时间（可选）
+            columns: 要加载的列（可选）
+            app_filter: 应用过滤（可选）
+        
+        Returns:
+            pd.DataFrame: 行为日志数据，无数据时返回带列名的空 DataFrame
+        """
+        columns = list(columns or self.BEHAVIOR_LOG_ANALYTICS_COLUMNS)
+        
+        conditions = []
+        if app_filter:
+            conditions.append(('app', '=', app_filter))
+        if start_time:
+            conditions.append(('start_time', '>=', start_time))
+        if end_time:
+            conditions.append(('end_time', '<=', end_time))
+        
+        df = self.db.query_advanced(
+            'user_app_behavior_log',
+            columns=columns,
+            conditions=conditions or None,
+            order_by='start_time DESC'
+        )
+        if df is None or df.empty:
+            return pd.DataFrame(columns=columns)
+        
+        for col in self.BEHAVIOR_LOG_CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        if 'start_time' in df.columns:
+            df['start_dt'] = pd.to_datetime(df['start_time'])
+        if 'end_time' in df.columns:
+            df['end_dt'] = pd.to_datetime(df['end_time'])
+        
+        return df
+    
+    # user_app_behavior_log 写入列顺序
+    BEHAVIOR_LOG_COLUMNS = (
+        'id', 'start_time', 'end_time', 'duration', 'app', 'title',
+        'is_multipurpose_app', 'category_id', 'sub_category_id', 'link_to_goal_id',
+    )
+
+    def save_user_app_behavior_log(self, cleaned_events_df) -> int:
         """
         保存行为日志数据（INSERT OR IGNORE）
         
         Args:
-            cleaned_events_df: 清洗后的事件数据 DataFrame
+            cleaned_events_df: 清洗后的事件数据 DataFrame，
+                或列式 EventBatch（直接按列写库，不经过 DataFrame）
         
         Returns:
             int: 实际插入的行数
         """
         try:
-            data_list = []
-            for _, row in cleaned_events_df.iterrows():
-                event_id = row.get('id', f"event_{row.get('start_time', '')}_{row.get('app', 'unknown')}")
-                
-                data_list.append({
-                    'id': event_id,
-                    'start_time': row['start_time'],
-                    'end_time': row['end_time'],
-                    'duration': row.get('duration'),
-                    'app': row['app'],
-                    'title': row.get('title'),
-                    'is_multipurpose_app': int(row.get('is_multipurpose_app', False)),
-                    'category_id': row.get('category_id'),
-                    'sub_category_id': row.get('sub_category_id'),
-                    'link_to_goal_id': row.get('link_to_goal_id')
-                })
+            if hasattr(cleaned_events_df, 'iter_records'):
+                values_list = list(cleaned_events_df.iter_records())
+            else:
+                values_list = self._behavior_log_records_from_df(cleaned_events_df)
             
-            if not data_list:
+            if not values_list:
                 return 0
             
-            columns = list(data_list[0].keys())
-            columns_str = ', '.join(columns)
-            placeholders = ', '.join(['?' for _ in columns])
+            columns_str = ', '.join(self.BEHAVIOR_LOG_COLUMNS)
+            placeholders = ', '.join(['?' for _ in self.BEHAVIOR_LOG_COLUMNS])
             sql = f"INSERT OR IGNORE INTO user_app_behavior_log ({columns_str}) VALUES ({placeholders})"
             
-            values_list = [
-                [row.get(col) for col in columns]
-                for row in data_list
-            ]
-            
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.executemany(sql, values_list)
                 affected = cursor.rowcount
-                logger.info(f"成功保存 {affected} 行清洗数据到数据库（共尝试 {len(data_list)} 行）")
+                logger.info(f"成功保存 {affected} 行清洗数据到数据库（共尝试 {len(values_list)} 行）")
                 return affected
                 
         except Exception as e:
             logger.error(f"保存清洗数据失败: {e}")
             raise
 
+    def _behavior_log_records_from_df(self, df: pd.DataFrame) -> List[tuple]:
+        """
+        按列将 DataFrame 转为写库参数（替代 iterrows，NaN 转为 None）
+        """
+        if df is None or df.empty:
+            return []
+        
+        def column(name, default=None):
+            if name not in df.columns:
+                return [default] * len(df)
+            series = df[name].astype(object)
+            return series.where(series.notna(), None).tolist()
+        
+        start_times = column('start_time')
+        apps = column('app')
+        ids = [
+            event_id if event_id is not None else f"event_{start or ''}_{app or 'unknown'}"
+            for event_id, start, app in zip(column('id'), start_times, apps)
+        ]
+        durations = [int(d) if d is not None else None for d in column('duration')]
+        is_multipurpose = [int(v) if v is not None else 0 for v in column('is_multipurpose_app', 0)]
+        
+        return list(zip(
+            ids, start_times, column('end_time'), durations, apps, column('title'),
+            is_multipurpose, column('category_id'), column('sub_category_id'), column('link_to_goal_id'),
+        ))
+
+    def backfill_behavior_log_categories(self, classified_df: pd.DataFrame) -> int:
+        """
+        将分类结果回填到已保存但尚未分类的行为日志（category_id IS NULL）
+
+        单用途应用按 app 匹配，多用途应用按 (app, title) 匹配
+
+        Args:
+            classified_df: 分类结果，需包含 app / title / is_multipurpose_app /
+                category_id / sub_category_id / link_to_goal_id，category_id 为空的行被忽略
+
+        Returns:
+            int: 更新的行数
+        """
+        if classified_df is None or classified_df.empty:
+            return 0
+
+        df = classified_df[classified_df['category_id'].notna()]
+        if df.empty:
+            return 0
+
+        def column(name):
+            if name not in df.columns:
+                return [None] * len(df)
+            series = df[name].astype(object)
+            return series.where(series.notna(), None).tolist()
+
+        single_values, multi_values = [], []
+        for app, title, is_multi, category_id, sub_category_id, goal_id in zip(
+            column('app'), column('title'), column('is_multipurpose_app'),
+            column('category_id'), column('sub_category_id'), column('link_to_goal_id')
+        ):
+            if is_multi:
+                multi_values.append((category_id, sub_category_id, goal_id, app, title))
+            else:
+                single_values.append((category_id, sub_category_id, goal_id, app))
+
+        updated = 0
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            if single_values:
+                cursor.executemany("""
+                    UPDATE user_app_behavior_log
+                    SET category_id = ?, sub_category_id = ?, link_to_goal_id = ?
+                    WHERE category_id IS NULL AND app = ? AND is_multipurpose_app = 0
+                """, single_values)
+                updated += cursor.rowcount
+            if multi_values:
+                cursor.executemany("""
+                    UPDATE user_app_behavior_log
+                    SET category_id = ?, sub_category_id = ?, link_to_goal_id = ?
+                    WHERE category_id IS NULL AND app = ? AND title = ? AND is_multipurpose_app = 1
+                """, multi_values)
+                updated += cursor.rowcount
+        if updated:
+            logger.info(f"回填了 {updated} 条未分类行为日志的分类")
+        return updated
+
+    @staticmethod
+    def normalize_app_key(app: str) -> str:
+        """应用描述表的键：去除首尾空白并转小写"""
+        return (app or "").strip().lower()
+
+    def load_app_descriptions(self, apps: Optional[Iterable[str]] = None, chunk_size: int = 400) -> Dict[str, str]:
+        """
+        查询应用描述
+
+        Args:
+            apps: 应用名列表（任意大小写），None 表示全部
+            chunk_size: 每次查询的键数量（避免超出 SQLite 参数上限）
+
+        Returns:
+            Dict[str, str]: 传入 apps 时为 原始应用名 -> 描述（仅包含有描述的应用），
+                否则为 表中记录的应用名 -> 描述
+        """
+        with self.db.get_connection() as conn:
+            if apps is None:
+                rows = conn.execute("SELECT app, description FROM app_description").fetchall()
+                return {app: description for app, description in rows}
+
+            keys_to_apps: Dict[str, List[str]] = {}
+            for app in apps:
+                keys_to_apps.setdefault(self.normalize_app_key(app), []).append(app)
+            keys = [key for key in keys_to_apps if key]
+            result = {}
+            for i in range(0, len(keys), chunk_size):
+                chunk = keys[i:i + chunk_size]
+                rows = conn.execute(
+                    f"SELECT app_key, description FROM app_description "
+                    f"WHERE app_key IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ).fetchall()
+                for app_key, description in rows:
+                    for app in keys_to_apps[app_key]:
+                        result[app] = description
+        return result
+
+    def save_app_descriptions(self, descriptions: Dict[str, str], source: str = 'llm') -> int:
+        """
+        保存应用描述（按归一化应用名 upsert，空描述被忽略）
+
+        Args:
+            descriptions: 应用名 -> 描述
+            source: 描述来源
+
+        Returns:
+            int: 写入的记录数
+        """
+        values = [
+            (self.normalize_app_key(app), app, description.strip(), source)
+            for app, description in descriptions.items()
+            if self.normalize_app_key(app) and description and description.strip()
+        ]
+        if not values:
+            return 0
+        with self.db.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO app_description (app_key, app, description, source)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (app_key) DO UPDATE SET
+                    description = excluded.description,
+                    source = excluded.source,
+                    updated_at = datetime('now', 'localtime')
+            """, values)
+        logger.debug(f"保存了 {len(values)} 条应用描述")
+        return len(values)
+
+    @staticmethod
+    def normalize_title_key(title: str) -> str:
+        """标题分析表的键：去除首尾空白、合并连续空白并转小写"""
+        return " ".join((title or "").split()).lower()
+
+    def load_title_analyses(self, titles: Iterable[str], chunk_size: int = 400) -> Dict[str, str]:
+        """
+        按归一化标题查询已保存的标题分析
+
+        Args:
+            titles: 原始标题列表
+            chunk_size: 每次查询的键数量（避免超出 SQLite 参数上限）
+
+        Returns:
+            Dict[str, str]: 原始标题 -> 分析（仅包含已有分析的标题）
+        """
+        keys_to_titles: Dict[str, List[str]] = {}
+        for title in titles:
+            keys_to_titles.setdefault(self.normalize_title_key(title), []).append(title)
+        keys = [key for key in keys_to_titles if key]
+        result = {}
+        with self.db.get_connection() as conn:
+            for i in range(0, len(keys), chunk_size):
+                chunk = keys[i:i + chunk_size]
+                rows = conn.execute(
+                    f"SELECT title_key, analysis FROM title_analysis "
+                    f"WHERE title_key IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ).fetchall()
+                for title_key, analysis in rows:
+                    for title in keys_to_titles[title_key]:
+                        result[title] = analysis
+        return result
+
+    def save_title_analyses(self, analyses: Dict[str, str], source: str = 'llm') -> int:
+        """
+        保存标题分析（按归一化标题 upsert，空分析被忽略）
+
+        Args:
+            analyses: 原始标题 -> 分析
+            source: 分析来源
+
+        Returns:
+            int: 写入的记录数
+        """
+        values = [
+            (self.normalize_title_key(title), title, analysis.strip(), source)
+            for title, analysis in analyses.items()
+            if self.normalize_title_key(title) and analysis and analysis.strip()
+        ]
+        if not values:
+            return 0
+        with self.db.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO title_analysis (title_key, title, analysis, source)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (title_key) DO UPDATE SET
+                    analysis = excluded.analysis,
+                    source = excluded.source,
+                    updated_at = datetime('now', 'localtime')
+            """, values)
+        logger.debug(f"保存了 {len(values)} 条标题分析")
+        return len(values)
+
     def save_tokens_usage(self, tokens_usage_data: List[Dict]) -> int:
         """
         保存 token 使用数据到 tokens_usage_log 表
@@ -834,6 +1239,38 @@ class LWBaseDataProvider:
         except Exception as e:
             logger.error(f"保存会话 {session_id} 的 token 使用数据失败: {e}")
             raise
+    
+    def add_session_tokens_usage(self, session_id: str, usage_data: Dict) -> None:
+        """
+        将 token 使用量累加到 session_id 对应的记录（不存在则插入）
+        
+        单条 INSERT ... ON CONFLICT DO UPDATE 完成累加，并发调用方不会互相覆盖
+        
+        Args:
+            session_id: 会话ID
+            usage_data: 本次增量，字段同 upsert_session_tokens_usage
+        """
+        sql = """
+        INSERT INTO tokens_usage_log
+            (session_id, input_tokens, output_tokens, total_tokens, search_count, result_items_count, mode)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (session_id) DO UPDATE SET
+            input_tokens = input_tokens + excluded.input_tokens,
+            output_tokens = output_tokens + excluded.output_tokens,
+            total_tokens = total_tokens + excluded.total_tokens,
+            search_count = search_count + excluded.search_count,
+            result_items_count = result_items_count + excluded.result_items_count
+        """
+        with self.db.get_connection() as conn:
+            conn.execute(sql, (
+                session_id,
+                usage_data.get('input_tokens', 0),
+                usage_data.get('output_tokens', 0),
+                usage_data.get('total_tokens', 0),
+                usage_data.get('search_count', 0),
+                usage_data.get('result_items_count', 0),
+                usage_data.get('mode', 'chatbot'),
+            ))
 
 
 if __name__ == "__main__":
@@ -62,6 +62,7 @@ class LWTableManager:
         indexes = config.get('indexes', [])
         timestamps = config.get('timestamps', False)
         update_at = config.get('update_at', False)
+        triggers = config.get('triggers', [])
         # 1. 构建列定义
         column_definitions = []
         for col_name, col_config in columns.items():
@@ -108,6 +109,19 @@ class LWTableManager:
             """
             cursor.execute(create_index_sql)
             logger.debug(f"索引 '{index_name}' 创建成功")
+        
+        # 6. 创建触发器
+        for trigger in triggers:
+            trigger_name = trigger['name']
+            create_trigger_sql = f"""
+            CREATE TRIGGER IF NOT EXISTS {trigger_name}
+            {trigger['event']} ON {table_name}
+            BEGIN
+                {trigger['body']};
+            END;
+            """
+            cursor.execute(create_trigger_sql)
+            logger.debug(f"触发器 '{trigger_name}' 创建成功")
     
 
 # ==================== 便捷函数 ====================